@@ -0,0 +1,346 @@
+import { CommandResult } from "./utils.js";
+import { encodeStateForClient } from "./node_utils/state_diff.js";
+import { stateETag } from "./node_utils/state_version.js";
+
+const ATTRACTION_TYPES = ["ride", "shop", "staff"];
+
+// Batches run at most one day, set by their proceed flag, so they cannot contain wait actions
+export const WAIT_IN_BATCH_MESSAGE = "wait cannot be applied in an action batch, use proceed to advance the park by a day";
+
+/**
+ * Apply an already parsed action to a park.
+ *
+ * Mirrors the routing that the Python client performs against the individual
+ * ride/shop/staff/park endpoints so that the same action can be applied without
+ * an HTTP request per action.
+ *
+ * @param {Park} park - The park to apply the action to
+ * @param {string} actionName - Name of the action (e.g. "place", "move", "wait")
+ * @param {Object} actionArgs - Keyword arguments of the action
+ * @returns {CommandResult} Result of the action
+ */
+export function applyAction(park, actionName, actionArgs = {}) {
+    const {type, subtype, subclass, x, y, new_x, new_y, price, order_quantity} = actionArgs;
+    park.resolveDeferredState();
+
+    if (["place", "move", "modify", "remove"].includes(actionName) && !ATTRACTION_TYPES.includes(type)) {
+        return new CommandResult(false, `Object to ${actionName} must be ride, shop, or staff, got ${type}`);
+    }
+
+    switch (actionName) {
+        case "place":
+            if (type === "ride") {
+                return park.addRide(x, y, subtype, subclass, price);
+            } else if (type === "shop") {
+                return park.addShop(x, y, subtype, subclass, price, order_quantity);
+            }
+            return park.hireStaff(x, y, subtype, subclass);
+        case "move":
+        case "modify":
+            if (type === "staff") {
+                return park.moveStaff(subtype, subclass, x, y, new_x, new_y);
+            } else if (price !== undefined) {
+                // Quantity is null for a ride
+                return park.modifyAttraction(type, subtype, subclass, x, y, price, type === "ride" ? null : order_quantity);
+            } else if (new_x !== undefined && new_y !== undefined) {
+                return park.moveAttraction(type, subtype, subclass, x, y, new_x, new_y);
+            }
+            return new CommandResult(false, "Invalid request");
+        case "remove":
+            if (type === "staff") {
+                return park.fireStaff(subtype, subclass, x, y);
+            }
+            return park.sellAttraction(type, subtype, subclass, x, y);
+        case "survey_guests":
+            return park.setNumGuestsToSurvey(actionArgs.num_guests);
+        case "set_research":
+            return park.setResearch(actionArgs.research_speed, actionArgs.research_topics);
+        case "add_path":
+            return park.addPathTile(x, y);
+        case "remove_path":
+            return park.removePathTile(x, y);
+        case "add_water":
+            return park.addWaterTile(x, y);
+        case "remove_water":
+            return park.removeWaterTile(x, y);
+        case "wait":
+            if (actionArgs.days !== undefined && !(Number.isInteger(actionArgs.days) && actionArgs.days >= 1)) {
+                return new CommandResult(false, `Number of days to wait must be a positive integer, got ${actionArgs.days}`);
+            }
+            return park.noop();
+        default:
+            return new CommandResult(false, `Invalid action: ${actionName}`);
+    }
+}
+
+/**
+ * Advance the park by one day, or by several days for wait(days=n).
+ *
+ * Days after the first are run with a noop action. Stops early once the episode is over or the
+ * park fails to proceed.
+ *
+ * @param {Park} park - The park to advance
+ * @param {number} days - Number of days to run
+ * @param {Object} proceedArgs - Arguments passed to park.proceed
+ * @returns {Object} The reward of each day that was run, whether the episode ended and the error of the
+ *     park failing to proceed, if any
+ */
+function proceedDays(park, days, proceedArgs) {
+    const result = {rewards: [], terminated: false, truncated: false, proceed_error: null};
+    for (let day = 0; day < days; day++) {
+        if (day > 0) {
+            park.noop();
+        }
+        try {
+            const done = park.proceed(proceedArgs);
+            result.rewards.push(done.reward);
+            result.terminated = done.terminated;
+            result.truncated = done.truncated;
+        } catch (error) {
+            result.proceed_error = error.message;
+        }
+        if (result.terminated || result.truncated || result.proceed_error !== null) {
+            break;
+        }
+    }
+    return result;
+}
+
+/**
+ * Number of days a valid action advances the park.
+ *
+ * @param {string|null} actionName - Parsed action name
+ * @param {Object} actionArgs - Parsed action arguments
+ * @param {CommandResult} actionResult - Result of applying the action
+ * @returns {number} days for a valid wait(days=n), otherwise 1
+ */
+function actionDays(actionName, actionArgs, actionResult) {
+    return actionName === "wait" && actionResult.success && actionArgs.days !== undefined ? actionArgs.days : 1;
+}
+
+/**
+ * Apply an action, advance the park by a day and collect the resulting state.
+ *
+ * The day is only advanced if the action was valid or noopOnInvalidAction is set,
+ * matching the behaviour of MiniAmusementPark.step on the Python side. wait(days=n) advances the park by
+ * up to n days, the reward is summed over the days and the reward of each day is returned in daily_rewards.
+ *
+ * @param {Object} params
+ * @param {Park} params.park - The park to step
+ * @param {string} params.parkId - Id of the park, attached to the returned state
+ * @param {string|null} params.actionName - Parsed action name. If null, no action is applied
+ * @param {Object} params.actionArgs - Parsed action arguments
+ * @param {boolean} params.noopOnInvalidAction - Proceed even if the action was invalid
+ * @param {boolean} params.includeGuests - Include the guest list in the returned state
+ * @param {string} params.clientId - Optional client id. If given, the state is encoded with encodeStateForClient
+ * @param {number} params.baseVersion - Version of the state held by the client
+ * @param {Object} params.io - socket.io server used for visualization
+ * @param {Function} params.visUpdateFn - Optional visualization update function
+ * @returns {Object} The action result, reward, terminated, truncated, full state (or state delta) and the
+ *     ETag of the state, which GET park/ honours in If-None-Match
+ */
+export function stepPark({park, parkId, actionName, actionArgs, noopOnInvalidAction = true, includeGuests = false, clientId, baseVersion, io, visUpdateFn}) {
+    let actionResult = new CommandResult(false, "No action provided");
+    if (actionName !== undefined && actionName !== null) {
+        actionResult = applyAction(park, actionName, actionArgs);
+        emitAction(park, io, actionName, actionArgs);
+    }
+
+    const result = {
+        action: {success: actionResult.success, message: actionResult.message},
+        proceeded: false,
+        proceed_error: null,
+        reward: 0,
+        terminated: false,
+        truncated: false,
+    };
+
+    if (actionResult.success || noopOnInvalidAction) {
+        const days = proceedDays(park, actionDays(actionName, actionArgs, actionResult), {visUpdateFn, parkId, io});
+        result.proceeded = days.rewards.length > 0;
+        result.proceed_error = days.proceed_error;
+        result.reward = days.rewards.reduce((a, b) => a + b, 0);
+        result.terminated = days.terminated;
+        result.truncated = days.truncated;
+        if (actionName === "wait") {
+            result.daily_rewards = days.rewards;
+        }
+    }
+
+    attachState(result, park, parkId, {includeGuests, clientId, baseVersion});
+    return result;
+}
+
+/**
+ * Apply a list of actions to a park within one day, optionally advancing the park by a day afterwards.
+ *
+ * Best effort by default: every action is applied in order and failed actions are skipped. If atomic is
+ * set, the actions are first tried on a fork of the park and only applied to the park if all of them
+ * succeed, otherwise the park is left unchanged and the day is not advanced. wait actions fail, since the
+ * park is advanced by at most one day, after all actions, and only if proceed is set.
+ *
+ * @param {Object} params
+ * @param {Park} params.park - The park to apply the actions to
+ * @param {string} params.parkId - Id of the park, attached to the returned state
+ * @param {Object[]} params.actions - Parsed actions as {action_name, action_args}. A null action_name is an invalid action
+ * @param {boolean} params.atomic - Apply either all actions or none of them
+ * @param {boolean} params.proceed - Advance the park by a day after the actions
+ * @param {boolean} params.includeGuests - Include the guest list in the returned state
+ * @param {string} params.clientId - Optional client id. If given, the state is encoded with encodeStateForClient
+ * @param {number} params.baseVersion - Version of the state held by the client
+ * @param {Object} params.io - socket.io server used for visualization
+ * @param {Function} params.visUpdateFn - Optional visualization update function
+ * @returns {Object} The result of each action, whether the actions were applied, a summary of the results in the
+ *     format of stepPark's action, the outcome of the day if it was advanced, the full state (or state delta) and its ETag
+ */
+export function actBatch({park, parkId, actions, atomic = false, proceed = false, includeGuests = false, clientId, baseVersion, io, visUpdateFn}) {
+    const applyAll = (target, stopOnFailure) => {
+        const results = [];
+        for (const {action_name = null, action_args = {}} of actions) {
+            if (stopOnFailure && results.some(result => !result.success)) {
+                results.push({success: false, message: "Not applied, an earlier action failed"});
+                continue;
+            }
+            let actionResult;
+            if (action_name === null) {
+                actionResult = new CommandResult(false, "No action provided");
+            } else if (action_name === "wait") {
+                actionResult = new CommandResult(false, WAIT_IN_BATCH_MESSAGE);
+            } else {
+                actionResult = applyAction(target, action_name, action_args);
+            }
+            results.push({success: actionResult.success, message: actionResult.message});
+        }
+        return results;
+    };
+
+    // The fork keeps the RNG state, so the actions succeed on the park exactly when they succeed on the fork
+    let results = atomic ? applyAll(park.fork(parkId), true) : null;
+    const applied = !atomic || results.every(result => result.success);
+    if (applied) {
+        results = applyAll(park, false);
+        for (const {action_name = null, action_args = {}} of actions) {
+            if (action_name !== null) {
+                emitAction(park, io, action_name, action_args);
+            }
+        }
+    }
+
+    const failed = results.find(result => !result.success);
+    const result = {
+        results,
+        applied,
+        action: failed ? failed : {success: true, message: `Applied ${results.length} actions`},
+        proceeded: false,
+        proceed_error: null,
+        reward: 0,
+        terminated: false,
+        truncated: false,
+    };
+
+    if (applied && proceed) {
+        const days = proceedDays(park, 1, {visUpdateFn, parkId, io});
+        result.proceeded = days.rewards.length > 0;
+        result.proceed_error = days.proceed_error;
+        result.reward = days.rewards.reduce((a, b) => a + b, 0);
+        result.terminated = days.terminated;
+        result.truncated = days.truncated;
+    }
+
+    attachState(result, park, parkId, {includeGuests, clientId, baseVersion});
+    return result;
+}
+
+/**
+ * Let connected visualizers know an action was applied.
+ */
+function emitAction(park, io, actionName, actionArgs) {
+    if (io && io.sockets.sockets.size > 0 && !park.training_mode) {
+        io.emit("action", {
+            "name": actionName,
+            "params": actionArgs
+        });
+    }
+}
+
+/**
+ * Add the full state of a park, or the delta for a client, and the ETag of the state to a result.
+ */
+function attachState(result, park, parkId, {includeGuests, clientId, baseVersion}) {
+    const state = park.getFullState({includeGuests});
+    state['state']['parkId'] = parkId;
+    result.etag = stateETag(state);
+    if (clientId !== undefined && clientId !== null) {
+        Object.assign(result, encodeStateForClient(park, clientId, baseVersion, state));
+    } else {
+        result.state = state;
+    }
+}
+
+/**
+ * Apply a sequence of actions, advancing the park by a day after each one, and collect the rewards.
+ *
+ * Intermediate states are not returned. The rollout stops early once the episode is over or the
+ * park fails to proceed. The reward of a wait(days=n) action is summed over the days it ran.
+ *
+ * @param {Object} params
+ * @param {Park} params.park - The park to roll out
+ * @param {string} params.parkId - Id of the park, attached to the returned state
+ * @param {Object[]} params.steps - Parsed actions as {action_name, action_args}. A null action_name is an invalid action
+ * @param {boolean} params.noopOnInvalidAction - Proceed even if an action was invalid
+ * @param {boolean} params.restore - Roll out a fork of the park so the park itself is left unchanged
+ * @param {boolean} params.returnState - Include the full state at the end of the rollout
+ * @param {boolean} params.includeGuests - Include the guest list in the returned state
+ * @param {Object} params.io - socket.io server used for visualization, unused if restore is set
+ * @param {Function} params.visUpdateFn - Optional visualization update function, unused if restore is set
+ * @returns {Object} Per-day rewards, action validity flags and messages, whether the episode ended, the
+ *     park value at the end, and the final state if requested
+ */
+export function rolloutPark({park, parkId, steps, noopOnInvalidAction = true, restore = true, returnState = false, includeGuests = false, io, visUpdateFn}) {
+    if (restore) {
+        // The fork keeps the RNG state, so the rollout matches what stepping the park would do
+        park = park.fork(parkId);
+        io = undefined;
+        visUpdateFn = undefined;
+    }
+
+    const result = {
+        rewards: [],
+        valid: [],
+        messages: [],
+        terminated: false,
+        truncated: false,
+        proceed_error: null,
+    };
+
+    for (const {action_name = null, action_args = {}} of steps) {
+        let actionResult = new CommandResult(false, "No action provided");
+        if (action_name !== null) {
+            actionResult = applyAction(park, action_name, action_args);
+        }
+        result.valid.push(actionResult.success);
+        result.messages.push(actionResult.message);
+
+        let reward = 0;
+        if (actionResult.success || noopOnInvalidAction) {
+            const days = proceedDays(park, actionDays(action_name, action_args, actionResult), {visUpdateFn, parkId, io});
+            reward = days.rewards.reduce((a, b) => a + b, 0);
+            result.terminated = days.terminated;
+            result.truncated = days.truncated;
+            result.proceed_error = days.proceed_error;
+        }
+        result.rewards.push(reward);
+
+        if (result.terminated || result.truncated || result.proceed_error !== null) {
+            break;
+        }
+    }
+
+    result.value = park.value;
+    if (returnState) {
+        const state = park.getFullState({includeGuests});
+        state['state']['parkId'] = parkId;
+        result.state = state;
+    }
+    return result;
+}
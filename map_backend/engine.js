@@ -0,0 +1,117 @@
+/**
+ * Park engine for clients running on the same machine.
+ *
+ * Serves the v1 API without binding a network port. Requests and responses are the RPC
+ * messages of rpc.js, encoded as UTF-8 JSON and prefixed with their length as a 4 byte
+ * big-endian unsigned integer.
+ *
+ * Usage:
+ *   node map_backend/engine.js --stdio                 Serve a single client over stdin/stdout
+ *   node map_backend/engine.js --socket <path>         Serve any number of clients over a Unix socket
+ *   node map_backend/engine.js --socket <path> --exit-with-parent
+ *                                                      Also exit once stdin is closed by the parent process
+ *
+ * Parks are evicted from memory like parks of server.js, configured by the same options.
+ */
+import fs from "fs";
+import net from "net";
+import { createV1Router } from "./routes/index.js";
+import { createRpcDispatcher } from "./rpc.js";
+import { ParkEvictionPolicy, evictionOptionsFromArgs } from "./node_utils/park_eviction.js";
+
+// Visualization clients cannot connect to the engine, so actions are never broadcast
+const headlessIo = {
+    sockets: { sockets: new Map() },
+    emit: () => {},
+};
+
+const parks = {};
+const eviction = new ParkEvictionPolicy(parks, evictionOptionsFromArgs(process.argv, process.env));
+const dispatchRpc = createRpcDispatcher(createV1Router({ parks, io: headlessIo, eviction }));
+
+const writeMessage = (output, message) => {
+    const payload = Buffer.from(JSON.stringify(message), "utf8");
+    const header = Buffer.alloc(4);
+    header.writeUInt32BE(payload.length, 0);
+    output.write(Buffer.concat([header, payload]));
+};
+
+/**
+ * Read length-prefixed requests from input and write their responses to output in request order.
+ *
+ * @param {stream.Readable} input - Stream the requests are read from
+ * @param {stream.Writable} output - Stream the responses are written to
+ */
+const serveStream = (input, output) => {
+    let chunks = [];
+    let bufferedLength = 0;
+    let pending = Promise.resolve();
+
+    input.on("data", (chunk) => {
+        chunks.push(chunk);
+        bufferedLength += chunk.length;
+        if (bufferedLength < 4) {
+            return;
+        }
+
+        let buffer = chunks.length === 1 ? chunks[0] : Buffer.concat(chunks, bufferedLength);
+        let offset = 0;
+        while (buffer.length - offset >= 4) {
+            const length = buffer.readUInt32BE(offset);
+            if (buffer.length - offset - 4 < length) {
+                break;
+            }
+            const payload = buffer.subarray(offset + 4, offset + 4 + length).toString("utf8");
+            offset += 4 + length;
+
+            pending = pending.then(async () => {
+                let request;
+                try {
+                    request = JSON.parse(payload);
+                } catch (error) {
+                    writeMessage(output, { id: null, status: 400, body: { data: {}, message: `Invalid request: ${error.message}` } });
+                    return;
+                }
+                writeMessage(output, await dispatchRpc(request));
+            });
+        }
+
+        const remaining = buffer.subarray(offset);
+        chunks = remaining.length > 0 ? [remaining] : [];
+        bufferedLength = remaining.length;
+    });
+};
+
+const argIndex = (flag) => process.argv.indexOf(flag);
+
+if (argIndex("--stdio") !== -1) {
+    // stdout carries the protocol, so all logging goes to stderr
+    console.log = console.error;
+    serveStream(process.stdin, process.stdout);
+    process.stdin.on("end", () => process.exit());
+} else if (argIndex("--socket") !== -1 && process.argv[argIndex("--socket") + 1] !== undefined) {
+    const socketPath = process.argv[argIndex("--socket") + 1];
+    if (fs.existsSync(socketPath)) {
+        fs.unlinkSync(socketPath);
+    }
+    const server = net.createServer((socket) => serveStream(socket, socket));
+    server.listen(socketPath, () => console.log(`Park engine listening on ${socketPath}`));
+    process.on("exit", () => {
+        try {
+            fs.unlinkSync(socketPath);
+        } catch (error) {
+            // Socket file was already removed
+        }
+    });
+    if (argIndex("--exit-with-parent") !== -1) {
+        process.stdin.on("end", () => process.exit());
+        process.stdin.resume();
+    }
+} else {
+    console.error("Usage: node map_backend/engine.js --stdio | --socket <path> [--exit-with-parent]");
+    process.exit(1);
+}
+
+for (const signal of ["SIGINT", "SIGTERM", "SIGHUP", "SIGQUIT"]) {
+    process.on(signal, () => process.exit());
+}
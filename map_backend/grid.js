@@ -552,8 +552,8 @@ class Grid {
             this.routing_table = global_routing_table_cache.get(paths);
             this.distance_table = global_distance_table_cache.get(paths);
             if (difficulty == "hard"){
-                let articulation_key = JSON.stringify({"paths": this.getAllEntrancePathAndExitTile().map(path => [path.x, path.y])})
-                this.articulation_paths = global_articulation_path_cache.get(articulation_key)
+                // The articulation paths are cached separately and may have been dropped from their cache
+                this.computeArticulationPaths();
             }
             return;
         }
@@ -0,0 +1,226 @@
+/**
+ * In-process deep copies and serialization of object graphs such as a Park.
+ *
+ * Unlike JSON or structuredClone, class instances keep their prototype, objects that are
+ * referenced from several places (a ride is referenced by the grid, park.rides and guests)
+ * are copied once, and cycles (guest.park) point into the copy.
+ */
+
+/**
+ * Deep-copy an object graph.
+ *
+ * @param {*} root - The value to copy
+ * @param {Object} options
+ * @param {Set} options.shared - Objects that are immutable and referenced by the copy instead of copied
+ * @param {Map} options.factories - Prototype -> function creating an empty instance, for classes with
+ *   private members, which Object.create cannot produce
+ * @returns {*} The copy
+ */
+export const cloneGraph = (root, {shared = new Set(), factories = new Map()} = {}) => {
+    const copies = new Map();
+
+    const copy = (value) => {
+        if (value === null || typeof value !== "object" || shared.has(value)) {
+            return value;
+        }
+        let result = copies.get(value);
+        if (result !== undefined) {
+            return result;
+        }
+
+        if (Array.isArray(value)) {
+            result = new Array(value.length);
+            copies.set(value, result);
+            for (let i = 0; i < value.length; i++) {
+                result[i] = copy(value[i]);
+            }
+        } else if (value instanceof Map) {
+            result = new Map();
+            copies.set(value, result);
+            for (const [key, item] of value) {
+                result.set(copy(key), copy(item));
+            }
+        } else if (value instanceof Set) {
+            result = new Set();
+            copies.set(value, result);
+            for (const item of value) {
+                result.add(copy(item));
+            }
+        } else if (value instanceof Date) {
+            result = new Date(value.getTime());
+            copies.set(value, result);
+        } else if (ArrayBuffer.isView(value) && !(value instanceof DataView)) {
+            result = value.slice();
+            copies.set(value, result);
+        } else {
+            const prototype = Object.getPrototypeOf(value);
+            const factory = factories.get(prototype);
+            result = factory !== undefined ? factory() : Object.create(prototype);
+            copies.set(value, result);
+            for (const key of Object.keys(value)) {
+                result[key] = copy(value[key]);
+            }
+        }
+        return result;
+    };
+
+    return copy(root);
+};
+
+/**
+ * Serialize an object graph to data that JSON can represent, keeping prototypes, objects referenced
+ * from several places and cycles like cloneGraph does.
+ *
+ * Prototypes, functions and shared objects are not part of the data. They are returned as references,
+ * which deserializeGraph needs to read the data back, so the data can only be read by the thread
+ * that wrote it.
+ *
+ * @param {*} root - The value to serialize
+ * @param {Object} options
+ * @param {Set} options.shared - Objects that are kept by reference instead of serialized
+ * @param {Set} options.exclude - Objects that are left out, they are null once read back
+ * @returns {{data: Object, references: {prototypes: Array, shared: Array}}} The data and its references
+ */
+export const serializeGraph = (root, {shared = new Set(), exclude = new Set()} = {}) => {
+    const ids = new Map();
+    const objects = [];
+    const prototypes = [];
+    const prototypeIds = new Map();
+    const sharedObjects = [];
+    const sharedIds = new Map();
+
+    const indexOf = (value, indices, values) => {
+        let index = indices.get(value);
+        if (index === undefined) {
+            index = values.length;
+            indices.set(value, index);
+            values.push(value);
+        }
+        return index;
+    };
+
+    // Objects of the encoding are references or values JSON cannot represent
+    const encode = (value) => {
+        if (value === undefined) {
+            return {u: 1};
+        }
+        if (typeof value === "number" && (!Number.isFinite(value) || Object.is(value, -0))) {
+            return {n: Object.is(value, -0) ? "-0" : String(value)};
+        }
+        if (typeof value === "bigint" || typeof value === "symbol") {
+            throw new TypeError(`Cannot serialize a ${typeof value}`);
+        }
+        if (value === null || typeof value !== "object" && typeof value !== "function") {
+            return value;
+        }
+        if (exclude.has(value)) {
+            return null;
+        }
+        // Functions are kept by reference, like cloneGraph does
+        if (shared.has(value) || typeof value === "function") {
+            return {s: indexOf(value, sharedIds, sharedObjects)};
+        }
+        let id = ids.get(value);
+        if (id === undefined) {
+            id = objects.length;
+            ids.set(value, id);
+            objects.push(null);
+            objects[id] = encodeObject(value);
+        }
+        return {r: id};
+    };
+
+    const encodeObject = (value) => {
+        if (Array.isArray(value)) {
+            return {a: Array.from(value, encode)};
+        } else if (value instanceof Map) {
+            return {m: Array.from(value, ([key, item]) => [encode(key), encode(item)])};
+        } else if (value instanceof Set) {
+            return {e: Array.from(value, encode)};
+        } else if (value instanceof Date) {
+            return {d: value.getTime()};
+        } else if (ArrayBuffer.isView(value) && !(value instanceof DataView)) {
+            return {t: value.constructor.name, v: Array.from(value, encode)};
+        }
+        const fields = {};
+        for (const key of Object.keys(value)) {
+            fields[key] = encode(value[key]);
+        }
+        return {p: indexOf(Object.getPrototypeOf(value), prototypeIds, prototypes), o: fields};
+    };
+
+    const encodedRoot = encode(root);
+    return {
+        data: {root: encodedRoot, objects},
+        references: {prototypes, shared: sharedObjects},
+    };
+};
+
+/**
+ * Read back a graph serialized by serializeGraph.
+ *
+ * @param {Object} data - The data returned by serializeGraph, possibly after a round trip through JSON
+ * @param {Object} references - The references returned by serializeGraph
+ * @param {Object} options
+ * @param {Map} options.factories - Prototype -> function creating an empty instance, as for cloneGraph
+ * @returns {*} The graph
+ */
+export const deserializeGraph = ({root, objects}, {prototypes, shared}, {factories = new Map()} = {}) => {
+
+    // Create every object before filling them in, so references can point to any object
+    const values = objects.map((encoded) => {
+        if (encoded.a !== undefined) {
+            return new Array(encoded.a.length);
+        } else if (encoded.m !== undefined) {
+            return new Map();
+        } else if (encoded.e !== undefined) {
+            return new Set();
+        } else if (encoded.d !== undefined) {
+            return new Date(encoded.d);
+        } else if (encoded.t !== undefined) {
+            return new globalThis[encoded.t](encoded.v.length);
+        }
+        const prototype = prototypes[encoded.p];
+        const factory = factories.get(prototype);
+        return factory !== undefined ? factory() : Object.create(prototype);
+    });
+
+    const decode = (value) => {
+        if (value === null || typeof value !== "object") {
+            return value;
+        } else if (value.r !== undefined) {
+            return values[value.r];
+        } else if (value.s !== undefined) {
+            return shared[value.s];
+        } else if (value.n !== undefined) {
+            return Number(value.n);
+        }
+        return undefined;
+    };
+
+    objects.forEach((encoded, id) => {
+        const result = values[id];
+        if (encoded.a !== undefined) {
+            encoded.a.forEach((item, i) => {
+                result[i] = decode(item);
+            });
+        } else if (encoded.m !== undefined) {
+            for (const [key, item] of encoded.m) {
+                result.set(decode(key), decode(item));
+            }
+        } else if (encoded.e !== undefined) {
+            for (const item of encoded.e) {
+                result.add(decode(item));
+            }
+        } else if (encoded.t !== undefined) {
+            encoded.v.forEach((item, i) => {
+                result[i] = decode(item);
+            });
+        } else if (encoded.o !== undefined) {
+            for (const key of Object.keys(encoded.o)) {
+                result[key] = decode(encoded.o[key]);
+            }
+        }
+    });
+    return decode(root);
+};
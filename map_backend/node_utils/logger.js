@@ -1,26 +1,121 @@
 import fs from 'fs';
+import os from 'os';
 import path from 'path';
 import { fileURLToPath } from 'url';
+import { isMainThread, threadId } from 'worker_threads';
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
 
+// Number of trajectory entries kept in memory. Once twice as many are logged, the older ones are
+// appended to a spill file, so the memory of a park does not grow with the length of its episode.
+const DEFAULT_TAIL_LENGTH = 8;
+
+// Spill files of all loggers of this process, removed when the process exits
+const SPILL_DIR = path.join(os.tmpdir(), `map_trajectories_${process.pid}`);
+let nextSpillFile = 0;
+if (isMainThread) {
+    process.on('exit', () => fs.rmSync(SPILL_DIR, { recursive: true, force: true }));
+}
+
+/**
+ * Append-only NDJSON file holding the entries a logger no longer keeps in memory
+ */
+class SpillFile {
+    constructor() {
+        this.path = null;
+        // Byte offset of each entry in the file
+        this.offsets = [];
+        this.size = 0;
+    }
+
+    get length() {
+        return this.offsets.length;
+    }
+
+    /**
+     * Append entries to the file
+     * @param {Array} entries - JSON serializable entries
+     */
+    append(entries) {
+        if (this.path === null) {
+            fs.mkdirSync(SPILL_DIR, { recursive: true });
+            this.path = path.join(SPILL_DIR, `${threadId}_${nextSpillFile++}.ndjson`);
+        }
+        const lines = entries.map(entry => JSON.stringify(entry) + "\n");
+        for (const line of lines) {
+            this.offsets.push(this.size);
+            this.size += Buffer.byteLength(line);
+        }
+        fs.appendFileSync(this.path, lines.join(""), 'utf8');
+    }
+
+    /**
+     * Read all entries in the file
+     * @returns {Array} The entries, oldest first
+     */
+    readAll() {
+        if (this.length === 0) {
+            return [];
+        }
+        return fs.readFileSync(this.path, 'utf8').trimEnd().split("\n").map(line => JSON.parse(line));
+    }
+
+    /**
+     * Remove the last entry from the file
+     * @returns {Object} The removed entry
+     */
+    pop() {
+        const offset = this.offsets.pop();
+        const buffer = Buffer.alloc(this.size - offset);
+        const fd = fs.openSync(this.path, 'r+');
+        try {
+            fs.readSync(fd, buffer, 0, buffer.length, offset);
+            fs.ftruncateSync(fd, offset);
+        } finally {
+            fs.closeSync(fd);
+        }
+        this.size = offset;
+        return JSON.parse(buffer.toString('utf8'));
+    }
+
+    /**
+     * Delete the file
+     */
+    clear() {
+        if (this.path !== null) {
+            fs.rmSync(this.path, { force: true });
+        }
+        this.path = null;
+        this.offsets = [];
+        this.size = 0;
+    }
+}
+
 /**
  * TrajectoryLogger - Logs episode trajectories in TSV format
  * Replaces the simple history array in park.js with full logging capabilities
+ *
+ * Only the most recent entries are kept in trajectoryData and middayData, older entries are spilled
+ * to NDJSON files that are read back when the whole trajectory is needed.
  */
 class TrajectoryLogger {
-    constructor(parkId, expName = null) {
+    constructor(parkId, expName = null, { tailLength = DEFAULT_TAIL_LENGTH } = {}) {
         this.parkId = parkId;
         this.expName = expName || this.parkId;
+        this.tailLength = Math.max(tailLength, 1);
 
         // Project root is two levels up from map_backend/node_utils/
         this.projectRoot = path.join(__dirname, '..', '..');
         this.logsDir = path.join(this.projectRoot, 'logged_trajectories');
 
         this.episodeIndex = 0;
-        this.trajectoryData = []; // Array of trajectory entries
-        this.middayData = []; // Array of midday state entries
+        this.trajectoryData = []; // Array of the most recent trajectory entries
+        this.middayData = []; // Array of the most recent midday state entries
+        this.trajectorySpill = new SpillFile();
+        this.middaySpill = new SpillFile();
+        // Total duration of the spilled trajectory entries
+        this.spilledDuration = 0;
         this.prevTime = null;
     }
 
@@ -53,13 +148,14 @@ class TrajectoryLogger {
 
         // Reset midday data for new episode
         this.middayData = [];
+        this.clearSpill();
     }
 
     /**
      * Log a trajectory step
      * @param {number} step - Current step number
      * @param {string} action - Action taken
-     * @param {Object} end_state - Resulting state
+     * @param {Object|Function} end_state - Resulting state, or a function computing it once it is first needed
      * @param {number} reward - Reward received
      * @param {Object} info - Additional info (may contain 'error' key)
      */
@@ -77,6 +173,30 @@ class TrajectoryLogger {
             reward,
             info
         });
+        this.spillTrajectory();
+    }
+
+    /**
+     * Move all but the last tailLength trajectory entries to the spill file once twice as many are in memory
+     */
+    spillTrajectory() {
+        if (this.trajectoryData.length >= 2 * this.tailLength) {
+            const spilled = this.trajectoryData.splice(0, this.trajectoryData.length - this.tailLength);
+            for (const entry of spilled) {
+                this.resolveEndState(entry);
+                this.spilledDuration += entry.duration;
+            }
+            this.trajectorySpill.append(spilled);
+        }
+    }
+
+    /**
+     * Move all but the last tailLength midday entries to the spill file once twice as many are in memory
+     */
+    spillMidday() {
+        if (this.middayData.length >= 2 * this.tailLength) {
+            this.middaySpill.append(this.middayData.splice(0, this.middayData.length - this.tailLength));
+        }
     }
 
     /**
@@ -90,6 +210,31 @@ class TrajectoryLogger {
             step,
             midday_states
         });
+        this.spillMidday();
+    }
+
+    /**
+     * Get the number of trajectory entries, including spilled entries
+     * @returns {number} Number of entries
+     */
+    numEntries() {
+        return this.trajectorySpill.length + this.trajectoryData.length;
+    }
+
+    /**
+     * Get all trajectory entries, reading spilled entries back from disk
+     * @returns {Array} Array of all trajectory entries
+     */
+    getEntries() {
+        return [...this.trajectorySpill.readAll(), ...this.trajectoryData];
+    }
+
+    /**
+     * Get all midday state entries, reading spilled entries back from disk
+     * @returns {Array} Array of all midday state entries
+     */
+    getMiddayEntries() {
+        return [...this.middaySpill.readAll(), ...this.middayData];
     }
 
     /**
@@ -97,7 +242,7 @@ class TrajectoryLogger {
      * @returns {Array} Array of all end states
      */
     getHistory() {
-        return this.trajectoryData.map(entry => entry.end_state);
+        return this.getEntries().map(entry => this.resolveEndState(entry));
     }
 
     /**
@@ -108,16 +253,79 @@ class TrajectoryLogger {
         if (this.trajectoryData.length === 0) {
             return null;
         }
-        return this.trajectoryData[this.trajectoryData.length - 1].end_state;
+        return this.resolveEndState(this.trajectoryData[this.trajectoryData.length - 1]);
+    }
+
+    /**
+     * Get the end state of an entry, computing it if it was logged as a function
+     * @param {Object} entry - A trajectory entry
+     * @returns {Object} The end state
+     */
+    resolveEndState(entry) {
+        if (typeof entry.end_state === "function") {
+            entry.end_state = entry.end_state();
+        }
+        return entry.end_state;
+    }
+
+    /**
+     * Keep only the last trajectory entry and no midday states, for parks whose trajectory is never saved
+     */
+    dropHistory() {
+        if (this.trajectoryData.length > 1) {
+            this.trajectoryData = this.trajectoryData.slice(-1);
+        }
+        this.middayData = [];
+        this.clearSpill();
     }
 
     /**
      * Remove the last trajectory entry (for undo functionality)
      */
     popLastEntry() {
-        if (this.trajectoryData.length > 1) {
-            this.trajectoryData.pop();
+        if (this.numEntries() <= 1) {
+            return;
         }
+        if (this.trajectoryData.length === 1) {
+            // Bring the previous entry back into memory, it becomes the last entry
+            const entry = this.trajectorySpill.pop();
+            this.spilledDuration -= entry.duration;
+            this.trajectoryData.unshift(entry);
+        }
+        this.trajectoryData.pop();
+    }
+
+    /**
+     * Describe the episode as JSON, for parks that are written to disk
+     * @returns {Object} The episode index, trajectory entries and midday entries
+     */
+    serialize() {
+        const entries = this.getEntries();
+        entries.forEach(entry => this.resolveEndState(entry));
+        return { episodeIndex: this.episodeIndex, entries, middayEntries: this.getMiddayEntries() };
+    }
+
+    /**
+     * Replace the episode with one returned by serialize
+     * @param {Object} data - The result of serialize
+     */
+    load({ episodeIndex, entries, middayEntries }) {
+        this.clearSpill();
+        this.episodeIndex = episodeIndex;
+        this.trajectoryData = entries;
+        this.middayData = middayEntries;
+        this.prevTime = Date.now();
+        this.spillTrajectory();
+        this.spillMidday();
+    }
+
+    /**
+     * Delete the spill files, for loggers that are replaced or whose park is deleted
+     */
+    clearSpill() {
+        this.trajectorySpill.clear();
+        this.middaySpill.clear();
+        this.spilledDuration = 0;
     }
 
     /**
@@ -125,7 +333,7 @@ class TrajectoryLogger {
      * @returns {number} Time taken to complete the episode in milliseconds
      */
     getTimeTaken() {
-        return this.trajectoryData.reduce((acc, entry) => acc + entry.duration, 0);
+        return this.trajectoryData.reduce((acc, entry) => acc + entry.duration, this.spilledDuration);
     }
 
     /**
@@ -133,7 +341,7 @@ class TrajectoryLogger {
      * @returns {string} TSV-formatted trajectory
      */
     getTrajectoryTSV() {
-        if (this.trajectoryData.length === 0) {
+        if (this.numEntries() === 0) {
             return "";
         }
 
@@ -143,13 +351,13 @@ class TrajectoryLogger {
         lines.push(["step", "action_valid", "duration", "action", "end_state", "reward", "info"].join("\t"));
 
         // Data rows
-        for (const entry of this.trajectoryData) {
+        for (const entry of this.getEntries()) {
             const row = [
                 entry.step,
                 entry.action_valid,
                 entry.duration,
                 entry.action,
-                JSON.stringify(entry.end_state),
+                JSON.stringify(this.resolveEndState(entry)),
                 entry.reward,
                 JSON.stringify(entry.info)
             ];
@@ -164,7 +372,7 @@ class TrajectoryLogger {
      * @returns {string} TSV-formatted midday states
      */
     getMiddayTSV() {
-        if (this.middayData.length === 0) {
+        if (this.middaySpill.length + this.middayData.length === 0) {
             return "";
         }
 
@@ -174,7 +382,7 @@ class TrajectoryLogger {
         lines.push(["step", "midday_states"].join("\t"));
 
         // Data rows - one row per step, with all tick states as JSON array
-        for (const entry of this.middayData) {
+        for (const entry of this.getMiddayEntries()) {
             const row = [
                 entry.step,
                 JSON.stringify(entry.midday_states)
@@ -202,7 +410,7 @@ class TrajectoryLogger {
         console.log(`Trajectory saved locally to ${filepath}`);
 
         // Also save midday states if available
-        if (this.middayData.length > 0) {
+        if (this.middaySpill.length + this.middayData.length > 0) {
             this.saveMiddayLocal();
         }
 
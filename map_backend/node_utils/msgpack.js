@@ -0,0 +1,235 @@
+/**
+ * Binary responses for the v1 API.
+ *
+ * Clients that send `Accept: application/msgpack` receive MessagePack instead of JSON.
+ * Values are encoded the way JSON.stringify would serialize them (toJSON is honoured,
+ * undefined values are dropped from objects and become null in arrays, non-finite
+ * numbers become null), so decoding yields the same data as parsing the JSON. The only
+ * exception are integers beyond Number.MAX_SAFE_INTEGER, which are encoded as floats.
+ */
+
+export const MSGPACK_CONTENT_TYPE = "application/msgpack";
+
+const INITIAL_BUFFER_SIZE = 64 * 1024;
+
+const isSkipped = (value) => value === undefined || typeof value === "function" || typeof value === "symbol";
+
+// Object keys repeat for every ride, shop, staff member and tile, so their encodings are cached
+const encodedKeys = new Map();
+const MAX_CACHED_KEYS = 4096;
+
+class MsgpackEncoder {
+    constructor() {
+        this.buffer = Buffer.allocUnsafe(INITIAL_BUFFER_SIZE);
+        this.offset = 0;
+    }
+
+    ensureCapacity(numBytes) {
+        if (this.offset + numBytes <= this.buffer.length) {
+            return;
+        }
+        const grown = Buffer.allocUnsafe(Math.max(this.buffer.length * 2, this.offset + numBytes));
+        this.buffer.copy(grown, 0, 0, this.offset);
+        this.buffer = grown;
+    }
+
+    writeByte(byte) {
+        this.ensureCapacity(1);
+        this.buffer[this.offset++] = byte;
+    }
+
+    writeHeader(length, fixPrefix, fixLimit, codes) {
+        if (length < fixLimit) {
+            this.writeByte(fixPrefix | length);
+        } else if (codes[0] !== undefined && length <= 0xff) {
+            this.ensureCapacity(2);
+            this.buffer[this.offset] = codes[0];
+            this.buffer.writeUInt8(length, this.offset + 1);
+            this.offset += 2;
+        } else if (length <= 0xffff) {
+            this.ensureCapacity(3);
+            this.buffer[this.offset] = codes[1];
+            this.buffer.writeUInt16BE(length, this.offset + 1);
+            this.offset += 3;
+        } else {
+            this.ensureCapacity(5);
+            this.buffer[this.offset] = codes[2];
+            this.buffer.writeUInt32BE(length, this.offset + 1);
+            this.offset += 5;
+        }
+    }
+
+    encodeNumber(value) {
+        if (!Number.isFinite(value)) {
+            this.writeByte(0xc0);
+            return;
+        }
+        if (!Number.isSafeInteger(value)) {
+            this.ensureCapacity(9);
+            this.buffer[this.offset] = 0xcb;
+            this.buffer.writeDoubleBE(value, this.offset + 1);
+            this.offset += 9;
+            return;
+        }
+
+        this.ensureCapacity(9);
+        const buffer = this.buffer;
+        const offset = this.offset;
+        if (value >= 0) {
+            if (value < 0x80) {
+                buffer[offset] = value;
+                this.offset += 1;
+            } else if (value <= 0xff) {
+                buffer[offset] = 0xcc;
+                buffer.writeUInt8(value, offset + 1);
+                this.offset += 2;
+            } else if (value <= 0xffff) {
+                buffer[offset] = 0xcd;
+                buffer.writeUInt16BE(value, offset + 1);
+                this.offset += 3;
+            } else if (value <= 0xffffffff) {
+                buffer[offset] = 0xce;
+                buffer.writeUInt32BE(value, offset + 1);
+                this.offset += 5;
+            } else {
+                buffer[offset] = 0xcf;
+                buffer.writeBigUInt64BE(BigInt(value), offset + 1);
+                this.offset += 9;
+            }
+        } else if (value >= -32) {
+            buffer[offset] = 0xe0 | (value + 32);
+            this.offset += 1;
+        } else if (value >= -0x80) {
+            buffer[offset] = 0xd0;
+            buffer.writeInt8(value, offset + 1);
+            this.offset += 2;
+        } else if (value >= -0x8000) {
+            buffer[offset] = 0xd1;
+            buffer.writeInt16BE(value, offset + 1);
+            this.offset += 3;
+        } else if (value >= -0x80000000) {
+            buffer[offset] = 0xd2;
+            buffer.writeInt32BE(value, offset + 1);
+            this.offset += 5;
+        } else {
+            buffer[offset] = 0xd3;
+            buffer.writeBigInt64BE(BigInt(value), offset + 1);
+            this.offset += 9;
+        }
+    }
+
+    encodeString(value) {
+        if (value.length < 32 && this.writeShortAscii(value)) {
+            return;
+        }
+        const length = Buffer.byteLength(value, "utf8");
+        this.writeHeader(length, 0xa0, 32, [0xd9, 0xda, 0xdb]);
+        this.ensureCapacity(length);
+        this.buffer.write(value, this.offset, length, "utf8");
+        this.offset += length;
+    }
+
+    /**
+     * Write a fixstr if the string is ASCII.
+     *
+     * @returns {boolean} false if the string contains non-ASCII characters, in which case nothing is written
+     */
+    writeShortAscii(value) {
+        this.ensureCapacity(value.length + 1);
+        const buffer = this.buffer;
+        const start = this.offset + 1;
+        for (let i = 0; i < value.length; i++) {
+            const code = value.charCodeAt(i);
+            if (code > 0x7f) {
+                return false;
+            }
+            buffer[start + i] = code;
+        }
+        buffer[this.offset] = 0xa0 | value.length;
+        this.offset = start + value.length;
+        return true;
+    }
+
+    encodeKey(key) {
+        let encoded = encodedKeys.get(key);
+        if (encoded === undefined) {
+            const start = this.offset;
+            this.encodeString(key);
+            if (encodedKeys.size < MAX_CACHED_KEYS) {
+                encodedKeys.set(key, Buffer.from(this.buffer.subarray(start, this.offset)));
+            }
+            return;
+        }
+        this.ensureCapacity(encoded.length);
+        encoded.copy(this.buffer, this.offset);
+        this.offset += encoded.length;
+    }
+
+    encode(value) {
+        if (value !== null && typeof value === "object" && typeof value.toJSON === "function") {
+            value = value.toJSON();
+        }
+
+        if (value === null || isSkipped(value)) {
+            this.writeByte(0xc0);
+        } else if (typeof value === "boolean") {
+            this.writeByte(value ? 0xc3 : 0xc2);
+        } else if (typeof value === "number") {
+            this.encodeNumber(value);
+        } else if (typeof value === "string") {
+            this.encodeString(value);
+        } else if (typeof value === "bigint") {
+            throw new TypeError("Do not know how to serialize a BigInt");
+        } else if (Array.isArray(value)) {
+            this.writeHeader(value.length, 0x90, 16, [undefined, 0xdc, 0xdd]);
+            for (const item of value) {
+                this.encode(item);
+            }
+        } else {
+            const keys = Object.keys(value);
+            let numEntries = 0;
+            for (const key of keys) {
+                if (!isSkipped(value[key])) {
+                    numEntries++;
+                }
+            }
+            this.writeHeader(numEntries, 0x80, 16, [undefined, 0xde, 0xdf]);
+            for (const key of keys) {
+                if (!isSkipped(value[key])) {
+                    this.encodeKey(key);
+                    this.encode(value[key]);
+                }
+            }
+        }
+    }
+}
+
+const sharedEncoder = new MsgpackEncoder();
+
+/**
+ * Encode a value as MessagePack.
+ *
+ * @param {*} value - Any value that can be serialized by JSON.stringify
+ * @returns {Buffer} The encoded value
+ */
+export const encodeMsgpack = (value) => {
+    // The scratch buffer is reused between calls, so the result is copied out of it
+    const encoder = sharedEncoder;
+    encoder.offset = 0;
+    encoder.encode(value);
+    return Buffer.from(encoder.buffer.subarray(0, encoder.offset));
+};
+
+/**
+ * Express middleware that makes res.json respond with MessagePack if the client accepts it.
+ */
+export const negotiateWireFormat = (req, res, next) => {
+    const accept = typeof req.get === "function" ? req.get("Accept") : undefined;
+    if (accept && accept.includes(MSGPACK_CONTENT_TYPE)) {
+        res.json = (payload) => {
+            res.set("Content-Type", MSGPACK_CONTENT_TYPE);
+            return res.send(encodeMsgpack(payload));
+        };
+    }
+    next();
+};
@@ -0,0 +1,284 @@
+/**
+ * Eviction of parks from memory.
+ *
+ * Every request touches the parks it refers to, so the policy knows the parks in least recently
+ * used order. Parks are evicted, least recently used first, once they have been idle for longer
+ * than the idle TTL, while there are more than maxParks parks, and while the heap of the thread is
+ * above maxHeapMb. Evicted parks are written to a spill directory if one is given and restored on
+ * their next request, otherwise they are deleted.
+ *
+ * Responses to requests that restored a park carry the header X-Park-Status: restored. Requests
+ * for parks that were deleted by eviction fail with X-Park-Status: evicted. Requests for parks whose
+ * file cannot be read back fail with status 500, and the file is kept so the park is not lost.
+ */
+import fs from "fs";
+import path from "path";
+import v8 from "v8";
+import Park from "../park.js";
+import { CommandResult } from "../utils.js";
+
+export const PARK_STATUS_HEADER = "X-Park-Status";
+
+const DEFAULT_IDLE_TTL_MS = 2 * 60 * 60 * 1000;
+// Ids of evicted parks that are remembered, older ones are forgotten along with their files
+const MAX_EVICTED = 10000;
+// The heap only shrinks after a garbage collection, so it is checked at most this often
+const HEAP_CHECK_INTERVAL_MS = 1000;
+// Fraction of the parks evicted when the heap is above maxHeapMb
+const HEAP_EVICTION_FRACTION = 0.1;
+
+const DELETE_PARK_PATH = /^\/park\/delete_park\/([^/]+)$/;
+
+/**
+ * Get the id of the park a request refers to.
+ *
+ * @param {Object} req - Express request
+ * @param {string} requestPath - Path of the request without query string
+ * @returns {string|undefined} The park id, if the request has one
+ */
+export const requestParkId = (req, requestPath) => {
+    const deleteMatch = requestPath.match(DELETE_PARK_PATH);
+    return req.body?.parkId ?? req.query?.parkId ?? (deleteMatch ? decodeURIComponent(deleteMatch[1]) : undefined);
+};
+
+/**
+ * Read eviction options from command line arguments and environment variables.
+ *
+ * --max-parks / MAP_MAX_PARKS, --max-heap-mb / MAP_MAX_HEAP_MB, --park-ttl-minutes / MAP_PARK_TTL_MINUTES
+ * and --evict-dir / MAP_EVICT_DIR.
+ *
+ * @param {Array<string>} argv - Command line arguments
+ * @param {Object} env - Environment variables
+ * @returns {Object} Options for ParkEvictionPolicy
+ */
+export const evictionOptionsFromArgs = (argv, env) => {
+    const option = (flag, variable) => {
+        const index = argv.indexOf(flag);
+        return index !== -1 ? argv[index + 1] : env[variable];
+    };
+    const maxParks = option("--max-parks", "MAP_MAX_PARKS");
+    const maxHeapMb = option("--max-heap-mb", "MAP_MAX_HEAP_MB");
+    const ttlMinutes = option("--park-ttl-minutes", "MAP_PARK_TTL_MINUTES");
+    return {
+        maxParks: maxParks !== undefined ? Number(maxParks) : Infinity,
+        maxHeapMb: maxHeapMb !== undefined ? Number(maxHeapMb) : Infinity,
+        idleTtlMs: ttlMinutes !== undefined ? Number(ttlMinutes) * 60 * 1000 : DEFAULT_IDLE_TTL_MS,
+        spillDir: option("--evict-dir", "MAP_EVICT_DIR") ?? null,
+    };
+};
+
+export class ParkEvictionPolicy {
+    /**
+     * @param {Object} parks - Park id -> Park, shared with the routes
+     * @param {Object} options
+     * @param {number} options.maxParks - Maximum number of parks in memory
+     * @param {number} options.maxHeapMb - Heap size of the thread in MB above which parks are evicted
+     * @param {number} options.idleTtlMs - Parks that were not used for longer are evicted
+     * @param {string|null} options.spillDir - Directory evicted parks are written to. If null, evicted parks are deleted.
+     */
+    constructor(parks, {maxParks = Infinity, maxHeapMb = Infinity, idleTtlMs = DEFAULT_IDLE_TTL_MS, spillDir = null} = {}) {
+        this.parks = parks;
+        this.maxParks = maxParks;
+        this.maxHeapBytes = maxHeapMb * 1024 * 1024;
+        this.idleTtlMs = idleTtlMs;
+        this.spillDir = spillDir;
+        // Park id -> time of last use, least recently used first
+        this.lastUsed = new Map();
+        // Park id -> {file, error} of a park written to disk, with the error of its last failed restore,
+        // or null for a deleted park
+        this.evicted = new Map();
+        this.lastHeapCheck = 0;
+        this.middleware = this.middleware.bind(this);
+    }
+
+    /**
+     * Mark a park as used.
+     *
+     * @param {string} parkId - Id of the park
+     */
+    touch(parkId) {
+        this.lastUsed.delete(parkId);
+        this.lastUsed.set(parkId, Date.now());
+    }
+
+    /**
+     * Track a new park and evict other parks if there are too many.
+     *
+     * @param {string} parkId - Id of the new park
+     */
+    add(parkId) {
+        this.touch(parkId);
+        this.enforce(new Set([parkId]));
+    }
+
+    /**
+     * Stop tracking a park that was deleted.
+     *
+     * @param {string} parkId - Id of the park
+     */
+    forget(parkId) {
+        this.lastUsed.delete(parkId);
+        if (!this.isEvicted(parkId)) {
+            return;
+        }
+        const entry = this.evicted.get(parkId);
+        if (entry) {
+            fs.rmSync(entry.file, { force: true });
+        }
+        // Lets park workers know an evicted park is gone for good
+        if (this.parks[parkId] === undefined) {
+            delete this.parks[parkId];
+        }
+        this.evicted.delete(parkId);
+    }
+
+    /**
+     * Whether a park was evicted and not restored since.
+     *
+     * @param {string} parkId - Id of the park
+     * @returns {boolean}
+     */
+    isEvicted(parkId) {
+        return this.evicted.has(parkId);
+    }
+
+    /**
+     * Express middleware restoring the parks a request refers to, marking them as used and evicting
+     * parks according to the policy.
+     */
+    middleware(req, res, next) {
+        const requestPath = req.url.split("?")[0];
+        const parkIds = requestPath === "/park/step_batch" && Array.isArray(req.body?.steps)
+            ? req.body.steps.map((step) => step?.parkId)
+            : [requestParkId(req, requestPath)];
+
+        for (const parkId of parkIds) {
+            if (parkId === undefined || parkId === null) {
+                continue;
+            }
+            if (this.parks[parkId] === undefined && this.isEvicted(parkId)) {
+                if (req.method === "DELETE") {
+                    this.forget(parkId);
+                    res.status(200).json({ data: {}, message: "Park data cleared successfully" });
+                    return;
+                }
+                const result = this.restore(parkId);
+                if (!result.success) {
+                    if (this.evicted.get(parkId)) {
+                        res.status(500).json({ data: {}, message: result.message });
+                    } else {
+                        res.set(PARK_STATUS_HEADER, "evicted");
+                        res.status(400).json({ data: {}, message: result.message });
+                    }
+                    return;
+                }
+                res.set(PARK_STATUS_HEADER, "restored");
+            }
+            if (this.parks[parkId] !== undefined) {
+                this.touch(parkId);
+            }
+        }
+        this.enforce(new Set(parkIds));
+        next();
+    }
+
+    /**
+     * Evict parks that exceed the limits of the policy.
+     *
+     * @param {Set} protectedIds - Parks that are not evicted, e.g. the parks of the current request
+     */
+    enforce(protectedIds = new Set()) {
+        const now = Date.now();
+        const victims = [];
+        for (const [parkId, lastUsed] of this.lastUsed) {
+            if (now - lastUsed <= this.idleTtlMs && this.lastUsed.size - victims.length <= this.maxParks) {
+                break;
+            }
+            if (!protectedIds.has(parkId)) {
+                victims.push(parkId);
+            }
+        }
+
+        if (this.maxHeapBytes < Infinity && now - this.lastHeapCheck >= HEAP_CHECK_INTERVAL_MS) {
+            this.lastHeapCheck = now;
+            if (v8.getHeapStatistics().used_heap_size > this.maxHeapBytes) {
+                const numVictims = victims.length + Math.ceil(this.lastUsed.size * HEAP_EVICTION_FRACTION);
+                for (const parkId of this.lastUsed.keys()) {
+                    if (victims.length >= numVictims) {
+                        break;
+                    }
+                    if (!protectedIds.has(parkId) && !victims.includes(parkId)) {
+                        victims.push(parkId);
+                    }
+                }
+            }
+        }
+
+        for (const parkId of victims) {
+            this.evict(parkId);
+        }
+    }
+
+    /**
+     * Remove a park from memory, writing it to the spill directory if there is one.
+     *
+     * @param {string} parkId - Id of the park
+     */
+    evict(parkId) {
+        const park = this.parks[parkId];
+        this.lastUsed.delete(parkId);
+        if (park === undefined) {
+            return;
+        }
+        let entry = null;
+        if (this.spillDir !== null) {
+            const file = path.join(this.spillDir, `${encodeURIComponent(parkId)}.json`);
+            try {
+                fs.mkdirSync(this.spillDir, { recursive: true });
+                fs.writeFileSync(file, park.serialize(), "utf8");
+                entry = {file, error: null};
+            } catch (error) {
+                // Deleted like without a spill directory, so requests for it report it as evicted
+                console.error(`Failed to write park ${parkId} to ${file}:`, error);
+                fs.rmSync(file, { force: true });
+            }
+        }
+        park.logger.clearSpill();
+        // Marked as evicted before it is deleted, so park workers keep the park assigned to their thread
+        this.evicted.set(parkId, entry);
+        delete this.parks[parkId];
+        if (this.evicted.size > MAX_EVICTED) {
+            this.forget(this.evicted.keys().next().value);
+        }
+        console.log(`Evicted park ${parkId}${entry ? ` to ${entry.file}` : ""}`);
+    }
+
+    /**
+     * Read an evicted park back from the spill directory.
+     *
+     * If the file cannot be read back, the park stays evicted and its file is kept, so the park is
+     * not lost and the next request for it tries again.
+     *
+     * @param {string} parkId - Id of the park
+     * @returns {CommandResult} Whether the park was restored
+     */
+    restore(parkId) {
+        const entry = this.evicted.get(parkId);
+        if (!entry) {
+            return new CommandResult(false, `Park ${parkId} was evicted from the server. Reset to continue with a new park.`);
+        }
+        let park;
+        try {
+            park = Park.deserialize(fs.readFileSync(entry.file, "utf8"));
+        } catch (error) {
+            console.error(`Failed to restore park ${parkId}:`, error);
+            entry.error = String(error);
+            return new CommandResult(false, `Failed to restore evicted park ${parkId} from ${entry.file}: ${entry.error}`);
+        }
+        this.parks[parkId] = park;
+        this.forget(parkId);
+        this.touch(parkId);
+        console.log(`Restored park ${parkId} from ${entry.file}`);
+        return new CommandResult(true, `Restored park ${parkId}`);
+    }
+}
@@ -0,0 +1,193 @@
+/**
+ * Run parks on worker threads.
+ *
+ * Simulating a day blocks the thread it runs on, so a server running every park on its main
+ * thread steps one park at a time and cannot answer other requests meanwhile. With a
+ * ParkWorkerPool, each park lives on one of several worker threads (park_worker.js) and the
+ * main thread forwards the park's requests to that worker as RPC messages (rpc.js). New parks
+ * are created on the worker with the fewest parks, forks stay on the worker of their park.
+ * Requests that do not belong to a park, such as /health, are still answered by the main thread.
+ */
+import { Worker } from "worker_threads";
+import { requestParkId } from "./park_eviction.js";
+
+const WORKER_PATH = new URL("../park_worker.js", import.meta.url);
+
+export class ParkWorkerPool {
+    /**
+     * Start the workers.
+     *
+     * @param {number} numWorkers - Number of worker threads
+     * @param {Object} evictionOptions - Options of the ParkEvictionPolicy of each worker, whose limits apply per worker
+     */
+    constructor(numWorkers, evictionOptions = {}) {
+        this.workers = [];
+        this.evictionOptions = evictionOptions;
+        // Park id -> index of the worker owning the park
+        this.owners = new Map();
+        this.numParks = new Array(numWorkers).fill(0);
+        // Request id -> {resolve, worker} of requests waiting for a response
+        this.pending = new Map();
+        this.nextRequestId = 0;
+        this.closed = false;
+        for (let i = 0; i < numWorkers; i++) {
+            this.startWorker(i);
+        }
+        this.forward = this.forward.bind(this);
+    }
+
+    startWorker(index) {
+        const worker = new Worker(WORKER_PATH, { workerData: { evictionOptions: this.evictionOptions } });
+        worker.on("message", (message) => this.onMessage(index, message));
+        worker.on("error", (error) => console.error(`Park worker ${index} failed:`, error));
+        worker.on("exit", (code) => this.onExit(index, worker, code));
+        this.workers[index] = worker;
+    }
+
+    onMessage(index, message) {
+        if (message.type === "created") {
+            this.owners.set(message.parkId, index);
+            this.numParks[index]++;
+        } else if (message.type === "deleted") {
+            if (this.owners.get(message.parkId) === index) {
+                this.owners.delete(message.parkId);
+                this.numParks[index]--;
+            }
+        } else if (message.type === "response") {
+            const entry = this.pending.get(message.response.id);
+            if (entry !== undefined) {
+                this.pending.delete(message.response.id);
+                entry.resolve(message.response);
+            }
+        }
+    }
+
+    onExit(index, worker, code) {
+        if (this.closed || this.workers[index] !== worker) {
+            return;
+        }
+        console.error(`Park worker ${index} exited with code ${code}, restarting it. Its parks are lost.`);
+        for (const [parkId, owner] of this.owners) {
+            if (owner === index) {
+                this.owners.delete(parkId);
+            }
+        }
+        this.numParks[index] = 0;
+        for (const [id, entry] of this.pending) {
+            if (entry.worker === index) {
+                this.pending.delete(id);
+                entry.resolve({ id, status: 500, body: { data: {}, message: "Park worker exited" } });
+            }
+        }
+        this.startWorker(index);
+    }
+
+    /**
+     * Send an RPC request to a worker.
+     *
+     * @param {number} index - Index of the worker
+     * @param {Object} request - RPC request without id
+     * @returns {Promise<Object>} The RPC response
+     */
+    request(index, request) {
+        return new Promise((resolve) => {
+            const id = this.nextRequestId++;
+            this.pending.set(id, { resolve, worker: index });
+            this.workers[index].postMessage({ ...request, id });
+        });
+    }
+
+    leastLoadedWorker() {
+        return this.numParks.indexOf(Math.min(...this.numParks));
+    }
+
+    /**
+     * Express middleware forwarding requests for parks owned by a worker to that worker.
+     * Other requests are passed on to the next handler.
+     */
+    async forward(req, res, next) {
+        const path = req.url.split("?")[0];
+        if (path === "/park/step_batch") {
+            return this.forwardBatch(req, res, next, path);
+        }
+
+        let worker;
+        if (path === "/park/get_new_park_id") {
+            worker = this.leastLoadedWorker();
+        } else {
+            worker = this.owners.get(requestParkId(req, path));
+        }
+        if (worker === undefined) {
+            return next();
+        }
+        sendResponse(res, await this.request(worker, toRpcRequest(req, path, req.body)));
+    }
+
+    /**
+     * Forward a batch of steps, split into one batch per worker that is stepped in parallel.
+     */
+    async forwardBatch(req, res, next, path) {
+        const steps = req.body?.steps;
+        if (!Array.isArray(steps) || steps.length == 0) {
+            return next();
+        }
+        const owners = steps.map((step) => this.owners.get(step?.parkId));
+        const unknownIndex = owners.indexOf(undefined);
+        if (unknownIndex !== -1) {
+            res.status(400).json({ data: {}, message: `Invalid or uninitialized Park Id: ${steps[unknownIndex]?.parkId}` });
+            return;
+        }
+
+        const indicesByWorker = new Map();
+        owners.forEach((worker, i) => {
+            if (!indicesByWorker.has(worker)) {
+                indicesByWorker.set(worker, []);
+            }
+            indicesByWorker.get(worker).push(i);
+        });
+
+        const batches = [...indicesByWorker].map(([worker, indices]) => {
+            const body = { ...req.body, steps: indices.map((i) => steps[i]) };
+            return this.request(worker, toRpcRequest(req, path, body));
+        });
+        const responses = await Promise.all(batches);
+
+        const failed = responses.find((response) => response.status !== 200);
+        if (failed !== undefined || responses.length === 1) {
+            sendResponse(res, failed || responses[0]);
+            return;
+        }
+        const results = new Array(steps.length);
+        [...indicesByWorker.values()].forEach((indices, batch) => {
+            indices.forEach((i, j) => {
+                results[i] = responses[batch].body.data.results[j];
+            });
+        });
+        res.status(200).json({ data: { results }, message: "Success" });
+    }
+
+    /**
+     * Stop all workers.
+     */
+    close() {
+        this.closed = true;
+        return Promise.all(this.workers.map((worker) => worker.terminate()));
+    }
+}
+
+const toRpcRequest = (req, path, body) => {
+    // The main thread encodes the response, so workers always respond with plain objects
+    const { accept, ...headers } = req.headers || {};
+    return { method: req.method, path, query: req.query, body, headers };
+};
+
+const sendResponse = (res, response) => {
+    for (const [name, value] of Object.entries(response.headers || {})) {
+        res.set(name, value);
+    }
+    if (response.body === null || response.body === undefined) {
+        res.status(response.status).end();
+    } else {
+        res.status(response.status).json(response.body);
+    }
+};
@@ -0,0 +1,154 @@
+/**
+ * Incremental park states.
+ *
+ * Clients that identify themselves with a clientId receive a structural delta against the
+ * last state sent to them instead of the full state, as long as the baseVersion they send
+ * matches the version the server remembers for them. map_py/state_delta.py applies the deltas.
+ *
+ * A delta describes how to turn a previous value into the next one:
+ *   - a primitive (number, string, boolean, null) replaces the previous value
+ *   - {r: value} replaces the previous value with an object or array
+ *   - {o: {key: delta}, order: [keys]} updates the listed keys of an object
+ *   - {a: {index: delta}} updates the listed items of an array with the same length
+ *   - {k: {key: delta}, order: [keys]} updates the listed entities of an array of entities
+ *     keyed by their id or position, see entityKey
+ * order lists the keys of the next value and is only sent if they differ from the previous keys.
+ */
+
+// Number of clients per park whose last state is remembered
+const MAX_CLIENTS_PER_PARK = 8;
+
+const clientSnapshots = new WeakMap();
+
+const isObject = (value) => value !== null && typeof value === "object" && !Array.isArray(value);
+
+/**
+ * Key identifying an entity (ride, shop, staff member, tile) within an array.
+ *
+ * @param {*} item - An array item
+ * @returns {string|undefined} The key, or undefined if the item is not an entity
+ */
+export const entityKey = (item) => {
+    if (!isObject(item)) {
+        return undefined;
+    }
+    if (item.id !== undefined && item.id !== null) {
+        return `id:${item.id}`;
+    }
+    if (typeof item.x === "number" && typeof item.y === "number") {
+        return `${item.x},${item.y}`;
+    }
+    return undefined;
+};
+
+const entityKeys = (array) => {
+    const keys = array.map(entityKey);
+    if (keys.some((key) => key === undefined) || new Set(keys).size !== keys.length) {
+        return undefined;
+    }
+    return keys;
+};
+
+const sameKeys = (a, b) => a.length === b.length && a.every((key, i) => key === b[i]);
+
+const replacement = (value) => (value !== null && typeof value === "object" ? {r: value} : value);
+
+/**
+ * Compute the delta between two JSON values.
+ *
+ * @param {*} prev - The previous value
+ * @param {*} next - The next value
+ * @returns {*} The delta, or undefined if the values are equal
+ */
+export const diffState = (prev, next) => {
+    if (prev === next) {
+        return undefined;
+    }
+
+    if (isObject(prev) && isObject(next)) {
+        const prevKeys = Object.keys(prev);
+        const nextKeys = Object.keys(next);
+        const changes = {};
+        let changed = false;
+        for (const key of nextKeys) {
+            const delta = key in prev ? diffState(prev[key], next[key]) : replacement(next[key]);
+            if (delta !== undefined) {
+                changes[key] = delta;
+                changed = true;
+            }
+        }
+        if (sameKeys(prevKeys, nextKeys)) {
+            return changed ? {o: changes} : undefined;
+        }
+        return {o: changes, order: nextKeys};
+    }
+
+    if (Array.isArray(prev) && Array.isArray(next)) {
+        const prevKeys = entityKeys(prev);
+        const nextKeys = prevKeys === undefined ? undefined : entityKeys(next);
+        if (nextKeys !== undefined) {
+            const prevByKey = new Map(prevKeys.map((key, i) => [key, prev[i]]));
+            const changes = {};
+            let changed = false;
+            nextKeys.forEach((key, i) => {
+                const delta = prevByKey.has(key) ? diffState(prevByKey.get(key), next[i]) : replacement(next[i]);
+                if (delta !== undefined) {
+                    changes[key] = delta;
+                    changed = true;
+                }
+            });
+            if (sameKeys(prevKeys, nextKeys)) {
+                return changed ? {k: changes} : undefined;
+            }
+            return {k: changes, order: nextKeys};
+        }
+
+        if (prev.length === next.length) {
+            const changes = {};
+            let changed = false;
+            next.forEach((item, i) => {
+                const delta = diffState(prev[i], item);
+                if (delta !== undefined) {
+                    changes[i] = delta;
+                    changed = true;
+                }
+            });
+            return changed ? {a: changes} : undefined;
+        }
+    }
+
+    return replacement(next);
+};
+
+/**
+ * Encode a park state for a client, as a delta if the client holds the last state sent to it.
+ *
+ * @param {Park} park - The park the state belongs to
+ * @param {string} clientId - Id chosen by the client
+ * @param {number|string|null} baseVersion - Version of the state held by the client
+ * @param {Object} state - The full state
+ * @returns {Object} {state_version, state} or {state_version, state_delta}
+ */
+export const encodeStateForClient = (park, clientId, baseVersion, state) => {
+    if (!clientSnapshots.has(park)) {
+        clientSnapshots.set(park, new Map());
+    }
+    const clients = clientSnapshots.get(park);
+    const previous = clients.get(clientId);
+
+    // Snapshots go through JSON so they compare exactly like the data the client received
+    const snapshot = JSON.parse(JSON.stringify(state));
+    const version = previous === undefined ? 1 : previous.version + 1;
+
+    clients.delete(clientId);
+    clients.set(clientId, {version, snapshot});
+    if (clients.size > MAX_CLIENTS_PER_PARK) {
+        clients.delete(clients.keys().next().value);
+    }
+
+    if (previous === undefined || baseVersion === undefined || baseVersion === null || Number(baseVersion) !== previous.version) {
+        return {state_version: version, state: snapshot};
+    }
+    const delta = diffState(previous.snapshot, snapshot);
+    return {state_version: version, state_delta: delta === undefined ? {o: {}} : delta};
+};
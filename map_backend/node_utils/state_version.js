@@ -0,0 +1,31 @@
+/**
+ * Versions of park states, used as ETags for conditional requests.
+ *
+ * Parks never modify a full state after it has been logged. Every change to a park
+ * logs or recalculates a new state object, so a version per state object identifies
+ * the content of the state without serializing it.
+ */
+
+let nextVersion = 1;
+const versions = new WeakMap();
+
+/**
+ * Version of a full park state. New state objects receive increasing versions.
+ *
+ * @param {Object} state - A full state returned by Park.getFullState
+ * @returns {number} The version of the state
+ */
+export const stateVersion = (state) => {
+    if (!versions.has(state)) {
+        versions.set(state, nextVersion++);
+    }
+    return versions.get(state);
+};
+
+/**
+ * ETag of a full park state.
+ *
+ * @param {Object} state - A full state returned by Park.getFullState
+ * @returns {string} The quoted ETag
+ */
+export const stateETag = (state) => `"state-${stateVersion(state)}"`;
@@ -1,18 +1,23 @@
 import Grid from "./grid.js";
-import { PathTile, WaterTile, EntranceTile, ExitTile } from "./tiles/tile.js";
+import { Tile, PathTile, WaterTile, EntranceTile, ExitTile, EmptyTile } from "./tiles/tile.js";
 import Ride from "./tiles/ride.js";
 import Shop from "./tiles/shop.js";
-import Guest from "./people/guest.js";
-import { Janitor, Mechanic, Clown, Stocker, ParkCrier, Vendor } from "./people/staff.js";
+import Guest, { GUEST_PREFERENCES } from "./people/guest.js";
+import { Person } from "./people/person.js";
+import { Staff, Janitor, Mechanic, Clown, Stocker, ParkCrier, Vendor } from "./people/staff.js";
 import Research from "./research.js";
 import config from './config.js';
 import { CommandResult, RNG } from "./utils.js";
 import TrajectoryLogger from "./node_utils/logger.js";
+import { cloneGraph, serializeGraph, deserializeGraph } from "./node_utils/clone.js";
 import fs from 'fs';
 import YAML from 'yaml';
 
 const guest_enums = YAML.parse(fs.readFileSync('./shared/guest_enums.yaml', 'utf8'));
 
+// Number of checkpoints kept per park, older checkpoints are dropped first
+const MAX_CHECKPOINTS = 32;
+
 
 class Park {
     constructor(parkId = null) {
@@ -29,6 +34,9 @@ class Park {
         this.value = 0;
         this.info = "";
         this.action_valid = false;
+        this.checkpoints = new Map();
+        this.next_checkpoint_id = 0;
+        this.training_mode = false;
     }
 
     setSeed(seed) {
@@ -41,6 +49,31 @@ class Park {
         return new CommandResult(true, `Seed=${seed}`);
     }
 
+    /**
+     * Skip the work that only serves visualization and saved trajectories. Midday states are not captured,
+     * only the last day is kept in the trajectory log, and the full state of a day is only computed once it is
+     * requested or before the next action changes the park.
+     *
+     * @param {boolean} enabled - Whether to enable training mode
+     * @returns {CommandResult}
+     */
+    setTrainingMode(enabled) {
+        this.training_mode = enabled;
+        if (enabled) {
+            this.logger.dropHistory();
+            this.midday_history = [];
+        }
+        return new CommandResult(true, `Training mode ${enabled ? "enabled" : "disabled"}`);
+    }
+
+    /**
+     * Compute the full state of the last day if training mode deferred it. Must be called before actions
+     * change the park.
+     */
+    resolveDeferredState() {
+        this.logger.getLastState();
+    }
+
     setSandboxMode(sandbox_steps) {
         this.sandbox_mode = sandbox_steps > 0;
         this.sandbox_steps = sandbox_steps;
@@ -257,6 +290,137 @@ class Park {
         this.logger.newEpisode(initialState);
     }
 
+    /**
+     * Keep a copy of the current full state in memory.
+     *
+     * @returns {string} Id of the checkpoint, to be passed to restoreCheckpoint
+     */
+    checkpoint() {
+        const checkpointId = `checkpoint-${this.next_checkpoint_id++}`;
+        // Stored the way park/set would receive it, so restoring is equivalent to setting the state
+        this.checkpoints.set(checkpointId, JSON.parse(JSON.stringify(this.getFullState({}))));
+        if (this.checkpoints.size > MAX_CHECKPOINTS) {
+            this.checkpoints.delete(this.checkpoints.keys().next().value);
+        }
+        return checkpointId;
+    }
+
+    /**
+     * Set the park to a checkpointed state and start a new history, like park/set does.
+     *
+     * @param {string} checkpointId - Id returned by checkpoint
+     * @returns {CommandResult} Whether the checkpoint exists
+     */
+    restoreCheckpoint(checkpointId) {
+        const state = this.checkpoints.get(checkpointId);
+        if (state === undefined) {
+            return new CommandResult(false, `Unknown checkpoint: ${checkpointId}`);
+        }
+        this.logger.clearSpill();
+        this.logger = new TrajectoryLogger(this.parkId);
+        this.midday_history = [];
+        // setState keeps references to parts of the state, so it receives a copy
+        this.setState(structuredClone(state));
+        return new CommandResult(true, `Restored ${checkpointId}`);
+    }
+
+    /**
+     * Drop a checkpoint that is no longer needed, instead of waiting for it to become the oldest.
+     *
+     * @param {string} checkpointId - Id returned by checkpoint
+     * @returns {CommandResult} Whether the checkpoint existed
+     */
+    deleteCheckpoint(checkpointId) {
+        if (!this.checkpoints.delete(checkpointId)) {
+            return new CommandResult(false, `Unknown checkpoint: ${checkpointId}`);
+        }
+        return new CommandResult(true, `Deleted ${checkpointId}`);
+    }
+
+    /**
+     * Copy the park in process, including the RNG state, so the copy continues exactly like this park would.
+     *
+     * Routing tables are shared with this park since they are never modified. The copy starts a new history
+     * at the current state and has no checkpoints.
+     *
+     * @param {string} parkId - Id of the copy
+     * @returns {Park} The copy
+     */
+    fork(parkId) {
+        const shared = new Set([this.logger, this.checkpoints, this.midday_history]);
+        for (const table of [this.grid.routing_table, this.grid.distance_table, this.grid.articulation_paths]) {
+            if (table !== undefined && table !== null) {
+                shared.add(table);
+            }
+        }
+        const forked = cloneGraph(this, {shared, factories: new Map([[Grid.prototype, () => new Grid(0)]])});
+
+        forked.parkId = parkId;
+        forked.logger = new TrajectoryLogger(parkId);
+        // Routes modify the logged state, so the copy gets its own
+        forked.logger.newEpisode(cloneGraph(this.getFullState({})));
+        forked.midday_history = [];
+        forked.checkpoints = new Map();
+        forked.next_checkpoint_id = 0;
+        return forked;
+    }
+
+    /**
+     * Serialize the park, e.g. to write it to disk, including the RNG state, trajectory and checkpoints.
+     *
+     * Routing tables are left out, they only depend on the paths and are rebuilt by Park.deserialize.
+     * Classes and functions are written by name, so the park can be read back by any thread, also
+     * after a restart.
+     *
+     * @returns {string} The serialized park
+     */
+    serialize() {
+        const exclude = new Set([this.logger]);
+        for (const table of [this.grid?.routing_table, this.grid?.distance_table, this.grid?.articulation_paths]) {
+            if (table !== undefined && table !== null) {
+                exclude.add(table);
+            }
+        }
+        const {data, references} = serializeGraph(this, {exclude});
+        const functions = references.shared.map((fn) => {
+            const name = SERIALIZED_FUNCTION_NAMES.get(fn);
+            if (name === undefined) {
+                throw new TypeError(`Cannot serialize park ${this.parkId}, it references the function ${fn.name}`);
+            }
+            return name;
+        });
+        const prototypes = references.prototypes.map((prototype) => {
+            const name = prototype === null ? null : prototype.constructor?.name;
+            if (name !== null && SERIALIZED_CLASSES.get(name)?.prototype !== prototype) {
+                throw new TypeError(`Cannot serialize park ${this.parkId}, it references an instance of ${name}`);
+            }
+            return name;
+        });
+        // The logger keeps part of the trajectory on disk, so it is serialized by itself
+        return JSON.stringify({park: data, prototypes, functions, trajectory: this.logger.serialize()});
+    }
+
+    /**
+     * Read back a park serialized with serialize. The park continues exactly like the serialized park would.
+     *
+     * @param {string} json - The JSON returned by serialize
+     * @returns {Park} The park
+     */
+    static deserialize(json) {
+        const {park: data, prototypes, functions, trajectory} = JSON.parse(json);
+        const references = {
+            prototypes: prototypes.map((name) => name === null ? null : SERIALIZED_CLASSES.get(name).prototype),
+            shared: functions.map((name) => SERIALIZED_FUNCTIONS.get(name)),
+        };
+        const park = deserializeGraph(data, references, {factories: new Map([[Grid.prototype, () => new Grid(0)]])});
+        if (park.initialized) {
+            park.grid.computeRoutingTable(park.difficulty);
+        }
+        park.logger = new TrajectoryLogger(park.parkId);
+        park.logger.load(trajectory);
+        return park;
+    }
+
     // ACTIONS
     addRide(x, y, subtype, subclass, ticket_price) {
         this.action = `place(x=${x}, y=${y}, type="ride", subtype="${subtype}", subclass="${subclass}", price=${ticket_price})`;
@@ -885,8 +1049,7 @@ class Park {
         if (!this.sandbox_mode) {
             return new CommandResult(false, "Undo day can only be called in sandbox mode");
         }
-        const history = this.logger.getHistory();
-        if (history.length <= 1) {
+        if (this.logger.numEntries() <= 1) {
             return new CommandResult(false, "Already at earliest day");
         }
         this.logger.popLastEntry();
@@ -1069,6 +1232,10 @@ class Park {
     }
 
     proceed({visUpdateFn, parkId, io}) {
+        if (this.training_mode) {
+            visUpdateFn = undefined;
+        }
+        const capture_midday = this.return_midday_states && !this.training_mode;
         // console.time("day_timer");
         // Reset all daily data
         this.guests = []
@@ -1122,10 +1289,10 @@ class Park {
             this.update(i);
 
             let midday_state = null;
-            if (this.return_midday_states || (visUpdateFn!=undefined && i % config.vis_update_rate == 0)) {
+            if (capture_midday || (visUpdateFn!=undefined && i % config.vis_update_rate == 0)) {
                 midday_state = this.calculateMiddayState();
             }
-            if (this.return_midday_states) {
+            if (capture_midday) {
                 midday_states.push(midday_state);
             }
             if (visUpdateFn!=undefined && i % config.vis_update_rate == 0) { visUpdateFn({io, park: this, parkId: parkId, state_type: "mid_day", midday_state: midday_state, tick: i}) }
@@ -1170,18 +1337,23 @@ class Park {
 
         this.staff = [...janitors, ...mechanics, ...specialists];
 
-        if (this.return_midday_states) {
-            this.midday_history.push(midday_states);
+        if (capture_midday) {
+            // Only the last day's midday states are returned, the logger keeps the others
+            this.midday_history = [midday_states];
             this.logger.log_midday_states(midday_states);
         }
         const new_value = this.asset_value + this.money;
         const reward = new_value - this.value;
         this.value = new_value;
-        const full_state = this.calculateFullState();
+        // In training mode the state is computed once it is requested, see resolveDeferredState
+        const full_state = this.training_mode ? () => this.calculateFullState() : this.calculateFullState();
 
         // Log the step - action will be set externally when called from routes
         // For now, log with a placeholder action (will be updated when integrated with action tracking)
         this.logger.log(this.step, this.action_valid, this.action, full_state, reward, this.info);
+        if (this.training_mode) {
+            this.logger.dropHistory();
+        }
 
         if (visUpdateFn!=undefined) { visUpdateFn({io, park: this, parkId: parkId, state_type: "day_end", full_state: full_state, tick: 0}) }
 
@@ -1451,4 +1623,14 @@ class Park {
     }
 }
 
+// Classes of the objects a park consists of, by name, so Park.deserialize can recreate them
+const SERIALIZED_CLASSES = new Map([
+    Object, Park, Grid, RNG, CommandResult, Research,
+    Tile, EntranceTile, ExitTile, PathTile, WaterTile, EmptyTile, Ride, Shop,
+    Person, Guest, Staff, Janitor, Mechanic, Clown, Stocker, ParkCrier, Vendor,
+].map((cls) => [cls.name, cls]));
+// Functions a park references, e.g. the preference of each guest, by name
+const SERIALIZED_FUNCTIONS = new Map(Object.entries(GUEST_PREFERENCES).map(([id, fn]) => [`guest_preferences.${id}`, fn]));
+const SERIALIZED_FUNCTION_NAMES = new Map(Array.from(SERIALIZED_FUNCTIONS, ([name, fn]) => [fn, name]));
+
 export default Park;
\ No newline at end of file
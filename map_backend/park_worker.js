@@ -0,0 +1,44 @@
+/**
+ * Worker thread owning a share of the parks of the server, see node_utils/park_workers.js.
+ *
+ * Receives RPC requests (rpc.js) for its parks from the main thread and answers them with its
+ * own v1 router. Tells the main thread whenever a park is created or deleted, so the main thread
+ * knows which worker to forward a park's requests to.
+ */
+import { parentPort, workerData } from "worker_threads";
+import { createV1Router } from "./routes/index.js";
+import { createRpcDispatcher } from "./rpc.js";
+import { ParkEvictionPolicy } from "./node_utils/park_eviction.js";
+
+// Visualization clients are connected to the main thread, so actions are never broadcast
+const headlessIo = {
+    sockets: { sockets: new Map() },
+    emit: () => {},
+};
+
+// Evicted parks stay assigned to this worker, so they are restored here
+const parks = new Proxy({}, {
+    set(target, parkId, park) {
+        if (!(parkId in target) && !eviction.isEvicted(parkId)) {
+            parentPort.postMessage({ type: "created", parkId });
+        }
+        target[parkId] = park;
+        return true;
+    },
+    deleteProperty(target, parkId) {
+        // Evicted parks are only deleted once the eviction policy forgets them
+        if ((parkId in target) !== eviction.isEvicted(parkId)) {
+            parentPort.postMessage({ type: "deleted", parkId });
+        }
+        delete target[parkId];
+        return true;
+    },
+});
+
+const eviction = new ParkEvictionPolicy(parks, workerData?.evictionOptions);
+
+const dispatchRpc = createRpcDispatcher(createV1Router({ parks, io: headlessIo, eviction }));
+
+parentPort.on("message", async (request) => {
+    parentPort.postMessage({ type: "response", response: await dispatchRpc(request) });
+});
@@ -526,4 +526,5 @@ class Guest extends Person {
     }
 }
 
-export default Guest;
\ No newline at end of file
+export { GUEST_PREFERENCES };
+export default Guest;
@@ -5,20 +5,42 @@ import { shopRouter } from "./shop.js";
 import { staffRouter } from "./staff.js";
 import { parkRouter } from "./park.js";
 import { leaderBoardRouter } from "./leaderboard.js";
+import { negotiateWireFormat } from "../node_utils/msgpack.js";
+import { ParkEvictionPolicy } from "../node_utils/park_eviction.js";
 
 const router = Router();
 
-export const createV1Router = ({parks , io, visUpdateFn}) => {
+export const createV1Router = ({parks , io, visUpdateFn, workers, eviction = new ParkEvictionPolicy(parks)}) => {
+    // Respond with MessagePack instead of JSON to clients that accept it
+    router.use(negotiateWireFormat);
+
     // Health check endpoint for ALB
     router.get("/health", (req, res) => {
         res.status(200).json({ status: 'healthy', timestamp: new Date().toISOString() });
     });
 
+    // Restore evicted parks the request refers to and evict parks that exceed the limits
+    router.use(eviction.middleware);
+
+    // Parks in training mode compute the state of a day once it is requested, which has to happen
+    // before requests change the park
+    router.use((req, res, next) => {
+        if (req.method !== "GET") {
+            parks[req.body?.parkId ?? req.query?.parkId]?.resolveDeferredState?.();
+        }
+        next();
+    });
+
+    // Requests for parks that live on a worker thread are answered by that worker
+    if (workers !== undefined) {
+        router.use(workers.forward);
+    }
+
     router.use("/ride", rideRouter({parks,io}));
     router.use("/guest", guestRouter({parks}));
     router.use("/staff", staffRouter({parks, io}));
     router.use("/shop", shopRouter({parks, io}));
-    router.use("/park", parkRouter(parks, io , visUpdateFn));
+    router.use("/park", parkRouter(parks, io , visUpdateFn, eviction));
     router.use("/leaderboard", leaderBoardRouter({parks}))
     return router;
 };
\ No newline at end of file
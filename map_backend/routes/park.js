@@ -6,57 +6,30 @@ import { v4 as uuidv4 } from 'uuid';
 const router = Router();
 const mutex = new Mutex();
 import TrajectoryLogger from "../node_utils/logger.js";
+import { stepPark, rolloutPark, actBatch } from "../actions.js";
+import { encodeStateForClient } from "../node_utils/state_diff.js";
+import { stateETag } from "../node_utils/state_version.js";
 
 export const removeGuestListFromState = (state) => {
     delete state['guests'];
     return state;
 }
 
+// Number of copies a single park/fork request may create
+const MAX_FORKS = 1000;
+
 const stringToBool = (variable) => {
    return typeof variable == "string" ? variable.toLocaleLowerCase() == "true" : variable 
 }
 
-export const parkRouter = (parks, io, visUpdateFn) => {
-    // Track when each park was last referenced
-    const park_timers = {};
-
-    // Helper function to update the timer for a park
-    const updateParkTimer = (parkId) => {
-        if (parkId && parks[parkId]) {
-            park_timers[parkId] = Date.now();
-        }
-    };
-
-    // Helper function to clean up parks that haven't been referenced in over 2 hours
-    const cleanupOldParks = () => {
-        const twoHoursInMs = 2 * 60 * 60 * 1000;
-        const now = Date.now();
-        const parksToDelete = [];
-
-        for (const parkId in park_timers) {
-            const lastReferenced = park_timers[parkId];
-            if (now - lastReferenced > twoHoursInMs) {
-                parksToDelete.push(parkId);
-            }
-        }
-
-        parksToDelete.forEach(parkId => {
-            delete parks[parkId];
-            delete park_timers[parkId];
-            console.log(`Deleted park ${parkId} - not referenced in over 2 hours`);
-        });
-    };
-
+export const parkRouter = (parks, io, visUpdateFn, eviction) => {
     router.get("/get_new_park_id", async (req, res) => {
         const release = await mutex.acquire();
         try {
-            // Clean up old parks before creating a new one
-            cleanupOldParks();
-            
             // Loop through i starting at 0 until we reach an id that is not in parks
             let uuid = uuidv4();
             parks[uuid] = new Park(uuid);
-            park_timers[uuid] = Date.now();
+            eviction.add(uuid);
             console.log(`New park id created: ${uuid}. There are currently ${Object.keys(parks).length} parks.`);
             res.status(200).json({ data: {'parkId': uuid}, message: "Success" });
         } finally {
@@ -65,7 +38,7 @@ export const parkRouter = (parks, io, visUpdateFn) => {
     });
 
     router.get("/", (req, res) => {
-        let {parkId, fullState = false, includeGuests = false} = req.query;
+        let {parkId, fullState = false, includeGuests = false, clientId, baseVersion} = req.query;
         fullState = stringToBool(fullState)
         includeGuests = stringToBool(includeGuests)
 
@@ -74,11 +47,20 @@ export const parkRouter = (parks, io, visUpdateFn) => {
         } else if (!parks[parkId].initialized) {
             res.status(400).json({data: {}, message: "Park has not yet been initialized"});
         } else {
-            updateParkTimer(parkId);
             if(fullState){
                 var state = parks[parkId].getFullState({includeGuests: includeGuests});
                 state['state']['parkId'] = parkId;
-                res.status(200).json({ data: state, message: "Success" });            
+                // The client already holds this state
+                const etag = stateETag(state);
+                res.set("ETag", etag);
+                if (req.get("If-None-Match") === etag) {
+                    res.status(304).end();
+                } else if (clientId !== undefined) {
+                    // Send only what changed since the last state this client received
+                    res.status(200).json({ data: encodeStateForClient(parks[parkId], clientId, baseVersion, state), message: "Success" });
+                } else {
+                    res.status(200).json({ data: state, message: "Success" });
+                }
             } else {
                 const state = parks[parkId].getState();
                 state['state']['parkId'] = parkId;
@@ -90,8 +72,6 @@ export const parkRouter = (parks, io, visUpdateFn) => {
     router.post("/proceed", (req, res) => {
         let {parkId, onlyAdvanceDay = false} = req.body;
         
-        updateParkTimer(parkId);
-        
         // Apply action
         let done = parks[parkId].proceed({visUpdateFn, parkId, io, onlyAdvanceDay});
         
@@ -99,13 +79,114 @@ export const parkRouter = (parks, io, visUpdateFn) => {
         res.status(200).json({ data: done, message: "Success" });
     });
 
+    // Helper function to apply an action, run the park for a day and collect the new state
+    const runStep = ({parkId, action_name = null, action_args = {}, noopOnInvalidAction = true, includeGuests = false, clientId, baseVersion}) => {
+        return stepPark({
+            park: parks[parkId],
+            parkId,
+            actionName: action_name,
+            actionArgs: action_args,
+            noopOnInvalidAction: stringToBool(noopOnInvalidAction),
+            includeGuests: stringToBool(includeGuests),
+            clientId,
+            baseVersion,
+            io,
+            visUpdateFn
+        });
+    };
+
+    router.post("/step", (req, res) => {
+        let {parkId} = req.body;
+
+        if (parks[parkId] === undefined) {
+            res.status(400).json({ data: {}, message: "Invalid Park Id" });
+        } else if (!parks[parkId].initialized) {
+            res.status(400).json({ data: {}, message: "Park has not yet been initialized" });
+        } else {
+            const result = runStep(req.body);
+            // Send response
+            res.status(200).json({ data: result, message: result.action.message });
+        }
+    });
+
+    router.post("/step_batch", (req, res) => {
+        let {steps = []} = req.body;
+        if (!Array.isArray(steps) || steps.length == 0) {
+            res.status(400).json({ data: {}, message: "No steps provided" });
+            return;
+        }
+        const parkIds = steps.map(step => step.parkId);
+        const invalidIndex = parkIds.findIndex(parkId => parks[parkId] === undefined || !parks[parkId].initialized);
+
+        if (invalidIndex !== -1) {
+            res.status(400).json({ data: {}, message: `Invalid or uninitialized Park Id: ${parkIds[invalidIndex]}` });
+        } else if (new Set(parkIds).size !== parkIds.length) {
+            res.status(400).json({ data: {}, message: "Each park can only be stepped once per batch" });
+        } else {
+            // Step every park in the batch and return the results in the same order
+            const results = steps.map(step => runStep(step));
+            res.status(200).json({ data: {results}, message: "Success" });
+        }
+    });
+
+    router.post("/rollout", (req, res) => {
+        let {parkId, steps = [], noopOnInvalidAction = true, restore = true, returnState = false, includeGuests = false} = req.body;
+
+        if (parks[parkId] === undefined) {
+            res.status(400).json({ data: {}, message: "Invalid Park Id" });
+        } else if (!parks[parkId].initialized) {
+            res.status(400).json({ data: {}, message: "Park has not yet been initialized" });
+        } else if (!Array.isArray(steps) || steps.length == 0) {
+            res.status(400).json({ data: {}, message: "No steps provided" });
+        } else {
+            const result = rolloutPark({
+                park: parks[parkId],
+                parkId,
+                steps,
+                noopOnInvalidAction: stringToBool(noopOnInvalidAction),
+                restore: stringToBool(restore),
+                returnState: stringToBool(returnState),
+                includeGuests: stringToBool(includeGuests),
+                io,
+                visUpdateFn
+            });
+            res.status(200).json({ data: result, message: "Success" });
+        }
+    });
+
+    router.post("/act_batch", (req, res) => {
+        let {parkId, actions = [], atomic = false, proceed = false, includeGuests = false, clientId, baseVersion} = req.body;
+
+        if (parks[parkId] === undefined) {
+            res.status(400).json({ data: {}, message: "Invalid Park Id" });
+        } else if (!parks[parkId].initialized) {
+            res.status(400).json({ data: {}, message: "Park has not yet been initialized" });
+        } else if (!Array.isArray(actions) || actions.length == 0) {
+            res.status(400).json({ data: {}, message: "No actions provided" });
+        } else {
+            const result = actBatch({
+                park: parks[parkId],
+                parkId,
+                actions,
+                atomic: stringToBool(atomic),
+                proceed: stringToBool(proceed),
+                includeGuests: stringToBool(includeGuests),
+                clientId,
+                baseVersion,
+                io,
+                visUpdateFn
+            });
+            res.status(200).json({ data: result, message: result.action.message });
+        }
+    });
+
     router.post("/set", (req, res) => {
         let {parkId, state} = req.body;
         
         if (parks[parkId] !== undefined) {
-            updateParkTimer(parkId);
             parks[parkId].setState(state);
             // Replace the history of the park
+            parks[parkId].logger.clearSpill();
             parks[parkId].logger = new TrajectoryLogger(parkId);
             parks[parkId].midday_history = [];
             parks[parkId].logger.newEpisode(parks[parkId].calculateFullState());
@@ -115,10 +196,67 @@ export const parkRouter = (parks, io, visUpdateFn) => {
         }
     });
 
+    router.post("/checkpoint", (req, res) => {
+        let {parkId} = req.body;
+
+        if (parks[parkId] === undefined) {
+            res.status(400).json({ data: {}, message: "Invalid Park Id" });
+        } else if (!parks[parkId].initialized) {
+            res.status(400).json({ data: {}, message: "Park has not yet been initialized" });
+        } else {
+            const checkpointId = parks[parkId].checkpoint();
+            res.status(200).json({ data: {checkpointId}, message: "Success" });
+        }
+    });
+
+    router.post("/restore", (req, res) => {
+        let {parkId, checkpointId} = req.body;
+
+        if (parks[parkId] !== undefined) {
+            const result = parks[parkId].restoreCheckpoint(checkpointId);
+            res.status(result.success ? 200 : 400).json({ data: {}, message: result.message });
+        } else {
+            res.status(400).json({ data: {}, message: "Invalid Park Id" });
+        }
+    });
+
+    router.post("/delete_checkpoint", (req, res) => {
+        let {parkId, checkpointId} = req.body;
+
+        if (parks[parkId] !== undefined) {
+            const result = parks[parkId].deleteCheckpoint(checkpointId);
+            res.status(result.success ? 200 : 400).json({ data: {}, message: result.message });
+        } else {
+            res.status(400).json({ data: {}, message: "Invalid Park Id" });
+        }
+    });
+
+    router.post("/fork", (req, res) => {
+        let {parkId, n = 1} = req.body;
+        n = Number(n);
+
+        if (parks[parkId] === undefined) {
+            res.status(400).json({ data: {}, message: "Invalid Park Id" });
+        } else if (!parks[parkId].initialized) {
+            res.status(400).json({ data: {}, message: "Park has not yet been initialized" });
+        } else if (!Number.isInteger(n) || n < 1 || n > MAX_FORKS) {
+            res.status(400).json({ data: {}, message: `n must be an integer between 1 and ${MAX_FORKS}` });
+        } else {
+            const parkIds = [];
+            for (let i = 0; i < n; i++) {
+                const uuid = uuidv4();
+                parks[uuid] = parks[parkId].fork(uuid);
+                eviction.touch(uuid);
+                parkIds.push(uuid);
+            }
+            eviction.enforce(new Set([parkId, ...parkIds]));
+            res.status(200).json({ data: {parkIds}, message: "Success" });
+        }
+    });
+
     router.post("/reset", (req, res) => {
         let {parkId, layout, difficulty, starting_money, horizon} = req.body;
         if (parks[parkId] !== undefined) {
-            updateParkTimer(parkId);
             // Apply action
             let result = parks[parkId].reset({layout, difficulty, starting_money, horizon});
             // Emit action
@@ -272,6 +410,17 @@ export const parkRouter = (parks, io, visUpdateFn) => {
         res.status(result.success ? 200 : 400).json({ data: {"sandbox_steps": sandbox_steps}, message: result.message });
     });
 
+    router.post("/training_mode", (req, res) => {
+        let {parkId, enabled = true} = req.body;
+
+        if (parks[parkId] !== undefined) {
+            const result = parks[parkId].setTrainingMode(stringToBool(enabled));
+            res.status(200).json({ data: {"enabled": parks[parkId].training_mode}, message: result.message });
+        } else {
+            res.status(400).json({ data: {}, message: "Invalid Park Id" });
+        }
+    });
+
     router.delete("/delete_park/:parkId", (req, res) => {
         const { parkId } = req.params;
 
@@ -281,8 +430,9 @@ export const parkRouter = (parks, io, visUpdateFn) => {
                 message: "Park not found"
             });
         } else {
+            parks[parkId].logger.clearSpill();
             delete parks[parkId];
-            delete park_timers[parkId];
+            eviction.forget(parkId);
             console.log("Park data cleared successfully");
             res.status(200).json({
                 data: {},
@@ -0,0 +1,69 @@
+/**
+ * Serve v1 API requests that arrive over a persistent connection (socket.io, pipes)
+ * instead of HTTP. Requests are routed through the same express router as HTTP requests,
+ * so every endpoint behaves identically regardless of the transport.
+ *
+ * A request has the form {id, method, path, query, body, headers}, e.g.
+ * {id: 3, method: "POST", path: "/park/step", query: {}, body: {parkId: ...}}.
+ * The response has the form {id, status, body, headers} where body is the usual {data, message}
+ * and headers holds the headers set by the route. headers are optional in both.
+ */
+
+/**
+ * Create a dispatcher for RPC requests.
+ *
+ * @param {Router} v1Router - The router returned by createV1Router
+ * @returns {Function} Function mapping a request to a promise of its response
+ */
+export const createRpcDispatcher = (v1Router) => (request) => new Promise((resolve) => {
+    const {id = null, method = "GET", path = "/", query = {}, body = {}, headers = {}} = request || {};
+    const requestHeaders = Object.fromEntries(Object.entries(headers || {}).map(([name, value]) => [name.toLowerCase(), value]));
+    const responseHeaders = {};
+
+    const req = {
+        method: String(method).toUpperCase(),
+        url: path,
+        originalUrl: path,
+        query: query || {},
+        body: body || {},
+        params: {},
+        headers: requestHeaders,
+        get: (name) => requestHeaders[name.toLowerCase()],
+    };
+
+    const res = {
+        statusCode: 200,
+        locals: {},
+        status(code) {
+            this.statusCode = code;
+            return this;
+        },
+        set(name, value) {
+            responseHeaders[name] = value;
+            return this;
+        },
+        setHeader(name, value) {
+            return this.set(name, value);
+        },
+        json(payload) {
+            resolve({id, status: this.statusCode, body: payload, headers: responseHeaders});
+            return this;
+        },
+        send(payload) {
+            resolve({id, status: this.statusCode, body: payload, headers: responseHeaders});
+            return this;
+        },
+        end() {
+            resolve({id, status: this.statusCode, body: null, headers: responseHeaders});
+            return this;
+        },
+    };
+
+    v1Router(req, res, (error) => {
+        if (error) {
+            resolve({id, status: 500, body: {data: {}, message: error.message}});
+        } else {
+            resolve({id, status: 404, body: {data: {}, message: `Endpoint not found: ${path}`}});
+        }
+    });
+});
@@ -3,9 +3,17 @@ import http from "http";
 import { Server } from "socket.io";
 import cors from "cors";
 import { createV1Router } from "./routes/index.js";
+import { createRpcDispatcher } from "./rpc.js";
+import { ParkWorkerPool } from "./node_utils/park_workers.js";
+import { ParkEvictionPolicy, evictionOptionsFromArgs } from "./node_utils/park_eviction.js";
 
 const app = express();
 const server = http.createServer(app);
+// Node closes idle keep-alive connections after 5 seconds, and a request sent on a pooled connection the
+// server is just closing fails with a connection reset. Clients pausing between steps keep their connections
+// usable for longer this way. The headers timeout must be above the keep-alive timeout.
+server.keepAliveTimeout = 65 * 1000;
+server.headersTimeout = 66 * 1000;
 
 
 // CORS configuration - use environment variable for origin, fallback to localhost
@@ -32,12 +40,37 @@ app.use(cors({
 app.use(express.json({ limit: '10mb' }));
 app.use(express.static("public"));
 
-// Only mount visualization router if --vis flag is passed
-if (process.argv.includes('--vis')) {
-    app.use("/v1", createV1Router({ parks, io, visUpdateFn: updateParkState }));
-} else {
-    app.use("/v1", createV1Router({ parks, io }));
+// Run parks on worker threads if --workers <n> or MAP_WORKERS is given. The visualization
+// needs the parks on the main thread, so it is not combined with workers.
+const workersIndex = process.argv.indexOf('--workers');
+let numWorkers = Number(workersIndex !== -1 ? process.argv[workersIndex + 1] : process.env.MAP_WORKERS || 0);
+if (numWorkers > 0 && process.argv.includes('--vis')) {
+    console.warn("Visualization requires parks on the main thread, ignoring --workers");
+    numWorkers = 0;
 }
+// Parks that are idle for too long, or exceed --max-parks or --max-heap-mb, are evicted from memory,
+// to --evict-dir if given, see node_utils/park_eviction.js
+const evictionOptions = evictionOptionsFromArgs(process.argv, process.env);
+const eviction = new ParkEvictionPolicy(parks, evictionOptions);
+const workers = numWorkers > 0 ? new ParkWorkerPool(numWorkers, evictionOptions) : undefined;
+
+// Only mount visualization router if --vis flag is passed
+const v1Router = process.argv.includes('--vis')
+    ? createV1Router({ parks, io, visUpdateFn: updateParkState, eviction })
+    : createV1Router({ parks, io, workers, eviction });
+app.use("/v1", v1Router);
+
+// Persistent connection alternative to HTTP for control traffic. Uses its own namespace so
+// RPC clients are not counted as visualization clients of the default namespace.
+const dispatchRpc = createRpcDispatcher(v1Router);
+io.of("/rpc").on("connection", (socket) => {
+    socket.on("rpc", async (request, ack) => {
+        const response = await dispatchRpc(request);
+        if (typeof ack === "function") {
+            ack(response);
+        }
+    });
+});
 
 io.on("connection", (socket) => {
     console.log("Client connected");
@@ -93,6 +126,12 @@ server.listen(park_port, () =>
     console.log(`Server running on port ${park_port} (http://localhost:${park_port})`)
 );
 
+// Used by map_py.server_pool, which keeps stdin open for as long as it runs
+if (process.argv.includes('--exit-with-parent')) {
+    process.stdin.on("end", () => process.exit());
+    process.stdin.resume();
+}
+
 process.on( 'SIGINT', function() {
   // console.log( "\nGracefully shutting down from SIGINT" );
   process.exit( );
@@ -0,0 +1,755 @@
+"""Asyncio wrapper for the business simulator game Mini Amusement Parks
+
+Requires the optional httpx dependency: pip install "MAP[async]"
+"""
+
+from map_py.mini_amusement_park import MiniAmusementPark
+from map_py.helpers import async_get_endpoint, async_post_endpoint, async_delete_park_endpoint, accept_header, ParkResponse, LatencyStats, MAX_RETRIES, EndpointNotFoundError
+from map_py.observations_and_actions.pydantic_obs import FullParkObs, ParkDataGranularity, ParkObservabilityMode
+from map_py.observations_and_actions.gym_action import MapsGymActionSpace
+from map_py.observations_and_actions.gym_obs import MapsGymObservationSpace
+from map_py.observations_and_actions.simple_gym_action import MapsSimpleGymActionSpace
+from map_py.observations_and_actions.simple_gym_obs import MapsSimpleGymObservationSpace
+from typing import List, Optional, Union, Tuple, Any
+import numpy as np
+import random
+import uuid
+import copy
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+def create_async_client(max_connections: int = 100, wire_format: str = "json") -> "httpx.AsyncClient":
+    """Create a pooled HTTP client that can be shared by many AsyncMiniAmusementPark instances.
+
+    Args:
+        max_connections: Maximum number of concurrent connections to the server.
+        wire_format: Encoding of the responses, one of "json" or "msgpack".
+
+    Returns:
+        An httpx.AsyncClient with keep-alive connections. Requests that could not connect to the server are
+        retried, other requests are not. Latency histograms of the requests are kept in client.latency.
+    """
+    if httpx is None:
+        raise ImportError("AsyncMiniAmusementPark requires httpx. Install it with: pip install httpx")
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    # Timeouts are set per request by the helpers, see map_py.helpers.request_timeout
+    transport = httpx.AsyncHTTPTransport(limits=limits, retries=MAX_RETRIES)
+    client = httpx.AsyncClient(transport=transport, timeout=None, headers=accept_header(wire_format))
+    client.latency = LatencyStats()
+    return client
+
+
+class AsyncMiniAmusementPark:
+    # Parsing, result handling and observation formatting do not perform any I/O and are shared
+    # with MiniAmusementPark so both classes always produce the same output.
+    parse_action = staticmethod(MiniAmusementPark.parse_action)
+    parse_sandbox_action = staticmethod(MiniAmusementPark.parse_sandbox_action)
+    is_sandbox_action = staticmethod(MiniAmusementPark.is_sandbox_action)
+    update_settings = MiniAmusementPark.update_settings
+    _step_request_data = MiniAmusementPark._step_request_data
+    _process_step_data = MiniAmusementPark._process_step_data
+    _rollout_request_data = MiniAmusementPark._rollout_request_data
+    _process_rollout_data = MiniAmusementPark._process_rollout_data
+    _act_batch_request_data = MiniAmusementPark._act_batch_request_data
+    _process_act_batch_data = MiniAmusementPark._process_act_batch_data
+    _state_request_params = MiniAmusementPark._state_request_params
+    _resolve_state = MiniAmusementPark._resolve_state
+    _format_observation = MiniAmusementPark._format_observation
+    _cached_format_observation = MiniAmusementPark._cached_format_observation
+    _conditional_headers = MiniAmusementPark._conditional_headers
+    _raise_if_evicted = MiniAmusementPark._raise_if_evicted
+
+    def __init__(self,
+                 host: str,
+                 port: str,
+                 park_id: Optional[str] = None,
+                 observation_type: str = "pydantic", # one of "pydantic", "gym", "gym_simple", "raw"
+                 obs_dtype: type = np.float64,
+                 client: Optional["httpx.AsyncClient"] = None,
+                 data_level: ParkDataGranularity = ParkDataGranularity.HIGH,
+                 observability_mode: ParkObservabilityMode = ParkObservabilityMode.NORMAL,
+                 return_raw_in_info: bool = False,
+                 return_detailed_guest_info: bool = False,
+                 negative_reward_on_invalid_action: bool = False,
+                 difficulty: Optional[str] = None,
+                 layout: Optional[str] = None,
+                 starting_money: Optional[int] = None,
+                 horizon: Optional[int] = None,
+                 noop_on_invalid_action: bool = True,
+                 seed: Optional[int] = None,
+                 new_seed_on_reset: bool = False,
+                 state_deltas: bool = False,
+                 cache_observations: bool = False,
+                 training_mode: bool = False,
+                 verbose: bool = True):
+        """Initialize an AsyncMiniAmusementPark environment instance.
+
+        No request is sent until initialize() or reset() is awaited. Use
+        `await AsyncMiniAmusementPark.create(...)` or `async with` to get an initialized instance.
+
+        Args:
+            host: The host address for the park's API server.
+            port: The port number for the park's API server.
+            park_id: Optional park ID to use. If None, a new park ID will be requested from the server.
+            observation_type: Type of observation to return. Must be one of "pydantic", "gym", "gym_simple" or "raw".
+            obs_dtype: Floating point type of "gym" and "gym_simple" observation arrays. np.float32 halves their memory.
+            client: Optional httpx.AsyncClient to send requests with. Share one client between many parks to pool
+                their connections. If None, a client owned by this instance is created.
+            data_level: Granularity level for park data observations (HIGH or LOW). Defaults to HIGH.
+            observability_mode: Observability mode for the park (NORMAL or ORACLE). Defaults to NORMAL.
+            return_raw_in_info: Whether to include raw state in the info dictionary returned by step/reset.
+            return_detailed_guest_info: Whether to include detailed guest information in observations.
+            negative_reward_on_invalid_action: Whether to give a negative reward for invalid actions.
+            difficulty: Optional difficulty setting for the park (e.g., "easy", "medium").
+            layout: Optional layout name to use for the park. Must correspond to a YAML file in the layouts directory.
+            starting_money: Optional starting money amount for the park.
+            horizon: Optional maximum number of steps/episodes for the park.
+            noop_on_invalid_action: If True, the park will proceed even if an invalid action is taken (no-op behavior).
+            seed: Optional random seed for reproducibility.
+            new_seed_on_reset: If True, a new seed will be generated for the park on reset.
+            state_deltas: If True, the server only sends what changed since the last state this instance received.
+                Raw states share unchanged parts between steps and must not be modified.
+            cache_observations: If True, observing an unchanged park returns the cached raw state and observation
+                after a 304 Not Modified response. Cached raw states and observations must not be modified.
+            training_mode: If True, the server does not keep the park's history, capture midday states or broadcast
+                actions to visualizers. Observations and rewards are the same.
+            verbose: Whether to print action parsing errors.
+        Raises:
+            ValueError: If the park settings cannot be initialized (e.g., invalid layout file) or obs_dtype is not
+                a floating point type.
+        """
+        if observation_type not in ["pydantic", "gym", "gym_simple", "raw"]:
+            raise ValueError(f"observation_type must be one of 'pydantic', 'gym', 'gym_simple' or 'raw', got {observation_type}")
+        if not np.issubdtype(obs_dtype, np.floating):
+            raise ValueError(f"obs_dtype must be a floating point type, got {obs_dtype}")
+
+        self.host = host
+        self.port = port
+        self.park_id = park_id
+        self.owns_client = client is None
+        self.client = client if client is not None else create_async_client()
+        self.visualizer = None
+
+        self.observation_type = observation_type
+        self.obs_dtype = np.dtype(obs_dtype)
+        if observation_type == "gym_simple":
+            self.action_space = MapsSimpleGymActionSpace()
+            self.observation_space = MapsSimpleGymObservationSpace(dtype=self.obs_dtype)
+        else:
+            self.action_space = MapsGymActionSpace()
+            self.observation_space = MapsGymObservationSpace(dtype=self.obs_dtype)
+
+        self.data_level = data_level
+        self.observability_mode = observability_mode
+        self.return_raw_in_info = return_raw_in_info
+        self.return_detailed_guest_info = return_detailed_guest_info
+        self.negative_reward_on_invalid_action = negative_reward_on_invalid_action
+        self.noop_on_invalid_action = noop_on_invalid_action
+        self.seed = seed
+        self.new_seed_on_reset = new_seed_on_reset
+        self.verbose = verbose
+        if self.observation_type == "raw":
+            self.return_raw_in_info = False
+
+        # State to reset to after a reset. Used for random resets since we only randomize on the first reset unless hard_reset is True.
+        self.reset_state = None
+        # Server-side checkpoint of reset_state, restored instead of uploading reset_state
+        self.reset_checkpoint = None
+        # Checkpoints kept by the client when the server does not support checkpoints
+        self._local_checkpoints = {}
+        self._last_raw_state = None
+        self.state_deltas = state_deltas
+        self._client_id = uuid.uuid4().hex
+        self._state_version = None
+        self.cache_observations = cache_observations
+        self._state_etag = None
+        self._observation_cache = {}
+        self._initialized = False
+        self.training_mode = training_mode
+
+        self.difficulty = None
+        self.layout = None
+        self.starting_money = None
+        self.horizon = None
+
+        response = self.update_settings(layout, difficulty, starting_money, horizon)
+        if response.status_code != 200:
+            raise ValueError(f"Failed to set the park: {response.message}")
+
+    @classmethod
+    async def create(cls, *args: Any, **kwargs: Any) -> "AsyncMiniAmusementPark":
+        """Create and initialize an AsyncMiniAmusementPark. Takes the same arguments as __init__."""
+        park = cls(*args, **kwargs)
+        await park.initialize()
+        return park
+
+    async def __aenter__(self) -> "AsyncMiniAmusementPark":
+        await self.initialize()
+        return self
+
+    async def __aexit__(self, *args: Any) -> bool:
+        try:
+            await self.delete_park()
+        except Exception as e:
+            print(f"Warning: Failed to clear park during cleanup: {e}")
+
+        await self.aclose()
+
+        # Return False to propagate any exceptions that occurred in the with block
+        return False
+
+    async def initialize(self) -> None:
+        """Request a park ID from the server if needed and seed the park."""
+        if self._initialized:
+            return
+        if self.park_id is None:
+            result = await async_get_endpoint(self.host, self.port, "park/get_new_park_id", {}, self.client)
+            self.park_id = result.data['parkId']
+        self._initialized = True
+        await self.set_seed(self.seed)
+        if self.training_mode:
+            await self.set_training_mode(True)
+
+    async def aclose(self) -> None:
+        """Close the HTTP client if it is owned by this instance."""
+        if self.owns_client:
+            try:
+                await self.client.aclose()
+            except:
+                pass
+
+    def latency_stats(self) -> dict:
+        """Latency of the requests sent through the client, per endpoint, see MiniAmusementPark.latency_stats.
+
+        Empty if the client was not created by create_async_client.
+        """
+        latency = getattr(self.client, "latency", None)
+        return latency.summary() if latency is not None else {}
+
+    async def set_seed(self, seed: Optional[int]) -> None:
+        """Set the random seed for the park environment.
+
+        Args:
+            seed: The random seed value. If None, uses the seed from initialization.
+        """
+        seed = seed or self.seed
+        if seed is not None:
+            result = await async_post_endpoint(self.host, self.port, "park/seed", {"parkId": self.park_id, "seed": seed}, self.client)
+            if result.error:
+                print("ERROR: ", result.message)
+
+    async def set(self, raw_state: dict) -> Tuple[Union[FullParkObs, dict], dict]:
+        """Set the environment to a particular state.
+
+        Args:
+            raw_state: The raw state dictionary to set the environment to. Must be a complete raw state dictionary.
+
+        Returns:
+            A tuple containing the observation and an info dictionary.
+
+        Raises:
+            RuntimeError: If there is an error setting the park state.
+        """
+        await self.initialize()
+        params = {'parkId': self.park_id, 'state': raw_state.copy()}
+        result = await async_post_endpoint(self.host, self.port, "park/set", params, self.client)
+        if result.error:
+            raise RuntimeError(f"Error setting park: {result.message}")
+
+        info = {}
+        obs, raw_state = await self.get_observation_and_raw_state()
+        if self.return_raw_in_info:
+            info['raw_state'] = raw_state
+        return obs, info
+
+    async def set_training_mode(self, enabled: bool) -> None:
+        """Enable or disable training mode for the park on the server.
+
+        In training mode the server only keeps the most recent state of the park and visualizers are not updated.
+        Does nothing but warn if the server does not support training mode.
+
+        Args:
+            enabled: Whether to enable training mode.
+
+        Raises:
+            RuntimeError: If the training mode of the park cannot be set.
+        """
+        await self.initialize()
+        try:
+            result = await async_post_endpoint(self.host, self.port, "park/training_mode", {'parkId': self.park_id, 'enabled': enabled}, self.client)
+        except EndpointNotFoundError:
+            print("Warning: The server does not support training mode")
+            self.training_mode = False
+            return
+
+        if result.error:
+            raise RuntimeError(f"Error setting training mode: {result.message}")
+        self.training_mode = enabled
+
+    async def checkpoint(self) -> str:
+        """Save the current state of the park on the server.
+
+        Falls back to keeping the raw state on the client if the server does not support checkpoints.
+
+        Returns:
+            The id of the checkpoint, to be passed to restore().
+
+        Raises:
+            RuntimeError: If the park cannot be checkpointed.
+        """
+        await self.initialize()
+        try:
+            result = await async_post_endpoint(self.host, self.port, "park/checkpoint", {'parkId': self.park_id}, self.client)
+        except EndpointNotFoundError:
+            checkpoint_id = f"local-{uuid.uuid4().hex}"
+            self._local_checkpoints[checkpoint_id] = await self.get_raw_state()
+            return checkpoint_id
+
+        if result.error:
+            raise RuntimeError(f"Error checkpointing park: {result.message}")
+        return result.data['checkpointId']
+
+    async def restore(self, checkpoint_id: str) -> Tuple[Union[FullParkObs, dict], dict]:
+        """Set the environment to a state saved with checkpoint().
+
+        Unlike set(), the state is not sent to the server.
+
+        Args:
+            checkpoint_id: The id returned by checkpoint().
+
+        Returns:
+            A tuple containing the observation and an info dictionary.
+
+        Raises:
+            RuntimeError: If the checkpoint does not exist.
+        """
+        await self.initialize()
+        result = await self._restore(checkpoint_id)
+        if result.error:
+            raise RuntimeError(f"Error restoring park: {result.message}")
+
+        info = {}
+        obs, raw_state = await self.get_observation_and_raw_state()
+        if self.return_raw_in_info:
+            info['raw_state'] = raw_state
+        return obs, info
+
+    async def delete_checkpoint(self, checkpoint_id: str) -> None:
+        """Delete a checkpoint saved with checkpoint() that is no longer needed.
+
+        The server only keeps the most recent checkpoints of each park, so deleting unused checkpoints
+        keeps older ones that are still needed from being dropped.
+
+        Args:
+            checkpoint_id: The id returned by checkpoint().
+
+        Raises:
+            RuntimeError: If the checkpoint does not exist.
+        """
+        result = await self._delete_checkpoint(checkpoint_id)
+        if result is not None and result.error:
+            raise RuntimeError(f"Error deleting checkpoint: {result.message}")
+
+    async def _replace_evicted_park(self, result: ParkResponse, info: dict) -> bool:
+        """Report the park status of a response in info and switch to a new park if the server deleted the park.
+
+        Args:
+            result: A response to a request for the park.
+            info: The info dictionary to report the park status in.
+
+        Returns:
+            Whether the park was evicted and replaced by a new park.
+        """
+        if result.park_status is not None:
+            info['park_status'] = result.park_status
+        if result.park_status != "evicted":
+            return False
+        if self.verbose:
+            print(f"Park {self.park_id} was evicted by the server, continuing with a new park")
+        new_park = await async_get_endpoint(self.host, self.port, "park/get_new_park_id", {}, self.client)
+        self.park_id = new_park.data['parkId']
+        self._last_raw_state = None
+        self._state_version = None
+        self._state_etag = None
+        self._observation_cache = {}
+        self.reset_checkpoint = None
+        await self.set_seed(self.seed)
+        if self.training_mode:
+            await self.set_training_mode(True)
+        return True
+
+    async def _restore(self, checkpoint_id: str) -> ParkResponse:
+        """Restore a checkpoint without observing the park."""
+        if checkpoint_id in self._local_checkpoints:
+            params = {'parkId': self.park_id, 'state': self._local_checkpoints[checkpoint_id]}
+            return await async_post_endpoint(self.host, self.port, "park/set", params, self.client)
+        return await async_post_endpoint(self.host, self.port, "park/restore", {'parkId': self.park_id, 'checkpointId': checkpoint_id}, self.client)
+
+    async def _delete_checkpoint(self, checkpoint_id: str) -> Optional[ParkResponse]:
+        """Delete a checkpoint, returning None if it was kept on the client or the server does not support deleting checkpoints."""
+        if self._local_checkpoints.pop(checkpoint_id, None) is not None:
+            return None
+        try:
+            return await async_post_endpoint(self.host, self.port, "park/delete_checkpoint", {'parkId': self.park_id, 'checkpointId': checkpoint_id}, self.client)
+        except EndpointNotFoundError:
+            return None
+
+    async def fork(self, n: int = 1) -> List["AsyncMiniAmusementPark"]:
+        """Copy the park into n new parks, e.g. to try different actions from the current state.
+
+        See MiniAmusementPark.fork.
+
+        Args:
+            n: Number of copies.
+
+        Returns:
+            Environments with the settings of this one for the new parks, sharing the HTTP client of this one.
+
+        Raises:
+            RuntimeError: If the park cannot be forked.
+        """
+        await self.initialize()
+        try:
+            result = await async_post_endpoint(self.host, self.port, "park/fork", {'parkId': self.park_id, 'n': n}, self.client)
+        except EndpointNotFoundError:
+            raw_state = await self.get_raw_state()
+            forks = []
+            for _ in range(n):
+                result = await async_get_endpoint(self.host, self.port, "park/get_new_park_id", {}, self.client)
+                forks.append(self._forked_env(result.data['parkId']))
+                await forks[-1].set(raw_state)
+            return forks
+
+        if result.error:
+            raise RuntimeError(f"Error forking park: {result.message}")
+        return [self._forked_env(park_id) for park_id in result.data['parkIds']]
+
+    def _forked_env(self, park_id: str) -> "AsyncMiniAmusementPark":
+        """Copy of this environment for a forked park."""
+        env = copy.copy(self)
+        env.owns_client = False
+        env.park_id = park_id
+        env._client_id = uuid.uuid4().hex
+        env._local_checkpoints = {}
+        env._last_raw_state = None
+        env._state_version = None
+        env._state_etag = None
+        env._observation_cache = {}
+        env.reset_checkpoint = None
+        return env
+
+    async def get_raw_state(self) -> dict:
+        """Returns the raw state of the environment specified by park_id."""
+        params = {'parkId': self.park_id, 'fullState': True, 'includeGuests': self.return_detailed_guest_info,
+                  **self._state_request_params()}
+        result = await async_get_endpoint(self.host, self.port, "park/", params, self.client, self._conditional_headers())
+        self._raise_if_evicted(result)
+        if result.error:
+            raise RuntimeError(f'Server encountered the error while observing: {result.message}. \nFull response: {result}')
+
+        if result.status_code == 304:
+            return self._last_raw_state
+        self._state_etag = result.etag
+        if 'state_version' in result.data:
+            return self._resolve_state(result.data)
+        self._last_raw_state = result.data
+        return result.data
+
+    async def get_observation_and_raw_state(self) -> Tuple[Union[FullParkObs, dict], dict]:
+        """Observe the current park.
+
+        Returns:
+            A tuple containing the observation (formatted according to observation_type) and the raw state.
+        """
+        raw_state = await self.get_raw_state()
+        return self._cached_format_observation(raw_state), raw_state
+
+    async def observe(self) -> Union[FullParkObs, dict]:
+        """Observe the current park.
+
+        Returns:
+            The observation of the environment, formatted according to observation_type.
+        """
+        return (await self.get_observation_and_raw_state())[0]
+
+    async def reset(self, *, seed: int | None = None, options: dict[str, Any] | None = None) -> Tuple[Union[FullParkObs, dict], dict]:
+        """Reset the environment to an initial state.
+
+        Args:
+            seed: the seed to be used after the reset, if provided.
+            options: if the 'hard_reset' is provided and set to True, then this forces a full reset
+                     even if a reset_state is cached.
+
+        Returns:
+            A tuple containing the park observation and an info dictionary. If an error occurred,
+            'error' will be a key in info. info['park_status'] is "restored" or "evicted" if the server had
+            evicted the park, see MiniAmusementPark.reset.
+        """
+        await self.initialize()
+        info = {}
+
+        hard_reset = False
+        if options is not None and 'hard_reset' in options:
+            hard_reset = options['hard_reset']
+            if not isinstance(hard_reset, bool):
+                raise ValueError('hard_reset provided in options must be a bool')
+
+        # If this has been randomly reset before, then restore stored start state
+        restored = False
+        if self.layout is None and self.reset_state is not None and not hard_reset:
+            # Restore the checkpoint of the start state, only uploading the start state if the checkpoint is gone
+            if self.reset_checkpoint is not None:
+                result = await self._restore(self.reset_checkpoint)
+                await self._replace_evicted_park(result, info)
+                restored = not result.error
+            if not restored:
+                await self.set(self.reset_state)
+        else:
+            reset_args = {'parkId': self.park_id,
+                          'layout': self.layout if self.layout is not None else "",
+                          'difficulty': self.difficulty,
+                          'starting_money': self.starting_money,
+                          'horizon': self.horizon}
+
+            result = await async_post_endpoint(self.host, self.port, "park/reset", reset_args, self.client)
+            if await self._replace_evicted_park(result, info):
+                reset_args['parkId'] = self.park_id
+                result = await async_post_endpoint(self.host, self.port, "park/reset", reset_args, self.client)
+            if result.error:
+                info['error'] = {
+                    'message': result.message,
+                    'type': 'reset_error'
+                }
+                print(f"Error resetting park: {result.message}")
+
+        if seed is not None:
+            await self.set_seed(seed)
+        elif self.new_seed_on_reset:
+            self.seed = self.seed + 1 if self.seed is not None else random.randint(0, 10000)
+            self.seed = self.seed % 10000
+            await self.set_seed(self.seed)
+
+        obs, raw_state = await self.get_observation_and_raw_state()
+
+        if self.layout is None:
+            self.reset_state = raw_state
+            if not restored:
+                # The start state changed, so the checkpoint of the previous start state is not needed anymore
+                if self.reset_checkpoint is not None:
+                    await self._delete_checkpoint(self.reset_checkpoint)
+                self.reset_checkpoint = await self.checkpoint()
+
+        if self.return_raw_in_info:
+            info['raw_state'] = raw_state
+
+        return obs, info
+
+    async def rollout(self, actions: List[Union[str, np.ndarray]], restore: bool = True, return_state: bool = False) -> dict:
+        """Perform a sequence of step actions on the server without observing the park in between.
+
+        See MiniAmusementPark.rollout.
+
+        Args:
+            actions: The actions to perform, one per day.
+            restore: If True, the park is left in its current state and the actions are performed on a copy.
+            return_state: If True, the raw state at the end of the rollout is included in the result.
+
+        Returns:
+            A dictionary with the rewards, valid, terminated, truncated and value of the rollout.
+
+        Raises:
+            RuntimeError: If the server encounters an error during the rollout.
+        """
+        decoded = [await self._decode_action(action) for action in actions]
+
+        params = self._rollout_request_data(decoded, restore, return_state)
+        result = await async_post_endpoint(self.host, self.port, "park/rollout", params, self.client)
+        if result.error:
+            raise RuntimeError(f'Server encountered the error during the rollout: {result.message}. \nFull response: {result}')
+        return self._process_rollout_data(result.data, restore, return_state)
+
+    async def act_batch(self, actions: List[Union[str, np.ndarray]], atomic: bool = False, proceed: bool = False) -> Tuple[Union[FullParkObs, dict], float, bool, bool, dict]:
+        """Apply several actions within the same day with a single request.
+
+        See MiniAmusementPark.act_batch.
+
+        Args:
+            actions: The actions to apply, in order.
+            atomic: If True, the actions are only applied if all of them succeed.
+            proceed: If True, the park is advanced by a day after the actions, unless an atomic batch failed.
+
+        Returns:
+            A 5-tuple like step(). info['action_results'] holds the result of each action.
+
+        Raises:
+            ParkEvictedError: If the server had deleted the park, see MiniAmusementPark.step.
+            RuntimeError: If the server encounters an error while applying the actions.
+        """
+        decoded = [await self._decode_action(action) for action in actions]
+
+        data, parse_errors = self._act_batch_request_data(decoded, atomic, proceed)
+        result = await async_post_endpoint(self.host, self.port, "park/act_batch", data, self.client)
+        info = {}
+        if result.park_status is not None:
+            info['park_status'] = result.park_status
+        self._raise_if_evicted(result)
+        if result.error:
+            raise RuntimeError(f'Server encountered the error while applying the actions: {result.message}. \nFull response: {result}')
+
+        reward, terminated, truncated, info, raw_state = self._process_act_batch_data(result.data, parse_errors, info)
+        obs = self._cached_format_observation(raw_state)
+
+        if self.return_raw_in_info:
+            info['raw_state'] = raw_state
+
+        return obs, reward, terminated, truncated, info
+
+    async def _decode_action(self, action: Union[str, np.ndarray, None]) -> Optional[str]:
+        """Convert a gym action array into an action string.
+
+        See MiniAmusementPark._decode_action.
+
+        Args:
+            action: The action string or gym action array.
+
+        Returns:
+            The action string. Strings and None are returned unchanged.
+        """
+        if action is None or isinstance(action, str):
+            return action
+        if self.observation_type == "gym_simple":
+            # Simple mode needs state for intelligent placement. The state of the previous observation
+            # is still current since only this environment modifies the park.
+            raw_state = self._last_raw_state if self._last_raw_state is not None else await self.get_raw_state()
+            return MapsSimpleGymActionSpace.decode_action(action, raw_state)
+        # Full mode has all parameters in action
+        return MapsGymActionSpace.decode_action(action)
+
+    async def step(self, action: Union[str, np.ndarray]) -> Tuple[Union[FullParkObs, dict], float, bool, bool, dict]:
+        """Perform a step action in the environment.
+
+        Args:
+            action: The action to be performed.
+
+        Returns:
+            A 5-tuple containing the observation, reward, terminated, truncated and info dictionary.
+            If an error occurred, 'error' will be a key in info. info['park_status'] is "restored" if the
+            server had evicted the park to disk. For wait(days=n), info['daily_rewards'] holds the reward
+            of each day, see MiniAmusementPark.step.
+
+        Raises:
+            ParkEvictedError: If the server had deleted the park, see MiniAmusementPark.step.
+            RuntimeError: If the server encounters an error while stepping.
+        """
+        action = await self._decode_action(action)
+        data, info = self._step_request_data(action)
+        result = await async_post_endpoint(self.host, self.port, "park/step", data, self.client)
+        if result.park_status is not None:
+            info['park_status'] = result.park_status
+        self._raise_if_evicted(result)
+        if result.error:
+            raise RuntimeError(f'Server encountered the error while stepping: {result.message}. \nFull response: {result}')
+
+        reward, terminated, truncated, info, raw_state = self._process_step_data(result.data, info)
+        obs = self._cached_format_observation(raw_state)
+
+        if self.return_raw_in_info:
+            info['raw_state'] = raw_state
+
+        return obs, reward, terminated, truncated, info
+
+    async def sandbox_action(self, action: str) -> Tuple[Union[FullParkObs, dict], dict]:
+        """Perform a sandbox action in the environment.
+
+        Args:
+            action: The sandbox action string to perform.
+
+        Returns:
+            A tuple containing the observation after the action and an info dictionary.
+            If an error occurred, 'error' will be a key in info.
+        """
+        info = {}
+        action_result = self.parse_sandbox_action(action, self.park_id)
+        if action_result.error:
+            info['error'] = {
+                'message': action_result.message,
+                'type': 'invalid_sandbox_action'
+            }
+            print("Error parsing sandbox action: ", action_result.message)
+            action_name, action_args = None, None
+        else:
+            action_name, action_args = action_result.data
+
+        if action_name in ["undo_day", "max_money", "max_research", "set_sandbox_mode"]:
+            data = {"parkId": self.park_id}
+            if action_name == "set_sandbox_mode":
+                data["sandbox_steps"] = action_args['sandbox_steps']
+            result = await async_post_endpoint(self.host, self.port, f"park/{action_name}", data, self.client)
+            if result.error:
+                info['error'] = {
+                    'message': result.message,
+                    'type': f'{action_name}_error'
+                }
+        elif action_name == "reset":
+            return await self.reset(options={'hard_reset': True})
+        elif action_name == "change_settings":
+            result = self.update_settings(layout=action_args["layout"], difficulty=action_args["difficulty"])
+            if not result.error:
+                return await self.reset(options={'hard_reset': True})
+            info['error'] = {
+                'message': result.message,
+                'type': 'change_settings_error'
+            }
+        elif 'error' not in info:
+            info['error'] = {
+                'message': f"Invalid sandbox action: {action_name}",
+                'type': 'invalid_sandbox_action'
+            }
+
+        obs, raw_state = await self.get_observation_and_raw_state()
+        if self.return_raw_in_info:
+            info['raw_state'] = raw_state
+        return obs, info
+
+    async def save_trajectory(self, username: str = "anon",
+                              save_local: bool = False, save_to_cloud: bool = False,
+                              save_path: Optional[str] = None) -> Union[dict, ParkResponse]:
+        """Save the current trajectory to the leaderboard.
+
+        Args:
+            username: The username to associate with this trajectory.
+            save_local: Whether to save the trajectory locally.
+            save_to_cloud: Whether to save the trajectory to the cloud.
+            save_path: Optional path to save the trajectory to when saving locally.
+
+        Returns:
+            The response data dictionary if successful, or ParkResponse if an error occurred.
+        """
+        data = {
+            "parkId": self.park_id,
+            "saveLocal": save_local,
+            "saveToCloud": save_to_cloud,
+            "name": username or "anon",
+        }
+        if save_path is not None:
+            data["savePath"] = save_path
+        result = await async_post_endpoint(self.host, self.port, "leaderboard/", data, self.client)
+        if result.error:
+            print("ERROR: ", result.message)
+            return result
+        return result.data
+
+    async def delete_park(self) -> dict:
+        """Delete the park instance from the backend server.
+
+        Returns:
+            dict: Response data from the server
+        """
+        result = await async_delete_park_endpoint(self.host, self.port, self.park_id, self.client)
+        if result.error:
+            print(f"ERROR clearing park: {result.message}")
+        return result.data
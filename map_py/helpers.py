@@ -4,8 +4,23 @@
 from argparse import Action
 import requests
 import ast
-import json
+import bisect
+import re
+import threading
+import time
 from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+WIRE_FORMATS = ["json", "msgpack"]
+MSGPACK_CONTENT_TYPE = "application/msgpack"
 
 @dataclass
 class ParkResponse:
@@ -13,25 +28,288 @@ class ParkResponse:
     message: str
     data: dict
     error: bool
+    etag: Optional[str] = None
+    # "restored" if the server restored the park from disk for this request, "evicted" if it deleted the park
+    park_status: Optional[str] = None
+
+
+class EndpointNotFoundError(ValueError):
+    """The server answered 404, i.e. it does not provide the requested endpoint."""
+
+
+class ParkEvictedError(RuntimeError):
+    """The server deleted the park to free memory. reset() continues with a new park.
+
+    Attributes:
+        park_id: The id of the deleted park.
+        park_status: The park status the server reported, "evicted".
+    """
+
+    def __init__(self, park_id: str, message: str, park_status: str = "evicted"):
+        super().__init__(message)
+        self.park_id = park_id
+        self.park_status = park_status
+
+# Seconds to wait for a connection to the server
+CONNECT_TIMEOUT = 5
+# Seconds to wait for the response to a request, by method, and for endpoints that can run many days.
+# Timeouts only bound how long a stalled server blocks the caller, so they are generous.
+READ_TIMEOUTS = {"GET": 60, "POST": 600, "PUT": 60, "DELETE": 60}
+ROUTE_READ_TIMEOUTS = {"park/rollout": 3600, "park/step_batch": 3600, "park/act_batch": 3600, "leaderboard/": 600}
+# Retries of idempotent requests and the base of their exponential backoff in seconds
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.1
+RETRY_STATUSES = (502, 503, 504)
+# GET endpoints that create something on the server, so a retry could create it twice. Like other
+# non-idempotent requests they are only retried if the connection could not be established.
+NON_IDEMPOTENT_ROUTES = ("park/get_new_park_id",)
+# Connections kept open per host, should be at least the number of threads sharing a session
+POOL_SIZE = 32
+
+# Segments of a URL path that are arguments rather than part of the endpoint, e.g. coordinates and park ids
+_PATH_ARGUMENT = re.compile(r"^(-?\d+|[0-9a-fA-F-]{32,})$")
+
+
+def _endpoint_path(url: str) -> str:
+    """Path of a URL created by create_url, without the leading /v1/."""
+    path = urlparse(url).path
+    if path.startswith("/v1/"):
+        path = path[len("/v1/"):]
+    return path
+
+
+def request_timeout(method: str, url: str, connect_timeout: Optional[float] = CONNECT_TIMEOUT,
+                    read_timeouts: Optional[dict] = None, route_read_timeouts: Optional[dict] = None) -> tuple:
+    """The (connect, read) timeout in seconds of a request.
+
+    Args:
+        method: The HTTP method of the request.
+        url: The URL of the request, as created by create_url.
+        connect_timeout: Seconds to wait for a connection.
+        read_timeouts: Seconds to wait for a response by HTTP method, defaults to READ_TIMEOUTS.
+        route_read_timeouts: Seconds to wait for a response of endpoints starting with the given paths,
+            overriding read_timeouts. Defaults to ROUTE_READ_TIMEOUTS.
+
+    Returns:
+        The timeouts, None waits forever.
+    """
+    read_timeouts = READ_TIMEOUTS if read_timeouts is None else read_timeouts
+    route_read_timeouts = ROUTE_READ_TIMEOUTS if route_read_timeouts is None else route_read_timeouts
+    path = _endpoint_path(url)
+    routes = [route for route in route_read_timeouts if path.startswith(route)]
+    if routes:
+        return (connect_timeout, route_read_timeouts[max(routes, key=len)])
+    return (connect_timeout, read_timeouts.get(method.upper()))
+
+
+class LatencyHistogram:
+    """Request latencies counted in exponentially growing buckets."""
+
+    # Upper bounds of the buckets in milliseconds, latencies above the last bound are counted in an extra bucket
+    BUCKET_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, latency_ms: float, error: bool = False) -> None:
+        """Count a request.
+
+        Args:
+            latency_ms: Time until the response was received, or until the request failed.
+            error: Whether the request failed without a response, e.g. on a timeout.
+        """
+        self.counts[bisect.bisect_left(self.BUCKET_BOUNDS_MS, latency_ms)] += 1
+        self.count += 1
+        self.errors += error
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the latency below which a fraction q of the requests completed, in milliseconds."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.BUCKET_BOUNDS_MS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def summary(self) -> dict:
+        """Count, errors, mean, p50, p90, p99 and max latency in milliseconds and the bucket counts."""
+        return {'count': self.count,
+                'errors': self.errors,
+                'mean_ms': self.total_ms / self.count if self.count else 0.0,
+                'p50_ms': self.quantile(0.5),
+                'p90_ms': self.quantile(0.9),
+                'p99_ms': self.quantile(0.99),
+                'max_ms': self.max_ms,
+                'buckets': {**{f"<={bound}ms": count for bound, count in zip(self.BUCKET_BOUNDS_MS, self.counts)},
+                            f">{self.BUCKET_BOUNDS_MS[-1]}ms": self.counts[-1]}}
+
+
+class LatencyStats:
+    """Latency histograms of the requests sent through a session, per endpoint. Thread safe."""
+
+    def __init__(self):
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def endpoint(method: str, url: str) -> str:
+        """Name of the endpoint of a request, e.g. "PUT ride/:arg/:arg" for a ride modified at any position."""
+        segments = [":arg" if _PATH_ARGUMENT.match(segment) else segment for segment in _endpoint_path(url).split("/")]
+        return f"{method.upper()} {'/'.join(segments)}"
+
+    def record(self, method: str, url: str, latency_ms: float, error: bool = False) -> None:
+        """Count a request in the histogram of its endpoint."""
+        endpoint = self.endpoint(method, url)
+        with self._lock:
+            histogram = self.histograms.get(endpoint)
+            if histogram is None:
+                histogram = self.histograms[endpoint] = LatencyHistogram()
+            histogram.record(latency_ms, error)
+
+    def summary(self) -> dict:
+        """Summaries of the histograms, see LatencyHistogram.summary, by endpoint."""
+        with self._lock:
+            return {endpoint: histogram.summary() for endpoint, histogram in sorted(self.histograms.items())}
+
+    def reset(self) -> None:
+        """Forget all recorded requests."""
+        with self._lock:
+            self.histograms = {}
+
+
+class HttpSession(requests.Session):
+    """requests.Session with a connection pool, timeouts, retries of idempotent requests and latency histograms.
+
+    Only GET requests are retried, on connection errors, read errors and 502/503/504 responses, with
+    exponential backoff. Other requests, and GET requests of NON_IDEMPOTENT_ROUTES, are only retried if the
+    connection to the server could not be established, in which case the server never received them.
+    """
+
+    def __init__(self, pool_size: int = POOL_SIZE, max_retries: int = MAX_RETRIES, backoff: float = RETRY_BACKOFF,
+                 connect_timeout: Optional[float] = CONNECT_TIMEOUT, read_timeouts: Optional[dict] = None,
+                 route_read_timeouts: Optional[dict] = None):
+        """Create a session.
+
+        Args:
+            pool_size: Connections kept open per host. Threads sharing the session wait for a free connection
+                if more requests are in flight.
+            max_retries: Number of retries of a request.
+            backoff: Seconds before the first retry, doubled for every further retry.
+            connect_timeout: Seconds to wait for a connection. None waits forever.
+            read_timeouts: Seconds to wait for a response by HTTP method, defaults to READ_TIMEOUTS. None waits forever.
+            route_read_timeouts: Seconds to wait for a response of endpoints starting with the given paths,
+                overriding read_timeouts. Defaults to ROUTE_READ_TIMEOUTS.
+        """
+        super().__init__()
+        retry = Retry(total=max_retries, connect=max_retries, read=max_retries, status=max_retries,
+                      backoff_factor=backoff, status_forcelist=RETRY_STATUSES,
+                      allowed_methods=frozenset({"GET", "HEAD"}), raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+        self._non_idempotent_adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                                                   max_retries=retry.new(read=0, status=0))
+        self.connect_timeout = connect_timeout
+        self.read_timeouts = dict(READ_TIMEOUTS if read_timeouts is None else read_timeouts)
+        self.route_read_timeouts = dict(ROUTE_READ_TIMEOUTS if route_read_timeouts is None else route_read_timeouts)
+        self.latency = LatencyStats()
+
+    def get_adapter(self, url):
+        if _endpoint_path(url).startswith(NON_IDEMPOTENT_ROUTES):
+            return self._non_idempotent_adapter
+        return super().get_adapter(url)
+
+    def close(self):
+        super().close()
+        self._non_idempotent_adapter.close()
+
+    def request(self, method, url, *args, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = request_timeout(method, url, self.connect_timeout, self.read_timeouts, self.route_read_timeouts)
+        start = time.perf_counter()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except requests.RequestException:
+            self.latency.record(method, url, (time.perf_counter() - start) * 1000, error=True)
+            raise
+        self.latency.record(method, url, (time.perf_counter() - start) * 1000)
+        return response
+
+
+_default_session = None
+_default_session_lock = threading.Lock()
+
+def default_session() -> HttpSession:
+    """The HttpSession used by the helpers when no session is given, shared by all callers."""
+    global _default_session
+    with _default_session_lock:
+        if _default_session is None:
+            _default_session = HttpSession()
+        return _default_session
+
+def _decode_body(response) -> dict:
+    """Decode a response body, which is MessagePack if the server honoured a msgpack Accept header and JSON otherwise."""
+    headers = getattr(response, "headers", None) or {}
+    if headers.get("Content-Type", "").startswith(MSGPACK_CONTENT_TYPE):
+        return msgpack.unpackb(response.content, raw=False, strict_map_key=False)
+    return response.json()
+
+def accept_header(wire_format: str) -> dict:
+    """Headers requesting responses in the given wire format.
+
+    Args:
+        wire_format: One of "json" or "msgpack".
+
+    Returns:
+        The headers to send with every request.
+
+    Raises:
+        ValueError: If the wire format is not supported.
+        ImportError: If the wire format is "msgpack" and msgpack is not installed.
+    """
+    if wire_format not in WIRE_FORMATS:
+        raise ValueError(f"wire_format must be one of {WIRE_FORMATS}, got {wire_format}")
+    if wire_format == "json":
+        return {}
+    if msgpack is None:
+        raise ImportError("wire_format='msgpack' requires msgpack. Install it with: pip install msgpack")
+    return {"Accept": f"{MSGPACK_CONTENT_TYPE}, application/json"}
 
 def _handle_response(response) -> ParkResponse:
+    headers = getattr(response, "headers", None) or {}
+    etag = headers.get("ETag")
+    park_status = headers.get("X-Park-Status")
+    if response.status_code == 304:
+        return ParkResponse(status_code=304, message="Not Modified", data={}, error=False, etag=etag, park_status=park_status)
     if response.status_code == 404:
-        raise ValueError(f"Endpoint not found: {response.url}\n full response: {response}")
+        raise EndpointNotFoundError(f"Endpoint not found: {response.url}\n full response: {response}")
     if response.status_code not in [200, 400, 500]:
         print(response)
-        print(f"Unexpected response: {response.json()}")
-        data = response.json()
+        data = _decode_body(response)
+        print(f"Unexpected response: {data}")
         message = f"Unexpected status code: {response.status_code}"
     else:
         try:
-            message, data = response.json()["message"], response.json()["data"]
-        except json.JSONDecodeError:
+            body = _decode_body(response)
+            message, data = body["message"], body["data"]
+        # JSONDecodeError and msgpack's decoding errors are both ValueErrors
+        except ValueError:
             print("Server error, did not get message or data:")
             print(response)
             import traceback
             print(traceback.format_exc())
             raise 
-    return ParkResponse(status_code=response.status_code, message=message, data=data, error=response.status_code != 200)
+    return ParkResponse(status_code=response.status_code, message=message, data=data, error=response.status_code != 200,
+                        etag=etag, park_status=park_status)
 
 def create_url(host: str, port: str, endpoint: str) -> str:
     """Create a URL from the given host, port, and endpoint.
@@ -46,7 +324,7 @@ def create_url(host: str, port: str, endpoint: str) -> str:
     """
     return "http://{0}:{1}/v1/{2}".format(host, port, endpoint)
 
-def get_endpoint(host: str, port: str, endpoint: str, params: dict, session = None) -> ParkResponse:
+def get_endpoint(host: str, port: str, endpoint: str, params: dict, session = None, headers: Optional[dict] = None) -> ParkResponse:
     """Send a GET request for a specified endpoint.
 
     Args:
@@ -54,14 +332,15 @@ def get_endpoint(host: str, port: str, endpoint: str, params: dict, session = No
         port: The port of the API.
         endpoint: The specific endpoint to call.
         params: The parameters to include in the GET request.
+        headers: Optional additional headers, e.g. If-None-Match.
 
     Returns:
         The JSON response from the API as a ParkResponse.
     """
     if(session is None):
-        session = requests
+        session = default_session()
 
-    response = session.get(create_url(host, port, endpoint), params = params)
+    response = session.get(create_url(host, port, endpoint), params = params, headers = headers)
     return _handle_response(response)
 
 
@@ -83,7 +362,7 @@ def put_endpoint(host: str, port: str, endpoint: str, data: dict, session = None
     except KeyError:
         return ParkResponse(status_code=400, message=f"Modification actions require 'x' and 'y' as keyword arguments", data={}, error=True)
     if(session is None):
-        session = requests
+        session = default_session()
     r = session.put(create_url(host, port, endpoint + "/{0}/{1}".format(x, y)), json = data)
     return _handle_response(r)
 
@@ -101,7 +380,7 @@ def post_endpoint(host: str, port: str, endpoint: str, data: dict, session = Non
         The JSON response from the server as a ParkResponse.
     """
     if(session is None):
-        session = requests
+        session = default_session()
     
     r = session.post(create_url(host, port, endpoint), json = data)
     return _handle_response(r)
@@ -123,7 +402,7 @@ def delete_endpoint(host: str, port: str, endpoint: str, data: dict, session = N
     except KeyError:
         return ParkResponse(status_code=400, message=f"Deletion actions require 'x' and 'y' as keyword arguments", data={}, error=True)
     if session is None:
-        session = requests
+        session = default_session()
     r = session.request(method = "delete", url = create_url(host, port, endpoint + "/{0}/{1}".format(x, y)), json = data)
     return _handle_response(r)
 
@@ -131,10 +410,66 @@ def delete_park_endpoint(host: str, port: str, park_id: str, session = None) ->
     """Delete a park.
     """
     if session is None:
-        session = requests
+        session = default_session()
     r = session.request(method = "delete", url = create_url(host, port, "park/delete_park/{0}".format(park_id)))
     return _handle_response(r)
 
+async def _async_request(client, method: str, url: str, **kwargs):
+    """Send a request with an httpx.AsyncClient, applying request_timeout and recording its latency in
+    client.latency if the client has one (see create_async_client)."""
+    connect_timeout, read_timeout = request_timeout(method, url)
+    latency = getattr(client, "latency", None)
+    start = time.perf_counter()
+    try:
+        # httpx takes (connect, read, write, pool) timeouts, waiting for a free connection is not bounded
+        response = await client.request(method, url, timeout=(connect_timeout, read_timeout, read_timeout, None), **kwargs)
+    except Exception:
+        if latency is not None:
+            latency.record(method, url, (time.perf_counter() - start) * 1000, error=True)
+        raise
+    if latency is not None:
+        latency.record(method, url, (time.perf_counter() - start) * 1000)
+    return response
+
+async def async_get_endpoint(host: str, port: str, endpoint: str, params: dict, client, headers: Optional[dict] = None) -> ParkResponse:
+    """Send a GET request for a specified endpoint without blocking the event loop.
+
+    Args:
+        host: The host of the API.
+        port: The port of the API.
+        endpoint: The specific endpoint to call.
+        params: The parameters to include in the GET request.
+        client: The httpx.AsyncClient used to send the request.
+        headers: Optional additional headers, e.g. If-None-Match.
+
+    Returns:
+        The JSON response from the API as a ParkResponse.
+    """
+    response = await _async_request(client, "GET", create_url(host, port, endpoint), params = params, headers = headers)
+    return _handle_response(response)
+
+async def async_post_endpoint(host: str, port: str, endpoint: str, data: dict, client) -> ParkResponse:
+    """Send a POST request to a specified endpoint without blocking the event loop.
+
+    Args:
+        host: The host of the endpoint.
+        port: The port of the endpoint.
+        endpoint: The specific endpoint to send the request to.
+        data: The data to be sent in the POST request.
+        client: The httpx.AsyncClient used to send the request.
+
+    Returns:
+        The JSON response from the server as a ParkResponse.
+    """
+    r = await _async_request(client, "POST", create_url(host, port, endpoint), json = data)
+    return _handle_response(r)
+
+async def async_delete_park_endpoint(host: str, port: str, park_id: str, client) -> ParkResponse:
+    """Delete a park without blocking the event loop.
+    """
+    r = await _async_request(client, "DELETE", create_url(host, port, "park/delete_park/{0}".format(park_id)))
+    return _handle_response(r)
+
 def _get_raw_value(arg):
     if(isinstance(arg, ast.Constant)):
         return arg.value 
@@ -1,16 +1,17 @@
 """Python wrapper for the business simulator game Mini Amusement Parks
 """
 
-from map_py.helpers import post_endpoint, get_endpoint, put_endpoint, delete_endpoint, delete_park_endpoint, get_action_name_and_args, ParkResponse
+from map_py.helpers import post_endpoint, get_endpoint, put_endpoint, delete_endpoint, delete_park_endpoint, get_action_name_and_args, ParkResponse, EndpointNotFoundError, ParkEvictedError
 from map_py.observations_and_actions.shared_constants import ACTION_PARAMS, ACTION_PARAM_TYPES, SANDBOX_ACTION_NAMES, SANDBOX_ACTION_PARAMS, SANDBOX_ACTION_PARAM_TYPES
 from map_py.observations_and_actions.pydantic_obs import format_pydantic_observation, FullParkObs, ParkDataGranularity, ParkObservabilityMode
-from map_py.observations_and_actions.gym_obs import format_gym_observation, MapsGymObservationSpace, obs_pydantic_to_array, obs_array_to_pydantic
+from map_py.observations_and_actions.gym_obs import format_gym_observation, MapsGymObservationSpace, obs_pydantic_to_array, obs_array_to_pydantic, observation_values_close
 from map_py.observations_and_actions.gym_action import MapsGymActionSpace
 from map_py.observations_and_actions.simple_gym_obs import MapsSimpleGymObservationSpace, format_simple_gym_observation
 from map_py.observations_and_actions.simple_gym_action import MapsSimpleGymActionSpace
 from map_py.shared_constants import LAYOUTS_DIR
+from map_py.transports import create_session
+from map_py.state_delta import apply_state_delta
 from map_py.gui.visualizer import Visualizer, format_full_state, GameState
-import requests
 from typing import List, Optional, Union, Tuple, Any
 import gymnasium as gym
 import numpy as np
@@ -20,6 +21,11 @@ import pygame
 import os
 import csv
 import json
+import uuid
+import copy
+
+# Failure message of wait actions in an action batch, the same as the one of the park/act_batch endpoint
+WAIT_IN_BATCH_MESSAGE = "wait cannot be applied in an action batch, use proceed to advance the park by a day"
 
 class MiniAmusementPark(gym.Env):
     def __init__(self,
@@ -27,6 +33,7 @@ class MiniAmusementPark(gym.Env):
                  port: str,
                  park_id: Optional[int] = None,
                  observation_type: str = "test", # one of "pydantic", "gym", "raw", "pydantic_and_image"
+                 obs_dtype: type = np.float64,
                  exp_name: str = "default_exp",
                  render_park: bool = False,
                  visualizer: Optional[Visualizer] = None,
@@ -42,6 +49,13 @@ class MiniAmusementPark(gym.Env):
                  noop_on_invalid_action: bool = True,
                  seed: Optional[int] = None,
                  new_seed_on_reset: bool = False,
+                 fast_step: bool = True,
+                 transport: str = "http",
+                 socket_path: Optional[str] = None,
+                 wire_format: str = "json",
+                 state_deltas: bool = False,
+                 cache_observations: bool = False,
+                 training_mode: bool = False,
                  verbose: bool = True):
         """Initialize a MiniAmusementPark environment instance.
 
@@ -51,6 +65,9 @@ class MiniAmusementPark(gym.Env):
             park_id: Optional park ID to use. If None, a new park ID will be requested from the server.
             observation_type: Type of observation to return. Must be one of "pydantic", "gym", "raw", "pydantic_and_image", or "test".
                 Defaults to "pydantic".
+            obs_dtype: Floating point type of "gym" and "gym_simple" observation arrays. np.float32 halves their memory.
+                In "test" mode, float32 observations are decoded back to pydantic within FLOAT32_ROUND_TRIP_RTOL and
+                FLOAT32_ROUND_TRIP_ATOL of map_py.observations_and_actions.gym_obs instead of exactly.
             exp_name: Experiment name used for organizing rendered images. Defaults to "default_exp".
             render_park: Whether to render the park state. If True, a Visualizer will be created if not provided.
             visualizer: Optional Visualizer instance for rendering. If None and render_park is True, one will be created.
@@ -66,14 +83,39 @@ class MiniAmusementPark(gym.Env):
             noop_on_invalid_action: If True, the park will proceed even if an invalid action is taken (no-op behavior).
             seed: Optional random seed for reproducibility.
             new_seed_on_reset: If True, a new seed will be generated for the park on reset.
+            fast_step: If True, step() applies the action, advances the day and fetches the new state with a
+                single request to the park/step endpoint. Falls back to one request per stage if the server
+                does not provide that endpoint.
+            transport: How requests are sent to the server. "http" sends a HTTP request per call, "websocket"
+                sends all requests over one persistent socket.io connection. "uds" and "pipe" skip the server and
+                talk to a park engine (map_backend/engine.js) on the same machine over a Unix socket or the
+                stdin/stdout of a spawned engine, in which case host and port are unused. Return values are the same.
+            socket_path: Socket of a running park engine for transport="uds". If None, a private engine is spawned.
+            wire_format: Encoding of HTTP responses, "json" or "msgpack". "msgpack" sends smaller payloads that are
+                faster to decode and requires the msgpack package. Return values are the same.
+            state_deltas: If True, the server only sends what changed since the last state this instance received,
+                and the full state is rebuilt locally. Unchanged parts of the returned raw states are shared between
+                steps, so raw states must not be modified.
+            cache_observations: If True, observing a park that has not changed since the last observation or step
+                is answered by the server with 304 Not Modified, and the cached raw state and formatted observation
+                are returned again. Cached raw states and observations must not be modified.
+            training_mode: If True, the server skips work that is only needed for visualization and saved
+                trajectories: the park's history is not kept, midday states are not captured and actions are not
+                broadcast to visualizers. Observations and rewards are the same.
         Raises:
-            ValueError: If the park settings cannot be initialized (e.g., invalid layout file).
+            ValueError: If the park settings cannot be initialized (e.g., invalid layout file) or obs_dtype is not
+                a floating point type.
         """
+        if not np.issubdtype(obs_dtype, np.floating):
+            raise ValueError(f"obs_dtype must be a floating point type, got {obs_dtype}")
         self.host = host
         self.port = port
         self.settings = {}
         self.game_size = 20
-        self.session = requests.Session()
+        self.transport = transport
+        self.session = create_session(transport, host, port, socket_path, wire_format)
+        # Forks share the session of the park they were forked from and must not close it
+        self.owns_session = True
         self.render_park = render_park
         self.visualizer = visualizer
         self.exp_name = exp_name
@@ -90,21 +132,26 @@ class MiniAmusementPark(gym.Env):
         self.new_seed_on_reset = new_seed_on_reset
 
         self.observation_type = observation_type
+        self.obs_dtype = np.dtype(obs_dtype)
 
         # Initialize action and observation spaces based on observation type
         if observation_type == "gym_simple":
             self.action_space = MapsSimpleGymActionSpace()
-            self.observation_space = MapsSimpleGymObservationSpace()
+            self.observation_space = MapsSimpleGymObservationSpace(dtype=self.obs_dtype)
         else:
             # For "gym", "pydantic", "raw", "test" modes
             self.action_space = MapsGymActionSpace()
-            self.observation_space = MapsGymObservationSpace()
+            self.observation_space = MapsGymObservationSpace(dtype=self.obs_dtype)
 
         self.data_level = data_level
         self.observability_mode = observability_mode
         self.return_raw_in_info = return_raw_in_info
         # State to reset to after a reset. Used for random resets since we only randomize on the first reset unless hard_reset is True.
         self.reset_state = None
+        # Server-side checkpoint of reset_state, restored instead of uploading reset_state
+        self.reset_checkpoint = None
+        # Checkpoints kept by the client when the server does not support checkpoints
+        self._local_checkpoints = {}
 
         self.return_detailed_guest_info = return_detailed_guest_info
         self.noop_on_invalid_action = noop_on_invalid_action
@@ -120,12 +167,28 @@ class MiniAmusementPark(gym.Env):
         self.guest_preferences = None
 
         self.verbose = verbose
+        self.fast_step = fast_step
+        # Raw state returned by the most recent observation. Used to decode gym_simple actions without
+        # an additional request, and as the base that state deltas are applied to.
+        self._last_raw_state = None
+        self.state_deltas = state_deltas
+        # Identifies this instance to the server, which remembers the last state it sent to each client
+        self._client_id = uuid.uuid4().hex
+        self._state_version = None
+        self.cache_observations = cache_observations
+        # ETag of _last_raw_state, and the last formatted observation per observation setting
+        self._state_etag = None
+        self._observation_cache = {}
 
         # Set initial settings.
         response = self.update_settings(layout, difficulty, starting_money, horizon)
         if response.status_code != 200:
             raise ValueError(f"Failed to set the park: {response.message}")
 
+        self.training_mode = False
+        if training_mode:
+            self.set_training_mode(True)
+
     def __enter__(self):
         """Enter the context manager.
 
@@ -160,6 +223,13 @@ class MiniAmusementPark(gym.Env):
             park_id: The park ID to use.
         """
         self.park_id = park_id
+        self._last_raw_state = None
+        self._state_version = None
+        self._state_etag = None
+        self._observation_cache = {}
+        self.reset_checkpoint = None
+        if self.training_mode:
+            self.set_training_mode(True)
 
     def update_settings(self, layout: Optional[str] = None, difficulty: Optional[str] = None, 
                         starting_money: Optional[int] = None, horizon: Optional[int] = None) -> ParkResponse:
@@ -193,11 +263,24 @@ class MiniAmusementPark(gym.Env):
 
         Safely closes the requests session, ignoring any errors that may occur.
         """
+        if not self.owns_session:
+            return
         try:
             self.session.close()
         except:
             pass
 
+    def latency_stats(self) -> dict:
+        """Latency of the requests sent to the server, per endpoint.
+
+        Forks share the statistics of the park they were forked from.
+
+        Returns:
+            A dictionary from endpoint (e.g. "POST park/step") to the count, number of failed requests, mean,
+            p50, p90, p99 and max latency in milliseconds, and the counts of the histogram buckets.
+        """
+        return self.session.latency.summary()
+
     def set(self, raw_state: dict) -> Tuple[Union[FullParkObs, dict], dict]:
         """Set the environment to a particular state.
 
@@ -232,19 +315,227 @@ class MiniAmusementPark(gym.Env):
 
         return obs, info
 
+    def set_training_mode(self, enabled: bool) -> None:
+        """Enable or disable training mode for the park on the server.
+
+        In training mode the server only keeps the most recent state of the park, so save_trajectory() only
+        contains the last day, and visualizers are not updated. Does nothing but warn if the server does not
+        support training mode.
+
+        Args:
+            enabled: Whether to enable training mode.
+
+        Raises:
+            RuntimeError: If the training mode of the park cannot be set.
+        """
+        try:
+            result = post_endpoint(self.host, self.port, "park/training_mode", {'parkId': self.park_id, 'enabled': enabled}, self.session)
+        except EndpointNotFoundError:
+            print("Warning: The server does not support training mode")
+            self.training_mode = False
+            return
+
+        if result.error:
+            raise RuntimeError(f"Error setting training mode: {result.message}")
+        self.training_mode = enabled
+
+    def checkpoint(self) -> str:
+        """Save the current state of the park on the server.
+
+        Falls back to keeping the raw state on the client if the server does not support checkpoints.
+
+        Returns:
+            The id of the checkpoint, to be passed to restore().
+
+        Raises:
+            RuntimeError: If the park cannot be checkpointed.
+        """
+        try:
+            result = post_endpoint(self.host, self.port, "park/checkpoint", {'parkId': self.park_id}, self.session)
+        except EndpointNotFoundError:
+            checkpoint_id = f"local-{uuid.uuid4().hex}"
+            self._local_checkpoints[checkpoint_id] = self.get_raw_state()
+            return checkpoint_id
+
+        if result.error:
+            raise RuntimeError(f"Error checkpointing park: {result.message}")
+        return result.data['checkpointId']
+
+    def restore(self, checkpoint_id: str) -> Tuple[Union[FullParkObs, dict], dict]:
+        """Set the environment to a state saved with checkpoint().
+
+        Unlike set(), the state is not sent to the server.
+
+        Args:
+            checkpoint_id: The id returned by checkpoint().
+
+        Returns:
+            A tuple containing:
+                - The observation (formatted according to observation_type) or raw state if observation_type is "raw"
+                - An info dictionary
+
+        Raises:
+            RuntimeError: If the checkpoint does not exist.
+        """
+        result = self._restore(checkpoint_id)
+        if result.error:
+            raise RuntimeError(f"Error restoring park: {result.message}")
+
+        info = {}
+        obs, raw_state = self.get_observation_and_raw_state()
+        if self.return_raw_in_info:
+            info['raw_state'] = raw_state
+        return obs, info
+
+    def delete_checkpoint(self, checkpoint_id: str) -> None:
+        """Delete a checkpoint saved with checkpoint() that is no longer needed.
+
+        The server only keeps the most recent checkpoints of each park, so deleting unused checkpoints
+        keeps older ones that are still needed from being dropped.
+
+        Args:
+            checkpoint_id: The id returned by checkpoint().
+
+        Raises:
+            RuntimeError: If the checkpoint does not exist.
+        """
+        result = self._delete_checkpoint(checkpoint_id)
+        if result is not None and result.error:
+            raise RuntimeError(f"Error deleting checkpoint: {result.message}")
+
+    def _raise_if_evicted(self, result: ParkResponse) -> None:
+        """Raise ParkEvictedError if a request failed because the server deleted the park."""
+        if result.error and result.park_status == "evicted":
+            raise ParkEvictedError(self.park_id, result.message, result.park_status)
+
+    def _replace_evicted_park(self, result: ParkResponse, info: dict) -> bool:
+        """Report the park status of a response in info and switch to a new park if the server deleted the park.
+
+        Args:
+            result: A response to a request for the park.
+            info: The info dictionary to report the park status in.
+
+        Returns:
+            Whether the park was evicted and replaced by a new park.
+        """
+        if result.park_status is not None:
+            info['park_status'] = result.park_status
+        if result.park_status != "evicted":
+            return False
+        if self.verbose:
+            print(f"Park {self.park_id} was evicted by the server, continuing with a new park")
+        self.set_park_id(get_endpoint(self.host, self.port, "park/get_new_park_id", {}, self.session).data['parkId'])
+        self.set_seed(self.seed)
+        return True
+
+    def _restore(self, checkpoint_id: str) -> ParkResponse:
+        """Restore a checkpoint without observing the park."""
+        if checkpoint_id in self._local_checkpoints:
+            params = {'parkId': self.park_id, 'state': self._local_checkpoints[checkpoint_id]}
+            return post_endpoint(self.host, self.port, "park/set", params, self.session)
+        return post_endpoint(self.host, self.port, "park/restore", {'parkId': self.park_id, 'checkpointId': checkpoint_id}, self.session)
+
+    def _delete_checkpoint(self, checkpoint_id: str) -> Optional[ParkResponse]:
+        """Delete a checkpoint, returning None if it was kept on the client or the server does not support deleting checkpoints."""
+        if self._local_checkpoints.pop(checkpoint_id, None) is not None:
+            return None
+        try:
+            return post_endpoint(self.host, self.port, "park/delete_checkpoint", {'parkId': self.park_id, 'checkpointId': checkpoint_id}, self.session)
+        except EndpointNotFoundError:
+            return None
+
+    def fork(self, n: int = 1) -> List["MiniAmusementPark"]:
+        """Copy the park into n new parks, e.g. to try different actions from the current state.
+
+        The server copies the park in memory, including its random number generator, so a copy that takes the
+        same actions as this park reaches the same states. If the server does not support forking, the raw state
+        is copied with set() instead and the copies do not continue the random number generator.
+
+        Args:
+            n: Number of copies.
+
+        Returns:
+            Environments with the settings of this one for the new parks. They share the connection of this
+            environment, so only shutdown() of this environment closes it. Delete the parks with delete_park()
+            once they are no longer needed.
+
+        Raises:
+            RuntimeError: If the park cannot be forked.
+        """
+        try:
+            result = post_endpoint(self.host, self.port, "park/fork", {'parkId': self.park_id, 'n': n}, self.session)
+        except EndpointNotFoundError:
+            raw_state = self.get_raw_state()
+            forks = []
+            for _ in range(n):
+                park_id = get_endpoint(self.host, self.port, "park/get_new_park_id", {}, self.session).data['parkId']
+                forks.append(self._forked_env(park_id))
+                forks[-1].set(raw_state)
+            return forks
+
+        if result.error:
+            raise RuntimeError(f"Error forking park: {result.message}")
+        return [self._forked_env(park_id) for park_id in result.data['parkIds']]
+
+    def _forked_env(self, park_id: str) -> "MiniAmusementPark":
+        """Copy of this environment for a forked park."""
+        env = copy.copy(self)
+        env.owns_session = False
+        env._client_id = uuid.uuid4().hex
+        env._local_checkpoints = {}
+        env.set_park_id(park_id)
+        return env
+
     def get_raw_state(self) -> dict:
         """
         Observe the environment specified by park_id.
         Returns the raw state of the environment.
         NOTE: This differs from the observe method that only returns the observation.
         """
-        params = {'parkId': self.park_id, 'fullState': True, 'includeGuests': self.return_detailed_guest_info}
-        result = get_endpoint(self.host, self.port, "park/", params, self.session)
+        params = {'parkId': self.park_id, 'fullState': True, 'includeGuests': self.return_detailed_guest_info,
+                  **self._state_request_params()}
+        result = get_endpoint(self.host, self.port, "park/", params, self.session, self._conditional_headers())
+        self._raise_if_evicted(result)
         if result.error:
             raise RuntimeError(f'Server encountered the error while observing: {result.message}. \nFull response: {result}')
-        
+
+        if result.status_code == 304:
+            return self._last_raw_state
+        self._state_etag = result.etag
+        if 'state_version' in result.data:
+            return self._resolve_state(result.data)
+        self._last_raw_state = result.data
         return result.data
 
+    def _conditional_headers(self) -> Optional[dict]:
+        """Headers asking the server to skip the state if it still matches the last raw state received."""
+        if not self.cache_observations or self._state_etag is None or self._last_raw_state is None:
+            return None
+        return {'If-None-Match': self._state_etag}
+
+    def _state_request_params(self) -> dict:
+        """Request parameters asking the server for a state delta if state_deltas is enabled."""
+        if not self.state_deltas:
+            return {}
+        return {'clientId': self._client_id, 'baseVersion': self._state_version}
+
+    def _resolve_state(self, data: dict) -> dict:
+        """Rebuild the raw state from a response to a request sent with _state_request_params.
+
+        Args:
+            data: A dictionary holding the state_version and either the full state or the state_delta
+                against the last state received.
+
+        Returns:
+            The raw state.
+        """
+        if 'state_delta' in data:
+            self._last_raw_state = apply_state_delta(self._last_raw_state, data['state_delta'])
+        else:
+            self._last_raw_state = data['state']
+        self._state_version = data['state_version']
+        return self._last_raw_state
+
     def get_observation_and_raw_state(self) -> Tuple[Union[FullParkObs, dict], dict]:
         """Observe the environment specified by self.park_id (i.e., the current park)
 
@@ -260,19 +551,43 @@ class MiniAmusementPark(gym.Env):
         Raises:
             RuntimeError: If the server encounters an error while observing.
         """
-        params = {'parkId': self.park_id, 'fullState': True, 'includeGuests': self.return_detailed_guest_info}
-        result = get_endpoint(self.host, self.port, "park/", params, self.session)
-        if result.error:
-            raise RuntimeError(f'Server encountered the error while observing: {result.message}. \nFull response: {result}')
+        raw_state = self.get_raw_state()
+        return self._cached_format_observation(raw_state), raw_state
+
+    def _cached_format_observation(self, raw_state: dict) -> Union[FullParkObs, dict]:
+        """Format a raw state, reusing the last observation if cache_observations is set and the state is unchanged."""
+        if not self.cache_observations:
+            return self._format_observation(raw_state)
+        key = (self.observation_type, self.data_level, self.observability_mode)
+        cached = self._observation_cache.get(key)
+        if cached is not None and cached[0] is raw_state:
+            return cached[1]
+        obs = self._format_observation(raw_state)
+        self._observation_cache[key] = (raw_state, obs)
+        return obs
+
+    def _format_observation(self, raw_state: dict) -> Union[FullParkObs, dict]:
+        """Format a raw state according to the observation_type setting.
+
+        Args:
+            raw_state: The raw state dictionary returned by the server.
 
+        Returns:
+            The observation (FullParkObs for "pydantic", dict for "gym" or "raw").
+        """
         if self.observation_type == "test":
-            pyd_obs = format_pydantic_observation(result.data, self.observability_mode, self.data_level, as_dict=False)
-            gym_obs = format_gym_observation(result.data)
-            gym_obs2 = obs_pydantic_to_array(pyd_obs)
-            pyd_obs2 = obs_array_to_pydantic(gym_obs, self.data_level, self.observability_mode, as_dict=False, raw_state=result.data)
+            pyd_obs = format_pydantic_observation(raw_state, self.observability_mode, self.data_level, as_dict=False)
+            gym_obs = format_gym_observation(raw_state, dtype=self.obs_dtype)
+            gym_obs2 = obs_pydantic_to_array(pyd_obs, dtype=self.obs_dtype)
+            pyd_obs2 = obs_array_to_pydantic(gym_obs, self.data_level, self.observability_mode, as_dict=False, raw_state=raw_state)
             
-            # Simple comparison of pydantic model attributes
-            if pyd_obs != pyd_obs2:
+            # Simple comparison of pydantic model attributes. Narrower arrays lose precision, so their round trip
+            # is only checked up to the documented tolerance
+            if self.obs_dtype == np.float64:
+                pyd_obs_diff = pyd_obs != pyd_obs2
+            else:
+                pyd_obs_diff = not observation_values_close(pyd_obs.model_dump(), pyd_obs2.model_dump())
+            if pyd_obs_diff:
                 print("Pydantic Observations differ:")
                 for attr_name in pyd_obs.__dict__.keys():
                     if getattr(pyd_obs, attr_name) != getattr(pyd_obs2, attr_name):
@@ -299,17 +614,17 @@ class MiniAmusementPark(gym.Env):
             
             obs = pyd_obs
         elif self.observation_type == "pydantic":
-            obs = format_pydantic_observation(result.data, self.observability_mode, self.data_level, as_dict=False)
+            obs = format_pydantic_observation(raw_state, self.observability_mode, self.data_level, as_dict=False)
         elif self.observation_type == "gym":
-            obs = format_gym_observation(result.data)
+            obs = format_gym_observation(raw_state, dtype=self.obs_dtype)
         elif self.observation_type == "gym_simple":
-            obs = format_simple_gym_observation(result.data)
+            obs = format_simple_gym_observation(raw_state, dtype=self.obs_dtype)
         elif self.observation_type == "raw":
-            obs = result.data
+            obs = raw_state
         elif self.observation_type == "pydantic_and_image":
-            pydantic_obs = format_pydantic_observation(result.data, self.observability_mode, self.data_level, as_dict=False)
+            pydantic_obs = format_pydantic_observation(raw_state, self.observability_mode, self.data_level, as_dict=False)
             pydantic_obs_dict = pydantic_obs.model_dump()
-            pydantic_obs_dict["staff"]["staff_list"] = result.data["staff"]
+            pydantic_obs_dict["staff"]["staff_list"] = raw_state["staff"]
             formatted_state = format_full_state(pydantic_obs_dict)
             self.visualizer.render_background()
             self.visualizer.draw_game_grid(formatted_state)
@@ -325,7 +640,7 @@ class MiniAmusementPark(gym.Env):
             # ensure dtype is uint8 (it usually already is)
             obs = {'image': rgb_array.astype(np.uint8), 'pydantic_obs': pydantic_obs}
 
-        return obs, result.data
+        return obs
 
     def observe(self) -> Union[FullParkObs, dict]:
         """Observe the environment specified by park_id.
@@ -353,6 +668,8 @@ class MiniAmusementPark(gym.Env):
             A tuple containing:
                 - The park observation (formatted according to observation_type)
                 - An info dictionary. If an error occurred, 'error' will be a key in info.
+                  info['park_status'] is "restored" if the server had evicted the park to disk, and "evicted"
+                  if the server had deleted the park, in which case the environment continues with a new park.
                   See https://gymnasium.farama.org/api/env/#gymnasium.Env.reset
         """
         info = {}            
@@ -366,13 +683,20 @@ class MiniAmusementPark(gym.Env):
                 raise ValueError('hard_reset provided in options must be a bool')
 
         # If this has been randomly reset before, then restore stored start state
+        restored = False
         if self.layout is None and self.reset_state is not None and not hard_reset:
-            _, set_info = self.set(self.reset_state)
-            if 'error' in set_info:
-                info['error'] = {
-                    'message': set_info.message,
-                    'type': 'reset_error'
-                }
+            # Restore the checkpoint of the start state, only uploading the start state if the checkpoint is gone
+            if self.reset_checkpoint is not None:
+                result = self._restore(self.reset_checkpoint)
+                self._replace_evicted_park(result, info)
+                restored = not result.error
+            if not restored:
+                _, set_info = self.set(self.reset_state)
+                if 'error' in set_info:
+                    info['error'] = {
+                        'message': set_info.message,
+                        'type': 'reset_error'
+                    }
             
         else:
             # Otherwise, proceed with java-side reset
@@ -383,6 +707,9 @@ class MiniAmusementPark(gym.Env):
                           'horizon': self.horizon}
             
             result = post_endpoint(self.host, self.port, "park/reset", reset_args, self.session)
+            if self._replace_evicted_park(result, info):
+                reset_args['parkId'] = self.park_id
+                result = post_endpoint(self.host, self.port, "park/reset", reset_args, self.session)
             if result.error:
                 info['error'] = {
                     'message': result.message,
@@ -401,6 +728,11 @@ class MiniAmusementPark(gym.Env):
 
         if self.layout is None:
             self.reset_state = raw_state
+            if not restored:
+                # The start state changed, so the checkpoint of the previous start state is not needed anymore
+                if self.reset_checkpoint is not None:
+                    self._delete_checkpoint(self.reset_checkpoint)
+                self.reset_checkpoint = self.checkpoint()
         
         if self.return_raw_in_info:
             info['raw_state'] = raw_state
@@ -423,22 +755,397 @@ class MiniAmusementPark(gym.Env):
                 - terminated: Whether the episode has terminated
                 - truncated: Whether the episode was truncated
                 - info: Info dictionary. If an error occurred, 'error' will be a key in info.
+                  info['park_status'] is "restored" if the server had evicted the park to disk.
+                  For wait(days=n), which runs the park for up to n days and stops early once the
+                  episode is over, the reward is summed over the days and info['daily_rewards']
+                  holds the reward of each day.
                   See https://gymnasium.farama.org/api/env/#gymnasium.Env.step
+
+        Raises:
+            ParkEvictedError: If the server had deleted the park, e.g. after it was idle for too long. Its
+                park_status is "evicted", and reset() continues with a new park.
+        """
+        action = self._decode_action(action)
+
+        step_result = self._step_single_request(action) if self.fast_step else None
+        if step_result is None:
+            step_result = self._step_multi_request(action)
+        reward, terminated, truncated, info, raw_state = step_result
+
+        obs = self._cached_format_observation(raw_state)
+
+        if self.return_raw_in_info:
+            info['raw_state'] = raw_state
+
+        if self.render_park:
+            self.render(raw_state, obs, action=action, info=info, save_image=False)
+
+        return obs, reward, terminated, truncated, info
+
+    def rollout(self, actions: List[Union[str, np.ndarray]], restore: bool = True, return_state: bool = False) -> dict:
+        """Perform a sequence of step actions on the server without observing the park in between.
+
+        Much cheaper than calling step() for each action when only the rewards are needed, e.g. to evaluate plans.
+        Gym actions are all decoded against the current state.
+
+        Args:
+            actions: The actions to perform, one per day, at least one. The rollout stops early once the episode is over.
+            restore: If True, the park is left in its current state and the actions are performed on a copy
+                that continues exactly like the park would.
+            return_state: If True, the raw state at the end of the rollout is included in the result.
+
+        Returns:
+            A dictionary containing:
+                - rewards: The reward of each day that was run
+                - valid: Whether each action was valid
+                - terminated: Whether the episode has terminated
+                - truncated: Whether the episode was truncated
+                - value: The park value at the end of the rollout
+                - state: The raw state at the end of the rollout, if return_state is True
+                - error: Present if the park failed to proceed, in the same format as info['error'] of step()
+
+        Raises:
+            RuntimeError: If there are no actions or the server encounters an error during the rollout.
+        """
+        params = self._rollout_request_data([self._decode_action(action) for action in actions], restore, return_state)
+        try:
+            result = post_endpoint(self.host, self.port, "park/rollout", params, self.session)
+        except EndpointNotFoundError:
+            # Server does not provide park/rollout, step a fork of the park instead
+            return self._rollout_with_steps(actions, restore, return_state)
+        if result.error:
+            raise RuntimeError(f'Server encountered the error during the rollout: {result.message}. \nFull response: {result}')
+
+        return self._process_rollout_data(result.data, restore, return_state)
+
+    def _rollout_request_data(self, actions: List[Optional[str]], restore: bool, return_state: bool) -> dict:
+        """Parse actions into the request body of the park/rollout endpoint."""
+        steps = []
+        for action in actions:
+            data, _ = self._step_request_data(action)
+            steps.append({'action_name': data['action_name'], 'action_args': data['action_args']})
+
+        return {'parkId': self.park_id,
+                'steps': steps,
+                'noopOnInvalidAction': self.noop_on_invalid_action,
+                'restore': restore,
+                'returnState': return_state,
+                'includeGuests': self.return_detailed_guest_info}
+
+    def _process_rollout_data(self, data: dict, restore: bool, return_state: bool) -> dict:
+        """Build the result of rollout() from the response of the park/rollout endpoint."""
+        if not restore:
+            # The park changed without this instance receiving the new state
+            self._state_version = None
+            self._last_raw_state = data.get('state')
+
+        rewards = data['rewards']
+        if self.negative_reward_on_invalid_action:
+            rewards = [-1 if not valid else reward for reward, valid in zip(rewards, data['valid'])]
+        rollout = {'rewards': rewards,
+                   'valid': data['valid'],
+                   'terminated': data['terminated'],
+                   'truncated': data['truncated'],
+                   'value': data['value']}
+        if return_state:
+            rollout['state'] = data['state']
+        if data['proceed_error'] is not None:
+            rollout['error'] = {
+                'message': data['proceed_error'],
+                'type': 'proceed_error'
+            }
+        return rollout
+
+    def _rollout_with_steps(self, actions: List[Union[str, np.ndarray]], restore: bool, return_state: bool) -> dict:
+        """Perform a rollout with one step() per action, for servers without the park/rollout endpoint."""
+        if not actions:
+            # Rejected like the park/rollout endpoint does, before a fork is created for nothing
+            raise RuntimeError("Error during the rollout: No steps provided")
+        actions = [self._decode_action(action) for action in actions]
+        env = self.fork(1)[0] if restore else self
+        observation_type, env.observation_type = env.observation_type, "raw"
+        rollout = {'rewards': [], 'valid': [], 'terminated': False, 'truncated': False}
+        try:
+            for action in actions:
+                raw_state, reward, terminated, truncated, info = env.step(action)
+                rollout['rewards'].append(reward)
+                rollout['valid'].append(info.get('error', {}).get('type') != 'invalid_action')
+                rollout['terminated'], rollout['truncated'] = terminated, truncated
+                if info.get('error', {}).get('type') == 'proceed_error':
+                    rollout['error'] = info['error']
+                if terminated or truncated or 'error' in rollout:
+                    break
+            rollout['value'] = raw_state['state']['value']
+            if return_state:
+                rollout['state'] = raw_state
+        finally:
+            env.observation_type = observation_type
+            if restore:
+                env.delete_park()
+        return rollout
+
+    def act_batch(self, actions: List[Union[str, np.ndarray]], atomic: bool = False, proceed: bool = False) -> Tuple[Union[FullParkObs, dict], float, bool, bool, dict]:
+        """Apply several actions within the same day with a single request.
+
+        Gym actions are all decoded against the current state.
+
+        Args:
+            actions: The actions to apply, in order.
+            atomic: If True, the actions are only applied if all of them succeed, otherwise the park is left
+                unchanged. If False, failed actions are skipped and the other actions are still applied.
+            proceed: If True, the park is advanced by a day after the actions, unless an atomic batch failed.
+                This is the only way a batch advances the park: wait actions, including wait(days=n), fail
+                inside a batch instead of being applied as a noop.
+
+        Returns:
+            A 5-tuple like step(). Like observe(), the observation is the park at the end of the last day
+            that was run. The reward is 0 and terminated and truncated are False if the day was not advanced. info['action_results'] holds a dictionary with 'success' and 'message' for each action,
+            info['applied'] whether the actions were applied and info['error'] describes the first failed action.
+
+        Raises:
+            ParkEvictedError: If the server had deleted the park, see step().
+            RuntimeError: If the server encounters an error while applying the actions.
         """
-        if not isinstance(action, str):
-            if self.observation_type == "gym_simple":
-                # Simple mode needs state for intelligent placement
-                raw_state = self.get_raw_state()
-                action = MapsSimpleGymActionSpace.decode_action(action, raw_state)
+        data, parse_errors = self._act_batch_request_data([self._decode_action(action) for action in actions], atomic, proceed)
+        try:
+            result = post_endpoint(self.host, self.port, "park/act_batch", data, self.session)
+        except EndpointNotFoundError:
+            # Server does not provide park/act_batch, apply the actions one request at a time
+            if atomic:
+                raise RuntimeError("The server does not support atomic action batches")
+            return self._act_batch_with_requests(actions, proceed)
+        info = {}
+        if result.park_status is not None:
+            info['park_status'] = result.park_status
+        self._raise_if_evicted(result)
+        if result.error:
+            raise RuntimeError(f'Server encountered the error while applying the actions: {result.message}. \nFull response: {result}')
+
+        reward, terminated, truncated, info, raw_state = self._process_act_batch_data(result.data, parse_errors, info)
+        obs = self._cached_format_observation(raw_state)
+
+        if self.return_raw_in_info:
+            info['raw_state'] = raw_state
+
+        if self.render_park:
+            self.render(raw_state, obs, info=info, save_image=False)
+
+        return obs, reward, terminated, truncated, info
+
+    def _act_batch_request_data(self, actions: List[Optional[str]], atomic: bool, proceed: bool) -> Tuple[dict, dict]:
+        """Parse actions into the request body of the park/act_batch endpoint.
+
+        Returns:
+            A tuple containing the request body and the parsing error of each action that could not be parsed,
+            by index. Actions that could not be parsed are sent without a name, so the server fails them.
+        """
+        batch, parse_errors = [], {}
+        for i, action in enumerate(actions):
+            action_result = self.parse_action(action, self.park_id)
+            if action_result.error:
+                if self.verbose:
+                    print(f"Error parsing action: {action_result.message}")
+                parse_errors[i] = action_result.message
+                batch.append({'action_name': None, 'action_args': {}})
             else:
-                # Full mode has all parameters in action
-                action = MapsGymActionSpace.decode_action(action)
+                action_name, action_args = action_result.data
+                batch.append({'action_name': action_name, 'action_args': action_args})
+
+        data = {'parkId': self.park_id,
+                'actions': batch,
+                'atomic': atomic,
+                'proceed': proceed,
+                'includeGuests': self.return_detailed_guest_info,
+                **self._state_request_params()}
+        return data, parse_errors
+
+    def _process_act_batch_data(self, data: dict, parse_errors: dict, info: dict) -> Tuple[float, bool, bool, dict, dict]:
+        """Extract the outcome from the response of the park/act_batch endpoint.
+
+        Returns:
+            A tuple of (reward, terminated, truncated, info, raw_state).
+        """
+        action_results = data['results']
+        for i, message in parse_errors.items():
+            action_results[i] = {'success': False, 'message': message}
+        info['action_results'] = action_results
+        info['applied'] = data['applied']
+        failed = next((result for result in action_results if not result['success']), None)
+        if failed is not None:
+            info['error'] = {
+                'message': failed['message'],
+                'type': 'invalid_action'
+            }
+        return self._process_step_data(data, info)
+
+    def _act_batch_with_requests(self, actions: List[Union[str, np.ndarray]], proceed: bool) -> Tuple[Union[FullParkObs, dict], float, bool, bool, dict]:
+        """Apply a best effort action batch with one request per action, for servers without the park/act_batch endpoint."""
+        info = {'action_results': [], 'applied': True}
+        for action in actions:
+            action = self._decode_action(action)
+            action_result = self.parse_action(action, self.park_id)
+            if not action_result.error and action_result.data[0] == 'wait':
+                action_result = ParkResponse(status_code=400, message=WAIT_IN_BATCH_MESSAGE, data={}, error=True)
+            else:
+                action_result = self._act(action)
+            info['action_results'].append({'success': not action_result.error, 'message': action_result.message})
+            if action_result.error and 'error' not in info:
+                info['error'] = {
+                    'message': action_result.message,
+                    'type': 'invalid_action'
+                }
+
+        reward, terminated, truncated = 0, False, False
+        if proceed:
+            proceed_result = post_endpoint(self.host, self.port, "park/proceed", {'parkId': self.park_id}, self.session)
+            if proceed_result.error:
+                info['error'] = {
+                    'message': proceed_result.message,
+                    'type': 'proceed_error'
+                }
+            else:
+                reward = proceed_result.data['reward'] if not self.negative_reward_on_invalid_action or 'error' not in info else -1
+                terminated = proceed_result.data['terminated']
+                truncated = proceed_result.data['truncated']
+
+        raw_state = self.get_raw_state()
+        obs = self._cached_format_observation(raw_state)
+        if self.return_raw_in_info:
+            info['raw_state'] = raw_state
+        return obs, reward, terminated, truncated, info
+
+    def _decode_action(self, action: Union[str, np.ndarray, None]) -> Optional[str]:
+        """Convert a gym action array into an action string.
+
+        Args:
+            action: The action string or gym action array.
+
+        Returns:
+            The action string. Strings and None are returned unchanged.
+        """
+        if action is None or isinstance(action, str):
+            return action
+        if self.observation_type == "gym_simple":
+            # Simple mode needs state for intelligent placement. The state of the previous observation
+            # is still current since only this environment modifies the park.
+            raw_state = self._last_raw_state if self._last_raw_state is not None else self.get_raw_state()
+            return MapsSimpleGymActionSpace.decode_action(action, raw_state)
+        # Full mode has all parameters in action
+        return MapsGymActionSpace.decode_action(action)
+
+    def _step_single_request(self, action: Optional[str]) -> Optional[Tuple[float, bool, bool, dict, dict]]:
+        """Apply an action, advance the park by a day and fetch the new state with one request.
+
+        Args:
+            action: The action string to perform.
 
+        Returns:
+            A tuple of (reward, terminated, truncated, info, raw_state), or None if the server
+            does not provide the park/step endpoint.
+
+        Raises:
+            ParkEvictedError: If the server had deleted the park.
+            RuntimeError: If the server encounters an error while stepping.
+        """
+        data, info = self._step_request_data(action)
+        try:
+            result = post_endpoint(self.host, self.port, "park/step", data, self.session)
+        except EndpointNotFoundError:
+            # Server does not provide park/step, use one request per stage from now on
+            self.fast_step = False
+            return None
+        if result.park_status is not None:
+            info['park_status'] = result.park_status
+        self._raise_if_evicted(result)
+        if result.error:
+            raise RuntimeError(f'Server encountered the error while stepping: {result.message}. \nFull response: {result}')
+
+        return self._process_step_data(result.data, info)
+
+    def _step_request_data(self, action: Optional[str]) -> Tuple[dict, dict]:
+        """Parse an action into the request body of the park/step endpoint.
+
+        Args:
+            action: The action string to perform.
+
+        Returns:
+            A tuple containing the request body and an info dictionary holding any parsing error.
+        """
+        info = {}
+        action_name, action_args = None, {}
+        if action is not None:
+            action_result = self.parse_action(action, self.park_id)
+            if action_result.error:
+                if self.verbose:
+                    print(f"Error parsing action: {action_result.message}")
+                info['error'] = {
+                    'message': action_result.message,
+                    'type': 'invalid_action'
+                }
+            else:
+                action_name, action_args = action_result.data
+
+        data = {'parkId': self.park_id,
+                'action_name': action_name,
+                'action_args': action_args,
+                'noopOnInvalidAction': self.noop_on_invalid_action,
+                'includeGuests': self.return_detailed_guest_info,
+                **self._state_request_params()}
+        return data, info
+
+    def _process_step_data(self, step_data: dict, info: dict) -> Tuple[float, bool, bool, dict, dict]:
+        """Extract the step outcome from the response of the park/step endpoint.
+
+        Args:
+            step_data: The data returned by the park/step endpoint.
+            info: The info dictionary returned by _step_request_data.
+
+        Returns:
+            A tuple of (reward, terminated, truncated, info, raw_state).
+        """
+        if not step_data['action']['success'] and 'error' not in info:
+            info['error'] = {
+                'message': step_data['action']['message'],
+                'type': 'invalid_action'
+            }
+
+        reward, terminated, truncated = 0, False, False
+        if step_data['proceed_error'] is not None:
+            info['error'] = {
+                'message': step_data['proceed_error'],
+                'type': 'proceed_error'
+            }
+        elif step_data['proceeded']:
+            reward = step_data['reward'] if not self.negative_reward_on_invalid_action or 'error' not in info else -1
+            terminated = step_data['terminated']
+            truncated = step_data['truncated']
+        if 'daily_rewards' in step_data:
+            info['daily_rewards'] = step_data['daily_rewards']
+
+        self._state_etag = step_data.get('etag')
+        if 'state_version' in step_data:
+            raw_state = self._resolve_state(step_data)
+        else:
+            raw_state = self._last_raw_state = step_data['state']
+        return reward, terminated, truncated, info, raw_state
+
+    def _step_multi_request(self, action: Optional[str]) -> Tuple[float, bool, bool, dict, dict]:
+        """Apply an action, advance the park by a day and fetch the new state with separate requests.
+
+        Args:
+            action: The action string to perform.
+
+        Returns:
+            A tuple of (reward, terminated, truncated, info, raw_state).
+        """
         info = {}
         # Apply action
         action_result = None  # Must be defined to check if it's a tuple later on
         if action is not None:
             action_result = self._act(action)
+            if action_result.park_status is not None:
+                info['park_status'] = action_result.park_status
+            self._raise_if_evicted(action_result)
         
         reward = 0
 
@@ -452,33 +1159,43 @@ class MiniAmusementPark(gym.Env):
 
         terminated, truncated = False, False
         if not action_result.error or self.noop_on_invalid_action:
-            # Run park for a day
-            data = {'parkId': self.park_id}
+            # wait(days=n) runs the park for up to n days
+            days = 1
+            if not action_result.error:
+                action_name, action_args = self.parse_action(action, self.park_id).data
+                if action_name == 'wait':
+                    days = action_args['days']
+                    info['daily_rewards'] = []
 
-            proceed_result = post_endpoint(self.host, self.port, "park/proceed", data, self.session)
+            data = {'parkId': self.park_id}
+            for day in range(days):
+                if day > 0:
+                    post_endpoint(self.host, self.port, "park/noop", data, self.session)
+
+                # Run park for a day
+                proceed_result = post_endpoint(self.host, self.port, "park/proceed", data, self.session)
+
+                # Check if park encountered an error
+                if proceed_result.error:
+                    info['error'] = {
+                        'message': proceed_result.message,
+                        'type': 'proceed_error'
+                    }
+                    break
 
-            # Check if park encountered an error
-            if proceed_result.error:
-                info['error'] = {
-                    'message': proceed_result.message,
-                    'type': 'proceed_error'
-                }
-            else:
                 # Action OK & no park server error, advance number of steps
-                reward = proceed_result.data['reward'] if not self.negative_reward_on_invalid_action or 'error' not in info else -1
+                reward += proceed_result.data['reward'] if not self.negative_reward_on_invalid_action or 'error' not in info else -1
                 terminated = proceed_result.data['terminated']
                 truncated = proceed_result.data['truncated']
+                if 'daily_rewards' in info:
+                    info['daily_rewards'].append(proceed_result.data['reward'])
+                if terminated or truncated:
+                    break
 
-        # Get observation and raw state
-        obs, raw_state = self.get_observation_and_raw_state()
-
-        if self.return_raw_in_info:
-            info['raw_state'] = raw_state
-
-        if self.render_park:
-            self.render(raw_state, obs, action=action, info=info, save_image=False)
+        # Get raw state
+        raw_state = self.get_raw_state()
 
-        return obs, reward, terminated, truncated, info
+        return reward, terminated, truncated, info, raw_state
 
     def set_seed(self, seed: Optional[int]) -> None:
         """Set the random seed for the park environment.
@@ -524,6 +1241,8 @@ class MiniAmusementPark(gym.Env):
         if action_name == 'modify':
             action_args["subtype"] = action_args.get("subtype", '')
             action_args["subclass"] = action_args.get("subclass", '')
+        if action_name == 'wait':
+            action_args["days"] = action_args.get("days", 1)
 
         # Validate presence of arguments
         action_params = set(action_args.keys())
@@ -550,6 +1269,9 @@ class MiniAmusementPark(gym.Env):
                 if not isinstance(param_value, expected_type):
                     return ParkResponse(status_code=400, message=f"Invalid action: {action} has argument {param_name} of type {type(param_value)} but expected type {expected_type}", data={}, error=True)
 
+        if action_name == 'wait' and action_args['days'] < 1:
+            return ParkResponse(status_code=400, message=f"Invalid action: {action} must wait for at least one day", data={}, error=True)
+
         return ParkResponse(status_code=200, message=f"Action {action} is valid", data=(action_name, action_args), error=False)
 
     def _act(self, action: str) -> ParkResponse:
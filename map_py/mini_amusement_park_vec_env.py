@@ -0,0 +1,244 @@
+"""Vectorized wrapper for the business simulator game Mini Amusement Parks
+
+Steps many parks with a single request to the park/step_batch endpoint.
+"""
+
+from map_py.mini_amusement_park import MiniAmusementPark
+from map_py.helpers import post_endpoint
+from map_py.transports import create_session
+from map_py.observations_and_actions.pydantic_obs import ParkDataGranularity, ParkObservabilityMode
+from map_py.observations_and_actions.gym_obs import format_gym_observation
+from gymnasium.vector import VectorEnv, AutoresetMode
+from gymnasium.vector.utils import batch_space, concatenate, create_empty_array, iterate
+from copy import deepcopy
+from typing import List, Optional, Sequence, Tuple, Union, Any
+import numpy as np
+
+
+class MiniAmusementParkVecEnv(VectorEnv):
+    metadata = {"autoreset_mode": AutoresetMode.NEXT_STEP}
+
+    def __init__(self,
+                 host: str,
+                 port: str,
+                 num_envs: int,
+                 park_ids: Optional[List[str]] = None,
+                 observation_type: str = "gym", # one of "gym", "gym_simple"
+                 obs_dtype: type = np.float64,
+                 data_level: ParkDataGranularity = ParkDataGranularity.HIGH,
+                 observability_mode: ParkObservabilityMode = ParkObservabilityMode.NORMAL,
+                 return_raw_in_info: bool = False,
+                 return_detailed_guest_info: bool = False,
+                 negative_reward_on_invalid_action: bool = False,
+                 difficulty: Optional[str] = None,
+                 layout: Optional[str] = None,
+                 starting_money: Optional[int] = None,
+                 horizon: Optional[int] = None,
+                 noop_on_invalid_action: bool = True,
+                 seed: Optional[int] = None,
+                 new_seed_on_reset: bool = False,
+                 copy: bool = True,
+                 transport: str = "http",
+                 socket_path: Optional[str] = None,
+                 wire_format: str = "json",
+                 state_deltas: bool = False,
+                 training_mode: bool = False,
+                 verbose: bool = False):
+        """Initialize a vectorized MiniAmusementPark environment.
+
+        Every sub-environment owns its own park on the server. Resets are performed per park,
+        while steps send the actions of all parks in one request.
+
+        Args:
+            host: The host address for the park's API server.
+            port: The port number for the park's API server.
+            num_envs: Number of parks to run.
+            park_ids: Optional park IDs to use, one per park. If None, new park IDs will be requested from the server.
+            observation_type: Type of observation to return. Must be one of "gym" or "gym_simple".
+            obs_dtype: Floating point type of the observation arrays. np.float32 halves the memory of the stacked observations.
+            data_level: Granularity level for park data observations (HIGH or LOW). Defaults to HIGH.
+            observability_mode: Observability mode for the park (NORMAL or ORACLE). Defaults to NORMAL.
+            return_raw_in_info: Whether to include raw state in the info dictionary returned by step/reset.
+            return_detailed_guest_info: Whether to include detailed guest information in observations.
+            negative_reward_on_invalid_action: Whether to give a negative reward for invalid actions.
+            difficulty: Optional difficulty setting for the parks (e.g., "easy", "medium").
+            layout: Optional layout name to use for the parks. Must correspond to a YAML file in the layouts directory.
+            starting_money: Optional starting money amount for the parks.
+            horizon: Optional maximum number of steps/episodes for the parks.
+            noop_on_invalid_action: If True, a park will proceed even if an invalid action is taken (no-op behavior).
+            seed: Optional random seed. Park i is seeded with seed + i.
+            new_seed_on_reset: If True, a new seed will be generated for each park on reset.
+            copy: If True, step and reset return a copy of the stacked observations.
+            transport: How requests are sent to the server, one of "http", "websocket" or "uds".
+            socket_path: Socket of a running park engine for transport="uds". If None, an engine is spawned
+                and shared by all parks.
+            wire_format: Encoding of HTTP responses, one of "json" or "msgpack".
+            state_deltas: If True, the server only sends what changed since the last state of each park.
+            training_mode: If True, the server does not keep the history of the parks, capture midday states or
+                broadcast actions to visualizers.
+            verbose: Whether to print action parsing errors.
+        Raises:
+            ValueError: If the observation type cannot be stacked, park_ids does not contain num_envs ids
+                or the transport is "pipe", whose parks cannot be shared between sessions.
+        """
+        if observation_type not in ["gym", "gym_simple"]:
+            raise ValueError(f"observation_type must be 'gym' or 'gym_simple', got {observation_type}")
+        if park_ids is not None and len(park_ids) != num_envs:
+            raise ValueError(f"Expected {num_envs} park ids, got {len(park_ids)}")
+        if transport == "pipe":
+            raise ValueError("transport 'pipe' is not supported by the vectorized environment, use 'uds' instead")
+
+        self.host = host
+        self.port = port
+        self.num_envs = num_envs
+        self.copy = copy
+        self.session = create_session(transport, host, port, socket_path, wire_format)
+        if transport == "uds":
+            # All parks must live in the engine that receives the batched steps
+            socket_path = self.session.socket_path
+        self.owns_parks = park_ids is None
+
+        self.envs = [MiniAmusementPark(host=host,
+                                       port=port,
+                                       park_id=None if park_ids is None else park_ids[i],
+                                       observation_type=observation_type,
+                                       obs_dtype=obs_dtype,
+                                       data_level=data_level,
+                                       observability_mode=observability_mode,
+                                       return_raw_in_info=return_raw_in_info,
+                                       return_detailed_guest_info=return_detailed_guest_info,
+                                       negative_reward_on_invalid_action=negative_reward_on_invalid_action,
+                                       difficulty=difficulty,
+                                       layout=layout,
+                                       starting_money=starting_money,
+                                       horizon=horizon,
+                                       noop_on_invalid_action=noop_on_invalid_action,
+                                       seed=None if seed is None else seed + i,
+                                       new_seed_on_reset=new_seed_on_reset,
+                                       transport=transport,
+                                       socket_path=socket_path,
+                                       wire_format=wire_format,
+                                       state_deltas=state_deltas,
+                                       training_mode=training_mode,
+                                       verbose=verbose)
+                     for i in range(num_envs)]
+
+        self.single_observation_space = self.envs[0].observation_space
+        self.single_action_space = self.envs[0].action_space
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+        self.action_space = batch_space(self.single_action_space, num_envs)
+
+        self._observations = create_empty_array(self.single_observation_space, n=num_envs, fn=np.zeros)
+        self._autoreset_envs = np.zeros(num_envs, dtype=np.bool_)
+
+    @property
+    def park_ids(self) -> List[str]:
+        """The park IDs of the sub-environments."""
+        return [env.park_id for env in self.envs]
+
+    def reset(self, *, seed: Union[int, Sequence[Optional[int]], None] = None,
+              options: dict[str, Any] | None = None) -> Tuple[dict, dict]:
+        """Reset all parks.
+
+        Args:
+            seed: Optional seed. An int seeds park i with seed + i, a sequence provides one seed per park.
+            options: Options passed to MiniAmusementPark.reset for every park.
+
+        Returns:
+            A tuple containing the stacked observations and the vectorized info dictionary.
+        """
+        if seed is None:
+            seeds = [None] * self.num_envs
+        elif isinstance(seed, int):
+            seeds = [seed + i for i in range(self.num_envs)]
+        else:
+            seeds = list(seed)
+            if len(seeds) != self.num_envs:
+                raise ValueError(f"Expected {self.num_envs} seeds, got {len(seeds)}")
+
+        observations, infos = [], {}
+        for i, (env, env_seed) in enumerate(zip(self.envs, seeds)):
+            obs, info = env.reset(seed=env_seed, options=options)
+            observations.append(obs)
+            infos = self._add_info(infos, info, i)
+
+        self._autoreset_envs = np.zeros(self.num_envs, dtype=np.bool_)
+        self._observations = concatenate(self.single_observation_space, observations, self._observations)
+        return deepcopy(self._observations) if self.copy else self._observations, infos
+
+    def step(self, actions: Union[np.ndarray, Sequence[str]]) -> Tuple[dict, np.ndarray, np.ndarray, np.ndarray, dict]:
+        """Perform one step in every park.
+
+        Parks whose episode ended on the previous step are reset instead of stepped.
+
+        Args:
+            actions: A batch of gym actions, or one action string per park.
+
+        Returns:
+            A 5-tuple containing the stacked observations, rewards, terminations, truncations and
+            the vectorized info dictionary.
+
+        Raises:
+            RuntimeError: If the server encounters an error while stepping.
+        """
+        if not isinstance(actions, (list, tuple)):
+            actions = list(iterate(self.action_space, actions))
+
+        rewards = np.zeros(self.num_envs, dtype=np.float64)
+        terminations = np.zeros(self.num_envs, dtype=np.bool_)
+        truncations = np.zeros(self.num_envs, dtype=np.bool_)
+        observations, infos = [None] * self.num_envs, {}
+
+        steps, step_infos, step_indices = [], [], []
+        for i, (env, action) in enumerate(zip(self.envs, actions)):
+            if self._autoreset_envs[i]:
+                observations[i], info = env.reset()
+                infos = self._add_info(infos, info, i)
+                continue
+            data, info = env._step_request_data(env._decode_action(action))
+            steps.append(data)
+            step_infos.append(info)
+            step_indices.append(i)
+
+        if len(steps) > 0:
+            result = post_endpoint(self.host, self.port, "park/step_batch", {"steps": steps}, self.session)
+            if result.error:
+                raise RuntimeError(f'Server encountered the error while stepping: {result.message}. \nFull response: {result}')
+
+            for i, info, step_data in zip(step_indices, step_infos, result.data['results']):
+                env = self.envs[i]
+                rewards[i], terminations[i], truncations[i], info, raw_state = env._process_step_data(step_data, info)
+                if env.observation_type == "gym":
+                    # Encode straight into the stacked observations instead of stacking a new observation
+                    format_gym_observation(raw_state, out={key: array[i] for key, array in self._observations.items()})
+                else:
+                    observations[i] = env._format_observation(raw_state)
+                if env.return_raw_in_info:
+                    info['raw_state'] = raw_state
+                infos = self._add_info(infos, info, i)
+
+        self._autoreset_envs = np.logical_or(terminations, truncations)
+        if self.envs[0].observation_type == "gym":
+            # Only the parks that were reset still need to be written
+            for i, obs in enumerate(observations):
+                if obs is not None:
+                    for key, value in obs.items():
+                        self._observations[key][i] = value
+        else:
+            self._observations = concatenate(self.single_observation_space, observations, self._observations)
+        return (deepcopy(self._observations) if self.copy else self._observations,
+                rewards, terminations, truncations, infos)
+
+    def close_extras(self, **kwargs: Any) -> None:
+        """Delete the parks created by this environment and close the HTTP sessions."""
+        for env in self.envs:
+            if self.owns_parks:
+                try:
+                    env.delete_park()
+                except Exception as e:
+                    print(f"Warning: Failed to clear park during cleanup: {e}")
+            env.shutdown()
+        try:
+            self.session.close()
+        except:
+            pass
@@ -2,9 +2,9 @@
    The python environment wrapper for the business simulator games
 """
 from .pydantic_obs import FullParkObs, format_pydantic_observation
-from .gym_obs import MapsGymObservationSpace, format_gym_observation, obs_pydantic_to_array, obs_array_to_pydantic
+from .gym_obs import MapsGymObservationSpace, format_gym_observation, format_gym_observation_batch, empty_gym_observation_batch, obs_pydantic_to_array, obs_array_to_pydantic
 from .gym_action import MapsGymActionSpace
 from .simple_gym_obs import MapsSimpleGymObservationSpace, format_simple_gym_observation
 from .simple_gym_action import MapsSimpleGymActionSpace
 
-__all__ = ['FullParkObs', 'format_pydantic_observation', 'MapsGymObservationSpace', 'format_gym_observation', 'obs_pydantic_to_array', 'obs_array_to_pydantic', 'MapsGymActionSpace', 'MapsSimpleGymObservationSpace', 'format_simple_gym_observation', 'MapsSimpleGymActionSpace']
\ No newline at end of file
+__all__ = ['FullParkObs', 'format_pydantic_observation', 'MapsGymObservationSpace', 'format_gym_observation', 'format_gym_observation_batch', 'empty_gym_observation_batch', 'obs_pydantic_to_array', 'obs_array_to_pydantic', 'MapsGymActionSpace', 'MapsSimpleGymObservationSpace', 'format_simple_gym_observation', 'MapsSimpleGymActionSpace']
\ No newline at end of file
@@ -9,6 +9,7 @@ import numpy as np
 from typing import Dict, List, Tuple, Any, Optional
 import yaml
 from .pydantic_obs import FullParkObs, park_observability_context, ParkDataGranularity, ParkObservabilityMode
+from .normalization import NormalizationTable, normalization_scales
 import gymnasium as gym
 from map_py.shared_constants import MAP_CONFIG as CONFIG
 
@@ -162,6 +163,79 @@ GRID_CHANNELS = [
 # Create a channel index mapping for O(1) lookups
 GRID_CHANNEL_INDICES = {channel: idx for idx, channel in enumerate(GRID_CHANNELS)}
 
+# Divisor of each field of NORMALIZATION_CONFIG, computed once
+NORMALIZATION_SCALES = normalization_scales(NORMALIZATION_CONFIG)
+
+# Normalization of each entry of the observation vectors and of the rows of the staff and survey matrices,
+# see FieldNormalization. Values that are copied unchanged are indicators, or are encoded separately
+RIDES_VECTOR_FIELDS = ['total_rides', 2, 'total_operating_cost', 'total_revenue_generated', 'total_excitement', 'avg_intensity', 'total_capacity']
+SHOPS_VECTOR_FIELDS = ['total_shops', 'total_revenue_generated_shops', 'total_operating_cost_shops', 2]
+STAFF_VECTOR_FIELDS = ['total_janitors'] * 4 + ['total_mechanics'] * 4 + ['total_specialists'] * 4 + ['total_salary_paid', 'staff_total_operating_cost']
+# The success metric value is normalized with the configuration of the success metric of each staff member
+STAFF_MEMBER_FIELDS = ['x', 'y', 'subclass_id', 'salary', 'employee_operating_cost', 'success_metric_id', None, 'tiles_traversed']
+GUESTS_VECTOR_FIELDS = ['total_guests', 'avg_money_spent', 'avg_time_in_park', 'avg_rides_visited', 'avg_food_shops_visited',
+                        'avg_drink_shops_visited', 'avg_specialty_shops_visited']
+SURVEY_AGE_FIELDS = ['survey_age']
+SURVEY_RESULT_FIELDS = [2, 2, 2, 'remaining_energy', 'remaining_money', 2, 'reason_for_exit_id', 'preference_id']
+PARK_VECTOR_FIELDS = (['step', 'horizon', 'value', 'money', 'revenue', 'expenses', None, 'profit', 'park_rating', 'research_speed']
+                      + [None] * 9 + ['research_operating_cost'] + [None] * ((len(ATTRACTION_TYPES) + 3) * len(ATTRACTION_COLORS))
+                      + [None, 'fast_days_since_last_new_entity', 'medium_days_since_last_new_entity', 'slow_days_since_last_new_entity', 2])
+
+RIDES_VECTOR_TABLE = NormalizationTable(NORMALIZATION_CONFIG, RIDES_VECTOR_FIELDS)
+SHOPS_VECTOR_TABLE = NormalizationTable(NORMALIZATION_CONFIG, SHOPS_VECTOR_FIELDS)
+STAFF_VECTOR_TABLE = NormalizationTable(NORMALIZATION_CONFIG, STAFF_VECTOR_FIELDS)
+STAFF_MEMBER_TABLE = NormalizationTable(NORMALIZATION_CONFIG, STAFF_MEMBER_FIELDS)
+GUESTS_VECTOR_TABLE = NormalizationTable(NORMALIZATION_CONFIG, GUESTS_VECTOR_FIELDS)
+SURVEY_AGE_TABLE = NormalizationTable(NORMALIZATION_CONFIG, SURVEY_AGE_FIELDS)
+SURVEY_RESULT_TABLE = NormalizationTable(NORMALIZATION_CONFIG, SURVEY_RESULT_FIELDS)
+PARK_VECTOR_TABLE = NormalizationTable(NORMALIZATION_CONFIG, PARK_VECTOR_FIELDS)
+
+# Grid channels of attractions, by attraction type, as (channel, field of the attraction, normalization).
+# The normalization is a key in NORMALIZATION_CONFIG, or the number of decimals for fields that are already in [0, 1]
+ATTRACTION_GRID_FIELDS = {
+    'ride': [
+        ('price', 'ticket_price', 'price'),
+        ('operating_cost', 'operating_cost', 'operating_cost'),
+        ('revenue_generated', 'revenue_generated', 'revenue_generated'),
+        ('guests_served', 'guests_entertained', 'guests_served'),
+        ('cleanliness', 'cleanliness', 2),
+        ('excitement', 'excitement', 'excitement'),
+        ('intensity', 'intensity', 'intensity'),
+        ('capacity', 'capacity', 'capacity'),
+        ('times_operated', 'times_operated', 'times_operated'),
+        ('uptime', 'uptime', 2),
+        ('avg_wait_time', 'avg_wait_time', 'avg_wait_time'),
+        ('avg_guests_per_operation', 'avg_guests_per_operation', 'avg_guests_per_operation'),
+        ('cost_per_operation', 'cost_per_operation', 'cost_per_operation'),
+        ('breakdown_rate', 'breakdown_rate', 3),
+    ],
+    'shop': [
+        ('price', 'item_price', 'price'),
+        ('operating_cost', 'operating_cost', 'operating_cost'),
+        ('revenue_generated', 'revenue_generated', 'revenue_generated'),
+        ('guests_served', 'guests_served', 'guests_served'),
+        ('cleanliness', 'cleanliness', 2),
+        ('item_cost', 'item_cost', 'item_cost'),
+        ('number_of_restocks', 'number_of_restocks', 'number_of_restocks'),
+        ('order_quantity', 'order_quantity', 'order_quantity'),
+        ('inventory', 'inventory', 'inventory'),
+        ('shop_uptime', 'uptime', 2),
+    ],
+}
+SUBTYPE_CHANNELS = {subtype: GRID_CHANNEL_INDICES[f'is_{subtype}'] for subtype in ATTRACTION_TYPES}
+SUBCLASS_CHANNELS = {subclass: GRID_CHANNEL_INDICES[f'is_{subclass}'] for subclass in ATTRACTION_COLORS}
+ATTRACTION_GRID_CHANNELS = {attraction_type: np.array([GRID_CHANNEL_INDICES[channel] for channel, _, _ in fields])
+                            for attraction_type, fields in ATTRACTION_GRID_FIELDS.items()}
+ATTRACTION_GRID_TABLES = {attraction_type: NormalizationTable(NORMALIZATION_CONFIG, [normalization for _, _, normalization in fields])
+                          for attraction_type, fields in ATTRACTION_GRID_FIELDS.items()}
+SUCCESS_METRIC_TABLES = {metric: NormalizationTable(NORMALIZATION_CONFIG, [metric]) for metric in STAFF_SUCCESS_METRICS}
+
+# Kinds of cells decoded from the grid, by precedence: a cell is decoded as the first kind whose indicator is set
+RIDE_SUBTYPES = ['roller_coaster', 'ferris_wheel', 'carousel']
+SHOP_SUBTYPES = ['drink', 'food', 'specialty']
+CELL_KINDS = ['entrance', 'exit', 'path', 'water'] + RIDE_SUBTYPES + SHOP_SUBTYPES
+CELL_KIND_CHANNELS = [GRID_CHANNEL_INDICES[f'is_{kind}'] for kind in CELL_KINDS]
+
 def normalize_with_config(value: float, config_key: str) -> float:
     """
     Normalize a value using the configuration for that field.
@@ -177,8 +251,8 @@ def normalize_with_config(value: float, config_key: str) -> float:
     if use_log:
         if value <= -1.0:
             raise ValueError(f"Normalize value {value} for {config_key} is less than or equal to -1.0")
-        value, max_value = np.log1p(value), np.log1p(max_value)
-    return value / max_value
+        value = np.log1p(value)
+    return value / NORMALIZATION_SCALES[config_key]
 
 def denormalize_with_config(value: float, config_key: str) -> float:
     """
@@ -187,14 +261,10 @@ def denormalize_with_config(value: float, config_key: str) -> float:
     use_log, max_value = NORMALIZATION_CONFIG[config_key]    
     if max_value == 1.0:
         raise ValueError(f"Denormalize value for {config_key} is 1.0")
+    # Log scaled fields are divided by log1p(max_value), the other ones by max_value
+    denorm_value = value * NORMALIZATION_SCALES[config_key]
     if use_log:
-        # For log normalization, we need to use log1p(max_value) as the scaling factor
-        log_max_value = np.log1p(max_value)
-        denorm_value = value * log_max_value
         denorm_value = np.expm1(denorm_value)
-    else:
-        # For linear normalization, just multiply by max_value
-        denorm_value = value * max_value
     
     if isinstance(max_value, int):
         denorm_value = round(denorm_value.item())
@@ -202,11 +272,42 @@ def denormalize_with_config(value: float, config_key: str) -> float:
         denorm_value = round(denorm_value.item(), 2)
     return denorm_value
 
+# Tolerance of decoding float32 observations, e.g. when comparing the round trip in the "test" observation type.
+# float32 keeps about 7 significant digits, so a denormalized value can be off by a relative 1e-5 (the log
+# scaled fields amplify the error of the normalized value), plus one step of the rounding to 2 decimals
+FLOAT32_ROUND_TRIP_RTOL = 1e-5
+FLOAT32_ROUND_TRIP_ATOL = 0.01
+
+def observation_values_close(a: Any, b: Any, rtol: float = FLOAT32_ROUND_TRIP_RTOL, atol: float = FLOAT32_ROUND_TRIP_ATOL) -> bool:
+    """
+    Compare two observations, e.g. model dumps of pydantic observations, allowing numbers to differ by a tolerance.
+
+    Args:
+        a: The first observation, a dict, list or value
+        b: The second observation
+        rtol: Relative tolerance of numbers
+        atol: Absolute tolerance of numbers
+
+    Returns:
+        True if both have the same structure, the same non-numerical values and numbers within the tolerance
+    """
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(observation_values_close(a[key], b[key], rtol, atol) for key in a)
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        return len(a) == len(b) and all(observation_values_close(x, y, rtol, atol) for x, y in zip(a, b))
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)) and not isinstance(a, bool) and not isinstance(b, bool):
+        return bool(np.isclose(a, b, rtol=rtol, atol=atol))
+    return a == b
+
 # Update the conversion function to use the configuration
-def obs_pydantic_to_array(obs: FullParkObs) -> Dict[str, np.ndarray]:
+def obs_pydantic_to_array(obs: FullParkObs, dtype: type = np.float64) -> Dict[str, np.ndarray]:
     """
     Convert a FullParkObs pydantic object to gym-compatible numpy arrays.
     Uses configuration-based normalization for all values.
+
+    Args:
+        obs: The pydantic observation
+        dtype: Floating point type of the returned arrays. Values are computed in float64 and then cast.
     """
     # Initialize unified grid
     grid = np.zeros((PARK_SIZE, PARK_SIZE, len(GRID_CHANNELS)), dtype=np.float64)
@@ -224,195 +325,71 @@ def obs_pydantic_to_array(obs: FullParkObs) -> Dict[str, np.ndarray]:
     for water in obs.waters:
         grid[water.x, water.y, GRID_CHANNEL_INDICES['is_water']] = 1.0
     
-    attraction_list = [('ride', attraction) for attraction in obs.rides.ride_list] + [('shop', attraction) for attraction in obs.shops.shop_list]
-    # Fill rides
-    for type, attraction in attraction_list:
-        # Set specific ride type
-        if attraction.subtype == 'roller_coaster':
-            grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['is_roller_coaster']] = 1.0
-        elif attraction.subtype == 'ferris_wheel':
-            grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['is_ferris_wheel']] = 1.0
-        elif attraction.subtype == 'carousel':
-            grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['is_carousel']] = 1.0
-        # Set specific shop type
-        elif attraction.subtype == 'drink':
-            grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['is_drink']] = 1.0
-        elif attraction.subtype == 'food':
-            grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['is_food']] = 1.0
-        elif attraction.subtype == 'specialty':
-            grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['is_specialty']] = 1.0
-        
-        # Set color
-        if attraction.subclass == 'yellow':
-            grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['is_yellow']] = 1.0
-        elif attraction.subclass == 'blue':
-            grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['is_blue']] = 1.0
-        elif attraction.subclass == 'green':
-            grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['is_green']] = 1.0
-        elif attraction.subclass == 'red':
-            grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['is_red']] = 1.0
-        
-        # Set out of service
-        if attraction.out_of_service:
-            grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['out_of_service']] = 1.0
-        
-        # Shared numerical properties
-        grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['cleanliness']] = np.round(attraction.cleanliness, 2)
-        grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['operating_cost']] = normalize_with_config(attraction.operating_cost, 'operating_cost')
-        grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['revenue_generated']] = normalize_with_config(attraction.revenue_generated, 'revenue_generated')
-
-        # Shared, but differently named numerical properties
-        price = attraction.ticket_price if type == 'ride' else attraction.item_price
-        grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['price']] = normalize_with_config(price, 'price')
-        num_guests = attraction.guests_entertained if type == 'ride' else attraction.guests_served
-        grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['guests_served']] = normalize_with_config(num_guests, 'guests_served')
-
-        # Ride-specific numerical properties
-        if type == 'ride':
-            grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['excitement']] = normalize_with_config(attraction.excitement, 'excitement')
-            grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['intensity']] = normalize_with_config(attraction.intensity, 'intensity')
-            grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['capacity']] = normalize_with_config(attraction.capacity, 'capacity')
-            grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['uptime']] = np.round(attraction.uptime, 2)
-            grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['times_operated']] = normalize_with_config(attraction.times_operated, 'times_operated')
-            grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['avg_wait_time']] = normalize_with_config(attraction.avg_wait_time, 'avg_wait_time')
-            grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['avg_guests_per_operation']] = normalize_with_config(attraction.avg_guests_per_operation, 'avg_guests_per_operation')
-            grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['cost_per_operation']] = normalize_with_config(attraction.cost_per_operation, 'cost_per_operation')
-            grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['breakdown_rate']] = np.round(attraction.breakdown_rate, 3)
-
-        # Shop-specific numerical properties
-        elif type == 'shop':
-            grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['item_cost']] = normalize_with_config(attraction.item_cost, 'item_cost')
-            grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['number_of_restocks']] = normalize_with_config(attraction.number_of_restocks, 'number_of_restocks')
-            grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['order_quantity']] = normalize_with_config(attraction.order_quantity, 'order_quantity')
-            grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['inventory']] = normalize_with_config(attraction.inventory, 'inventory')
-            grid[attraction.x, attraction.y, GRID_CHANNEL_INDICES['shop_uptime']] = np.round(attraction.uptime, 2)
+    # Fill rides and shops
+    _fill_attraction_grid(grid, [dict(ride) for ride in obs.rides.ride_list], 'ride')
+    _fill_attraction_grid(grid, [dict(shop) for shop in obs.shops.shop_list], 'shop')
 
     # Create vectors with configuration-based normalization
-    rides_vector = np.array([
-        normalize_with_config(obs.rides.total_rides, 'total_rides'),
-        np.round(obs.rides.min_uptime, 2),
-        normalize_with_config(obs.rides.total_operating_cost, 'total_operating_cost'),
-        normalize_with_config(obs.rides.total_revenue_generated, 'total_revenue_generated'),
-        normalize_with_config(obs.rides.total_excitement, 'total_excitement'),
-        normalize_with_config(obs.rides.avg_intensity, 'avg_intensity'),
-        normalize_with_config(obs.rides.total_capacity, 'total_capacity'),
-    ], dtype=np.float64)
+    rides_vector = RIDES_VECTOR_TABLE.normalize([
+        obs.rides.total_rides,
+        obs.rides.min_uptime,
+        obs.rides.total_operating_cost,
+        obs.rides.total_revenue_generated,
+        obs.rides.total_excitement,
+        obs.rides.avg_intensity,
+        obs.rides.total_capacity,
+    ])
     
-    shops_vector = np.array([
-        normalize_with_config(obs.shops.total_shops, 'total_shops'),
-        normalize_with_config(obs.shops.total_revenue_generated, 'total_revenue_generated_shops'),
-        normalize_with_config(obs.shops.total_operating_cost, 'total_operating_cost_shops'),
-        np.round(obs.shops.min_uptime, 2)
-    ], dtype=np.float64)
+    shops_vector = SHOPS_VECTOR_TABLE.normalize([
+        obs.shops.total_shops,
+        obs.shops.total_revenue_generated,
+        obs.shops.total_operating_cost,
+        obs.shops.min_uptime
+    ])
     
     # Staff vector with color-coded counts (14 elements total)
     # total_janitors, total_mechanics, total_specialists are Lists of 4 ints each
-    staff_vector = np.array([
-        # Janitors by color (4 values)
-        normalize_with_config(obs.staff.total_janitors[0], 'total_janitors'),
-        normalize_with_config(obs.staff.total_janitors[1], 'total_janitors'),
-        normalize_with_config(obs.staff.total_janitors[2], 'total_janitors'),
-        normalize_with_config(obs.staff.total_janitors[3], 'total_janitors'),
-        # Mechanics by color (4 values)
-        normalize_with_config(obs.staff.total_mechanics[0], 'total_mechanics'),
-        normalize_with_config(obs.staff.total_mechanics[1], 'total_mechanics'),
-        normalize_with_config(obs.staff.total_mechanics[2], 'total_mechanics'),
-        normalize_with_config(obs.staff.total_mechanics[3], 'total_mechanics'),
-        # Specialists by color (4 values)
-        normalize_with_config(obs.staff.total_specialists[0], 'total_specialists'),
-        normalize_with_config(obs.staff.total_specialists[1], 'total_specialists'),
-        normalize_with_config(obs.staff.total_specialists[2], 'total_specialists'),
-        normalize_with_config(obs.staff.total_specialists[3], 'total_specialists'),
-        # Aggregate staff costs (2 values)
-        normalize_with_config(obs.staff.total_salary_paid, 'total_salary_paid'),
-        normalize_with_config(obs.staff.total_operating_cost, 'staff_total_operating_cost')
-    ], dtype=np.float64)
+    staff_vector = STAFF_VECTOR_TABLE.normalize([
+        *obs.staff.total_janitors,
+        *obs.staff.total_mechanics,
+        *obs.staff.total_specialists,
+        obs.staff.total_salary_paid,
+        obs.staff.total_operating_cost
+    ])
     
-    # Create janitor vector with all Employee fields including x,y (50, 8)
-    # Fields: [x, y, subclass_id, salary, operating_cost, success_metric_id, success_metric_value, tiles_traversed]
-    # Sort janitors by (x, y) coordinates to match extraction order
-    sorted_janitors = sorted(obs.staff.staff_list, key=lambda s: (s.x, s.y) if s.subtype == 'janitor' else (999, 999))
-    sorted_janitors = [s for s in sorted_janitors if s.subtype == 'janitor'][:MAX_STAFF_PER_TYPE]
-    janitor_vector = np.zeros((MAX_STAFF_PER_TYPE, 8), dtype=np.float64)
-    for i, janitor in enumerate(sorted_janitors):
-        janitor_vector[i] = [
-            normalize_with_config(janitor.x, 'x'),
-            normalize_with_config(janitor.y, 'y'),
-            normalize_with_config(STAFF_SUBCLASS_MAP[janitor.subclass], 'subclass_id'),
-            normalize_with_config(janitor.salary or 0, 'salary'),
-            normalize_with_config(janitor.operating_cost or 0, 'employee_operating_cost'),
-            normalize_with_config(STAFF_SUCCESS_METRICS[janitor.success_metric], 'success_metric_id'),
-            normalize_with_config(janitor.success_metric_value or 0.0, janitor.success_metric),
-            normalize_with_config(janitor.tiles_traversed or 0, 'tiles_traversed')
-        ]
-
-    # Create mechanic vector with all Employee fields including x,y (50, 8)
+    # Create janitor, mechanic and specialist vectors with all Employee fields including x,y (50, 8)
     # Fields: [x, y, subclass_id, salary, operating_cost, success_metric_id, success_metric_value, tiles_traversed]
-    # Sort mechanics by (x, y) coordinates to match extraction order
-    sorted_mechanics = sorted(obs.staff.staff_list, key=lambda s: (s.x, s.y) if s.subtype == 'mechanic' else (999, 999))
-    sorted_mechanics = [s for s in sorted_mechanics if s.subtype == 'mechanic'][:MAX_STAFF_PER_TYPE]
-    mechanic_vector = np.zeros((MAX_STAFF_PER_TYPE, 8), dtype=np.float64)
-    for i, mechanic in enumerate(sorted_mechanics):
-        mechanic_vector[i] = [
-            normalize_with_config(mechanic.x, 'x'),
-            normalize_with_config(mechanic.y, 'y'),
-            normalize_with_config(STAFF_SUBCLASS_MAP[mechanic.subclass], 'subclass_id'),
-            normalize_with_config(mechanic.salary or 0, 'salary'),
-            normalize_with_config(mechanic.operating_cost or 0, 'employee_operating_cost'),
-            normalize_with_config(STAFF_SUCCESS_METRICS[mechanic.success_metric], 'success_metric_id'),
-            normalize_with_config(mechanic.success_metric_value or 0.0, mechanic.success_metric),
-            normalize_with_config(mechanic.tiles_traversed or 0, 'tiles_traversed')
-        ]
-
-    # Create specialist vector with all Employee fields including x,y (50, 8)
-    # Specialists aren't on grid so we store x,y in the vector
-    # Sort specialists by (x, y) coordinates to match extraction order
-    sorted_specialists = sorted(obs.staff.staff_list, key=lambda s: (s.x, s.y) if s.subtype == 'specialist' else (999, 999))
-    sorted_specialists = [s for s in sorted_specialists if s.subtype == 'specialist'][:MAX_STAFF_PER_TYPE]
-    specialist_vector = np.zeros((MAX_STAFF_PER_TYPE, 8), dtype=np.float64)
-    for i, specialist in enumerate(sorted_specialists):
-        success_metric_id = STAFF_SUCCESS_METRICS[specialist.success_metric]
-        specialist_vector[i] = [
-            normalize_with_config(specialist.x, 'x'),
-            normalize_with_config(specialist.y, 'y'),
-            normalize_with_config(STAFF_SUBCLASS_MAP[specialist.subclass], 'subclass_id'),
-            normalize_with_config(specialist.salary or 0, 'salary'),
-            normalize_with_config(specialist.operating_cost or 0, 'employee_operating_cost'),
-            normalize_with_config(success_metric_id, 'success_metric_id'),
-            normalize_with_config(specialist.success_metric_value or 0.0, specialist.success_metric),
-            normalize_with_config(specialist.tiles_traversed or 0, 'tiles_traversed')
-        ]
+    # Staff are sorted by (x, y) coordinates to match extraction order
+    janitor_vector = _pydantic_staff_matrix(obs.staff.staff_list, 'janitor')
+    mechanic_vector = _pydantic_staff_matrix(obs.staff.staff_list, 'mechanic')
+    specialist_vector = _pydantic_staff_matrix(obs.staff.staff_list, 'specialist')
     
-    guests_vector = np.array([
-        normalize_with_config(obs.guests.total_guests, 'total_guests'),
-        normalize_with_config(obs.guests.avg_money_spent, 'avg_money_spent'),
-        normalize_with_config(obs.guests.avg_time_in_park, 'avg_time_in_park'),
-        normalize_with_config(obs.guests.avg_rides_visited, 'avg_rides_visited'),
-        normalize_with_config(obs.guests.avg_food_shops_visited, 'avg_food_shops_visited'),
-        normalize_with_config(obs.guests.avg_drink_shops_visited, 'avg_drink_shops_visited'),
-        normalize_with_config(obs.guests.avg_specialty_shops_visited, 'avg_specialty_shops_visited')
-    ], dtype=np.float64)
+    guests_vector = GUESTS_VECTOR_TABLE.normalize([
+        obs.guests.total_guests,
+        obs.guests.avg_money_spent,
+        obs.guests.avg_time_in_park,
+        obs.guests.avg_rides_visited,
+        obs.guests.avg_food_shops_visited,
+        obs.guests.avg_drink_shops_visited,
+        obs.guests.avg_specialty_shops_visited
+    ])
     
     # Survey results
-    survey_age = np.array([
-        normalize_with_config(obs.guest_survey_results.age_of_results, 'survey_age')
-    ], dtype=np.float64)
+    survey_age = SURVEY_AGE_TABLE.normalize([obs.guest_survey_results.age_of_results])
     
     survey_results = np.zeros((MAX_SURVEY_RESULTS, 8), dtype=np.float64)
-    for i, result in enumerate(obs.guest_survey_results.list_of_results[:MAX_SURVEY_RESULTS]):
-        reason_for_exit_id = GUEST_ENUMS['exit_reason_description_to_id'][result.reason_for_exit]
-        preference_id = GUEST_ENUMS['preference_description_to_id'][result.preference]
-        if result:
-            survey_results[i] = [
-                np.round(result.happiness_at_exit, 2),
-                np.round(result.hunger_at_exit, 2),
-                np.round(result.thirst_at_exit, 2),
-                normalize_with_config(result.remaining_energy, 'remaining_energy'),
-                normalize_with_config(result.remaining_money, 'remaining_money'),
-                np.round(result.percent_of_money_spent, 2),
-                normalize_with_config(reason_for_exit_id, 'reason_for_exit_id'),  # Would need to parse from string
-                normalize_with_config(preference_id, 'preference_id')  # Would need to parse from string
-            ]
+    results = obs.guest_survey_results.list_of_results[:MAX_SURVEY_RESULTS]
+    if results:
+        survey_results[:len(results)] = SURVEY_RESULT_TABLE.normalize([
+            [result.happiness_at_exit,
+             result.hunger_at_exit,
+             result.thirst_at_exit,
+             result.remaining_energy,
+             result.remaining_money,
+             result.percent_of_money_spent,
+             GUEST_ENUMS['exit_reason_description_to_id'][result.reason_for_exit],
+             GUEST_ENUMS['preference_description_to_id'][result.preference]]
+            for result in results])
     
     # Park vector with configuration-based normalization
     research_speed_map = {'none': 0, 'slow': 1, 'medium': 2, 'fast': 4}
@@ -442,28 +419,28 @@ def obs_pydantic_to_array(obs: FullParkObs) -> Dict[str, np.ndarray]:
                 available_entities[i] = 1.0
             i += 1
     
-    park_vector = np.array([
-        normalize_with_config(obs.step, 'step'),
-        normalize_with_config(obs.horizon, 'horizon'),
-        normalize_with_config(obs.value, 'value'),
-        normalize_with_config(obs.money, 'money'),
-        normalize_with_config(obs.revenue, 'revenue'),
-        normalize_with_config(obs.expenses, 'expenses'),
+    park_vector = PARK_VECTOR_TABLE.normalize([
+        obs.step,
+        obs.horizon,
+        obs.value,
+        obs.money,
+        obs.revenue,
+        obs.expenses,
         1.0 if obs.profit > 0 else 0.0, # profit sign
-        normalize_with_config(abs(obs.profit), 'profit'),
-        normalize_with_config(obs.park_rating, 'park_rating'),
-        normalize_with_config(research_speed, 'research_speed'),
+        abs(obs.profit),
+        obs.park_rating,
+        research_speed,
         *in_research,
-        normalize_with_config(obs.research_operating_cost, 'research_operating_cost'),
+        obs.research_operating_cost,
         *available_entities,
         1.0 if obs.new_entity_available else 0.0, # new_entity_available
-        normalize_with_config(obs.fast_days_since_last_new_entity, 'fast_days_since_last_new_entity'),
-        normalize_with_config(obs.medium_days_since_last_new_entity, 'medium_days_since_last_new_entity'),
-        normalize_with_config(obs.slow_days_since_last_new_entity, 'slow_days_since_last_new_entity'),
+        obs.fast_days_since_last_new_entity,
+        obs.medium_days_since_last_new_entity,
+        obs.slow_days_since_last_new_entity,
         round(obs.min_cleanliness, 2),
-    ], dtype=np.float64)
+    ])
 
-    return {
+    obs_arrays = {
         'grid': grid,
         'rides_vector': rides_vector,
         'shops_vector': shops_vector,
@@ -476,11 +453,15 @@ def obs_pydantic_to_array(obs: FullParkObs) -> Dict[str, np.ndarray]:
         'survey_results': survey_results,
         'park_vector': park_vector
     }
+    return {key: value.astype(dtype, copy=False) for key, value in obs_arrays.items()}
 
 def obs_array_to_pydantic(obs_dict: Dict[str, np.ndarray], data_level: ParkDataGranularity, observability_mode: ParkObservabilityMode, as_dict: bool=False, raw_state: Optional[dict] = None) -> FullParkObs:
     """
     Convert gym-compatible numpy arrays to a FullParkObs pydantic object.
 
+    Arrays of any floating point type are accepted. Values are denormalized in float64, so decoding float32
+    arrays gives values within FLOAT32_ROUND_TRIP_RTOL and FLOAT32_ROUND_TRIP_ATOL of the encoded ones.
+
     Args:
         obs_dict: Dictionary of numpy arrays from gym observation
         data_level: Park data granularity level
@@ -491,184 +472,109 @@ def obs_array_to_pydantic(obs_dict: Dict[str, np.ndarray], data_level: ParkDataG
     rides_vector = obs_dict['rides_vector']
     shops_vector = obs_dict['shops_vector']
     staff_vector = obs_dict['staff_vector']
-    janitor_vector = obs_dict.get('janitor_vector', np.zeros((MAX_STAFF_PER_TYPE, 8), dtype=np.float64))
-    mechanic_vector = obs_dict.get('mechanic_vector', np.zeros((MAX_STAFF_PER_TYPE, 8), dtype=np.float64))
-    specialist_vector = obs_dict.get('specialist_vector', np.zeros((MAX_STAFF_PER_TYPE, 8), dtype=np.float64))
+    janitor_vector = obs_dict.get('janitor_vector', np.zeros((MAX_STAFF_PER_TYPE, 8), dtype=grid.dtype))
+    mechanic_vector = obs_dict.get('mechanic_vector', np.zeros((MAX_STAFF_PER_TYPE, 8), dtype=grid.dtype))
+    specialist_vector = obs_dict.get('specialist_vector', np.zeros((MAX_STAFF_PER_TYPE, 8), dtype=grid.dtype))
     guests_vector = obs_dict['guests_vector']
     survey_age = obs_dict['survey_age']
     survey_results = obs_dict['survey_results']
     park_vector = obs_dict['park_vector']
     
-    # Extract grid data
-    entrance_coords = None
-    exit_coords = None
-    paths = []
-    waters = []
-    rides = []
-    shops = []
-    janitors = []
-    mechanics = []
-    specialists = []
-    for x in range(PARK_SIZE):
-        for y in range(PARK_SIZE):
-            if grid[x, y, GRID_CHANNEL_INDICES['is_entrance']] > 0.5:
-                entrance_coords = (x, y)
-            elif grid[x, y, GRID_CHANNEL_INDICES['is_exit']] > 0.5:
-                exit_coords = (x, y)
-    
-            elif grid[x, y, GRID_CHANNEL_INDICES['is_path']] > 0.5:
-                cleanliness = round(grid[x, y, GRID_CHANNEL_INDICES['cleanliness']].item(), 2)
-                paths.append({
-                    'x': x,
-                    'y': y,
-                    'cleanliness': cleanliness
-                })
-            elif grid[x, y, GRID_CHANNEL_INDICES['is_water']] > 0.5:
-                waters.append({
-                    'x': x,
-                    'y': y
-                })
-    
-            elif grid[x, y, GRID_CHANNEL_INDICES['is_roller_coaster']] > 0.5:
-                rides.append(_extract_ride_data(grid, x, y, 'roller_coaster'))
-            elif grid[x, y, GRID_CHANNEL_INDICES['is_ferris_wheel']] > 0.5:
-                rides.append(_extract_ride_data(grid, x, y, 'ferris_wheel'))
-            elif grid[x, y, GRID_CHANNEL_INDICES['is_carousel']] > 0.5:
-                rides.append(_extract_ride_data(grid, x, y, 'carousel'))
-            elif grid[x, y, GRID_CHANNEL_INDICES['is_drink']] > 0.5:
-                shops.append(_extract_shop_data(grid, x, y, 'drink'))
-            elif grid[x, y, GRID_CHANNEL_INDICES['is_food']] > 0.5:
-                shops.append(_extract_shop_data(grid, x, y, 'food'))
-            elif grid[x, y, GRID_CHANNEL_INDICES['is_specialty']] > 0.5:
-                shops.append(_extract_shop_data(grid, x, y, 'specialty'))
-
-    # Reconstruct janitors from janitor_vector
-    for i in range(MAX_STAFF_PER_TYPE):
-        if np.any(janitor_vector[i] != 0):  # Check if janitor exists
-            success_metric = STAFF_SUCCESS_METRICS_REVERSE[int(denormalize_with_config(janitor_vector[i, 5], 'success_metric_id'))]
-            janitors.append({
-                'x': int(denormalize_with_config(janitor_vector[i, 0], 'x')),
-                'y': int(denormalize_with_config(janitor_vector[i, 1], 'y')),
-                'subtype': 'janitor',
-                'subclass': STAFF_SUBCLASS_REVERSE[int(denormalize_with_config(janitor_vector[i, 2], 'subclass_id'))],
-                'salary': int(denormalize_with_config(janitor_vector[i, 3], 'salary')),
-                'operating_cost': int(denormalize_with_config(janitor_vector[i, 4], 'employee_operating_cost')),
-                'success_metric': success_metric,
-                'success_metric_value': denormalize_with_config(janitor_vector[i, 6], success_metric),
-                'tiles_traversed': int(denormalize_with_config(janitor_vector[i, 7], 'tiles_traversed'))
-            })
-
-    # Reconstruct mechanics from mechanic_vector
-    for i in range(MAX_STAFF_PER_TYPE):
-        if np.any(mechanic_vector[i] != 0):  # Check if mechanic exists
-            success_metric = STAFF_SUCCESS_METRICS_REVERSE[int(denormalize_with_config(mechanic_vector[i, 5], 'success_metric_id'))]
-            mechanics.append({
-                'x': int(denormalize_with_config(mechanic_vector[i, 0], 'x')),
-                'y': int(denormalize_with_config(mechanic_vector[i, 1], 'y')),
-                'subtype': 'mechanic',
-                'subclass': STAFF_SUBCLASS_REVERSE[int(denormalize_with_config(mechanic_vector[i, 2], 'subclass_id'))],
-                'salary': int(denormalize_with_config(mechanic_vector[i, 3], 'salary')),
-                'operating_cost': int(denormalize_with_config(mechanic_vector[i, 4], 'employee_operating_cost')),
-                'success_metric': success_metric,
-                'success_metric_value': denormalize_with_config(mechanic_vector[i, 6], success_metric),
-                'tiles_traversed': int(denormalize_with_config(mechanic_vector[i, 7], 'tiles_traversed'))
-            })
-
-    # Reconstruct specialists from specialist_vector
-    for i in range(MAX_STAFF_PER_TYPE):
-        if np.any(specialist_vector[i] != 0):  # Check if specialist exists
-            success_metric = STAFF_SUCCESS_METRICS_REVERSE[int(denormalize_with_config(specialist_vector[i, 5], 'success_metric_id'))]
-            specialists.append({
-                'x': int(denormalize_with_config(specialist_vector[i, 0], 'x')),
-                'y': int(denormalize_with_config(specialist_vector[i, 1], 'y')),
-                'subtype': 'specialist',
-                'subclass': STAFF_SUBCLASS_REVERSE[int(denormalize_with_config(specialist_vector[i, 2], 'subclass_id'))],
-                'salary': int(denormalize_with_config(specialist_vector[i, 3], 'salary')),
-                'operating_cost': int(denormalize_with_config(specialist_vector[i, 4], 'employee_operating_cost')),
-                'success_metric': success_metric,
-                'success_metric_value': denormalize_with_config(specialist_vector[i, 6], success_metric),
-                'tiles_traversed': int(denormalize_with_config(specialist_vector[i, 7], 'tiles_traversed'))
-            })
+    # Extract grid data. Each cell is decoded as the first kind in CELL_KINDS whose indicator is set
+    indicators = grid[:, :, CELL_KIND_CHANNELS] > 0.5
+    kinds = np.where(indicators.any(axis=2), indicators.argmax(axis=2), -1)
+    # np.nonzero gives the cells of a kind in row-major (x, then y) order
+    entrance_xs, entrance_ys = np.nonzero(kinds == CELL_KINDS.index('entrance'))
+    entrance_coords = (int(entrance_xs[-1]), int(entrance_ys[-1])) if len(entrance_xs) > 0 else None
+    exit_xs, exit_ys = np.nonzero(kinds == CELL_KINDS.index('exit'))
+    exit_coords = (int(exit_xs[-1]), int(exit_ys[-1])) if len(exit_xs) > 0 else None
+
+    path_xs, path_ys = np.nonzero(kinds == CELL_KINDS.index('path'))
+    paths = [{'x': x, 'y': y, 'cleanliness': round(cleanliness, 2)}
+             for x, y, cleanliness in zip(path_xs.tolist(), path_ys.tolist(), grid[path_xs, path_ys, GRID_CHANNEL_INDICES['cleanliness']].tolist())]
+    water_xs, water_ys = np.nonzero(kinds == CELL_KINDS.index('water'))
+    waters = [{'x': x, 'y': y} for x, y in zip(water_xs.tolist(), water_ys.tolist())]
+
+    ride_xs, ride_ys = np.nonzero(np.isin(kinds, [CELL_KINDS.index(subtype) for subtype in RIDE_SUBTYPES]))
+    rides = [_extract_ride_data(values, CELL_KINDS[kind])
+             for values, kind in zip(_extract_attraction_values(grid, ride_xs, ride_ys, 'ride'), kinds[ride_xs, ride_ys].tolist())]
+    shop_xs, shop_ys = np.nonzero(np.isin(kinds, [CELL_KINDS.index(subtype) for subtype in SHOP_SUBTYPES]))
+    shops = [_extract_shop_data(values, CELL_KINDS[kind])
+             for values, kind in zip(_extract_attraction_values(grid, shop_xs, shop_ys, 'shop'), kinds[shop_xs, shop_ys].tolist())]
+
+    # Reconstruct janitors, mechanics and specialists from their vectors
+    janitors = _extract_staff_data(janitor_vector, 'janitor')
+    mechanics = _extract_staff_data(mechanic_vector, 'mechanic')
+    specialists = _extract_staff_data(specialist_vector, 'specialist')
 
     # Parse vectors
+    rides_values = RIDES_VECTOR_TABLE.denormalize(rides_vector)
     rides_data = {
-        'total_rides': int(denormalize_with_config(rides_vector[0], 'total_rides')),
-        'min_uptime': round(rides_vector[1].item(), 2),
-        'total_operating_cost': int(denormalize_with_config(rides_vector[2], 'total_operating_cost')),
-        'total_revenue_generated': int(denormalize_with_config(rides_vector[3], 'total_revenue_generated')),
-        'total_excitement': denormalize_with_config(rides_vector[4], 'total_excitement'),
-        'avg_intensity': denormalize_with_config(rides_vector[5], 'avg_intensity'),
-        'total_capacity': int(denormalize_with_config(rides_vector[6], 'total_capacity')),
+        'total_rides': int(rides_values[0]),
+        'min_uptime': rides_values[1],
+        'total_operating_cost': int(rides_values[2]),
+        'total_revenue_generated': int(rides_values[3]),
+        'total_excitement': rides_values[4],
+        'avg_intensity': rides_values[5],
+        'total_capacity': int(rides_values[6]),
         'ride_list': rides
     }
     
+    shops_values = SHOPS_VECTOR_TABLE.denormalize(shops_vector)
     shops_data = {
-        'total_shops': int(denormalize_with_config(shops_vector[0], 'total_shops')),
-        'total_revenue_generated': int(denormalize_with_config(shops_vector[1], 'total_revenue_generated_shops')),
-        'total_operating_cost': int(denormalize_with_config(shops_vector[2], 'total_operating_cost_shops')),
-        'min_uptime': round(shops_vector[3].item(), 2),
+        'total_shops': int(shops_values[0]),
+        'total_revenue_generated': int(shops_values[1]),
+        'total_operating_cost': int(shops_values[2]),
+        'min_uptime': shops_values[3],
         'shop_list': shops
     }
     
+    staff_values = [int(value) for value in STAFF_VECTOR_TABLE.denormalize(staff_vector)]
     staff_data = {
-        'total_janitors': [
-            int(denormalize_with_config(staff_vector[0], 'total_janitors')),
-            int(denormalize_with_config(staff_vector[1], 'total_janitors')),
-            int(denormalize_with_config(staff_vector[2], 'total_janitors')),
-            int(denormalize_with_config(staff_vector[3], 'total_janitors'))
-        ],
-        'total_mechanics': [
-            int(denormalize_with_config(staff_vector[4], 'total_mechanics')),
-            int(denormalize_with_config(staff_vector[5], 'total_mechanics')),
-            int(denormalize_with_config(staff_vector[6], 'total_mechanics')),
-            int(denormalize_with_config(staff_vector[7], 'total_mechanics'))
-        ],
-        'total_specialists': [
-            int(denormalize_with_config(staff_vector[8], 'total_specialists')),
-            int(denormalize_with_config(staff_vector[9], 'total_specialists')),
-            int(denormalize_with_config(staff_vector[10], 'total_specialists')),
-            int(denormalize_with_config(staff_vector[11], 'total_specialists'))
-        ],
-        'total_salary_paid': int(denormalize_with_config(staff_vector[12], 'total_salary_paid')),
-        'total_operating_cost': int(denormalize_with_config(staff_vector[13], 'staff_total_operating_cost')),
+        'total_janitors': staff_values[0:4],
+        'total_mechanics': staff_values[4:8],
+        'total_specialists': staff_values[8:12],
+        'total_salary_paid': staff_values[12],
+        'total_operating_cost': staff_values[13],
         'staff_list': janitors + mechanics + specialists
     }
     
+    guests_values = GUESTS_VECTOR_TABLE.denormalize(guests_vector)
     guests_data = {
-        'total_guests': denormalize_with_config(guests_vector[0], 'total_guests'),
-        'avg_money_spent': denormalize_with_config(guests_vector[1], 'avg_money_spent'),
-        'avg_time_in_park': denormalize_with_config(guests_vector[2], 'avg_time_in_park'),
-        'avg_rides_visited': denormalize_with_config(guests_vector[3], 'avg_rides_visited'),
-        'avg_food_shops_visited': denormalize_with_config(guests_vector[4], 'avg_food_shops_visited'),
-        'avg_drink_shops_visited': denormalize_with_config(guests_vector[5], 'avg_drink_shops_visited'),
-        'avg_specialty_shops_visited': denormalize_with_config(guests_vector[6], 'avg_specialty_shops_visited')
+        'total_guests': guests_values[0],
+        'avg_money_spent': guests_values[1],
+        'avg_time_in_park': guests_values[2],
+        'avg_rides_visited': guests_values[3],
+        'avg_food_shops_visited': guests_values[4],
+        'avg_drink_shops_visited': guests_values[5],
+        'avg_specialty_shops_visited': guests_values[6]
     }
 
-    # Parse survey results
-    survey_results_list = []
-    for i in range(survey_results.shape[0]):
-
-        if np.any(survey_results[i] != 0):  # Check if row has any non-zero values
-            result = {
-                'happiness_at_exit': round(survey_results[i, 0].item(), 2),
-                'hunger_at_exit': round(survey_results[i, 1].item(), 2),
-                'thirst_at_exit': round(survey_results[i, 2].item(), 2),
-                'remaining_energy': denormalize_with_config(survey_results[i, 3], 'remaining_energy'),
-                'remaining_money': denormalize_with_config(survey_results[i, 4], 'remaining_money'),
-                'percent_of_money_spent': round(survey_results[i, 5].item(), 2),
-                'reason_for_exit': GUEST_ENUMS['exit_reasons'][int(denormalize_with_config(survey_results[i, 6], 'reason_for_exit_id'))]['description'],
-                'preference': GUEST_ENUMS['preferences'][int(denormalize_with_config(survey_results[i, 7], 'preference_id'))]['description']
-            }
-            survey_results_list.append(result)
+    # Parse survey results, rows with only zeros are empty
+    survey_rows = np.flatnonzero(np.any(survey_results != 0, axis=1))
+    survey_results_list = [
+        {
+            'happiness_at_exit': values[0],
+            'hunger_at_exit': values[1],
+            'thirst_at_exit': values[2],
+            'remaining_energy': values[3],
+            'remaining_money': values[4],
+            'percent_of_money_spent': values[5],
+            'reason_for_exit': GUEST_ENUMS['exit_reasons'][int(values[6])]['description'],
+            'preference': GUEST_ENUMS['preferences'][int(values[7])]['description']
+        }
+        for values in SURVEY_RESULT_TABLE.denormalize(survey_results[survey_rows])
+    ]
     
     survey_data = {
-        'age_of_results': int(denormalize_with_config(survey_age[0], 'survey_age')),
+        'age_of_results': int(SURVEY_AGE_TABLE.denormalize(survey_age)[0]),
         'list_of_results': survey_results_list
     }
     
     # Parse park vector
+    park_values = PARK_VECTOR_TABLE.denormalize(park_vector)
     research_speed_map = {0: 'none', 1: 'slow', 2: 'medium', 4: 'fast'}
-    research_speed = research_speed_map.get(int(denormalize_with_config(park_vector[9], 'research_speed')), 'none')
+    research_speed = research_speed_map.get(int(park_values[9]), 'none')
 
     # Parse research topics (now includes staff types)
     # Preserve original order, don't sort
@@ -695,14 +601,14 @@ def obs_array_to_pydantic(obs_dict: Dict[str, np.ndarray], data_level: ParkDataG
     with park_observability_context(data_level, observability_mode):
         # Create FullParkObs object
         full_park_obs = FullParkObs(
-            step=int(denormalize_with_config(park_vector[0], 'step')),
-            horizon=int(denormalize_with_config(park_vector[1], 'horizon')),
-            value=int(denormalize_with_config(park_vector[2], 'value')),
-            money=int(denormalize_with_config(park_vector[3], 'money')),
-            revenue=int(denormalize_with_config(park_vector[4], 'revenue')),
-            expenses=int(denormalize_with_config(park_vector[5], 'expenses')),
-            profit=int(denormalize_with_config(park_vector[7], 'profit')) * profit_sign,
-            park_rating=denormalize_with_config(park_vector[8], 'park_rating'),
+            step=int(park_values[0]),
+            horizon=int(park_values[1]),
+            value=int(park_values[2]),
+            money=int(park_values[3]),
+            revenue=int(park_values[4]),
+            expenses=int(park_values[5]),
+            profit=int(park_values[7]) * profit_sign,
+            park_rating=park_values[8],
             guests=guests_data,
             guest_survey_results=survey_data,
             rides=rides_data,
@@ -710,17 +616,17 @@ def obs_array_to_pydantic(obs_dict: Dict[str, np.ndarray], data_level: ParkDataG
             staff=staff_data,
             research_speed=research_speed,
             research_topics=research_topics,
-            research_operating_cost=int(denormalize_with_config(park_vector[19], 'research_operating_cost')),
+            research_operating_cost=int(park_values[19]),
             available_entities=available_entities,
             new_entity_available=park_vector[56] > 0.5,
-            fast_days_since_last_new_entity=int(denormalize_with_config(park_vector[57], 'fast_days_since_last_new_entity')),
-            medium_days_since_last_new_entity=int(denormalize_with_config(park_vector[58], 'medium_days_since_last_new_entity')),
-            slow_days_since_last_new_entity=int(denormalize_with_config(park_vector[59], 'slow_days_since_last_new_entity')),
+            fast_days_since_last_new_entity=int(park_values[57]),
+            medium_days_since_last_new_entity=int(park_values[58]),
+            slow_days_since_last_new_entity=int(park_values[59]),
             entrance=entrance_coords,
             exit=exit_coords,
             paths=paths,
             waters=waters,
-            min_cleanliness=round(park_vector[60].item(), 2)
+            min_cleanliness=park_values[60]
         )
     if as_dict:
         return full_park_obs.model_dump(exclude_none=True)
@@ -728,72 +634,102 @@ def obs_array_to_pydantic(obs_dict: Dict[str, np.ndarray], data_level: ParkDataG
     return full_park_obs
 
 
-def _extract_ride_data(grid: np.ndarray, x: int, y: int, subtype: str) -> dict:
-    """Helper function to extract ride data from grid."""
-    # Determine subclass (color)
-    subclass = None
-    if grid[x, y, GRID_CHANNEL_INDICES['is_yellow']] > 0.5:
-        subclass = 'yellow'
-    elif grid[x, y, GRID_CHANNEL_INDICES['is_blue']] > 0.5:
-        subclass = 'blue'
-    elif grid[x, y, GRID_CHANNEL_INDICES['is_green']] > 0.5:
-        subclass = 'green'
-    elif grid[x, y, GRID_CHANNEL_INDICES['is_red']] > 0.5:
-        subclass = 'red'
+def _extract_attraction_values(grid: np.ndarray, xs: np.ndarray, ys: np.ndarray, attraction_type: str) -> List[dict]:
+    """
+    Helper function to extract the attractions of one type at the given cells of the grid.
+
+    The numerical channels of all the cells are denormalized in one pass.
+
+    Args:
+        grid: The grid
+        xs: The x coordinates of the cells
+        ys: The y coordinates of the cells
+        attraction_type: 'ride' or 'shop', a key of ATTRACTION_GRID_FIELDS
 
+    Returns:
+        For each cell, its x, y, subclass, out_of_service and the denormalized fields of ATTRACTION_GRID_FIELDS
+    """
+    cells = grid[xs, ys]
+    # The subclass is the first color whose indicator is set
+    colors = cells[:, list(SUBCLASS_CHANNELS.values())] > 0.5
+    subclasses = [ATTRACTION_COLORS[color] if has_color else None
+                  for color, has_color in zip(colors.argmax(axis=1).tolist(), colors.any(axis=1).tolist())]
+    out_of_service = (cells[:, GRID_CHANNEL_INDICES['out_of_service']] > 0.5).tolist()
+
+    fields = [field for _, field, _ in ATTRACTION_GRID_FIELDS[attraction_type]]
+    rows = ATTRACTION_GRID_TABLES[attraction_type].denormalize(cells[:, ATTRACTION_GRID_CHANNELS[attraction_type]])
+    return [dict(zip(fields, row), x=x, y=y, subclass=subclass, out_of_service=is_out_of_service)
+            for row, x, y, subclass, is_out_of_service in zip(rows, xs.tolist(), ys.tolist(), subclasses, out_of_service)]
+
+def _extract_ride_data(values: dict, subtype: str) -> dict:
+    """Helper function to build ride data from the values extracted by _extract_attraction_values."""
     return {
         'subtype': subtype,
-        'subclass': subclass,
-        'x': x,
-        'y': y,
-        'out_of_service': grid[x, y, GRID_CHANNEL_INDICES['out_of_service']] > 0.5,
-        'uptime': round(grid[x, y, GRID_CHANNEL_INDICES['uptime']].item(), 2),
-        'cleanliness': round(grid[x, y, GRID_CHANNEL_INDICES['cleanliness']].item(), 2),
-        'ticket_price': int(denormalize_with_config(grid[x, y, GRID_CHANNEL_INDICES['price']], 'price')),
-        'operating_cost': int(denormalize_with_config(grid[x, y, GRID_CHANNEL_INDICES['operating_cost']], 'operating_cost')),
-        'revenue_generated': int(denormalize_with_config(grid[x, y, GRID_CHANNEL_INDICES['revenue_generated']], 'revenue_generated')),
-        'capacity': int(denormalize_with_config(grid[x, y, GRID_CHANNEL_INDICES['capacity']], 'capacity')),
-        'intensity': int(denormalize_with_config(grid[x, y, GRID_CHANNEL_INDICES['intensity']], 'intensity')),
-        'excitement': int(denormalize_with_config(grid[x, y, GRID_CHANNEL_INDICES['excitement']], 'excitement')),
-        'guests_entertained': int(denormalize_with_config(grid[x, y, GRID_CHANNEL_INDICES['guests_served']], 'guests_served')),
-        'times_operated': int(denormalize_with_config(grid[x, y, GRID_CHANNEL_INDICES['times_operated']], 'times_operated')),
-        'cost_per_operation': int(denormalize_with_config(grid[x, y, GRID_CHANNEL_INDICES['cost_per_operation']], 'cost_per_operation')),
-        'avg_wait_time': denormalize_with_config(grid[x, y, GRID_CHANNEL_INDICES['avg_wait_time']], 'avg_wait_time'),
-        'avg_guests_per_operation': denormalize_with_config(grid[x, y, GRID_CHANNEL_INDICES['avg_guests_per_operation']], 'avg_guests_per_operation'),
-        'breakdown_rate': round(grid[x, y, GRID_CHANNEL_INDICES['breakdown_rate']].item(), 3)
+        'subclass': values['subclass'],
+        'x': values['x'],
+        'y': values['y'],
+        'out_of_service': values['out_of_service'],
+        'uptime': values['uptime'],
+        'cleanliness': values['cleanliness'],
+        'ticket_price': int(values['ticket_price']),
+        'operating_cost': int(values['operating_cost']),
+        'revenue_generated': int(values['revenue_generated']),
+        'capacity': int(values['capacity']),
+        'intensity': int(values['intensity']),
+        'excitement': int(values['excitement']),
+        'guests_entertained': int(values['guests_entertained']),
+        'times_operated': int(values['times_operated']),
+        'cost_per_operation': int(values['cost_per_operation']),
+        'avg_wait_time': values['avg_wait_time'],
+        'avg_guests_per_operation': values['avg_guests_per_operation'],
+        'breakdown_rate': values['breakdown_rate']
     }
 
-def _extract_shop_data(grid: np.ndarray, x: int, y: int, subtype: str) -> dict:
-    """Helper function to extract shop data from grid."""
-    # Determine subclass (color)
-    subclass = None
-    if grid[x, y, GRID_CHANNEL_INDICES['is_yellow']] > 0.5:
-        subclass = 'yellow'
-    elif grid[x, y, GRID_CHANNEL_INDICES['is_blue']] > 0.5:
-        subclass = 'blue'
-    elif grid[x, y, GRID_CHANNEL_INDICES['is_green']] > 0.5:
-        subclass = 'green'
-    elif grid[x, y, GRID_CHANNEL_INDICES['is_red']] > 0.5:
-        subclass = 'red'
-    
+def _extract_shop_data(values: dict, subtype: str) -> dict:
+    """Helper function to build shop data from the values extracted by _extract_attraction_values."""
     return {
         'subtype': subtype,
-        'subclass': subclass,
-        'x': x,
-        'y': y,
-        'item_price': int(denormalize_with_config(grid[x, y, GRID_CHANNEL_INDICES['price']], 'price')),
-        'item_cost': int(denormalize_with_config(grid[x, y, GRID_CHANNEL_INDICES['item_cost']], 'item_cost')),
-        'operating_cost': int(denormalize_with_config(grid[x, y, GRID_CHANNEL_INDICES['operating_cost']], 'operating_cost')),
-        'uptime': round(grid[x, y, GRID_CHANNEL_INDICES['shop_uptime']].item(), 2),
-        'number_of_restocks': int(denormalize_with_config(grid[x, y, GRID_CHANNEL_INDICES['number_of_restocks']], 'number_of_restocks')),
-        'order_quantity': int(denormalize_with_config(grid[x, y, GRID_CHANNEL_INDICES['order_quantity']], 'order_quantity')),
-        'inventory': int(denormalize_with_config(grid[x, y, GRID_CHANNEL_INDICES['inventory']], 'inventory')),
-        'revenue_generated': int(denormalize_with_config(grid[x, y, GRID_CHANNEL_INDICES['revenue_generated']], 'revenue_generated')),
-        'cleanliness': round(grid[x, y, GRID_CHANNEL_INDICES['cleanliness']].item(), 2),
-        'guests_served': int(denormalize_with_config(grid[x, y, GRID_CHANNEL_INDICES['guests_served']], 'guests_served')),
-        'out_of_service': grid[x, y, GRID_CHANNEL_INDICES['out_of_service']] > 0.5
+        'subclass': values['subclass'],
+        'x': values['x'],
+        'y': values['y'],
+        'item_price': int(values['item_price']),
+        'item_cost': int(values['item_cost']),
+        'operating_cost': int(values['operating_cost']),
+        'uptime': values['uptime'],
+        'number_of_restocks': int(values['number_of_restocks']),
+        'order_quantity': int(values['order_quantity']),
+        'inventory': int(values['inventory']),
+        'revenue_generated': int(values['revenue_generated']),
+        'cleanliness': values['cleanliness'],
+        'guests_served': int(values['guests_served']),
+        'out_of_service': values['out_of_service']
     }
 
+def _extract_staff_data(matrix: np.ndarray, subtype: str) -> List[dict]:
+    """Helper function to extract staff members of one subtype from their vector, rows with only zeros are empty."""
+    rows = np.flatnonzero(np.any(matrix != 0, axis=1))
+    values = STAFF_MEMBER_TABLE.denormalize(matrix[rows])
+    success_metrics = [STAFF_SUCCESS_METRICS_REVERSE[int(row[5])] for row in values]
+
+    # Success metric values are denormalized with the configuration of the success metric of each staff member
+    success_metric_values = [0.0] * len(rows)
+    for success_metric in set(success_metrics):
+        indices = [i for i, metric in enumerate(success_metrics) if metric == success_metric]
+        for i, (value,) in zip(indices, SUCCESS_METRIC_TABLES[success_metric].denormalize(matrix[rows[indices], 6:7])):
+            success_metric_values[i] = value
+
+    return [{
+        'x': int(row[0]),
+        'y': int(row[1]),
+        'subtype': subtype,
+        'subclass': STAFF_SUBCLASS_REVERSE[int(row[2])],
+        'salary': int(row[3]),
+        'operating_cost': int(row[4]),
+        'success_metric': success_metric,
+        'success_metric_value': success_metric_value,
+        'tiles_traversed': int(row[7])
+    } for row, success_metric, success_metric_value in zip(values, success_metrics, success_metric_values)]
+
 class MapsGymObservationSpace(gym.spaces.Dict):
     """
     Gymnasium compatible observation space for the MAP environment.
@@ -815,10 +751,15 @@ class MapsGymObservationSpace(gym.spaces.Dict):
     - park_vector: Overall park statistics
     """
     
-    def __init__(self):
+    def __init__(self, dtype: type = np.float64):
+        """
+        Args:
+            dtype: Floating point type of the observation arrays, e.g. np.float32 to halve their memory
+        """
         # Constants from the existing gym_obs.py
         PARK_SIZE = 20
         MAX_SURVEY_RESULTS = 25  # From config
+        self.obs_dtype = np.dtype(dtype)
 
         super().__init__({
             # Grid representation (channels: boolean indicators + numerical properties)
@@ -826,7 +767,7 @@ class MapsGymObservationSpace(gym.spaces.Dict):
                 low=0.0,
                 high=1.0,
                 shape=(PARK_SIZE, PARK_SIZE, len(GRID_CHANNELS)),
-                dtype=np.float64
+                dtype=dtype
             ),
 
             # # Rides summary vector (7 values)
@@ -834,7 +775,7 @@ class MapsGymObservationSpace(gym.spaces.Dict):
                 low=0.0,
                 high=1.0,
                 shape=(7,),
-                dtype=np.float64
+                dtype=dtype
             ),
 
             # # Shops summary vector (4 values)
@@ -842,7 +783,7 @@ class MapsGymObservationSpace(gym.spaces.Dict):
                 low=0.0,
                 high=1.0,
                 shape=(4,),
-                dtype=np.float64
+                dtype=dtype
             ),
 
             # # Staff summary vector (14 values: 4 janitors + 4 mechanics + 4 specialists + 2 costs)
@@ -850,7 +791,7 @@ class MapsGymObservationSpace(gym.spaces.Dict):
                 low=0.0,
                 high=1.0,
                 shape=(14,),
-                dtype=np.float64
+                dtype=dtype
             ),
 
             # # Janitor vector (MAX_STAFF_PER_TYPE x 8 fields per janitor, includes x,y)
@@ -858,7 +799,7 @@ class MapsGymObservationSpace(gym.spaces.Dict):
                 low=0.0,
                 high=1.0,
                 shape=(MAX_STAFF_PER_TYPE, 8),
-                dtype=np.float64
+                dtype=dtype
             ),
 
             # # Mechanic vector (MAX_STAFF_PER_TYPE x 8 fields per mechanic, includes x,y)
@@ -866,7 +807,7 @@ class MapsGymObservationSpace(gym.spaces.Dict):
                 low=0.0,
                 high=1.0,
                 shape=(MAX_STAFF_PER_TYPE, 8),
-                dtype=np.float64
+                dtype=dtype
             ),
 
             # # Specialist vector (MAX_STAFF_PER_TYPE x 8 fields per specialist, includes x,y)
@@ -874,7 +815,7 @@ class MapsGymObservationSpace(gym.spaces.Dict):
                 low=0.0,
                 high=1.0,
                 shape=(MAX_STAFF_PER_TYPE, 8),
-                dtype=np.float64
+                dtype=dtype
             ),
 
             # # Guests summary vector (7 values)
@@ -882,7 +823,7 @@ class MapsGymObservationSpace(gym.spaces.Dict):
                 low=0.0,
                 high=1.0,
                 shape=(7,),
-                dtype=np.float64
+                dtype=dtype
             ),
 
             # # Survey age (1 value)
@@ -890,7 +831,7 @@ class MapsGymObservationSpace(gym.spaces.Dict):
                 low=0.0,
                 high=1.0,
                 shape=(1,),
-                dtype=np.float64
+                dtype=dtype
             ),
 
             # # Survey results: MAX_SURVEY_RESULTS x 8 array
@@ -898,7 +839,7 @@ class MapsGymObservationSpace(gym.spaces.Dict):
                 low=0.0,
                 high=1.0,
                 shape=(MAX_SURVEY_RESULTS, 8),
-                dtype=np.float64
+                dtype=dtype
             ),
 
             # Park summary vector (61 values: includes 9 research topics + 36 available entities for attractions+staff)
@@ -906,7 +847,7 @@ class MapsGymObservationSpace(gym.spaces.Dict):
                 low=0.0,
                 high=1.0,
                 shape=(61,),
-                dtype=np.float64
+                dtype=dtype
             )
         })
         
@@ -938,9 +879,102 @@ class MapsGymObservationSpace(gym.spaces.Dict):
         Convert FullParkObs pydantic object to gym-compatible observation.
         Uses the existing obs_pydantic_to_array function.
         """
-        return obs_pydantic_to_array(obs)
+        return obs_pydantic_to_array(obs, dtype=self.obs_dtype)
+
+# Shapes of the arrays of a gym observation, by key
+GYM_OBSERVATION_SHAPES = {key: space.shape for key, space in MapsGymObservationSpace().spaces.items()}
 
-def format_gym_observation(state: dict) -> MapsGymObservationSpace:
+def _fill_attraction_grid(grid: np.ndarray, attractions: List[dict], attraction_type: str) -> None:
+    """
+    Write the indicator and numerical channels of attractions of one type into the grid.
+
+    The fields of all attractions are gathered into columns, normalized in one pass and scattered into the grid.
+
+    Args:
+        grid: The grid to write into
+        attractions: Attractions of the type, as dicts of their fields
+        attraction_type: 'ride' or 'shop', a key of ATTRACTION_GRID_FIELDS
+    """
+    if not attractions:
+        return
+    xs = np.array([attraction['x'] for attraction in attractions], dtype=np.intp)
+    ys = np.array([attraction['y'] for attraction in attractions], dtype=np.intp)
+
+    for channels, key in [(SUBTYPE_CHANNELS, 'subtype'), (SUBCLASS_CHANNELS, 'subclass')]:
+        indices = [(i, channels[attraction[key]]) for i, attraction in enumerate(attractions) if attraction[key] in channels]
+        if indices:
+            rows, channel_indices = np.array(indices, dtype=np.intp).T
+            grid[xs[rows], ys[rows], channel_indices] = 1.0
+    out_of_service = np.array([bool(attraction['out_of_service']) for attraction in attractions])
+    grid[xs[out_of_service], ys[out_of_service], GRID_CHANNEL_INDICES['out_of_service']] = 1.0
+
+    fields = ATTRACTION_GRID_FIELDS[attraction_type]
+    columns = np.array([[attraction[field] for _, field, _ in fields] for attraction in attractions], dtype=np.float64)
+    grid[xs[:, None], ys[:, None], ATTRACTION_GRID_CHANNELS[attraction_type]] = ATTRACTION_GRID_TABLES[attraction_type].normalize(columns)
+
+def _zeroed_array(out: Optional[dict], key: str, shape: Tuple[int, ...], dtype: type) -> np.ndarray:
+    """Return the output buffer for key filled with zeros, or a new array of zeros if there is no output buffer."""
+    if out is None:
+        return np.zeros(shape, dtype=dtype)
+    out[key].fill(0.0)
+    return out[key]
+
+def _staff_matrix(staff: List[dict], default_metric: Optional[str], matrix: np.ndarray) -> np.ndarray:
+    """
+    Encode up to MAX_STAFF_PER_TYPE staff members of one type, sorted by (x, y), as rows of 8 normalized fields.
+
+    Args:
+        staff: Staff members of one type
+        default_metric: Success metric of staff members without one. If None, every staff member must have one.
+        matrix: The (MAX_STAFF_PER_TYPE, 8) array of zeros to write the rows into
+    """
+    staff = sorted(staff, key=lambda member: (member['x'], member['y']))[:MAX_STAFF_PER_TYPE]
+    if not staff:
+        return matrix
+    metrics = [member['success_metric'] if default_metric is None else member.get('success_metric', default_metric) for member in staff]
+    columns = np.array([
+        [member['x'], member['y'], STAFF_SUBCLASS_MAP[member['subclass']], member.get('salary', 0), member.get('operating_cost', 0),
+         STAFF_SUCCESS_METRICS[metric], member.get('success_metric_value', member.get(default_metric, 0.0)), member.get('tiles_traversed', 0)]
+        for member, metric in zip(staff, metrics)], dtype=np.float64)
+    return _normalize_staff_rows(columns, metrics, matrix)
+
+def _normalize_staff_rows(columns: np.ndarray, metrics: List[str], matrix: np.ndarray) -> np.ndarray:
+    """
+    Normalize the rows of raw staff fields, ordered as STAFF_MEMBER_FIELDS, into the first rows of matrix.
+
+    Args:
+        columns: The (num_staff, 8) raw fields
+        metrics: The success metric of each staff member
+        matrix: The array of zeros to write the rows into
+    """
+    num_staff = len(metrics)
+    matrix[:num_staff] = STAFF_MEMBER_TABLE.normalize(columns)
+    # Success metric values are normalized with the configuration of the metric of each staff member
+    metrics = np.array(metrics)
+    for metric in set(metrics.tolist()):
+        rows = metrics == metric
+        matrix[:num_staff][rows, 6] = SUCCESS_METRIC_TABLES[metric].normalize(columns[rows, 6:7])[:, 0]
+    return matrix
+
+def _pydantic_staff_matrix(staff_list: list, subtype: str) -> np.ndarray:
+    """
+    Encode up to MAX_STAFF_PER_TYPE pydantic staff members of one subtype, sorted by (x, y), as rows of 8 normalized fields.
+
+    Args:
+        staff_list: The staff members of all subtypes
+        subtype: 'janitor', 'mechanic' or 'specialist'
+    """
+    matrix = np.zeros((MAX_STAFF_PER_TYPE, 8), dtype=np.float64)
+    staff = sorted((member for member in staff_list if member.subtype == subtype), key=lambda member: (member.x, member.y))[:MAX_STAFF_PER_TYPE]
+    if not staff:
+        return matrix
+    columns = np.array([
+        [member.x, member.y, STAFF_SUBCLASS_MAP[member.subclass], member.salary or 0, member.operating_cost or 0,
+         STAFF_SUCCESS_METRICS[member.success_metric], member.success_metric_value or 0.0, member.tiles_traversed or 0]
+        for member in staff], dtype=np.float64)
+    return _normalize_staff_rows(columns, [member.success_metric for member in staff], matrix)
+
+def format_gym_observation(state: dict, out: Optional[dict] = None, dtype: type = np.float64) -> MapsGymObservationSpace:
     """
     Convert a raw state dictionary directly to gym-compatible observation arrays.
     
@@ -949,12 +983,16 @@ def format_gym_observation(state: dict) -> MapsGymObservationSpace:
     
     Args:
         state: Raw state dictionary from the game server
+        out: Optional dictionary of arrays with the shapes of MapsGymObservationSpace to write the
+            observation into instead of allocating new arrays
+        dtype: Floating point type of the new arrays if out is not given. Values are computed in float64
+            and cast when they are written.
         
     Returns:
-        ParkObservationSpace containing gym-compatible numpy arrays
+        ParkObservationSpace containing gym-compatible numpy arrays, out if it was given
     """
     # Initialize unified grid
-    grid = np.zeros((PARK_SIZE, PARK_SIZE, len(GRID_CHANNELS)), dtype=np.float64)
+    grid = _zeroed_array(out, 'grid', (PARK_SIZE, PARK_SIZE, len(GRID_CHANNELS)), dtype)
     
     # Fill entrance and exit
     entrance = (state['entrance']['x'], state['entrance']['y'])
@@ -962,110 +1000,57 @@ def format_gym_observation(state: dict) -> MapsGymObservationSpace:
     grid[entrance[0], entrance[1], GRID_CHANNEL_INDICES['is_entrance']] = 1.0
     grid[exit_coords[0], exit_coords[1], GRID_CHANNEL_INDICES['is_exit']] = 1.0
 
-    ride_uptime, ride_operating_cost, ride_revenue_generated, ride_excitement, ride_intensity, ride_capacity = [], 0, 0, state['state']['park_excitement'], 0, 0
-    shop_operating_cost, shop_revenue_generated, shop_uptime = 0, 0, []
-    cleanliness = []
+    rides, shops = state['rides'], state['shops']
 
-    
     # Fill paths and waters from terrain
-    for terrain in state['terrain']:
-        x, y = terrain['x'], terrain['y']
-        if terrain['type'] == 'path':
-            grid[x, y, GRID_CHANNEL_INDICES['is_path']] = 1.0
-            grid[x, y, GRID_CHANNEL_INDICES['cleanliness']] = np.round(terrain['cleanliness'], 2)
-            cleanliness.append(terrain['cleanliness'])
-        elif terrain['type'] == 'water':
-            grid[x, y, GRID_CHANNEL_INDICES['is_water']] = 1.0
-    
-    # Fill rides
-    for attraction in state['rides'] + state['shops']:
-        x, y = attraction['x'], attraction['y']
-        if attraction['type'] == 'ride':
-            ride_uptime.append(attraction['uptime'])
-            ride_operating_cost += attraction['operating_cost']
-            ride_revenue_generated += attraction['revenue_generated']
-            ride_intensity += attraction['intensity']
-            ride_capacity += attraction['capacity']
-        elif attraction['type'] == 'shop':
-            shop_operating_cost += attraction['operating_cost']
-            shop_revenue_generated += attraction['revenue_generated']
-            shop_uptime.append(attraction['uptime'])
-        cleanliness.append(attraction['cleanliness'])
-
-        # Set ride type indicators
-        if attraction['subtype'] == 'roller_coaster':
-            grid[x, y, GRID_CHANNEL_INDICES['is_roller_coaster']] = 1.0
-        elif attraction['subtype'] == 'ferris_wheel':
-            grid[x, y, GRID_CHANNEL_INDICES['is_ferris_wheel']] = 1.0
-        elif attraction['subtype'] == 'carousel':
-            grid[x, y, GRID_CHANNEL_INDICES['is_carousel']] = 1.0
-        elif attraction['subtype'] == 'drink':
-            grid[x, y, GRID_CHANNEL_INDICES['is_drink']] = 1.0
-        elif attraction['subtype'] == 'food':
-            grid[x, y, GRID_CHANNEL_INDICES['is_food']] = 1.0
-        elif attraction['subtype'] == 'specialty':
-            grid[x, y, GRID_CHANNEL_INDICES['is_specialty']] = 1.0
-        
-        # Set color indicators
-        if attraction['subclass'] == 'yellow':
-            grid[x, y, GRID_CHANNEL_INDICES['is_yellow']] = 1.0
-        elif attraction['subclass'] == 'blue':
-            grid[x, y, GRID_CHANNEL_INDICES['is_blue']] = 1.0
-        elif attraction['subclass'] == 'green':
-            grid[x, y, GRID_CHANNEL_INDICES['is_green']] = 1.0
-        elif attraction['subclass'] == 'red':
-            grid[x, y, GRID_CHANNEL_INDICES['is_red']] = 1.0
-        
-        # Set status
-        if attraction['out_of_service']:
-            grid[x, y, GRID_CHANNEL_INDICES['out_of_service']] = 1.0
-        
-        # Set numerical properties
-        price_key = 'ticket_price' if attraction['type'] == 'ride' else 'item_price'
-        grid[x, y, GRID_CHANNEL_INDICES['price']] = normalize_with_config(attraction[price_key], 'price')
-        grid[x, y, GRID_CHANNEL_INDICES['operating_cost']] = normalize_with_config(attraction['operating_cost'], 'operating_cost')
-        grid[x, y, GRID_CHANNEL_INDICES['revenue_generated']] = normalize_with_config(attraction['revenue_generated'], 'revenue_generated')
-        guests_served_key = 'guests_entertained' if attraction['type'] == 'ride' else 'guests_served'
-        grid[x, y, GRID_CHANNEL_INDICES['guests_served']] = normalize_with_config(attraction[guests_served_key], 'guests_served')
-        grid[x, y, GRID_CHANNEL_INDICES['cleanliness']] = np.round(attraction['cleanliness'], 2)
-        if attraction['type'] == 'ride':
-            grid[x, y, GRID_CHANNEL_INDICES['excitement']] = normalize_with_config(attraction['excitement'], 'excitement')
-            grid[x, y, GRID_CHANNEL_INDICES['intensity']] = normalize_with_config(attraction['intensity'], 'intensity')
-            grid[x, y, GRID_CHANNEL_INDICES['capacity']] = normalize_with_config(attraction['capacity'], 'capacity')
-            grid[x, y, GRID_CHANNEL_INDICES['times_operated']] = normalize_with_config(attraction['times_operated'], 'times_operated')
-            grid[x, y, GRID_CHANNEL_INDICES['uptime']] = np.round(attraction['uptime'], 2)
-            grid[x, y, GRID_CHANNEL_INDICES['avg_wait_time']] = normalize_with_config(attraction['avg_wait_time'], 'avg_wait_time')
-            grid[x, y, GRID_CHANNEL_INDICES['avg_guests_per_operation']] = normalize_with_config(attraction['avg_guests_per_operation'], 'avg_guests_per_operation')
-            grid[x, y, GRID_CHANNEL_INDICES['cost_per_operation']] = normalize_with_config(attraction['cost_per_operation'], 'cost_per_operation')
-            grid[x, y, GRID_CHANNEL_INDICES['breakdown_rate']] = np.round(attraction['breakdown_rate'], 3)
-        elif attraction['type'] == 'shop':
-            grid[x, y, GRID_CHANNEL_INDICES['item_cost']] = normalize_with_config(attraction['item_cost'], 'item_cost')
-            grid[x, y, GRID_CHANNEL_INDICES['number_of_restocks']] = normalize_with_config(attraction['number_of_restocks'], 'number_of_restocks')
-            grid[x, y, GRID_CHANNEL_INDICES['order_quantity']] = normalize_with_config(attraction['order_quantity'], 'order_quantity')
-            grid[x, y, GRID_CHANNEL_INDICES['inventory']] = normalize_with_config(attraction['inventory'], 'inventory')
-            grid[x, y, GRID_CHANNEL_INDICES['shop_uptime']] = np.round(attraction['uptime'], 2)
+    paths = [terrain for terrain in state['terrain'] if terrain['type'] == 'path']
+    waters = [terrain for terrain in state['terrain'] if terrain['type'] == 'water']
+    if paths:
+        path_xs, path_ys = np.array([[terrain['x'], terrain['y']] for terrain in paths], dtype=np.intp).T
+        grid[path_xs, path_ys, GRID_CHANNEL_INDICES['is_path']] = 1.0
+        grid[path_xs, path_ys, GRID_CHANNEL_INDICES['cleanliness']] = np.round(np.array([terrain['cleanliness'] for terrain in paths], dtype=np.float64), 2)
+    if waters:
+        water_xs, water_ys = np.array([[terrain['x'], terrain['y']] for terrain in waters], dtype=np.intp).T
+        grid[water_xs, water_ys, GRID_CHANNEL_INDICES['is_water']] = 1.0
+
+    # Fill rides and shops
+    ride_list = [attraction for attraction in rides + shops if attraction['type'] == 'ride']
+    shop_list = [attraction for attraction in rides + shops if attraction['type'] == 'shop']
+    _fill_attraction_grid(grid, ride_list, 'ride')
+    _fill_attraction_grid(grid, shop_list, 'shop')
+
+    # Totals are summed in the order of the attractions so they match the per attraction accumulation exactly
+    ride_uptime = [ride['uptime'] for ride in ride_list]
+    ride_operating_cost = sum(ride['operating_cost'] for ride in ride_list)
+    ride_revenue_generated = sum(ride['revenue_generated'] for ride in ride_list)
+    ride_intensity = sum(ride['intensity'] for ride in ride_list)
+    ride_capacity = sum(ride['capacity'] for ride in ride_list)
+    shop_uptime = [shop['uptime'] for shop in shop_list]
+    shop_operating_cost = sum(shop['operating_cost'] for shop in shop_list)
+    shop_revenue_generated = sum(shop['revenue_generated'] for shop in shop_list)
+    cleanliness = [terrain['cleanliness'] for terrain in paths] + [attraction['cleanliness'] for attraction in rides + shops]
 
     # Calculate total staff operating cost
     total_staff_operating_cost = sum(staff_member['operating_cost'] for staff_member in state['staff'])
 
     # Create rides vector
-    rides_vector = np.array([
-        normalize_with_config(len(state['rides']), 'total_rides'),
+    rides_vector = RIDES_VECTOR_TABLE.normalize([
+        len(state['rides']),
         round(min(ride_uptime), 2) if len(ride_uptime) > 0 else 1.0,
-        normalize_with_config(ride_operating_cost, 'total_operating_cost'),
-        normalize_with_config(ride_revenue_generated, 'total_revenue_generated'),
-        normalize_with_config(state['state']['park_excitement'], 'total_excitement'),
-        normalize_with_config(ride_intensity / max(len(state['rides']), 1), 'avg_intensity'),
-        normalize_with_config(ride_capacity, 'total_capacity'),
-    ], dtype=np.float64)
+        ride_operating_cost,
+        ride_revenue_generated,
+        state['state']['park_excitement'],
+        ride_intensity / max(len(state['rides']), 1),
+        ride_capacity,
+    ])
     
     # Create shops vector
-    shops_vector = np.array([
-        normalize_with_config(len(state['shops']), 'total_shops'),
-        normalize_with_config(shop_revenue_generated, 'total_revenue_generated_shops'),
-        normalize_with_config(shop_operating_cost, 'total_operating_cost_shops'),
+    shops_vector = SHOPS_VECTOR_TABLE.normalize([
+        len(state['shops']),
+        shop_revenue_generated,
+        shop_operating_cost,
         round(min(shop_uptime), 2) if len(shop_uptime) > 0 else 1.0
-    ], dtype=np.float64)
+    ])
     
     # Create staff vector with color-coded counts
     janitors = [s for s in state['staff'] if s['subtype'] == 'janitor']
@@ -1095,105 +1080,50 @@ def format_gym_observation(state: dict) -> MapsGymObservationSpace:
         elif s['subclass'] == 'green': specialist_colors[2] += 1
         elif s['subclass'] == 'red': specialist_colors[3] += 1
 
-    staff_vector = np.array([
-        # Janitors by color
-        normalize_with_config(janitor_colors[0], 'total_janitors'),
-        normalize_with_config(janitor_colors[1], 'total_janitors'),
-        normalize_with_config(janitor_colors[2], 'total_janitors'),
-        normalize_with_config(janitor_colors[3], 'total_janitors'),
-        # Mechanics by color
-        normalize_with_config(mechanic_colors[0], 'total_mechanics'),
-        normalize_with_config(mechanic_colors[1], 'total_mechanics'),
-        normalize_with_config(mechanic_colors[2], 'total_mechanics'),
-        normalize_with_config(mechanic_colors[3], 'total_mechanics'),
-        # Specialists by color
-        normalize_with_config(specialist_colors[0], 'total_specialists'),
-        normalize_with_config(specialist_colors[1], 'total_specialists'),
-        normalize_with_config(specialist_colors[2], 'total_specialists'),
-        normalize_with_config(specialist_colors[3], 'total_specialists'),
+    staff_vector = STAFF_VECTOR_TABLE.normalize([
+        # Janitors, mechanics and specialists by color
+        *janitor_colors,
+        *mechanic_colors,
+        *specialist_colors,
         # Aggregate costs
-        normalize_with_config(state['state']['total_salary_paid'], 'total_salary_paid'),
-        normalize_with_config(total_staff_operating_cost, 'staff_total_operating_cost')
-    ], dtype=np.float64)
-    
-    # Create janitor vector with all Employee fields including x,y (50, 8)
-    # Sort janitors by (x, y) coordinates to match extraction order
-    sorted_janitors = sorted(janitors, key=lambda j: (j['x'], j['y']))[:MAX_STAFF_PER_TYPE]
-    janitor_vector = np.zeros((MAX_STAFF_PER_TYPE, 8), dtype=np.float64)
-    for i, janitor in enumerate(sorted_janitors):
-        success_metric = janitor.get('success_metric', 'amount_cleaned')
-        janitor_vector[i] = [
-            normalize_with_config(janitor['x'], 'x'),
-            normalize_with_config(janitor['y'], 'y'),
-            normalize_with_config(STAFF_SUBCLASS_MAP[janitor['subclass']], 'subclass_id'),
-            normalize_with_config(janitor.get('salary', 0), 'salary'),
-            normalize_with_config(janitor.get('operating_cost', 0), 'employee_operating_cost'),
-            normalize_with_config(STAFF_SUCCESS_METRICS.get(success_metric, 0), 'success_metric_id'),
-            normalize_with_config(janitor.get('success_metric_value', janitor.get('amount_cleaned', 0.0)), success_metric),
-            normalize_with_config(janitor.get('tiles_traversed', 0), 'tiles_traversed')
-        ]
-
-    # Create mechanic vector with all Employee fields including x,y (50, 8)
-    # Sort mechanics by (x, y) coordinates to match extraction order
-    sorted_mechanics = sorted(mechanics, key=lambda m: (m['x'], m['y']))[:MAX_STAFF_PER_TYPE]
-    mechanic_vector = np.zeros((MAX_STAFF_PER_TYPE, 8), dtype=np.float64)
-    for i, mechanic in enumerate(sorted_mechanics):
-        success_metric = mechanic.get('success_metric', 'repair_steps_performed')
-        mechanic_vector[i] = [
-            normalize_with_config(mechanic['x'], 'x'),
-            normalize_with_config(mechanic['y'], 'y'), 
-            normalize_with_config(STAFF_SUBCLASS_MAP[mechanic['subclass']], 'subclass_id'),
-            normalize_with_config(mechanic.get('salary', 0), 'salary'),
-            normalize_with_config(mechanic.get('operating_cost', 0), 'employee_operating_cost'),
-            normalize_with_config(STAFF_SUCCESS_METRICS.get(success_metric, 1), 'success_metric_id'),
-            normalize_with_config(mechanic.get('success_metric_value', mechanic.get('repair_steps_performed', 0.0)), success_metric),
-            normalize_with_config(mechanic.get('tiles_traversed', 0), 'tiles_traversed')
-        ]
-
-    # Create specialist vector with all Employee fields including x,y (50, 8)
-    # Sort specialists by (x, y) coordinates to match extraction order
-    sorted_specialists = sorted(specialists, key=lambda s: (s['x'], s['y']))[:MAX_STAFF_PER_TYPE]
-    specialist_vector = np.zeros((MAX_STAFF_PER_TYPE, 8), dtype=np.float64)
-    for i, specialist in enumerate(sorted_specialists):
-        success_metric_id = STAFF_SUCCESS_METRICS[specialist['success_metric']]
-        specialist_vector[i] = [
-            normalize_with_config(specialist['x'], 'x'),
-            normalize_with_config(specialist['y'], 'y'),
-            normalize_with_config(STAFF_SUBCLASS_MAP[specialist['subclass']], 'subclass_id'),
-            normalize_with_config(specialist.get('salary', 0), 'salary'),
-            normalize_with_config(specialist.get('operating_cost', 0), 'employee_operating_cost'),
-            normalize_with_config(success_metric_id, 'success_metric_id'),
-            normalize_with_config(specialist.get('success_metric_value', 0.0), specialist['success_metric']),
-            normalize_with_config(specialist.get('tiles_traversed', 0), 'tiles_traversed')
-        ]
+        state['state']['total_salary_paid'],
+        total_staff_operating_cost
+    ])
     
+    # Create janitor, mechanic and specialist vectors with all Employee fields including x,y (50, 8)
+    # Staff are sorted by (x, y) coordinates to match extraction order
+    janitor_vector = _staff_matrix(janitors, 'amount_cleaned', _zeroed_array(out, 'janitor_vector', (MAX_STAFF_PER_TYPE, 8), dtype))
+    mechanic_vector = _staff_matrix(mechanics, 'repair_steps_performed', _zeroed_array(out, 'mechanic_vector', (MAX_STAFF_PER_TYPE, 8), dtype))
+    specialist_vector = _staff_matrix(specialists, None, _zeroed_array(out, 'specialist_vector', (MAX_STAFF_PER_TYPE, 8), dtype))
+
     # Create guests vector (avg_steps_taken maps to avg_time_in_park in pydantic)
-    guests_vector = np.array([
-        normalize_with_config(state['guestStats']['total_guests'], 'total_guests'),
-        normalize_with_config(state['guestStats']['avg_money_spent'], 'avg_money_spent'),
-        normalize_with_config(state['guestStats']['avg_steps_taken'], 'avg_time_in_park'),
-        normalize_with_config(state['guestStats']['avg_rides_visited'], 'avg_rides_visited'),
-        normalize_with_config(state['guestStats']['avg_food_shops_visited'], 'avg_food_shops_visited'),
-        normalize_with_config(state['guestStats']['avg_drink_shops_visited'], 'avg_drink_shops_visited'),
-        normalize_with_config(state['guestStats']['avg_specialty_shops_visited'], 'avg_specialty_shops_visited')
-    ], dtype=np.float64)
+    guests_vector = GUESTS_VECTOR_TABLE.normalize([
+        state['guestStats']['total_guests'],
+        state['guestStats']['avg_money_spent'],
+        state['guestStats']['avg_steps_taken'],
+        state['guestStats']['avg_rides_visited'],
+        state['guestStats']['avg_food_shops_visited'],
+        state['guestStats']['avg_drink_shops_visited'],
+        state['guestStats']['avg_specialty_shops_visited']
+    ])
     
     # Create survey data
-    survey_age = np.array([normalize_with_config(state['guest_survey_results']['age_of_results'], 'survey_age')], dtype=np.float64)
+    survey_age = SURVEY_AGE_TABLE.normalize([state['guest_survey_results']['age_of_results']])
     
-    survey_results = np.zeros((MAX_SURVEY_RESULTS, 8), dtype=np.float64)
-    for i, result in enumerate(state['guest_survey_results']['list_of_results'][:MAX_SURVEY_RESULTS]):
-        if result:
-            survey_results[i] = [
-                round(result['happiness_at_exit'], 2),
-                round(result['hunger_at_exit'], 2),
-                round(result['thirst_at_exit'], 2),
-                normalize_with_config(result['remaining_energy'], 'remaining_energy'),
-                normalize_with_config(result['remaining_money'], 'remaining_money'),
-                round(result['percent_of_money_spent'], 2),
-                normalize_with_config(result['reason_for_exit_id'], 'reason_for_exit_id'),
-                normalize_with_config(result['preference_id'], 'preference_id')
-            ]
+    survey_results = _zeroed_array(out, 'survey_results', (MAX_SURVEY_RESULTS, 8), dtype)
+    results = [(i, result) for i, result in enumerate(state['guest_survey_results']['list_of_results'][:MAX_SURVEY_RESULTS]) if result]
+    if results:
+        rows = [i for i, _ in results]
+        survey_results[rows] = SURVEY_RESULT_TABLE.normalize([
+            [round(result['happiness_at_exit'], 2),
+             round(result['hunger_at_exit'], 2),
+             round(result['thirst_at_exit'], 2),
+             result['remaining_energy'],
+             result['remaining_money'],
+             round(result['percent_of_money_spent'], 2),
+             result['reason_for_exit_id'],
+             result['preference_id']]
+            for _, result in results])
     
     # Create park vector
     research_speed_map = {'none': 0, 'slow': 1, 'medium': 2, 'fast': 4}
@@ -1223,28 +1153,28 @@ def format_gym_observation(state: dict) -> MapsGymObservationSpace:
 
     profit = state['state']['revenue'] - state['state']['expenses']
     
-    park_vector = np.array([
-        normalize_with_config(state['state']['step'], 'step'),
-        normalize_with_config(state['state']['horizon'], 'horizon'),
-        normalize_with_config(state['state']['value'], 'value'),
-        normalize_with_config(state['state']['money'], 'money'),
-        normalize_with_config(state['state']['revenue'], 'revenue'),
-        normalize_with_config(state['state']['expenses'], 'expenses'),
+    park_vector = PARK_VECTOR_TABLE.normalize([
+        state['state']['step'],
+        state['state']['horizon'],
+        state['state']['value'],
+        state['state']['money'],
+        state['state']['revenue'],
+        state['state']['expenses'],
         1.0 if profit > 0 else 0.0, # profit sign
-        normalize_with_config(abs(profit), 'profit'),
-        normalize_with_config(state['state']['park_rating'], 'park_rating'),
-        normalize_with_config(research_speed, 'research_speed'),
+        abs(profit),
+        state['state']['park_rating'],
+        research_speed,
         *in_research,  # 6 research topic indicators
-        normalize_with_config(state['state'].get('research_operating_cost', 0), 'research_operating_cost'),
+        state['state'].get('research_operating_cost', 0),
         *available_entities,  # 24 (6 attraction types * 4 colors) attraction type indicators
         1.0 if state['state']['new_entity_available'] else 0.0,  # new_entity_available
-        normalize_with_config(state['state'].get('fast_days_since_last_new_entity', 0), 'fast_days_since_last_new_entity'),
-        normalize_with_config(state['state'].get('medium_days_since_last_new_entity', 0), 'medium_days_since_last_new_entity'),
-        normalize_with_config(state['state'].get('slow_days_since_last_new_entity', 0), 'slow_days_since_last_new_entity'),
+        state['state'].get('fast_days_since_last_new_entity', 0),
+        state['state'].get('medium_days_since_last_new_entity', 0),
+        state['state'].get('slow_days_since_last_new_entity', 0),
         round(min(cleanliness), 2),
-    ], dtype=np.float64)
+    ])
     
-    return {
+    obs = {
         'grid': grid,
         'rides_vector': rides_vector,
         'shops_vector': shops_vector,
@@ -1257,3 +1187,57 @@ def format_gym_observation(state: dict) -> MapsGymObservationSpace:
         'survey_results': survey_results,
         'park_vector': park_vector
     }
+    if out is None:
+        return {key: value.astype(dtype, copy=False) for key, value in obs.items()}
+
+    # The grid, staff and survey arrays were written in place, copy the small summary vectors
+    for key, value in obs.items():
+        if value is not out[key]:
+            out[key][...] = value
+    return out
+
+def empty_gym_observation_batch(batch_size: int, dtype: type = np.float64) -> dict:
+    """
+    Allocate stacked arrays for a batch of gym observations.
+
+    The layout is the one gymnasium uses for a batched MapsGymObservationSpace, with a leading batch
+    dimension on every array, e.g. (batch_size, 20, 20, len(GRID_CHANNELS)) for the grid.
+
+    Args:
+        batch_size: Number of observations in the batch
+        dtype: Floating point type of the arrays
+    """
+    return {key: np.zeros((batch_size,) + shape, dtype=dtype) for key, shape in GYM_OBSERVATION_SHAPES.items()}
+
+def format_gym_observation_batch(states: List[dict], out: Optional[dict] = None, dtype: type = np.float64) -> dict:
+    """
+    Convert many raw state dictionaries to stacked gym observation arrays.
+
+    Every state is encoded straight into its row of the stacked arrays. Passing the same out buffers
+    on every call avoids allocating new observation arrays, which makes this suited to training loops
+    and to converting logged trajectories into training tensors.
+
+    Args:
+        states: Raw state dictionaries from the game server
+        out: Optional stacked arrays to write the observations into, e.g. from empty_gym_observation_batch.
+            Every array must have at least len(states) rows; rows past len(states) are left untouched.
+        dtype: Floating point type of the new arrays if out is not given
+
+    Returns:
+        Dictionary of stacked arrays with len(states) rows, views of out if it was given
+
+    Raises:
+        ValueError: If out is missing a key or an array has the wrong shape or too few rows
+    """
+    if out is None:
+        out = empty_gym_observation_batch(len(states), dtype)
+    else:
+        for key, shape in GYM_OBSERVATION_SHAPES.items():
+            if key not in out:
+                raise ValueError(f"Output buffers are missing '{key}'")
+            if out[key].shape[1:] != shape or out[key].shape[0] < len(states):
+                raise ValueError(f"Output buffer '{key}' has shape {out[key].shape}, expected at least {(len(states),) + shape}")
+
+    for i, state in enumerate(states):
+        format_gym_observation(state, out={key: array[i] for key, array in out.items()})
+    return {key: array[:len(states)] for key, array in out.items()}
@@ -0,0 +1,128 @@
+"""
+Precomputed normalization of the numerical fields of the gym observations.
+
+A NormalizationTable is built once for a fixed sequence of fields, e.g. the entries of an observation
+vector, and normalizes or denormalizes whole arrays of those fields in a single pass.
+"""
+
+import numpy as np
+from typing import Dict, List, Sequence, Tuple, Union
+
+# How a field is normalized: a key of the normalization configuration, the number of decimals to round
+# a value that is already in [0, 1] to, or None for values that are copied unchanged (e.g. indicators)
+FieldNormalization = Union[str, int, None]
+
+
+def normalization_scales(config: Dict[str, Tuple[bool, float]]) -> Dict[str, float]:
+    """
+    Compute the divisor of every field of a normalization configuration.
+
+    Args:
+        config: Maps each field to (use_log, max_value)
+
+    Returns:
+        Maps each field to log1p(max_value) if it is log scaled and to max_value otherwise
+    """
+    return {key: np.log1p(max_value) if use_log else max_value for key, (use_log, max_value) in config.items()}
+
+
+class NormalizationTable:
+    """
+    Normalization of a fixed sequence of fields, stored as per field vectors.
+
+    Normalizing rounds the values to 2 decimals, takes log1p of the log scaled fields and divides by the
+    scale of each field. The results are exactly those of normalizing each value on its own.
+    """
+
+    def __init__(self, config: Dict[str, Tuple[bool, float]], fields: Sequence[FieldNormalization]):
+        """
+        Args:
+            config: Normalization configuration mapping each field to (use_log, max_value)
+            fields: How each field is normalized, see FieldNormalization
+
+        Raises:
+            ValueError: If a configured field has a max value of 1.0, such values must be rounded instead
+        """
+        self.fields = list(fields)
+        scales = normalization_scales(config)
+        self.scale = np.ones(len(self.fields), dtype=np.float64)
+        self.use_log = np.zeros(len(self.fields), dtype=bool)
+        # Decimals each denormalized value is rounded to, 0 for fields rounded to integers, None if copied
+        self._decimals: List[Union[int, None]] = []
+        round_decimals = np.full(len(self.fields), 2)
+        copied = np.zeros(len(self.fields), dtype=bool)
+        for i, field in enumerate(self.fields):
+            if field is None:
+                copied[i] = True
+                self._decimals.append(None)
+            elif isinstance(field, int):
+                round_decimals[i] = field
+                self._decimals.append(field)
+            else:
+                use_log, max_value = config[field]
+                if max_value == 1.0:
+                    raise ValueError(f"Normalize value for {field} is 1.0")
+                self.scale[i] = scales[field]
+                self.use_log[i] = use_log
+                self._decimals.append(0 if isinstance(max_value, int) else 2)
+
+        self._log_fields = np.flatnonzero(self.use_log)
+        self._copied_fields = np.flatnonzero(copied)
+        self._round_groups = [(int(decimals), np.flatnonzero(~copied & (round_decimals == decimals)))
+                              for decimals in np.unique(round_decimals[~copied])]
+
+    def normalize(self, values: np.ndarray) -> np.ndarray:
+        """
+        Normalize an array whose last axis holds the fields of the table.
+
+        Args:
+            values: The values to normalize, of shape (..., len(fields))
+
+        Returns:
+            The float64 normalized values
+
+        Raises:
+            ValueError: If a log scaled value is less than or equal to -1
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if len(self._round_groups) == 1 and len(self._round_groups[0][1]) == len(self.fields):
+            normalized = np.round(values, self._round_groups[0][0])
+        else:
+            normalized = np.empty_like(values)
+            for decimals, fields in self._round_groups:
+                normalized[..., fields] = np.round(values[..., fields], decimals)
+            normalized[..., self._copied_fields] = values[..., self._copied_fields]
+
+        if len(self._log_fields) > 0:
+            logged = normalized[..., self._log_fields]
+            invalid = logged <= -1.0
+            if np.any(invalid):
+                index = np.argwhere(invalid)[0]
+                raise ValueError(f"Normalize value {logged[tuple(index)]} for {self.fields[self._log_fields[index[-1]]]} is less than or equal to -1.0")
+            normalized[..., self._log_fields] = np.log1p(logged)
+        return normalized / self.scale
+
+    def denormalize(self, values: np.ndarray) -> list:
+        """
+        Denormalize a vector or matrix of normalized values back to the original scale.
+
+        Configured fields with an integer max value are rounded to integers and the other ones to 2 decimals,
+        fields given as decimals are rounded to them and copied fields are returned as floats.
+
+        Args:
+            values: The normalized values, of shape (len(fields),) or (rows, len(fields))
+
+        Returns:
+            A list of values, or a list of rows for a matrix
+        """
+        values = np.asarray(values, dtype=np.float64)
+        denormalized = values * self.scale
+        if len(self._log_fields) > 0:
+            denormalized[..., self._log_fields] = np.expm1(denormalized[..., self._log_fields])
+        rows = [self._round_row(row) for row in denormalized.reshape(-1, len(self.fields)).tolist()]
+        return rows[0] if values.ndim == 1 else rows
+
+    def _round_row(self, row: List[float]) -> list:
+        """Round the denormalized values of one row as described in denormalize."""
+        return [value if decimals is None else round(value) if decimals == 0 else round(value, decimals)
+                for value, decimals in zip(row, self._decimals)]
@@ -9,6 +9,7 @@ import numpy as np
 from typing import Dict
 import yaml
 import gymnasium as gym
+from .normalization import NormalizationTable
 from map_py.shared_constants import MAP_CONFIG as CONFIG
 
 # Constants for observation space bounds
@@ -70,24 +71,15 @@ NORMALIZATION_CONFIG = {
     'slow_days_since_last_new_entity': (False, MAX_STEPS),
 }
 
-
-def normalize_with_config(value: float, config_key: str) -> float:
-    """
-    Normalize a value using the configuration for that field.
-
-    Args:
-        value: The value to normalize
-        config_key: The key in NORMALIZATION_CONFIG
-    """
-    use_log, max_value = NORMALIZATION_CONFIG[config_key]
-    value = np.round(value, 2)
-    if max_value == 1.0:
-        raise ValueError(f"Normalize value for {config_key} is 1.0")
-    if use_log:
-        if value <= -1.0:
-            raise ValueError(f"Normalize value {value} for {config_key} is less than or equal to -1.0")
-        value, max_value = np.log1p(value), np.log1p(max_value)
-    return value / max_value
+# Normalization of each entry of the observation vectors, see FieldNormalization
+RIDES_VECTOR_TABLE = NormalizationTable(NORMALIZATION_CONFIG, ['num_rides'] * 12 + [
+    2, 'total_operating_cost', 'total_revenue_generated', 'total_excitement', 'avg_intensity', 'total_capacity', 'avg_wait_time'])
+SHOPS_VECTOR_TABLE = NormalizationTable(NORMALIZATION_CONFIG, ['num_shops'] * 12 + ['total_revenue_generated_shops', 'total_operating_cost_shops', 2])
+STAFF_VECTOR_TABLE = NormalizationTable(NORMALIZATION_CONFIG, ['num_staff'] * 12 + ['total_salary_paid', 'total_operating_cost'])
+GUESTS_VECTOR_TABLE = NormalizationTable(NORMALIZATION_CONFIG, [
+    'total_guests', 'avg_money_spent', 'avg_time_in_park', 'avg_rides_visited', 'avg_food_shops_visited',
+    'avg_drink_shops_visited', 'avg_specialty_shops_visited'])
+PARK_VECTOR_TABLE = NormalizationTable(NORMALIZATION_CONFIG, ['step', 'horizon', 'value', 'money', 'revenue', 'expenses', None, 'profit', 'park_rating', 2])
 
 
 class MapsSimpleGymObservationSpace(gym.spaces.Dict):
@@ -104,42 +96,46 @@ class MapsSimpleGymObservationSpace(gym.spaces.Dict):
     - park_vector: Overall park statistics (10 values)
     """
 
-    def __init__(self):
+    def __init__(self, dtype: type = np.float64):
+        """
+        Args:
+            dtype: Floating point type of the observation arrays, e.g. np.float32 to halve their memory
+        """
         super().__init__({
             "rides_vector": gym.spaces.Box(
                 low=0.0,
                 high=1.0,
                 shape=(19,),
-                dtype=np.float64
+                dtype=dtype
             ),
             "shops_vector": gym.spaces.Box(
                 low=0.0,
                 high=1.0,
                 shape=(15,),
-                dtype=np.float64
+                dtype=dtype
             ),
             "staff_vector": gym.spaces.Box(
                 low=0.0,
                 high=1.0,
                 shape=(14,),
-                dtype=np.float64
+                dtype=dtype
             ),
             "guests_vector": gym.spaces.Box(
                 low=0.0,
                 high=1.0,
                 shape=(7,),
-                dtype=np.float64
+                dtype=dtype
             ),
             "park_vector": gym.spaces.Box(
                 low=0.0,
                 high=1.0,
                 shape=(10,),
-                dtype=np.float64
+                dtype=dtype
             )
         })
 
 
-def format_simple_gym_observation(state: dict) -> Dict[str, np.ndarray]:
+def format_simple_gym_observation(state: dict, dtype: type = np.float64) -> Dict[str, np.ndarray]:
     """
     Convert a raw state dictionary to simplified gym-compatible observation arrays.
 
@@ -148,6 +144,7 @@ def format_simple_gym_observation(state: dict) -> Dict[str, np.ndarray]:
 
     Args:
         state: Raw state dictionary from the game server
+        dtype: Floating point type of the returned arrays. Values are computed in float64 and then cast.
 
     Returns:
         Dictionary containing 5 vectors: rides_vector, shops_vector, staff_vector,
@@ -172,20 +169,20 @@ def format_simple_gym_observation(state: dict) -> Dict[str, np.ndarray]:
         if key in ride_counts:
             ride_counts[key] += 1
 
-    rides_vector = np.array([
-        normalize_with_config(ride_counts[f'{subtype}_{color}'], 'num_rides')
+    rides_vector = RIDES_VECTOR_TABLE.normalize([
+        ride_counts[f'{subtype}_{color}']
         for subtype in ride_subtypes
         for color in colors
     ] + [
         # Aggregate metrics
         round(min(r['uptime'] for r in state['rides']), 2) if state['rides'] else 1.0,
-        normalize_with_config(sum(r['operating_cost'] for r in state['rides']), 'total_operating_cost'),
-        normalize_with_config(sum(r['revenue_generated'] for r in state['rides']), 'total_revenue_generated'),
-        normalize_with_config(state['state']['park_excitement'], 'total_excitement'),
-        normalize_with_config(sum(r['intensity'] for r in state['rides']) / max(len(state['rides']), 1), 'avg_intensity'),
-        normalize_with_config(sum(r['capacity'] for r in state['rides']), 'total_capacity'),
-        normalize_with_config(sum(r['avg_wait_time'] for r in state['rides']) / max(len(state['rides']), 1), 'avg_wait_time'),
-    ], dtype=np.float64)
+        sum(r['operating_cost'] for r in state['rides']),
+        sum(r['revenue_generated'] for r in state['rides']),
+        state['state']['park_excitement'],
+        sum(r['intensity'] for r in state['rides']) / max(len(state['rides']), 1),
+        sum(r['capacity'] for r in state['rides']),
+        sum(r['avg_wait_time'] for r in state['rides']) / max(len(state['rides']), 1),
+    ])
 
     # ===== SHOPS VECTOR (15 values) =====
     # Format: [drink: 4 colors, food: 4 colors, specialty: 4 colors,
@@ -203,16 +200,16 @@ def format_simple_gym_observation(state: dict) -> Dict[str, np.ndarray]:
         if key in shop_counts:
             shop_counts[key] += 1
 
-    shops_vector = np.array([
-        normalize_with_config(shop_counts[f'{subtype}_{color}'], 'num_shops')
+    shops_vector = SHOPS_VECTOR_TABLE.normalize([
+        shop_counts[f'{subtype}_{color}']
         for subtype in shop_subtypes
         for color in colors
     ] + [
         # Aggregate metrics
-        normalize_with_config(sum(s['revenue_generated'] for s in state['shops']), 'total_revenue_generated_shops'),
-        normalize_with_config(sum(s['operating_cost'] for s in state['shops']), 'total_operating_cost_shops'),
+        sum(s['revenue_generated'] for s in state['shops']),
+        sum(s['operating_cost'] for s in state['shops']),
         round(min(s['uptime'] for s in state['shops']), 2) if state['shops'] else 1.0,
-    ], dtype=np.float64)
+    ])
 
     # ===== STAFF VECTOR (14 values) =====
     # Format: [janitor: 4 colors, mechanic: 4 colors, specialist: 4 colors,
@@ -233,25 +230,25 @@ def format_simple_gym_observation(state: dict) -> Dict[str, np.ndarray]:
     # Calculate total staff operating cost
     total_staff_operating_cost = sum(staff_member['operating_cost'] for staff_member in state['staff'])
 
-    staff_vector = np.array([
-        normalize_with_config(staff_counts[f'{subtype}_{color}'], 'num_staff')
+    staff_vector = STAFF_VECTOR_TABLE.normalize([
+        staff_counts[f'{subtype}_{color}']
         for subtype in staff_subtypes
         for color in colors
     ] + [
-        normalize_with_config(state['state']['total_salary_paid'], 'total_salary_paid'),
-        normalize_with_config(total_staff_operating_cost, 'total_operating_cost')
-    ], dtype=np.float64)
+        state['state']['total_salary_paid'],
+        total_staff_operating_cost
+    ])
 
     # ===== GUESTS VECTOR (7 values) =====
-    guests_vector = np.array([
-        normalize_with_config(state['guestStats']['total_guests'], 'total_guests'),
-        normalize_with_config(state['guestStats']['avg_money_spent'], 'avg_money_spent'),
-        normalize_with_config(state['guestStats']['avg_steps_taken'], 'avg_time_in_park'),
-        normalize_with_config(state['guestStats']['avg_rides_visited'], 'avg_rides_visited'),
-        normalize_with_config(state['guestStats']['avg_food_shops_visited'], 'avg_food_shops_visited'),
-        normalize_with_config(state['guestStats']['avg_drink_shops_visited'], 'avg_drink_shops_visited'),
-        normalize_with_config(state['guestStats']['avg_specialty_shops_visited'], 'avg_specialty_shops_visited')
-    ], dtype=np.float64)
+    guests_vector = GUESTS_VECTOR_TABLE.normalize([
+        state['guestStats']['total_guests'],
+        state['guestStats']['avg_money_spent'],
+        state['guestStats']['avg_steps_taken'],
+        state['guestStats']['avg_rides_visited'],
+        state['guestStats']['avg_food_shops_visited'],
+        state['guestStats']['avg_drink_shops_visited'],
+        state['guestStats']['avg_specialty_shops_visited']
+    ])
 
     # ===== PARK VECTOR (10 values) =====
     profit = state['state']['revenue'] - state['state']['expenses']
@@ -291,23 +288,23 @@ def format_simple_gym_observation(state: dict) -> Dict[str, np.ndarray]:
             else:
                 available_entities.append(0.0)
 
-    park_vector = np.array([
-        normalize_with_config(state['state']['step'], 'step'),
-        normalize_with_config(state['state']['horizon'], 'horizon'),
-        normalize_with_config(state['state']['value'], 'value'),
-        normalize_with_config(state['state']['money'], 'money'),
-        normalize_with_config(state['state']['revenue'], 'revenue'),
-        normalize_with_config(state['state']['expenses'], 'expenses'),
+    park_vector = PARK_VECTOR_TABLE.normalize([
+        state['state']['step'],
+        state['state']['horizon'],
+        state['state']['value'],
+        state['state']['money'],
+        state['state']['revenue'],
+        state['state']['expenses'],
         1.0 if profit > 0 else 0.0,  # profit sign
-        normalize_with_config(abs(profit), 'profit'),
-        normalize_with_config(state['state']['park_rating'], 'park_rating'),
+        abs(profit),
+        state['state']['park_rating'],
         round(min_cleanliness, 2),
-    ], dtype=np.float64)
+    ])
 
     return {
-        'rides_vector': rides_vector,
-        'shops_vector': shops_vector,
-        'staff_vector': staff_vector,
-        'guests_vector': guests_vector,
-        'park_vector': park_vector
+        'rides_vector': rides_vector.astype(dtype, copy=False),
+        'shops_vector': shops_vector.astype(dtype, copy=False),
+        'staff_vector': staff_vector.astype(dtype, copy=False),
+        'guests_vector': guests_vector.astype(dtype, copy=False),
+        'park_vector': park_vector.astype(dtype, copy=False)
     }
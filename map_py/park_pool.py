@@ -0,0 +1,197 @@
+"""Pool of ready-to-use MiniAmusementPark instances
+
+Creating a park requests a new park id, sends its settings and seed and resets it before the
+first step. ParkPool does this in background threads ahead of time, so acquiring a park is
+instant, and recycles released parks with a reset instead of deleting them.
+"""
+
+from map_py.mini_amusement_park import MiniAmusementPark
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Sequence, Tuple, Any
+import queue
+import threading
+
+# (layout, difficulty) of the parks in a pool
+PoolKey = Tuple[Optional[str], Optional[str]]
+
+
+class ParkPool:
+    def __init__(self,
+                 host: str,
+                 port: str,
+                 size: int = 4,
+                 configs: Optional[Sequence[PoolKey]] = None,
+                 max_workers: int = 4,
+                 **park_kwargs: Any):
+        """Initialize a pool and start preparing parks in the background.
+
+        Args:
+            host: The host address for the park's API server.
+            port: The port number for the park's API server.
+            size: Number of parks to keep per (layout, difficulty), including acquired parks. Released parks are
+                recycled as long as the pool holds fewer parks, so size should be at least the number of parks
+                used at the same time.
+            configs: (layout, difficulty) pairs to prepare parks for right away. Parks for other pairs are
+                prepared after their first acquire().
+            max_workers: Number of threads preparing parks.
+            **park_kwargs: Additional arguments passed to MiniAmusementPark, e.g. observation_type or transport.
+
+        Raises:
+            ValueError: If park_kwargs contains park_id, layout or difficulty.
+        """
+        for key in ["park_id", "layout", "difficulty"]:
+            if key in park_kwargs:
+                raise ValueError(f"{key} is chosen by the pool and cannot be passed to ParkPool")
+
+        self.host = host
+        self.port = port
+        self.size = size
+        self.park_kwargs = park_kwargs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="park_pool")
+        self._lock = threading.Lock()
+        self._ready: Dict[PoolKey, queue.SimpleQueue] = {}
+        # Number of parks per key that are being created or reset
+        self._pending: Dict[PoolKey, int] = {}
+        self._acquired: Dict[MiniAmusementPark, PoolKey] = {}
+        self._num_acquired: Dict[PoolKey, int] = {}
+        self._closed = False
+
+        for layout, difficulty in configs or []:
+            self._refill((layout, difficulty))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args: Any) -> bool:
+        self.close()
+        return False
+
+    def acquire(self, layout: Optional[str] = None, difficulty: Optional[str] = None) -> MiniAmusementPark:
+        """Get a park that has already been reset.
+
+        Calling reset() on the park is not required but allowed. If no park is ready, waits for a park that is
+        being prepared, or creates one if there is none.
+
+        Args:
+            layout: Layout of the park. If None, a random layout is used.
+            difficulty: Difficulty of the park. If None, "easy" is used.
+
+        Returns:
+            A reset MiniAmusementPark. Hand it back with release() once the episode is over.
+        """
+        key = (layout, difficulty)
+        ready = self._ready_queue(key)
+        env = None
+        while env is None:
+            try:
+                env = ready.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    pending = self._pending.get(key, 0)
+                if pending == 0:
+                    env = self._create(key)
+                else:
+                    # A park that is already being prepared is ready sooner than a new one
+                    try:
+                        env = ready.get(timeout=0.1)
+                    except queue.Empty:
+                        pass
+
+        with self._lock:
+            self._acquired[env] = key
+            self._num_acquired[key] = self._num_acquired.get(key, 0) + 1
+        # Start keeping parks of this kind if this is the first acquire for them
+        self._refill(key)
+        return env
+
+    def release(self, env: MiniAmusementPark) -> None:
+        """Return a park to the pool. It is reset in the background and handed out again.
+
+        The park is deleted instead if the pool already holds size parks of its kind.
+
+        Args:
+            env: A park returned by acquire().
+
+        Raises:
+            ValueError: If the park was not acquired from this pool.
+        """
+        with self._lock:
+            key = self._acquired.pop(env, None)
+            if key is None:
+                raise ValueError(f"Park {env.park_id} was not acquired from this pool")
+            self._num_acquired[key] -= 1
+            recycle = not self._closed and self._num_parks(key) < self.size
+            if recycle:
+                self._pending[key] = self._pending.get(key, 0) + 1
+
+        if recycle:
+            self._executor.submit(self._prepare, key, env)
+        else:
+            self._discard(env)
+
+    def close(self) -> None:
+        """Stop preparing parks and delete all parks that are not acquired."""
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=True)
+        for ready in self._ready.values():
+            while True:
+                try:
+                    self._discard(ready.get_nowait())
+                except queue.Empty:
+                    break
+
+    def _ready_queue(self, key: PoolKey) -> queue.SimpleQueue:
+        return self._ready.setdefault(key, queue.SimpleQueue())
+
+    def _num_parks(self, key: PoolKey) -> int:
+        """Number of ready, pending and acquired parks for key. Must be called while holding the lock."""
+        return self._ready_queue(key).qsize() + self._pending.get(key, 0) + self._num_acquired.get(key, 0)
+
+    def _create(self, key: PoolKey) -> MiniAmusementPark:
+        layout, difficulty = key
+        env = MiniAmusementPark(host=self.host, port=self.port, layout=layout, difficulty=difficulty, **self.park_kwargs)
+        env.reset()
+        return env
+
+    def _refill(self, key: PoolKey) -> None:
+        """Start preparing parks until the pool holds size parks for key."""
+        with self._lock:
+            if self._closed:
+                return
+            missing = self.size - self._num_parks(key)
+            if missing <= 0:
+                return
+            self._pending[key] = self._pending.get(key, 0) + missing
+
+        for _ in range(missing):
+            self._executor.submit(self._prepare, key, None)
+
+    def _prepare(self, key: PoolKey, env: Optional[MiniAmusementPark]) -> None:
+        """Create a park, or reset a released one, and add it to the ready parks."""
+        try:
+            if env is None:
+                env = self._create(key)
+            else:
+                env.reset()
+        except Exception as e:
+            print(f"Warning: Failed to prepare park: {e}")
+            if env is not None:
+                self._discard(env)
+            env = None
+
+        with self._lock:
+            self._pending[key] -= 1
+            if env is not None and not self._closed:
+                self._ready_queue(key).put(env)
+                return
+        if env is not None:
+            self._discard(env)
+
+    @staticmethod
+    def _discard(env: MiniAmusementPark) -> None:
+        try:
+            env.delete_park()
+        except Exception as e:
+            print(f"Warning: Failed to clear park during cleanup: {e}")
+        env.shutdown()
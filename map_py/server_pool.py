@@ -0,0 +1,190 @@
+"""Pool of park servers running in separate Node.js processes
+
+A park server runs every park on a single thread, so parks stepped at the same time wait for
+each other. ServerPool starts one server per worker on consecutive ports and pins each park to
+a worker, so parks on different workers run in parallel.
+"""
+
+from map_py.mini_amusement_park import MiniAmusementPark
+from pathlib import Path
+from typing import List, Optional, Sequence, Any
+import os
+import subprocess
+import threading
+import time
+import uuid
+import zlib
+import requests
+
+SERVER_PATH = Path(__file__).resolve().parent.parent / "map_backend" / "server.js"
+
+
+class ServerPool:
+    def __init__(self,
+                 num_workers: Optional[int] = None,
+                 host: str = "localhost",
+                 base_port: int = 3100,
+                 node: str = "node",
+                 startup_timeout: float = 10,
+                 monitor_interval: float = 1,
+                 server_args: Sequence[str] = (),
+                 verbose: bool = False):
+        """Start the park servers and wait until they are healthy.
+
+        Args:
+            num_workers: Number of servers. Defaults to the number of CPUs.
+            host: The host the servers are reached at.
+            base_port: Port of the first server. Server i listens on base_port + i.
+            node: The Node.js executable used to run the servers.
+            startup_timeout: Seconds to wait for a server to answer /v1/health.
+            monitor_interval: Seconds between checks for crashed servers, which are restarted on the same port.
+                Parks of a crashed server are lost.
+            server_args: Additional arguments passed to server.js, e.g. ["--workers", "4"] to also run the parks of
+                each server on worker threads.
+            verbose: Whether to show the output of the servers.
+
+        Raises:
+            RuntimeError: If a server does not become healthy in time.
+        """
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.host = host
+        self.ports = [str(base_port + i) for i in range(self.num_workers)]
+        self.node = node
+        self.startup_timeout = startup_timeout
+        self.server_args = list(server_args)
+        self.verbose = verbose
+        self.restarts = [0] * self.num_workers
+        self._processes: List[Optional[subprocess.Popen]] = [None] * self.num_workers
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+
+        try:
+            for worker in range(self.num_workers):
+                self._start(worker)
+            for worker in range(self.num_workers):
+                self._wait_until_healthy(worker)
+        except Exception:
+            self.close()
+            raise
+
+        self._monitor = threading.Thread(target=self._monitor_workers, args=(monitor_interval,),
+                                         name="server_pool_monitor", daemon=True)
+        self._monitor.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args: Any) -> bool:
+        self.close()
+        return False
+
+    def worker_for(self, key: str) -> int:
+        """Index of the worker that parks with the given key are assigned to.
+
+        The assignment only depends on the key and the number of workers, so it is the same in every process.
+
+        Args:
+            key: Any string identifying a park, e.g. a park id or an environment name.
+
+        Returns:
+            The worker index.
+        """
+        return zlib.crc32(str(key).encode()) % self.num_workers
+
+    def port_for(self, key: str) -> str:
+        """Port of the worker that parks with the given key are assigned to.
+
+        Args:
+            key: Any string identifying a park.
+
+        Returns:
+            The port of the worker.
+        """
+        return self.ports[self.worker_for(key)]
+
+    def make_env(self, key: Optional[str] = None, **park_kwargs: Any) -> MiniAmusementPark:
+        """Create a park on the worker its key is assigned to.
+
+        The environment keeps sending its requests to that worker, and so do its forks.
+
+        Args:
+            key: Key the worker is chosen by. Defaults to a random key, which spreads parks evenly.
+            **park_kwargs: Arguments passed to MiniAmusementPark, except host and port.
+
+        Returns:
+            The environment.
+        """
+        if key is None:
+            key = uuid.uuid4().hex
+        return MiniAmusementPark(host=self.host, port=self.port_for(key), **park_kwargs)
+
+    def healthy(self) -> List[bool]:
+        """Check the health endpoint of every worker.
+
+        Returns:
+            Whether each worker answered /v1/health.
+        """
+        return [self._is_healthy(worker) for worker in range(self.num_workers)]
+
+    def close(self) -> None:
+        """Stop all workers."""
+        self._closed.set()
+        with self._lock:
+            for process in self._processes:
+                if process is not None and process.poll() is None:
+                    process.terminate()
+            for process in self._processes:
+                if process is None:
+                    continue
+                try:
+                    process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                if process.stdin is not None:
+                    process.stdin.close()
+
+    def _start(self, worker: int) -> None:
+        env = os.environ.copy()
+        env["MAP_PORT"] = self.ports[worker]
+        output = None if self.verbose else subprocess.DEVNULL
+        # The server exits once the pipe to its stdin is closed, i.e. when this process exits
+        self._processes[worker] = subprocess.Popen([self.node, str(SERVER_PATH), "--exit-with-parent", *self.server_args],
+                                                   cwd=SERVER_PATH.parent.parent, env=env, stdin=subprocess.PIPE,
+                                                   stdout=output, stderr=output)
+
+    def _is_healthy(self, worker: int) -> bool:
+        try:
+            response = requests.get(f"http://{self.host}:{self.ports[worker]}/v1/health", timeout=self.startup_timeout)
+            return response.status_code == 200
+        except requests.RequestException:
+            return False
+
+    def _wait_until_healthy(self, worker: int) -> None:
+        deadline = time.monotonic() + self.startup_timeout
+        while not self._is_healthy(worker):
+            exit_code = self._processes[worker].poll()
+            if exit_code is not None:
+                raise RuntimeError(f"Park server on port {self.ports[worker]} exited with code {exit_code}")
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Park server on port {self.ports[worker]} did not become healthy "
+                                   f"within {self.startup_timeout} seconds")
+            time.sleep(0.05)
+
+    def _monitor_workers(self, interval: float) -> None:
+        """Restart workers whose process exited."""
+        while not self._closed.wait(interval):
+            for worker in range(self.num_workers):
+                with self._lock:
+                    if self._closed.is_set():
+                        return
+                    exit_code = self._processes[worker].poll()
+                    if exit_code is None:
+                        continue
+                    print(f"Warning: Park server on port {self.ports[worker]} exited with code {exit_code}, restarting it")
+                    self.restarts[worker] += 1
+                    self._processes[worker].stdin.close()
+                    self._start(worker)
+                try:
+                    self._wait_until_healthy(worker)
+                except RuntimeError as e:
+                    print(f"Warning: {e}")
@@ -0,0 +1,63 @@
+"""Apply the park state deltas computed by map_backend/node_utils/state_diff.js
+
+Deltas are applied copy-on-write: the previous state is never modified and unchanged parts
+are shared between the previous and the new state.
+"""
+
+from typing import Any, Optional
+
+
+def entity_key(item: Any) -> Optional[str]:
+    """Key identifying an entity (ride, shop, staff member, tile) within an array.
+
+    Args:
+        item: An array item.
+
+    Returns:
+        The key, or None if the item is not an entity.
+    """
+    if not isinstance(item, dict):
+        return None
+    if item.get("id") is not None:
+        return f"id:{item['id']}"
+    if isinstance(item.get("x"), (int, float)) and isinstance(item.get("y"), (int, float)) \
+            and not isinstance(item["x"], bool) and not isinstance(item["y"], bool):
+        return f"{item['x']},{item['y']}"
+    return None
+
+
+def apply_state_delta(value: Any, delta: Any) -> Any:
+    """Apply a delta to a value.
+
+    Args:
+        value: The previous value.
+        delta: The delta between the previous value and the next one.
+
+    Returns:
+        The next value.
+    """
+    if not isinstance(delta, dict):
+        return delta
+    if "r" in delta:
+        return delta["r"]
+
+    if "o" in delta:
+        changes = delta["o"]
+        keys = delta.get("order", value.keys())
+        return {key: apply_state_delta(value.get(key), changes[key]) if key in changes else value[key]
+                for key in keys}
+
+    if "k" in delta:
+        changes = delta["k"]
+        by_key = {entity_key(item): item for item in value}
+        keys = delta.get("order", by_key.keys())
+        return [apply_state_delta(by_key.get(key), changes[key]) if key in changes else by_key[key]
+                for key in keys]
+
+    if "a" in delta:
+        result = list(value)
+        for index, change in delta["a"].items():
+            result[int(index)] = apply_state_delta(result[int(index)], change)
+        return result
+
+    raise ValueError(f"Invalid state delta: {delta}")
@@ -0,0 +1,83 @@
+"""Tests for the asyncio MiniAmusementPark client."""
+import asyncio
+import unittest
+from map_py.mini_amusement_park import MiniAmusementPark
+from map_py.async_mini_amusement_park import AsyncMiniAmusementPark, create_async_client
+
+HOST = 'localhost'
+PORT = '3000'
+
+ACTIONS = [
+    "place(x=1, y=5, type='ride', subtype='carousel', subclass='yellow', price=2)",
+    "place(x=2, y=6, type='shop', subtype='drink', subclass='yellow', price=3, order_quantity=50)",
+    "modify(x=1, y=5, type='ride', price=3)",
+    "wait()",
+]
+
+class TestAsyncPark(unittest.TestCase):
+    def test_matches_sync_park(self):
+        """Check the async client produces the same observations and rewards as the sync client."""
+        async def run_async():
+            async with AsyncMiniAmusementPark(host=HOST, port=PORT, layout='diagonal_squares', observation_type='pydantic', seed=5) as park:
+                results = [await park.reset()]
+                for action in ACTIONS:
+                    results.append(await park.step(action))
+                return results
+
+        async_results = asyncio.run(run_async())
+
+        with MiniAmusementPark(host=HOST, port=PORT, layout='diagonal_squares', observation_type='pydantic', seed=5) as park:
+            sync_results = [park.reset()]
+            for action in ACTIONS:
+                sync_results.append(park.step(action))
+
+        for async_result, sync_result in zip(async_results, sync_results):
+            assert async_result == sync_result, (async_result[1:], sync_result[1:])
+
+    def test_concurrent_episodes(self):
+        """Check many parks can be driven concurrently with one shared client."""
+        async def run_episode(client, seed):
+            park = await AsyncMiniAmusementPark.create(host=HOST, port=PORT, client=client, layout='diagonal_squares', observation_type='raw', seed=seed)
+            await park.reset()
+            total_reward = 0
+            for action in ACTIONS:
+                _, reward, _, _, _ = await park.step(action)
+                total_reward += reward
+            await park.delete_park()
+            return total_reward
+
+        async def run_all():
+            async with create_async_client() as client:
+                return await asyncio.gather(*[run_episode(client, seed) for seed in [1, 1, 2]])
+
+        rewards = asyncio.run(run_all())
+        assert rewards[0] == rewards[1]
+
+    def test_gym_actions_match_sync_park(self):
+        """Check gym action arrays are decoded like the sync client, fetching the state if none was observed yet."""
+        with MiniAmusementPark(host=HOST, port=PORT, layout='diagonal_squares', observation_type='gym_simple', seed=5) as park:
+            park.reset()
+            park.action_space.seed(7)
+            sampled, decoded = [], []
+            while len(sampled) < 3:
+                action = park.action_space.sample()
+                try:
+                    decoded.append(park._decode_action(action))
+                    sampled.append(action)
+                except (TypeError, ValueError, KeyError, IndexError):
+                    # Some sampled actions cannot be decoded in an empty park
+                    continue
+            sync_results = [park.rollout(sampled), park.act_batch(sampled)[1:]]
+
+        async def run_async():
+            async with AsyncMiniAmusementPark(host=HOST, port=PORT, layout='diagonal_squares', observation_type='gym_simple', seed=5) as park:
+                await park.reset()
+                park._last_raw_state = None
+                assert [await park._decode_action(action) for action in sampled] == decoded
+                assert park._last_raw_state is not None
+                return [await park.rollout(sampled), (await park.act_batch(sampled))[1:]]
+
+        assert asyncio.run(run_async()) == sync_results
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+"""Tests for forking parks."""
+import copy
+import unittest
+from map_py.mini_amusement_park import MiniAmusementPark
+
+HOST = 'localhost'
+PORT = '3000'
+
+ACTIONS = [
+    "place(x=1, y=5, type='ride', subtype='carousel', subclass='yellow', price=2)",
+    "place(type='staff', subtype='janitor', subclass='blue', x=0, y=1)",
+    "wait()",
+]
+
+def without_park_id(raw_state):
+    raw_state = copy.deepcopy(raw_state)
+    raw_state['state'].pop('parkId')
+    return raw_state
+
+class TestFork(unittest.TestCase):
+    def test_forks_continue_like_original(self):
+        """Check forks taking the same actions as the original park reach the same states."""
+        with MiniAmusementPark(host=HOST, port=PORT, layout='diagonal_squares', observation_type='raw', seed=3) as map:
+            map.reset()
+            for action in ACTIONS:
+                map.step(action)
+
+            forks = map.fork(2)
+            assert len({fork.park_id for fork in forks} | {map.park_id}) == 3
+            try:
+                assert without_park_id(forks[0].get_raw_state()) == without_park_id(map.get_raw_state())
+                for _ in range(3):
+                    raw, reward, _, _, _ = map.step("wait()")
+                    fork_raw, fork_reward, _, _, _ = forks[0].step("wait()")
+                    assert without_park_id(raw) == without_park_id(fork_raw)
+                    assert reward == fork_reward
+
+                # Changing a fork does not change the other parks
+                forks[1].step("remove(type='ride', subtype='carousel', subclass='yellow', x=1, y=5)")
+                assert len(forks[1].get_raw_state()['rides']) == 0
+                assert len(map.get_raw_state()['rides']) == 1
+                assert len(forks[0].get_raw_state()['rides']) == 1
+            finally:
+                for fork in forks:
+                    fork.delete_park()
+                    fork.shutdown()
+
+            # Shutting down forks leaves the original's connection open
+            map.step("wait()")
+
+    def test_invalid_fork(self):
+        with MiniAmusementPark(host=HOST, port=PORT, layout='diagonal_squares', observation_type='raw') as map:
+            map.reset()
+            with self.assertRaises(RuntimeError):
+                map.fork(0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,8 +3,12 @@ have a better home yet.
 """
 import unittest
 from map_py.mini_amusement_park import MiniAmusementPark
-from map_py.observations_and_actions.pydantic_obs import FullParkObs
+from map_py.observations_and_actions.pydantic_obs import FullParkObs, ParkDataGranularity, ParkObservabilityMode, format_pydantic_observation
+from map_py.observations_and_actions.gym_obs import (format_gym_observation, format_gym_observation_batch, empty_gym_observation_batch, obs_pydantic_to_array, obs_array_to_pydantic,
+                                                    NORMALIZATION_CONFIG, normalize_with_config, denormalize_with_config)
+from map_py.observations_and_actions.normalization import NormalizationTable
 from map_py.tests.states import COMPLEX_ENV4_STATE, EMPTY_ENV4_STATE
+import numpy as np
 import copy 
 
 GRID_SIZE = 20  # Hard-coded in MiniAmusementPark
@@ -39,6 +43,147 @@ class TestThemeParkSemanticErrors(unittest.TestCase):
 
         assert 'park_rating' in new_state['state']
 
+    def test_cached_observation(self) -> None:
+        """Check repeated observations of an unchanged park are served from the cache."""
+        with MiniAmusementPark(host=HOST, port=PORT, layout='diagonal_squares', cache_observations=True) as map:
+            map.reset()
+            step_obs, _, _, _, _ = map.step('place(type="staff", subtype="janitor", subclass="blue", x=0, y=1)')
+            obs, raw = map.get_observation_and_raw_state()
+            assert obs is step_obs
+            assert map.get_observation_and_raw_state() == (obs, raw)
+
+            # The park changes without a step, so it must be fetched again
+            modified = copy.deepcopy(raw)
+            modified['state']['money'] += 100
+            map.set(modified)
+            _, new_raw = map.get_observation_and_raw_state()
+            assert new_raw is not raw
+            assert new_raw['state']['money'] == raw['state']['money'] + 100
+
+            uncached_map = MiniAmusementPark(host=HOST, port=PORT, park_id=map.park_id)
+            assert uncached_map.get_raw_state() == new_raw
+
+    def test_gym_observation_matches_pydantic_encoder(self) -> None:
+        """Check the gym encoder gives exactly the arrays of encoding the pydantic observation, as checked by the "test" observation type."""
+        actions = [
+            "place(x=1, y=5, type='ride', subtype='carousel', subclass='yellow', price=2)",
+            "place(x=1, y=6, type='shop', subtype='drink', subclass='yellow', price=3, order_quantity=50)",
+            "place(x=3, y=3, type='shop', subtype='food', subclass='yellow', price=4, order_quantity=100)",
+            "place(type='staff', subtype='janitor', subclass='yellow', x=0, y=1)",
+            "place(type='staff', subtype='mechanic', subclass='yellow', x=0, y=2)",
+            "wait(days=3)",
+        ]
+        with MiniAmusementPark(host=HOST, port=PORT, layout='diagonal_squares', observation_type='raw', seed=3) as map:
+            map.reset()
+            for action in actions:
+                raw, _, _, _, info = map.step(action)
+                assert 'error' not in info, info
+                gym_obs = format_gym_observation(raw)
+                pydantic_obs = format_pydantic_observation(raw, ParkObservabilityMode.NORMAL, ParkDataGranularity.HIGH, as_dict=False)
+                expected = obs_pydantic_to_array(pydantic_obs)
+                assert gym_obs.keys() == expected.keys()
+                for key in expected:
+                    assert gym_obs[key].dtype == expected[key].dtype, key
+                    np.testing.assert_array_equal(gym_obs[key], expected[key], err_msg=key)
+            assert len(raw['rides']) == 1 and len(raw['shops']) == 2 and len(raw['staff']) == 2
+
+    def test_gym_observation_batch(self) -> None:
+        """Check batched gym observations match encoding each state and are written into reused buffers."""
+        actions = [
+            "place(x=1, y=5, type='ride', subtype='carousel', subclass='yellow', price=2)",
+            "place(type='staff', subtype='janitor', subclass='yellow', x=0, y=1)",
+            "wait()",
+        ]
+        with MiniAmusementPark(host=HOST, port=PORT, layout='diagonal_squares', observation_type='raw', seed=3) as map:
+            raw, _ = map.reset()
+            states = [raw] + [map.step(action)[0] for action in actions]
+
+        out = empty_gym_observation_batch(len(states) + 1)
+        for batch_states in [states, states[::-1], states[:2]]:
+            batch = format_gym_observation_batch(batch_states, out=out)
+            for i, state in enumerate(batch_states):
+                expected = format_gym_observation(state)
+                for key in expected:
+                    assert batch[key].shape == (len(batch_states),) + expected[key].shape, key
+                    assert np.shares_memory(batch[key], out[key]), key
+                    np.testing.assert_array_equal(batch[key][i], expected[key], err_msg=key)
+
+        allocated = format_gym_observation_batch(states)
+        for key in allocated:
+            np.testing.assert_array_equal(allocated[key], format_gym_observation_batch(states, out=out)[key], err_msg=key)
+        with self.assertRaises(ValueError):
+            format_gym_observation_batch(states, out=empty_gym_observation_batch(2))
+
+    def test_float32_observations(self) -> None:
+        """Check obs_dtype=np.float32 gives float32 observations in the space and passes the "test" round trip."""
+        actions = [
+            "place(x=1, y=5, type='ride', subtype='carousel', subclass='yellow', price=2)",
+            "place(x=1, y=6, type='shop', subtype='drink', subclass='yellow', price=3, order_quantity=50)",
+            "place(type='staff', subtype='janitor', subclass='yellow', x=0, y=1)",
+            "wait(days=2)",
+        ]
+        for observation_type in ['test', 'gym', 'gym_simple']:
+            with MiniAmusementPark(host=HOST, port=PORT, layout='diagonal_squares', observation_type=observation_type,
+                                   obs_dtype=np.float32, seed=3) as map:
+                map.reset()
+                for action in actions:
+                    # The "test" observation type raises if the round trip is outside the float32 tolerance
+                    obs, _, _, _, info = map.step(action)
+                    assert 'error' not in info, info
+                    if observation_type != 'test':
+                        assert all(value.dtype == np.float32 for value in obs.values())
+                        assert map.observation_space.contains(obs)
+
+        with self.assertRaises(ValueError):
+            MiniAmusementPark(host=HOST, port=PORT, observation_type='gym', obs_dtype=np.int32)
+
+    def test_gym_observation_decodes_to_pydantic(self) -> None:
+        """Check decoding gym arrays gives the pydantic observation, with attractions and paths in row-major order."""
+        actions = [
+            "place(x=1, y=5, type='ride', subtype='carousel', subclass='yellow', price=2)",
+            "place(x=3, y=3, type='shop', subtype='food', subclass='yellow', price=4, order_quantity=100)",
+            "place(x=1, y=6, type='shop', subtype='drink', subclass='yellow', price=3, order_quantity=50)",
+            "place(type='staff', subtype='mechanic', subclass='yellow', x=0, y=2)",
+            "place(type='staff', subtype='janitor', subclass='yellow', x=0, y=1)",
+            "wait(days=3)",
+        ]
+        with MiniAmusementPark(host=HOST, port=PORT, layout='diagonal_squares', observation_type='raw', seed=3) as map:
+            map.reset()
+            for action in actions:
+                raw, _, _, _, info = map.step(action)
+                assert 'error' not in info, info
+                expected = format_pydantic_observation(raw, ParkObservabilityMode.NORMAL, ParkDataGranularity.HIGH, as_dict=False)
+                decoded = obs_array_to_pydantic(format_gym_observation(raw), ParkDataGranularity.HIGH, ParkObservabilityMode.NORMAL)
+                assert decoded == expected
+
+        assert [(shop.x, shop.y) for shop in decoded.shops.shop_list] == [(1, 6), (3, 3)]
+        assert [(path.x, path.y) for path in decoded.paths] == sorted((path.x, path.y) for path in decoded.paths)
+        assert [staff.subtype for staff in decoded.staff.staff_list] == ['janitor', 'mechanic']
+
+    def test_normalization_table(self) -> None:
+        """Check a NormalizationTable gives exactly the values of normalizing and denormalizing each field on its own."""
+        fields = ['money', 'park_rating', 'total_rides', 2, None, 'revenue']
+        table = NormalizationTable(NORMALIZATION_CONFIG, fields)
+        rows = [[12345.678, 55.555, 7, 0.456, 1.0, 0.0], [-0.5, 0.004, 250, 0.999, 0.0, 999999.99]]
+
+        normalized = table.normalize(rows)
+        assert normalized.dtype == np.float64 and normalized.shape == (2, len(fields))
+        for row, normalized_row, denormalized_row in zip(rows, normalized, table.denormalize(normalized)):
+            for field, value, normalized_value, denormalized_value in zip(fields, row, normalized_row, denormalized_row):
+                if field is None:
+                    assert normalized_value == value and denormalized_value == value
+                elif isinstance(field, int):
+                    assert normalized_value == np.round(value, field) and denormalized_value == round(normalized_value.item(), field)
+                else:
+                    assert normalized_value == normalize_with_config(value, field), field
+                    assert denormalized_value == denormalize_with_config(normalized_value, field), field
+                    assert type(denormalized_value) is type(denormalize_with_config(normalized_value, field)), field
+
+        with self.assertRaises(ValueError):
+            table.normalize([[-1.0, 0, 0, 0, 0, 0]])
+        with self.assertRaises(ValueError):
+            NormalizationTable(NORMALIZATION_CONFIG, ['uptime'])
+
     # TODO: Add meaningful tests of observation.
 
 
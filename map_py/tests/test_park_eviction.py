@@ -0,0 +1,127 @@
+"""Tests for evicting parks from the memory of the server. Starts its own servers on ports 3314 to 3317."""
+import asyncio
+import os
+import tempfile
+import unittest
+from map_py.mini_amusement_park import MiniAmusementPark
+from map_py.async_mini_amusement_park import AsyncMiniAmusementPark
+from map_py.helpers import ParkEvictedError
+from map_py.server_pool import ServerPool
+
+HOST = 'localhost'
+PORT = '3000'
+
+ACTIONS = [
+    "place(x=1, y=5, type='ride', subtype='carousel', subclass='yellow', price=2)",
+    "place(type='staff', subtype='janitor', subclass='blue', x=0, y=1)",
+    "wait()",
+    "wait()",
+]
+
+def make_park(port):
+    return MiniAmusementPark(host=HOST, port=port, layout='diagonal_squares', observation_type='raw', seed=3)
+
+def step(map, action):
+    raw, reward, _, _, info = map.step(action)
+    raw['state'].pop('parkId')
+    return raw, reward, info
+
+class TestParkEviction(unittest.TestCase):
+    def test_restores_evicted_parks(self):
+        """Check parks evicted to disk continue like parks that were never evicted."""
+        with make_park(PORT) as map:
+            map.reset()
+            expected = [step(map, action)[:2] for action in ACTIONS]
+
+        for server_args in [[], ["--workers", "2"]]:
+            with tempfile.TemporaryDirectory() as directory, \
+                    ServerPool(num_workers=1, base_port=3314, server_args=["--max-parks", "1", "--evict-dir", directory, *server_args]) as pool:
+                map = make_park(pool.ports[0])
+                map.reset()
+                trajectory = []
+                for i, action in enumerate(ACTIONS):
+                    # Creating two parks evicts this park, also if each park worker holds one of them
+                    others = [make_park(pool.ports[0]) for _ in range(2)]
+                    raw, reward, info = step(map, action)
+                    assert info.get('park_status') == 'restored', (server_args, i, info)
+                    trajectory.append((raw, reward))
+                    for other in others:
+                        other.delete_park()
+                assert trajectory == expected, server_args
+                map.delete_park()
+
+    def test_reset_replaces_deleted_park(self):
+        """Check parks evicted without a spill directory are reported and replaced on reset."""
+        with ServerPool(num_workers=1, base_port=3315, server_args=["--max-parks", "1"]) as pool:
+            map = make_park(pool.ports[0])
+            map.reset()
+            park_id = map.park_id
+            other = make_park(pool.ports[0])
+            with self.assertRaisesRegex(RuntimeError, "evicted"):
+                map.step("wait()")
+
+            _, info = map.reset()
+            assert info['park_status'] == 'evicted'
+            assert map.park_id != park_id
+            _, _, _, _, info = map.step("wait()")
+            assert 'error' not in info and 'park_status' not in info
+            map.delete_park()
+            other.delete_park()
+
+    def test_step_evicted_park(self):
+        """Check stepping a park that was evicted without a spill directory raises ParkEvictedError with its status."""
+        async def step_async(port, park_id):
+            park = AsyncMiniAmusementPark(host=HOST, port=port, park_id=park_id, observation_type='raw')
+            try:
+                await park.step("wait()")
+            finally:
+                await park.aclose()
+
+        with ServerPool(num_workers=1, base_port=3316, server_args=["--max-parks", "1"]) as pool:
+            map = make_park(pool.ports[0])
+            map.reset()
+            other = make_park(pool.ports[0])
+            for fast_step in [True, False]:
+                map.fast_step = fast_step
+                with self.assertRaises(ParkEvictedError) as context:
+                    map.step("wait()")
+                assert context.exception.park_status == 'evicted' and context.exception.park_id == map.park_id, fast_step
+            with self.assertRaises(ParkEvictedError):
+                map.act_batch(["place(type='staff', subtype='janitor', subclass='blue', x=0, y=1)"], proceed=True)
+            with self.assertRaises(ParkEvictedError):
+                map.get_raw_state()
+            with self.assertRaises(ParkEvictedError) as context:
+                asyncio.run(step_async(pool.ports[0], map.park_id))
+            assert context.exception.park_status == 'evicted'
+            map.delete_park()
+            other.delete_park()
+
+    def test_failed_restore_keeps_park(self):
+        """Check a park whose file cannot be read back is reported as a failed restore and stays on disk."""
+        with tempfile.TemporaryDirectory() as directory, \
+                ServerPool(num_workers=1, base_port=3317, server_args=["--max-parks", "1", "--evict-dir", directory]) as pool:
+            map = make_park(pool.ports[0])
+            map.reset()
+            other = make_park(pool.ports[0])
+            file = os.path.join(directory, f"{map.park_id}.json")
+            with open(file) as f:
+                contents = f.read()
+            with open(file, "w") as f:
+                f.write(contents[:len(contents) // 2])
+
+            with self.assertRaisesRegex(RuntimeError, "Failed to restore") as context:
+                map.step("wait()")
+            assert not isinstance(context.exception, ParkEvictedError)
+            assert os.path.exists(file)
+
+            # The park is read back once its file is intact again
+            with open(file, "w") as f:
+                f.write(contents)
+            _, _, _, _, info = map.step("wait()")
+            assert info['park_status'] == 'restored' and 'error' not in info, info
+            assert not os.path.exists(file)
+            map.delete_park()
+            other.delete_park()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+"""Tests for the pool of pre-allocated parks."""
+import time
+import unittest
+from map_py.mini_amusement_park import MiniAmusementPark
+from map_py.park_pool import ParkPool
+
+HOST = 'localhost'
+PORT = '3000'
+
+class TestParkPool(unittest.TestCase):
+    def test_acquired_parks_are_reset(self):
+        """Check acquired and recycled parks are in the same state as freshly reset parks."""
+        with MiniAmusementPark(host=HOST, port=PORT, layout='diagonal_squares', observation_type='raw', seed=5) as map:
+            expected, _ = map.reset()
+            expected['state'].pop('parkId')
+
+        with ParkPool(HOST, PORT, size=2, configs=[('diagonal_squares', None)], observation_type='raw', seed=5) as pool:
+            for _ in range(4):
+                env = pool.acquire('diagonal_squares')
+                raw = env.get_raw_state()
+                raw['state'].pop('parkId')
+                assert raw == expected
+                env.step("place(x=1, y=5, type='ride', subtype='carousel', subclass='yellow', price=2)")
+                pool.release(env)
+
+    def test_parks_are_recycled(self):
+        """Check released parks are handed out again instead of creating new ones."""
+        with ParkPool(HOST, PORT, size=1, configs=[('diagonal_squares', 'easy')]) as pool:
+            env = pool.acquire('diagonal_squares', 'easy')
+            park_id = env.park_id
+            pool.release(env)
+            # Wait for the background reset of the released park
+            deadline = time.time() + 10
+            while pool._pending.get(('diagonal_squares', 'easy'), 0) > 0 and time.time() < deadline:
+                time.sleep(0.01)
+            assert pool.acquire('diagonal_squares', 'easy').park_id == park_id
+
+    def test_release_unknown_park(self):
+        """Check parks that do not belong to the pool are rejected."""
+        with ParkPool(HOST, PORT, size=0) as pool:
+            with MiniAmusementPark(host=HOST, port=PORT) as map:
+                with self.assertRaises(ValueError):
+                    pool.release(map)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+"""Tests for running parks on worker threads of the server. Starts its own server on port 3313."""
+import unittest
+from map_py.mini_amusement_park import MiniAmusementPark
+from map_py.mini_amusement_park_vec_env import MiniAmusementParkVecEnv
+from map_py.server_pool import ServerPool
+
+HOST = 'localhost'
+PORT = '3000'
+
+ACTIONS = [
+    "place(x=1, y=5, type='ride', subtype='carousel', subclass='yellow', price=2)",
+    "place(type='staff', subtype='janitor', subclass='blue', x=0, y=1)",
+    "survey_guests(num_guests=5)",
+    "wait()",
+]
+
+def run_episode(port):
+    trajectory = []
+    with MiniAmusementPark(host=HOST, port=port, layout='diagonal_squares', observation_type='raw', seed=3,
+                           cache_observations=True) as map:
+        map.reset()
+        for action in ACTIONS:
+            raw, reward, _, _, info = map.step(action)
+            raw['state'].pop('parkId')
+            trajectory.append((raw, reward, info.get('error')))
+        forks = map.fork(2)
+        trajectory.append([fork.rollout(["wait()"] * 2) for fork in forks])
+        # Not modified since the last observation
+        trajectory.append(map.get_raw_state() is map.get_raw_state())
+    return trajectory
+
+class TestParkWorkers(unittest.TestCase):
+    def test_matches_main_thread(self):
+        """Check parks on worker threads behave like parks on the main thread."""
+        with ServerPool(num_workers=1, base_port=3313, server_args=["--workers", "2"]) as pool:
+            assert run_episode(pool.ports[0]) == run_episode(PORT)
+
+            # A batch holding parks of both workers
+            vec_env = MiniAmusementParkVecEnv(host=HOST, port=pool.ports[0], num_envs=4, layout='diagonal_squares', seed=7)
+            obs, _ = vec_env.reset()
+            obs, rewards, _, _, _ = vec_env.step(vec_env.action_space.sample())
+            assert rewards.shape == (4,)
+            vec_env.close()
+
+            # Requests for unknown parks are answered by the main thread
+            with self.assertRaises(RuntimeError):
+                MiniAmusementPark(host=HOST, port=pool.ports[0], park_id='unknown', observation_type='raw').get_raw_state()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -47,6 +47,49 @@ class TestThemeParkSemanticErrors(unittest.TestCase):
 
         test_state_equality_after_reset(ori_state.model_dump(), reset_state.model_dump())
 
+    def test_restore_checkpoint(self) -> None:
+        map = MiniAmusementPark(host=HOST, port=PORT, layout='old_layout', observation_type='raw', seed=1)
+        map.reset()
+        map.step('place(type="staff", subtype="janitor", subclass="red", x=1,y=1)')
+        checkpoint_id = map.checkpoint()
+        ori_state = copy.deepcopy(map.get_raw_state())
+
+        map.step('wait()')
+        map.step('wait()')
+        assert map.get_raw_state() != ori_state
+        restored_state, _ = map.restore(checkpoint_id)
+        assert restored_state == ori_state
+
+        with self.assertRaises(RuntimeError):
+            map.restore('unknown')
+
+    def test_random_reset_uses_checkpoint(self) -> None:
+        map = MiniAmusementPark(host=HOST, port=PORT, observation_type='raw', seed=1, new_seed_on_reset=False)
+        first_state, _ = map.reset()
+        first_state = copy.deepcopy(first_state)
+        assert map.reset_checkpoint is not None
+
+        map.step('wait()')
+        reset_state, _ = map.reset()
+        assert reset_state == first_state
+
+    def test_hard_reset_deletes_old_checkpoint(self) -> None:
+        """Check a hard reset replaces the start state checkpoint instead of keeping the old one on the server."""
+        map = MiniAmusementPark(host=HOST, port=PORT, observation_type='raw', seed=1, new_seed_on_reset=False)
+        map.reset()
+        old_checkpoint = map.reset_checkpoint
+
+        map.reset(options={'hard_reset': True})
+        assert map.reset_checkpoint != old_checkpoint
+        with self.assertRaises(RuntimeError):
+            map.restore(old_checkpoint)
+
+        checkpoint_id = map.checkpoint()
+        map.delete_checkpoint(checkpoint_id)
+        with self.assertRaises(RuntimeError):
+            map.delete_checkpoint(checkpoint_id)
+        map.delete_park()
+
 
     # ====================================================
     
@@ -0,0 +1,37 @@
+"""Tests for ServerPool. Starts its own servers on ports 3310 and 3311."""
+import time
+import unittest
+from map_py.server_pool import ServerPool
+
+class TestServerPool(unittest.TestCase):
+    def test_parks_on_workers(self):
+        with ServerPool(num_workers=2, base_port=3310) as pool:
+            assert pool.healthy() == [True, True]
+            assert pool.port_for("some park") == pool.port_for("some park")
+            assert {pool.worker_for(f"park {i}") for i in range(20)} == {0, 1}
+
+            keys = [key for key in map(str, range(20)) if pool.worker_for(key) == 1][:1] + \
+                   [key for key in map(str, range(20)) if pool.worker_for(key) == 0][:1]
+            envs = [pool.make_env(key, layout='diagonal_squares', observation_type='raw') for key in keys]
+            assert [env.port for env in envs] == ['3311', '3310']
+            for env in envs:
+                env.reset()
+                _, _, _, _, info = env.step("wait()")
+                assert 'error' not in info
+                env.shutdown()
+
+    def test_restarts_crashed_worker(self):
+        with ServerPool(num_workers=2, base_port=3310, monitor_interval=0.1) as pool:
+            pool._processes[0].kill()
+            deadline = time.monotonic() + 10
+            while pool.restarts[0] == 0 or not all(pool.healthy()):
+                assert time.monotonic() < deadline, "Worker was not restarted"
+                time.sleep(0.1)
+            assert pool.restarts == [1, 0]
+
+            env = pool.make_env("0", layout='diagonal_squares', observation_type='raw')
+            env.reset()
+            env.shutdown()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+"""Tests for incremental park states."""
+import copy
+import unittest
+from map_py.mini_amusement_park import MiniAmusementPark
+from map_py.state_delta import apply_state_delta
+
+HOST = 'localhost'
+PORT = '3000'
+
+ACTIONS = [
+    "set_research(research_speed='fast', research_topics=['carousel'])",
+    "place(x=1, y=5, type='ride', subtype='carousel', subclass='yellow', price=2)",
+    "place(type='staff', subtype='janitor', subclass='blue', x=0, y=1)",
+    "survey_guests(num_guests=5)",
+    "modify(x=1, y=5, type='ride', price=3)",
+    "wait()",
+    "remove(x=1, y=5, type='ride')",
+    "wait()",
+]
+
+def run_episode(**kwargs):
+    trajectory = []
+    with MiniAmusementPark(host=HOST, port=PORT, layout='diagonal_squares', observation_type='raw', seed=3,
+                           return_detailed_guest_info=True, **kwargs) as map:
+        raw, _ = map.reset()
+        trajectory.append(copy.deepcopy(raw))
+        for action in ACTIONS:
+            raw, reward, _, _, _ = map.step(action)
+            trajectory.append((copy.deepcopy(raw), reward))
+            trajectory.append(copy.deepcopy(map.get_raw_state()))
+        map.sandbox_action("undo_day()")
+        trajectory.append(copy.deepcopy(map.get_raw_state()))
+        raw, _ = map.reset()
+        trajectory.append(copy.deepcopy(raw))
+    for state in trajectory:
+        raw = state[0] if isinstance(state, tuple) else state
+        raw['state'].pop('parkId')
+    return trajectory
+
+class TestStateDelta(unittest.TestCase):
+    def test_matches_full_states(self):
+        """Check states rebuilt from deltas are identical to full states."""
+        full_trajectory = run_episode(state_deltas=False)
+        delta_trajectory = run_episode(state_deltas=True)
+        assert full_trajectory == delta_trajectory
+
+    def test_apply_does_not_modify_previous_state(self):
+        """Check deltas that reorder entities are applied without modifying the previous state."""
+        previous = {'step': 1, 'rides': [{'x': 1, 'y': 2, 'price': 3}, {'x': 4, 'y': 5, 'price': 6}]}
+        expected = {'step': 2, 'rides': [{'x': 7, 'y': 8, 'price': 9}, {'x': 1, 'y': 2, 'price': 4}]}
+        delta = {'o': {'step': 2, 'rides': {'k': {'7,8': {'r': {'x': 7, 'y': 8, 'price': 9}},
+                                                  '1,2': {'o': {'price': 4}}},
+                                            'order': ['7,8', '1,2']}}}
+        snapshot = copy.deepcopy(previous)
+        assert apply_state_delta(previous, delta) == expected
+        assert previous == snapshot
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,7 +4,8 @@
 have a better home yet.
 """
 import unittest
-from map_py.mini_amusement_park import MiniAmusementPark, FullParkObs 
+from map_py.mini_amusement_park import MiniAmusementPark, FullParkObs, WAIT_IN_BATCH_MESSAGE
+from map_py.helpers import post_endpoint, EndpointNotFoundError
 from map_py.tests.states import COMPLEX_ENV4_STATE, EMPTY_ENV4_STATE
 from map_py.tests.test_pathing import is_occupied
 import copy 
@@ -329,6 +330,222 @@ class TestThemeParkSemanticErrors(unittest.TestCase):
                 matches = [s for s in obs.staff.staff_list if s.x == x and s.y == y and s.subtype == staff_type]
                 assert len(matches) == 0
 
+    def test_fast_step_matches_multi_request_step(self):
+        """Check the single request park/step path produces the same trajectory as separate requests."""
+        actions = [
+            "place(x=1, y=5, type='ride', subtype='carousel', subclass='yellow', price=2)",
+            "modify(x=1, y=5, type='ride', price=3)",
+            "move(x=1, y=5, type='ride', subtype='carousel', subclass='yellow', new_x=1, new_y=3)",
+            "place(x=2, y=6, type='shop', subtype='drink', subclass='yellow', price=3, order_quantity=50)",
+            "survey_guests(num_guests=5)",
+            "remove(x=1, y=3, type='ride', subtype='carousel', subclass='yellow')",
+            "not an action(",
+            "wait()",
+        ]
+        trajectories = []
+        for fast_step in [True, False]:
+            map = MiniAmusementPark(host=HOST, port=PORT, layout='diagonal_squares', observation_type='raw', seed=3, fast_step=fast_step)
+            _, info = map.reset()
+            assert 'error' not in info, info
+
+            trajectory = []
+            for action in actions:
+                raw, reward, terminated, truncated, info = map.step(action)
+                raw['state'].pop('parkId')
+                trajectory.append((raw, reward, terminated, truncated, info.get('error')))
+            assert map.fast_step == fast_step
+            trajectories.append(trajectory)
+            map.delete_park()
+
+        for fast_entry, multi_entry in zip(*trajectories):
+            assert fast_entry == multi_entry, (fast_entry[1:], multi_entry[1:])
+
+    def test_corrupt_response_keeps_fast_step(self):
+        """Check a corrupt park/step response is raised instead of being taken for a missing endpoint."""
+        with self.assertRaises(EndpointNotFoundError):
+            post_endpoint(HOST, PORT, "park/no_such_endpoint", {})
+
+        map = MiniAmusementPark(host=HOST, port=PORT, layout='diagonal_squares', observation_type='raw', seed=3)
+        map.reset()
+        post = map.session.post
+        def truncated_post(url, *args, **kwargs):
+            response = post(url, *args, **kwargs)
+            if url.endswith("park/step"):
+                response._content = response.content[:10]
+            return response
+        map.session.post = truncated_post
+        try:
+            with self.assertRaises(ValueError) as context:
+                map.step("wait()")
+            assert not isinstance(context.exception, EndpointNotFoundError)
+        finally:
+            del map.session.post
+        assert map.fast_step
+        raw, _, _, _, info = map.step("wait()")
+        assert 'error' not in info and raw['state']['step'] == 2
+        map.delete_park()
+
+    def test_rollout_matches_step(self):
+        """Check a rollout returns the rewards that stepping through the same actions would."""
+        actions = [
+            "place(x=1, y=5, type='ride', subtype='carousel', subclass='yellow', price=2)",
+            "not an action(",
+            "place(type='staff', subtype='janitor', subclass='blue', x=0, y=1)",
+            "wait()",
+            "wait()",
+        ]
+        map = MiniAmusementPark(host=HOST, port=PORT, layout='diagonal_squares', observation_type='raw', seed=3)
+        map.reset()
+        start_state = copy.deepcopy(map.get_raw_state())
+
+        rollout = map.rollout(actions)
+        assert map.get_raw_state() == start_state
+        assert rollout['valid'] == [True, False, True, True, True]
+        assert 'state' not in rollout and 'error' not in rollout
+
+        # Rolling out without restoring leaves the park where stepping would
+        in_place = map.rollout(actions, restore=False, return_state=True)
+        end_state = copy.deepcopy(map.get_raw_state())
+        assert end_state == in_place['state']
+        assert in_place['rewards'] == rollout['rewards']
+        map.delete_park()
+
+        map = MiniAmusementPark(host=HOST, port=PORT, layout='diagonal_squares', observation_type='raw', seed=3)
+        map.reset()
+        rewards = []
+        for action in actions:
+            raw, reward, _, _, _ = map.step(action)
+            rewards.append(reward)
+        assert rewards == rollout['rewards']
+        assert raw['state']['value'] == rollout['value']
+        map.delete_park()
+
+    def test_empty_rollout(self):
+        """Check a rollout without actions is rejected, on the server and in the step() fallback."""
+        map = MiniAmusementPark(host=HOST, port=PORT, layout='diagonal_squares', observation_type='raw', seed=3)
+        start_state, _ = map.reset()
+        with self.assertRaises(RuntimeError):
+            map.rollout([])
+        for restore in [True, False]:
+            with self.assertRaises(RuntimeError):
+                map._rollout_with_steps([], restore, return_state=True)
+        assert map.get_raw_state() == start_state
+        map.delete_park()
+
+    def test_training_mode_matches_normal(self):
+        """Check a park in training mode steps like a park that keeps its history."""
+        actions = [
+            "place(x=1, y=5, type='ride', subtype='carousel', subclass='yellow', price=2)",
+            "not an action(",
+            "place(type='staff', subtype='janitor', subclass='blue', x=0, y=1)",
+            "survey_guests(num_guests=5)",
+            "wait()",
+        ]
+        trajectories = []
+        for training_mode in [False, True]:
+            # Without fast_step, actions and states are separate requests
+            map = MiniAmusementPark(host=HOST, port=PORT, layout='diagonal_squares', observation_type='raw', seed=3,
+                                    fast_step=False, training_mode=training_mode)
+            assert map.training_mode == training_mode
+            map.reset()
+            trajectory = []
+            for action in actions:
+                raw, reward, _, _, info = map.step(action)
+                raw['state'].pop('parkId')
+                trajectory.append((raw, reward, info.get('error')))
+            trajectory.append(map.rollout(["wait()"] * 2))
+            trajectories.append(trajectory)
+            map.delete_park()
+        assert trajectories[0] == trajectories[1]
+
+    def test_wait_days_matches_single_waits(self):
+        """Check wait(days=n) ends where n wait() steps would and stops once the episode is over."""
+        place = "place(x=1, y=5, type='ride', subtype='carousel', subclass='yellow', price=2)"
+        map = MiniAmusementPark(host=HOST, port=PORT, layout='diagonal_squares', observation_type='raw', seed=3)
+        map.reset()
+        map.step(place)
+        rewards = []
+        for _ in range(4):
+            raw, reward, _, _, info = map.step("wait()")
+            assert info['daily_rewards'] == [reward]
+            rewards.append(reward)
+        raw['state'].pop('parkId')
+        map.delete_park()
+
+        for fast_step in [True, False]:
+            map = MiniAmusementPark(host=HOST, port=PORT, layout='diagonal_squares', observation_type='raw', seed=3, fast_step=fast_step)
+            map.reset()
+            map.step(place)
+            fast_forward, reward, terminated, truncated, info = map.step("wait(days=4)")
+            fast_forward['state'].pop('parkId')
+            assert fast_forward == raw, fast_step
+            assert info['daily_rewards'] == rewards and reward == sum(rewards), (fast_step, info, rewards)
+            assert not terminated and not truncated
+
+            _, _, _, _, info = map.step("wait(days=0)")
+            assert info['error']['type'] == 'invalid_action'
+
+            horizon = fast_forward['state']['horizon']
+            _, reward, terminated, _, info = map.step(f"wait(days={horizon + 10})")
+            assert terminated and 'error' not in info, info
+            assert len(info['daily_rewards']) < horizon and reward == sum(info['daily_rewards'])
+            map.delete_park()
+
+    def test_act_batch(self):
+        """Check a batch of actions matches applying them one request at a time, and atomic batches fail as a whole."""
+        actions = [
+            "place(x=1, y=5, type='ride', subtype='carousel', subclass='yellow', price=2)",
+            "place(x=1, y=5, type='shop', subtype='drink', subclass='yellow', price=3, order_quantity=50)",
+            "not an action(",
+            "place(type='staff', subtype='janitor', subclass='blue', x=0, y=1)",
+        ]
+        trajectories = []
+        for batched in [True, False]:
+            map = MiniAmusementPark(host=HOST, port=PORT, layout='diagonal_squares', observation_type='raw', seed=3)
+            map.reset()
+            act_batch = map.act_batch if batched else map._act_batch_with_requests
+            raw, reward, terminated, truncated, info = act_batch(actions, proceed=True)
+            raw['state'].pop('parkId')
+            assert [result['success'] for result in info['action_results']] == [True, False, False, True]
+            trajectories.append((raw, reward, terminated, truncated, info['error']['type']))
+            map.delete_park()
+        assert trajectories[0] == trajectories[1]
+
+        map = MiniAmusementPark(host=HOST, port=PORT, layout='diagonal_squares', observation_type='raw', seed=3)
+        map.reset()
+        _, reward, _, _, info = map.act_batch(actions, atomic=True, proceed=True)
+        assert not info['applied'] and reward == 0
+        assert [result['success'] for result in info['action_results']] == [True, False, False, False]
+        raw, _, _, _, _ = map.step("wait()")
+        assert len(raw['rides']) == 0 and len(raw['staff']) == 0 and raw['state']['step'] == 1
+
+        # Like observe(), the state is the one at the end of the last day
+        _, _, _, _, info = map.act_batch([actions[0], actions[3]], atomic=True)
+        assert info['applied'] and 'error' not in info, info
+        raw, _, _, _, _ = map.step("wait()")
+        assert len(raw['rides']) == 1 and len(raw['staff']) == 1 and raw['state']['step'] == 2
+        map.delete_park()
+
+    def test_act_batch_rejects_wait(self):
+        """Check wait actions fail inside an action batch instead of silently doing nothing."""
+        actions = ["place(type='staff', subtype='janitor', subclass='blue', x=0, y=1)", "wait(days=5)"]
+        for batched in [True, False]:
+            map = MiniAmusementPark(host=HOST, port=PORT, layout='diagonal_squares', observation_type='raw', seed=3)
+            map.reset()
+            act_batch = map.act_batch if batched else map._act_batch_with_requests
+            raw, _, _, _, info = act_batch(actions, proceed=True)
+            assert info['action_results'][1] == {'success': False, 'message': WAIT_IN_BATCH_MESSAGE}, info
+            assert info['action_results'][0]['success'] and info['error']['message'] == WAIT_IN_BATCH_MESSAGE
+            # Only the day of proceed is run
+            assert raw['state']['step'] == 1 and len(raw['staff']) == 1
+            map.delete_park()
+
+        map = MiniAmusementPark(host=HOST, port=PORT, layout='diagonal_squares', observation_type='raw', seed=3)
+        map.reset()
+        raw, reward, _, _, info = map.act_batch(actions, atomic=True, proceed=True)
+        assert not info['applied'] and reward == 0 and raw['state']['step'] == 0 and len(raw['staff']) == 0
+        map.delete_park()
+
     # TODO: Attempt to construct on top of the entrance or exit.
 
 if __name__ == "__main__":
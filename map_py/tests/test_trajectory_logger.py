@@ -0,0 +1,43 @@
+"""Tests for trajectories longer than the part the server keeps in memory."""
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from map_py.helpers import post_endpoint
+from map_py.mini_amusement_park import MiniAmusementPark
+
+HOST = 'localhost'
+PORT = '3000'
+
+NUM_DAYS = 20
+
+class TestTrajectoryLogger(unittest.TestCase):
+    def test_spilled_trajectory(self):
+        """Check saving a trajectory reads back the days the server spilled to disk."""
+        with MiniAmusementPark(host=HOST, port=PORT, layout='diagonal_squares', observation_type='raw', seed=3) as map:
+            map.reset()
+            map.step("place(x=1, y=5, type='ride', subtype='carousel', subclass='yellow', price=2)")
+            for _ in range(NUM_DAYS - 1):
+                raw, _, _, _, _ = map.step("wait()")
+            last_day = (raw['state']['step'], raw['state']['money'])
+
+            with tempfile.TemporaryDirectory() as directory:
+                result = map.save_trajectory(save_local=True, save_path=str(Path(directory) / "trajectory.tsv"))
+                with open(result['results']['localPath']) as f:
+                    rows = [line.split("\t") for line in f.read().strip().split("\n")]
+            header, rows = rows[0], rows[1:]
+            end_states = [json.loads(row[header.index('end_state')]) for row in rows]
+            assert [int(row[header.index('step')]) for row in rows] == list(range(NUM_DAYS + 1))
+            assert [state['state']['step'] for state in end_states] == list(range(NUM_DAYS + 1))
+            assert rows[1][header.index('action')].startswith("place(")
+            assert (end_states[-1]['state']['step'], end_states[-1]['state']['money']) == last_day
+
+            result = post_endpoint(HOST, PORT, "park/set_sandbox_mode", {'parkId': map.park_id, 'sandbox_steps': 10}, map.session)
+            assert not result.error
+            _, info = map.sandbox_action("undo_day()")
+            assert 'error' not in info, info
+            state = map.get_raw_state()['state']
+            assert (state['step'], state['money']) == (end_states[-2]['state']['step'], end_states[-2]['state']['money'])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+"""Tests that every transport returns the same results as HTTP."""
+import os
+import socket
+import tempfile
+import threading
+import unittest
+import requests
+from map_py.mini_amusement_park import MiniAmusementPark
+from map_py import helpers
+
+HOST = 'localhost'
+PORT = '3000'
+
+ACTIONS = [
+    "place(x=1, y=5, type='ride', subtype='carousel', subclass='yellow', price=2)",
+    "place(x=2, y=6, type='shop', subtype='drink', subclass='yellow', price=3, order_quantity=50)",
+    "modify(x=1, y=5, type='ride', price=3)",
+    "not an action(",
+    "wait()",
+]
+
+def run_episode(**kwargs):
+    trajectory = []
+    with MiniAmusementPark(layout='diagonal_squares', observation_type='raw', seed=11, **kwargs) as map:
+        raw, info = map.reset()
+        raw['state'].pop('parkId')
+        trajectory.append((raw, info))
+        for action in ACTIONS:
+            raw, reward, terminated, truncated, info = map.step(action)
+            raw['state'].pop('parkId')
+            trajectory.append((raw, reward, terminated, truncated, info))
+        _, info = map.sandbox_action("undo_day()")
+        trajectory.append(info)
+    return trajectory
+
+class TestTransports(unittest.TestCase):
+    def test_websocket_matches_http(self):
+        """Check the socket.io transport returns the same values as HTTP."""
+        http_trajectory = run_episode(host=HOST, port=PORT, transport='http')
+        websocket_trajectory = run_episode(host=HOST, port=PORT, transport='websocket')
+        assert http_trajectory == websocket_trajectory
+
+    def test_pipe_matches_http(self):
+        """Check a park engine spawned behind stdin/stdout returns the same values as HTTP."""
+        http_trajectory = run_episode(host=HOST, port=PORT, transport='http')
+        pipe_trajectory = run_episode(host=HOST, port=PORT, transport='pipe')
+        assert http_trajectory == pipe_trajectory
+
+    def test_uds_matches_http(self):
+        """Check a park engine behind a Unix socket returns the same values as HTTP."""
+        http_trajectory = run_episode(host=HOST, port=PORT, transport='http')
+        uds_trajectory = run_episode(host=HOST, port=PORT, transport='uds')
+        assert http_trajectory == uds_trajectory
+
+    def test_spawned_engine_outside_repository(self):
+        """Check pipe and Unix socket engines start when Python runs outside the repository root."""
+        http_trajectory = run_episode(host=HOST, port=PORT, transport='http')
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as other_dir:
+            os.chdir(other_dir)
+            try:
+                for transport in ['pipe', 'uds']:
+                    assert run_episode(host=HOST, port=PORT, transport=transport) == http_trajectory, transport
+            finally:
+                os.chdir(cwd)
+
+    @unittest.skipIf(helpers.msgpack is None, "msgpack is not installed")
+    def test_msgpack_matches_json(self):
+        """Check msgpack responses decode to the same values as JSON responses."""
+        json_trajectory = run_episode(host=HOST, port=PORT, wire_format='json', return_detailed_guest_info=True)
+        msgpack_trajectory = run_episode(host=HOST, port=PORT, wire_format='msgpack', return_detailed_guest_info=True)
+        assert json_trajectory == msgpack_trajectory
+
+    def test_http_session_retries_and_latency(self):
+        """Check requests to a stalled server time out, only idempotent GET requests are retried, and latencies are recorded."""
+        with socket.socket() as server:
+            server.bind(("localhost", 0))
+            server.listen()
+            connections = []
+            def accept():
+                # Accept connections without ever responding
+                while True:
+                    try:
+                        connections.append(server.accept()[0])
+                    except OSError:
+                        return
+            threading.Thread(target=accept, daemon=True).start()
+            port = server.getsockname()[1]
+
+            session = helpers.HttpSession(max_retries=2, backoff=0, read_timeouts={"GET": 0.2, "POST": 0.2})
+            with self.assertRaises(requests.RequestException):
+                helpers.get_endpoint(HOST, port, "park/", {}, session)
+            num_get_connections = len(connections)
+            with self.assertRaises(requests.RequestException):
+                helpers.post_endpoint(HOST, port, "park/step", {}, session)
+            assert num_get_connections == 3 and len(connections) == 4, (num_get_connections, len(connections))
+            # Retrying could create a second park
+            with self.assertRaises(requests.RequestException):
+                helpers.get_endpoint(HOST, port, "park/get_new_park_id", {}, session)
+            assert len(connections) == 5, len(connections)
+            stats = session.latency.summary()
+            assert stats["GET park/"]["errors"] == 1 and stats["POST park/step"]["errors"] == 1, stats
+            for connection in connections:
+                connection.close()
+
+        with MiniAmusementPark(host=HOST, port=PORT, layout='diagonal_squares', observation_type='raw', seed=11) as map:
+            map.reset()
+            for _ in range(3):
+                map.step("wait()")
+            stats = map.latency_stats()
+        assert stats["POST park/step"]["count"] == 3 and stats["POST park/step"]["errors"] == 0, stats
+        assert 0 < stats["POST park/step"]["p50_ms"] <= stats["POST park/step"]["max_ms"]
+
+    def test_invalid_transport(self):
+        """Check an unknown transport is rejected."""
+        with self.assertRaises(ValueError):
+            MiniAmusementPark(host=HOST, port=PORT, transport='carrier_pigeon')
+        with self.assertRaises(ValueError):
+            MiniAmusementPark(host=HOST, port=PORT, wire_format='xml')
+
+if __name__ == "__main__":
+    unittest.main()
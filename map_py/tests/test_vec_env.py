@@ -0,0 +1,52 @@
+"""Tests for the vectorized MiniAmusementPark environment."""
+import unittest
+import numpy as np
+from map_py.mini_amusement_park import MiniAmusementPark
+from map_py.mini_amusement_park_vec_env import MiniAmusementParkVecEnv
+
+HOST = 'localhost'
+PORT = '3000'
+
+class TestVecEnv(unittest.TestCase):
+    def test_matches_individual_parks(self):
+        """Check batched steps produce the same observations and rewards as stepping each park."""
+        num_envs = 3
+        vec_env = MiniAmusementParkVecEnv(host=HOST, port=PORT, num_envs=num_envs, layout='diagonal_squares', seed=7)
+        envs = [MiniAmusementPark(host=HOST, port=PORT, observation_type='gym', layout='diagonal_squares', seed=7 + i, verbose=False)
+                for i in range(num_envs)]
+
+        vec_obs, vec_info = vec_env.reset()
+        assert vec_env.observation_space.contains(vec_obs)
+        for i, env in enumerate(envs):
+            obs, info = env.reset()
+            for key in obs:
+                assert np.array_equal(vec_obs[key][i], obs[key]), key
+
+        vec_env.action_space.seed(0)
+        for _ in range(5):
+            actions = vec_env.action_space.sample()
+            vec_obs, rewards, terminations, truncations, vec_info = vec_env.step(actions)
+            assert rewards.shape == (num_envs,)
+            for i, env in enumerate(envs):
+                obs, reward, terminated, truncated, info = env.step(actions[i])
+                assert reward == rewards[i]
+                assert terminated == terminations[i] and truncated == truncations[i]
+                assert ('error' in info) == ('error' in vec_info and vec_info['_error'][i])
+                for key in obs:
+                    assert np.array_equal(vec_obs[key][i], obs[key]), key
+
+        vec_env.close()
+        for env in envs:
+            env.delete_park()
+
+    def test_string_actions(self):
+        """Check a list of action strings can be stepped."""
+        vec_env = MiniAmusementParkVecEnv(host=HOST, port=PORT, num_envs=2, layout='diagonal_squares')
+        vec_env.reset()
+        _, rewards, _, _, info = vec_env.step(["wait()", "not an action("])
+        assert rewards.shape == (2,)
+        assert list(info['_error']) == [False, True]
+        vec_env.close()
+
+if __name__ == "__main__":
+    unittest.main()
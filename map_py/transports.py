@@ -0,0 +1,300 @@
+"""Transports that carry requests from the python interface to the park server.
+
+The helpers in map_py.helpers send every request through a session object. Besides
+map_py.helpers.HttpSession (HTTP), the sessions in this module send the same requests as messages
+over a persistent connection, which the server routes through the same endpoints.
+The "pipe" and "uds" transports talk to a park engine (map_backend/engine.js) on the
+same machine instead of the park server.
+"""
+
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+import itertools
+import json
+import os
+import shutil
+import socket
+import struct
+import subprocess
+import tempfile
+import threading
+import time
+from map_py.helpers import accept_header, HttpSession, LatencyStats
+
+TRANSPORTS = ["http", "websocket", "uds", "pipe"]
+
+# socket.io namespace served by map_backend/server.js for RPC requests
+RPC_NAMESPACE = "/rpc"
+
+ENGINE_PATH = Path(__file__).resolve().parent.parent / "map_backend" / "engine.js"
+
+# Engine messages are prefixed with their length as a 4 byte big-endian unsigned integer
+FRAME_HEADER = struct.Struct(">I")
+
+
+class RpcResponse:
+    """Response to an RPC request with the attributes of requests.Response used by the helpers."""
+
+    def __init__(self, status_code: int, payload: dict, url: str, headers: Optional[dict] = None):
+        self.status_code = status_code
+        self.url = url
+        self.headers = headers or {}
+        self._payload = payload
+
+    def json(self) -> dict:
+        return self._payload
+
+    def __repr__(self) -> str:
+        return f"<RpcResponse [{self.status_code}]>"
+
+
+class RpcSession:
+    """Base class for sessions that send requests as messages with request ids over a persistent connection.
+
+    Implements the subset of the requests.Session interface used by map_py.helpers.
+    Subclasses implement _send.
+    """
+
+    def __init__(self):
+        self._request_ids = itertools.count()
+        self._lock = threading.Lock()
+        self.latency = LatencyStats()
+
+    def get(self, url: str, params: Optional[dict] = None, headers: Optional[dict] = None) -> RpcResponse:
+        return self.request("get", url, params=params, headers=headers)
+
+    def post(self, url: str, json: Optional[dict] = None) -> RpcResponse:
+        return self.request("post", url, json=json)
+
+    def put(self, url: str, json: Optional[dict] = None) -> RpcResponse:
+        return self.request("put", url, json=json)
+
+    def request(self, method: str, url: str, json: Optional[dict] = None, params: Optional[dict] = None,
+                headers: Optional[dict] = None) -> RpcResponse:
+        """Send a request and wait for its response.
+
+        Args:
+            method: The HTTP method of the endpoint (e.g. "get", "post").
+            url: The URL of the endpoint, as created by map_py.helpers.create_url.
+            json: The request body.
+            params: The query parameters.
+            headers: The request headers.
+
+        Returns:
+            The response of the server.
+
+        Raises:
+            ConnectionError: If the response does not belong to the request.
+        """
+        path = urlparse(url).path
+        # Endpoints are served relative to the v1 router
+        if path.startswith("/v1/"):
+            path = path[len("/v1"):]
+
+        start = time.perf_counter()
+        with self._lock:
+            request_id = next(self._request_ids)
+            try:
+                response = self._send({
+                    "id": request_id,
+                    "method": method.upper(),
+                    "path": path,
+                    "query": params or {},
+                    "body": json or {},
+                    "headers": headers or {},
+                })
+            except Exception:
+                self.latency.record(method, url, (time.perf_counter() - start) * 1000, error=True)
+                raise
+        self.latency.record(method, url, (time.perf_counter() - start) * 1000)
+
+        if response is None or response.get("id") != request_id:
+            raise ConnectionError(f"Expected response to request {request_id}, got {response}")
+        return RpcResponse(response["status"], response["body"], url, response.get("headers"))
+
+    def _send(self, request: dict) -> dict:
+        """Send a request message and return the matching response message."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class SocketIOSession(RpcSession):
+    """Sends requests over a single socket.io connection to the park server."""
+
+    def __init__(self, host: str, port: str, timeout: float = 600):
+        """Connect to the RPC namespace of the park server.
+
+        Args:
+            host: The host address for the park's API server.
+            port: The port number for the park's API server.
+            timeout: Seconds to wait for the response to a request.
+        """
+        import socketio
+
+        super().__init__()
+        self.timeout = timeout
+        self.sio = socketio.Client()
+        self.sio.connect(f"http://{host}:{port}", namespaces=[RPC_NAMESPACE], transports=["websocket"])
+
+    def _send(self, request: dict) -> dict:
+        return self.sio.call("rpc", request, namespace=RPC_NAMESPACE, timeout=self.timeout)
+
+    def close(self) -> None:
+        self.sio.disconnect()
+
+
+class FramedSession(RpcSession):
+    """Base class for sessions that exchange length-prefixed JSON messages with a park engine.
+
+    Subclasses implement _write and _read_exact.
+    """
+
+    def _send(self, request: dict) -> dict:
+        payload = json.dumps(request).encode("utf-8")
+        self._write(FRAME_HEADER.pack(len(payload)) + payload)
+        (length,) = FRAME_HEADER.unpack(self._read_exact(FRAME_HEADER.size))
+        return json.loads(self._read_exact(length))
+
+    def _write(self, data: bytes) -> None:
+        raise NotImplementedError
+
+    def _read_exact(self, num_bytes: int) -> bytes:
+        raise NotImplementedError
+
+
+class PipeSession(FramedSession):
+    """Sends requests to a park engine child process over its stdin and stdout.
+
+    The engine and its parks live as long as the session, so parks cannot be shared with
+    other sessions.
+    """
+
+    def __init__(self, node: str = "node"):
+        """Spawn a park engine.
+
+        Args:
+            node: The Node.js executable used to run the engine.
+        """
+        super().__init__()
+        # The engine reads ./shared/config.yaml, so it runs from the repository root
+        self.process = subprocess.Popen([node, str(ENGINE_PATH), "--stdio"], cwd=ENGINE_PATH.parent.parent,
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def _write(self, data: bytes) -> None:
+        self.process.stdin.write(data)
+        self.process.stdin.flush()
+
+    def _read_exact(self, num_bytes: int) -> bytes:
+        data = self.process.stdout.read(num_bytes)
+        if len(data) < num_bytes:
+            raise ConnectionError(f"Park engine exited with code {self.process.poll()}")
+        return data
+
+    def close(self) -> None:
+        if self.process.poll() is None:
+            self.process.stdin.close()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process.stdout.close()
+
+
+class UnixSocketSession(FramedSession):
+    """Sends requests to a park engine over a Unix domain socket.
+
+    Attaches to the engine listening on socket_path, or spawns a private engine if no path is
+    given. Parks are shared between all sessions attached to the same engine.
+    """
+
+    def __init__(self, socket_path: Optional[str] = None, node: str = "node", startup_timeout: float = 10):
+        """Connect to a park engine.
+
+        Args:
+            socket_path: Path of the socket of a running engine
+                (started with `node map_backend/engine.js --socket <path>`). If None, an engine is spawned.
+            node: The Node.js executable used to spawn the engine.
+            startup_timeout: Seconds to wait for a spawned engine to accept connections.
+
+        Raises:
+            ConnectionError: If a spawned engine does not accept connections in time.
+        """
+        super().__init__()
+        self.process = None
+        self._socket_dir = None
+        if socket_path is None:
+            self._socket_dir = tempfile.mkdtemp(prefix="map_engine_")
+            socket_path = os.path.join(self._socket_dir, "engine.sock")
+            # The engine exits once the pipe to its stdin is closed, i.e. when this process exits
+            self.process = subprocess.Popen([node, str(ENGINE_PATH), "--socket", socket_path, "--exit-with-parent"],
+                                            cwd=ENGINE_PATH.parent.parent, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL)
+        self.socket_path = socket_path
+
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            try:
+                self.sock.connect(socket_path)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                if self.process is None or self.process.poll() is not None or time.monotonic() > deadline:
+                    self.close()
+                    raise ConnectionError(f"Could not connect to a park engine at {socket_path}")
+                time.sleep(0.05)
+        self._reader = self.sock.makefile("rb")
+
+    def _write(self, data: bytes) -> None:
+        self.sock.sendall(data)
+
+    def _read_exact(self, num_bytes: int) -> bytes:
+        data = self._reader.read(num_bytes)
+        if len(data) < num_bytes:
+            raise ConnectionError(f"Park engine at {self.socket_path} closed the connection")
+        return data
+
+    def close(self) -> None:
+        if hasattr(self, "_reader"):
+            self._reader.close()
+        self.sock.close()
+        if self.process is not None and self.process.poll() is None:
+            self.process.stdin.close()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        if self._socket_dir is not None:
+            shutil.rmtree(self._socket_dir, ignore_errors=True)
+
+
+def create_session(transport: str, host: str, port: str, socket_path: Optional[str] = None, wire_format: str = "json"):
+    """Create the session used to send requests to the park server.
+
+    Args:
+        transport: One of "http", "websocket", "uds" or "pipe".
+        host: The host address for the park's API server. Unused by "uds" and "pipe".
+        port: The port number for the park's API server. Unused by "uds" and "pipe".
+        socket_path: Socket of a running park engine for "uds". If None, an engine is spawned.
+        wire_format: Encoding of HTTP response bodies, one of "json" or "msgpack".
+            Messages of the other transports are always JSON.
+
+    Returns:
+        A HttpSession for "http", otherwise an RpcSession. Both record latency histograms in session.latency.
+
+    Raises:
+        ValueError: If the transport or wire format is not supported.
+    """
+    headers = accept_header(wire_format)
+    if transport == "http":
+        session = HttpSession()
+        session.headers.update(headers)
+        return session
+    if transport == "websocket":
+        return SocketIOSession(host, port)
+    if transport == "uds":
+        return UnixSocketSession(socket_path)
+    if transport == "pipe":
+        return PipeSession()
+    raise ValueError(f"transport must be one of {TRANSPORTS}, got {transport}")
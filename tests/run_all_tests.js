@@ -3,6 +3,8 @@
 import { runAllTests as runClickHandlerTests } from './test_click_handler.js'
 import { runAllTests as runMiniAmusementParkTests } from './test_mini_amusement_park.js'
 import { runAllTests as runGameStateListenerTests } from './test_game_state_listener.js'
+import { runAllTests as runMsgpackTests } from './test_msgpack.js'
+import { runAllTests as runParkSerializationTests } from './test_park_serialization.js'
 
 async function runAllTests() {
   console.log('🧪 Running All JavaScript Tests\n')
@@ -23,6 +25,16 @@ async function runAllTests() {
     console.log('='.repeat(50))
     await runGameStateListenerTests()
     
+    console.log('\n' + '='.repeat(50))
+    console.log('Testing MessagePack encoder...')
+    console.log('='.repeat(50))
+    runMsgpackTests()
+    
+    console.log('\n' + '='.repeat(50))
+    console.log('Testing Park serialization...')
+    console.log('='.repeat(50))
+    runParkSerializationTests()
+    
     console.log('\n🎉 All test suites completed successfully!')
     
   } catch (error) {
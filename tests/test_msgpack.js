@@ -0,0 +1,139 @@
+import assert from 'node:assert/strict'
+import { spawnSync } from 'node:child_process'
+import { encodeMsgpack } from '../map_backend/node_utils/msgpack.js'
+
+// The reference decoder is the msgpack package the Python client decodes responses with
+const PYTHON = process.env.PYTHON || 'python3'
+const DECODE_SCRIPT = `
+import json, sys
+import msgpack
+values = list(msgpack.Unpacker(sys.stdin.buffer, raw=False, strict_map_key=False))
+json.dump(values, sys.stdout)
+`
+
+const range = (length) => Array.from({ length }, (_, i) => i)
+const objectOfSize = (size) => Object.fromEntries(range(size).map((i) => [`k${i}`, i]))
+
+// [description, value, expected type byte]
+const CASES = [
+  ['positive fixint min', 0, 0x00],
+  ['positive fixint max', 127, 0x7f],
+  ['uint8 min', 128, 0xcc],
+  ['uint8 max', 255, 0xcc],
+  ['uint16 min', 256, 0xcd],
+  ['uint16 max', 0xffff, 0xcd],
+  ['uint32 min', 0x10000, 0xce],
+  ['uint32 max', 0xffffffff, 0xce],
+  ['uint64 min', 0x100000000, 0xcf],
+  ['uint64 max safe', Number.MAX_SAFE_INTEGER, 0xcf],
+  ['negative fixint max', -1, 0xff],
+  ['negative fixint min', -32, 0xe0],
+  ['int8 max', -33, 0xd0],
+  ['int8 min', -128, 0xd0],
+  ['int16 max', -129, 0xd1],
+  ['int16 min', -0x8000, 0xd1],
+  ['int32 max', -0x8001, 0xd2],
+  ['int32 min', -0x80000000, 0xd2],
+  ['int64 max', -0x80000001, 0xd3],
+  ['int64 min safe', Number.MIN_SAFE_INTEGER, 0xd3],
+  ['negative zero', -0, 0x00],
+  ['float', 0.1, 0xcb],
+  ['negative float', -1.5, 0xcb],
+  ['large float', 1e300, 0xcb],
+  ['unsafe integer', Number.MAX_SAFE_INTEGER + 2, 0xcb],
+  ['NaN', NaN, 0xc0],
+  ['Infinity', -Infinity, 0xc0],
+  ['null', null, 0xc0],
+  ['undefined', undefined, 0xc0],
+  ['false', false, 0xc2],
+  ['true', true, 0xc3],
+  ['fixstr min', '', 0xa0],
+  ['fixstr max', 'a'.repeat(31), 0xbf],
+  ['str8 min', 'a'.repeat(32), 0xd9],
+  ['str8 max', 'a'.repeat(0xff), 0xd9],
+  ['str16 min', 'a'.repeat(0x100), 0xda],
+  ['str16 max', 'a'.repeat(0xffff), 0xda],
+  ['str32 min', 'a'.repeat(0x10000), 0xdb],
+  ['non-ASCII fixstr', 'café', 0xa5],
+  ['non-ASCII str8 of fewer than 32 characters', 'é'.repeat(16), 0xd9],
+  ['surrogate pairs', '🎢🎡', 0xa8],
+  ['fixarray min', [], 0x90],
+  ['fixarray max', range(15), 0x9f],
+  ['array16 min', range(16), 0xdc],
+  ['array16 max', range(0xffff), 0xdc],
+  ['array32 min', range(0x10000), 0xdd],
+  ['fixmap min', {}, 0x80],
+  ['fixmap max', objectOfSize(15), 0x8f],
+  ['map16 min', objectOfSize(16), 0xde],
+  ['map16 max', objectOfSize(0xffff), 0xde],
+  ['map32 min', objectOfSize(0x10000), 0xdf],
+  ['skipped object values', { kept: 1, undefinedValue: undefined, functionValue: () => 1, symbolValue: Symbol('s') }, 0x81],
+  ['skipped array values', [undefined, () => 1, Symbol('s')], 0x93],
+  ['toJSON', { date: new Date(0), custom: { toJSON: () => [1, 2] } }, 0x82],
+  ['repeated keys', range(3).map((i) => ({ x: i, y: -i, 'ключ': 'значение' })), 0x93],
+  ['nested', { rides: [{ x: 1, uptime: 0.5, name: null, open: true }], grid: [[0, 1], [2, 3]] }, 0x82],
+]
+
+function decodeWithReference(buffers) {
+  const result = spawnSync(PYTHON, ['-c', DECODE_SCRIPT], { input: Buffer.concat(buffers), maxBuffer: 1 << 28 })
+  if (result.error || result.status !== 0) {
+    throw new Error(`Reference decoder failed (it needs python with msgpack installed, set PYTHON to use another interpreter): ${result.error || result.stderr}`)
+  }
+  return JSON.parse(result.stdout)
+}
+
+function testEncodingBoundaries() {
+  const buffers = CASES.map(([, value]) => encodeMsgpack(value))
+  const decoded = decodeWithReference(buffers)
+
+  assert.equal(decoded.length, CASES.length, 'each encoded value should decode to exactly one value')
+  CASES.forEach(([description, value, typeByte], i) => {
+    assert.equal(buffers[i][0], typeByte, `${description}: type byte 0x${buffers[i][0].toString(16)} != 0x${typeByte.toString(16)}`)
+    assert.deepEqual(decoded[i], JSON.parse(JSON.stringify(value) ?? 'null'), `${description}: decoded value differs from JSON`)
+  })
+  console.log(`✅ ${CASES.length} values decode to their JSON serialization`)
+}
+
+function testBufferGrowth() {
+  // Larger than the initial scratch buffer, followed by a small value that reuses it
+  const large = range(20000).map((i) => ({ id: `guest-${i}`, happiness: i / 3 }))
+  const [decodedLarge, decodedSmall] = decodeWithReference([encodeMsgpack(large), encodeMsgpack({ id: 'x' })])
+
+  assert.deepEqual(decodedLarge, JSON.parse(JSON.stringify(large)))
+  assert.deepEqual(decodedSmall, { id: 'x' })
+  console.log('✅ Values larger than the scratch buffer are encoded')
+}
+
+function testBigIntRejected() {
+  assert.throws(() => encodeMsgpack({ value: 1n }), TypeError)
+  console.log('✅ BigInt values are rejected like JSON.stringify does')
+}
+
+function runAllTests() {
+  try {
+    console.log('MessagePack Encoder Tests')
+
+    testEncodingBoundaries()
+    testBufferGrowth()
+    testBigIntRejected()
+
+    console.log('🎉 All tests completed successfully!')
+
+  } catch (error) {
+    console.error('❌ Test failed:', error.message)
+    console.error(error.stack)
+    process.exitCode = 1
+  }
+}
+
+export {
+  testEncodingBoundaries,
+  testBufferGrowth,
+  testBigIntRejected,
+  runAllTests
+}
+
+// Run tests if this file is executed directly
+if (import.meta.url === `file://${process.argv[1]}`) {
+  runAllTests()
+}
@@ -0,0 +1,75 @@
+import assert from 'node:assert/strict'
+import { execFileSync } from 'node:child_process'
+import fs from 'node:fs'
+import os from 'node:os'
+import path from 'node:path'
+import Park from '../map_backend/park.js'
+
+const DAYS = 3
+
+function runDays(park, days) {
+  for (let i = 0; i < days; i++) {
+    park.proceed({})
+  }
+}
+
+// Reads the park in a new process, like a restarted server or another worker would
+function continueInNewProcess(file) {
+  const script = `
+    import fs from 'node:fs'
+    import Park from ${JSON.stringify(new URL('../map_backend/park.js', import.meta.url).href)}
+    const park = Park.deserialize(fs.readFileSync(${JSON.stringify(file)}, 'utf8'))
+    for (let i = 0; i < ${DAYS}; i++) {
+      park.proceed({})
+    }
+    process.stdout.write(JSON.stringify(park.getFullState({})))
+  `
+  return JSON.parse(execFileSync(process.execPath, ['--input-type=module', '-e', script], { maxBuffer: 1 << 28 }))
+}
+
+function testSerializedParkContinuesInNewProcess(difficulty) {
+  const park = new Park('serialization-test')
+  park.reset({ layout: 'diagonal_squares', difficulty })
+  assert.ok(park.addRide(1, 5, 'carousel', 'yellow', 2).success)
+  runDays(park, DAYS)
+
+  const directory = fs.mkdtempSync(path.join(os.tmpdir(), 'park-serialization-'))
+  const file = path.join(directory, 'park.json')
+  try {
+    const json = park.serialize()
+    // The routing tables are rebuilt instead of being written
+    assert.ok(json.length < 1 << 20, `serialized park is ${json.length} bytes`)
+    fs.writeFileSync(file, json, 'utf8')
+    runDays(park, DAYS)
+    assert.deepEqual(continueInNewProcess(file), JSON.parse(JSON.stringify(park.getFullState({}))))
+  } finally {
+    fs.rmSync(directory, { recursive: true, force: true })
+  }
+  console.log(`✅ Parks of difficulty ${difficulty} read back in a new process continue like the original`)
+}
+
+function runAllTests() {
+  try {
+    console.log('Park Serialization Tests')
+
+    testSerializedParkContinuesInNewProcess('easy')
+    testSerializedParkContinuesInNewProcess('hard')
+
+    console.log('🎉 All tests completed successfully!')
+
+  } catch (error) {
+    console.error('❌ Test failed:', error.message)
+    console.error(error.stack)
+    process.exitCode = 1
+  }
+}
+
+export {
+  testSerializedParkContinuesInNewProcess,
+  runAllTests
+}
+
+// Run tests if this file is executed directly
+if (import.meta.url === `file://${process.argv[1]}`) {
+  runAllTests()
+}
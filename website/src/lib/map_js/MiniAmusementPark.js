@@ -326,6 +326,9 @@ export class MiniAmusementPark {
       if ((actionName === "place" || actionName === "modify") && "type" in actionArgs && actionArgs.type === "ride") {
         actionArgs.order_quantity = actionArgs.order_quantity || -1;
       }
+      if (actionName === "wait") {
+        actionArgs.days = actionArgs.days ?? 1;
+      }
 
       // Validate presence of arguments
       const actionParamsSet = new Set(Object.keys(actionArgs))